@@ -0,0 +1,112 @@
+"""
+Benchmark kompakcije arhive: datoteke re-ingestirane više puta (svaki re-ingest
+je novi file_processed s cijelim sadržajem), pa replay prije i nakon
+`compact_archive`.
+
+Replay ide kroz _replay_file_processed iz rebuild_from_archive (FTS + entiteti)
+s lokalnom zamjenom Oraclea (i Chroma kolekcije) koja embedira HashingEmbeddingFunction-om i
+simulira round-trip embedding API-ja (--latency-ms po upsert pozivu).
+
+    python -m benchmarks.bench_archive_compact --files 200 --edits 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from src.modules.librarian import Librarian
+from src.rebuild_from_archive import _replay_file_processed
+from src.utils.archive_writer import close_all_writers
+from src.utils.embedding_cache import HashingEmbeddingFunction
+from src.utils.event_archive import compact_archive, iter_events, migrate_archive
+from src.utils.metadata_helper import entity_key
+
+
+class SimulatedOracle:
+    def __init__(self, latency):
+        self.latency = latency
+        self.embed = HashingEmbeddingFunction()
+
+    def safe_upsert(self, documents, metadatas, ids):
+        time.sleep(self.latency)
+        self.embed(documents)
+
+    # Librarian entitete upsertira u istu (simuliranu) kolekciju
+    def upsert(self, ids, documents, metadatas):
+        self.safe_upsert(documents, metadatas, ids)
+
+    def delete(self, ids=None, where=None):
+        pass
+
+
+def write_history(lib, files, edits, chunks):
+    # Replay bilježi mtime izvorne datoteke, pa moraju postojati
+    os.makedirs(os.path.join(lib.data_path, "docs"))
+    for f in range(files):
+        open(os.path.join(lib.data_path, "docs", f"doc_{f}.md"), "w").close()
+    for edit in range(edits):
+        for f in range(files):
+            source = os.path.join(lib.data_path, "docs", f"doc_{f}.md")
+            body = [f"Dokument {f}, verzija {edit}, odlomak {c}. " + "tekst " * 60 for c in range(chunks)]
+            lib.log_event("file_processed", {
+                "chunks": body,
+                "metadata": {"source": source, "project": "bench"},
+                "entities": {"decisions": [{"content": f"Odluka {f}.{edit}"}]},
+            })
+        # Ratifikacija s referencom (Librarian.entity_ref), kao što je bilježi ratify_decision
+        f = edit % files
+        ref = {"file_path": os.path.join(lib.data_path, "docs", f"doc_{f}.md"), "project": "bench",
+               "type": "decision", "key": entity_key("decision", f"Odluka {f}.{edit}")[1], "n": 0}
+        lib.log_event("decision_ratified", {"decision_id": edit + 1, "decision_ref": ref,
+                                            "updates": {"valid_from": "2025-01-01"}})
+    close_all_writers(lib.data_path)
+    migrate_archive(lib.archive_path)
+
+
+def replay(lib, oracle):
+    lib.wipe_all(keep_archive=True)
+    lib._collection = oracle
+    start = time.perf_counter()
+    events = 0
+    for record in iter_events(lib.archive_path):
+        if record.get("event") == "file_processed":
+            _replay_file_processed(lib, oracle, record["data"])
+        events += 1
+    return time.perf_counter() - start, events
+
+
+def run(files, edits, chunks, latency_ms):
+    with tempfile.TemporaryDirectory(dir=ROOT) as tmp:
+        lib = Librarian(tmp)
+        oracle = SimulatedOracle(latency_ms / 1000)
+        write_history(lib, files, edits, chunks)
+        print(f"Datoteka: {files} x {edits} re-ingesta, {chunks} chunkova | latencija {latency_ms} ms")
+
+        before_s, before_events = replay(lib, oracle)
+        start = time.perf_counter()
+        stats = compact_archive(lib.archive_path)
+        compact_s = time.perf_counter() - start
+        after_s, after_events = replay(lib, oracle)
+
+        print(f"  kompakcija        {compact_s:7.2f} s")
+        print(f"  događaja          {before_events:7d} -> {after_events}")
+        print(f"  sirovo            {stats['raw_bytes_before'] / 1048576:7.2f} MB -> "
+              f"{stats['raw_bytes_after'] / 1048576:.2f} MB")
+        print(f"  gzip              {stats['compressed_bytes_before'] / 1048576:7.2f} MB -> "
+              f"{stats['compressed_bytes_after'] / 1048576:.2f} MB")
+        print(f"  replay            {before_s:7.2f} s -> {after_s:.2f} s ({before_s / after_s:.1f}x)")
+        close_all_writers(lib.data_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay arhive prije i nakon kompakcije")
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--edits", type=int, default=20)
+    parser.add_argument("--chunks", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    run(args.files, args.edits, args.chunks, args.latency_ms)
@@ -0,0 +1,85 @@
+"""
+Offline benchmark za CachedEmbeddingFunction.
+
+Koristi lokalni HashingEmbeddingFunction uz simuliranu mrežnu latenciju,
+tako da se može pokrenuti bez GEMINI_API_KEY:
+
+    python -m benchmarks.bench_embedding_cache --queries 2000 --latency-ms 80
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.utils.embedding_cache import CachedEmbeddingFunction, EmbeddingStore, HashingEmbeddingFunction
+
+
+class SimulatedRemoteEmbedder(HashingEmbeddingFunction):
+    """Hashing embedder s latencijom jednog mrežnog poziva."""
+
+    def __init__(self, dim, latency_ms):
+        super().__init__(dim=dim)
+        self.latency = latency_ms / 1000.0
+
+    def __call__(self, input):
+        time.sleep(self.latency)
+        return super().__call__(input)
+
+
+def zipf_queries(vocabulary, n, s=1.1, seed=42):
+    rng = random.Random(seed)
+    weights = [1.0 / (rank ** s) for rank in range(1, len(vocabulary) + 1)]
+    return rng.choices(vocabulary, weights=weights, k=n)
+
+
+def run(queries, distinct, dim, latency_ms):
+    vocabulary = [f"Kako radi komponenta {i} u Kronosu?" for i in range(distinct)]
+    workload = zipf_queries(vocabulary, queries)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "embeddings.db")
+
+        # 1. Bez cachea
+        raw = SimulatedRemoteEmbedder(dim, latency_ms)
+        start = time.perf_counter()
+        for q in workload:
+            raw([q])
+        uncached = time.perf_counter() - start
+
+        # 2. Hladni cache (prvi prolaz)
+        inner = SimulatedRemoteEmbedder(dim, latency_ms)
+        cached = CachedEmbeddingFunction(inner, "local-bench", EmbeddingStore(db_path))
+        start = time.perf_counter()
+        for q in workload:
+            cached([q])
+        cold = time.perf_counter() - start
+
+        # 3. Topli cache nakon "restarta" (nova instanca, ista datoteka)
+        inner_warm = SimulatedRemoteEmbedder(dim, latency_ms)
+        warm_fn = CachedEmbeddingFunction(inner_warm, "local-bench", EmbeddingStore(db_path))
+        start = time.perf_counter()
+        for q in workload:
+            warm_fn([q])
+        warm = time.perf_counter() - start
+
+        size_kb = os.path.getsize(db_path) / 1024
+
+    print(f"Queries: {queries} | distinct: {distinct} | dim: {dim} | latency: {latency_ms}ms")
+    print(f"  uncached:   {uncached:8.2f}s  ({raw.calls} remote calls)")
+    print(f"  cold cache: {cold:8.2f}s  ({inner.calls} remote calls, hit rate {cached.hits / queries:.1%})")
+    print(f"  warm cache: {warm:8.2f}s  ({inner_warm.calls} remote calls, hit rate {warm_fn.hits / queries:.1%})")
+    print(f"  store size: {size_kb:.0f} KB (float16: {dim * 2} B/vector vs float32: {dim * 4} B/vector)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--distinct", type=int, default=300)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+    run(args.queries, args.distinct, args.dim, args.latency_ms)
@@ -0,0 +1,76 @@
+"""
+Benchmark indeksiranja entiteta: stari obrazac (jedan upsert po entitetu)
+naspram Librarian._index_entities (batch upsert preko keširanog handlea).
+
+Kolekcija je lokalna zamjena koja embedira dokumente HashingEmbeddingFunction-om
+i simulira round-trip embedding API-ja (--latency-ms po pozivu), pa rezultat
+ne ovisi o mreži ni o instaliranom Chroma modelu.
+
+    python -m benchmarks.bench_entity_index --entities 5000 --latency-ms 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from src.modules.librarian import Librarian
+from src.utils.embedding_cache import HashingEmbeddingFunction
+
+
+class SimulatedCollection:
+    def __init__(self, latency):
+        self.latency = latency
+        self.embed = HashingEmbeddingFunction()
+        self.calls = 0
+
+    def upsert(self, ids, documents, metadatas):
+        self.calls += 1
+        time.sleep(self.latency)
+        self.embed(documents)
+
+
+def make_items(n):
+    types = ("problem", "solution", "decision", "task")
+    return [
+        (i + 1, types[i % 4], f"Entitet {i}: odluka o indeksiranju i pretrazi dokumentacije.",
+         "bench", os.path.join(ROOT, "docs", f"file_{i // 40}.md"))
+        for i in range(n)
+    ]
+
+
+def run(entities, latency_ms, batch_size):
+    items = make_items(entities)
+    print(f"Entities: {entities} | latency/call: {latency_ms} ms | batch: {batch_size}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        lib = Librarian(tmp)
+        lib._collection = SimulatedCollection(latency_ms / 1000)
+
+        start = time.perf_counter()
+        for item in items:
+            lib._index_entities([item])
+        single = time.perf_counter() - start
+        single_calls = lib._collection.calls
+
+        lib._collection = SimulatedCollection(latency_ms / 1000)
+        start = time.perf_counter()
+        lib._index_entities(items, batch_size=batch_size)
+        batched = time.perf_counter() - start
+        batched_calls = lib._collection.calls
+
+    print(f"  per-entity (prije)  {single:8.2f}s  {entities / single:10.0f} entiteta/s  ({single_calls} upsert poziva)")
+    print(f"  batch               {batched:8.2f}s  {entities / batched:10.0f} entiteta/s  ({batched_calls} upsert poziva)")
+    print(f"  ubrzanje: {single / batched:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-entity vs batch indeksiranje entiteta")
+    parser.add_argument("--entities", type=int, default=5000)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+    run(args.entities, args.latency_ms, args.batch_size)
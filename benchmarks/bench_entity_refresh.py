@@ -0,0 +1,76 @@
+"""
+Benchmark re-ingesta entiteta: prvi store_extracted_data po datoteci naspram
+ponovnog s istim entitetima (diff po tip + hash sadržaja) i s jednim
+promijenjenim entitetom po datoteci.
+
+Kolekcija je lokalna zamjena koja embedira HashingEmbeddingFunction-om i
+simulira round-trip embedding API-ja (--latency-ms po upsert pozivu).
+
+    python -m benchmarks.bench_entity_refresh --files 200 --entities 40
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from src.modules.librarian import Librarian
+from src.utils.embedding_cache import HashingEmbeddingFunction
+
+
+class SimulatedCollection:
+    def __init__(self, latency):
+        self.latency = latency
+        self.embed = HashingEmbeddingFunction()
+        self.embedded = 0
+
+    def upsert(self, ids, documents, metadatas):
+        time.sleep(self.latency)
+        self.embed(documents)
+        self.embedded += len(documents)
+
+    def delete(self, ids=None, where=None):
+        pass
+
+
+def make_data(file_no, entities, revision=0):
+    per_type = max(entities // 4, 1)
+    data = {
+        "problems": [f"Datoteka {file_no}: problem {i}" for i in range(per_type)],
+        "solutions": [f"Datoteka {file_no}: rješenje {i}" for i in range(per_type)],
+        "decisions": [{"content": f"Datoteka {file_no}: odluka {i}", "valid_from": "2024-01-01"}
+                      for i in range(per_type)],
+        "tasks": [{"status": "todo", "content": f"Datoteka {file_no}: zadatak {i}"} for i in range(per_type)],
+    }
+    if revision:
+        data["problems"][0] = f"Datoteka {file_no}: problem 0 (revizija {revision})"
+    return data
+
+
+def run(files, entities, latency_ms):
+    paths = [os.path.join(ROOT, "docs", f"bench_{i}.md") for i in range(files)]
+    print(f"Files: {files} | entities/file: {entities} | latency/upsert: {latency_ms} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        lib = Librarian(tmp)
+        rounds = (("prvi ingest", 0), ("re-ingest bez promjena", 0), ("re-ingest, 1 promjena/datoteci", 1))
+        for label, revision in rounds:
+            lib._collection = SimulatedCollection(latency_ms / 1000)
+            start = time.perf_counter()
+            for i, path in enumerate(paths):
+                lib.store_extracted_data(path, make_data(i, entities, revision), project="bench")
+            duration = time.perf_counter() - start
+            print(f"  {label:32s} {duration:8.2f}s  {files / duration:8.0f} datoteka/s  "
+                  f"embedirano: {lib._collection.embedded}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Diff-based re-ingest entiteta")
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--entities", type=int, default=40)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+    run(args.files, args.entities, args.latency_ms)
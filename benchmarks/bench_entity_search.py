@@ -0,0 +1,91 @@
+"""
+Benchmark pretrage entiteta: LIKE '%q%' (puno skeniranje tablice) naspram
+FTS5 indeksa entities_fts (bm25) koji koristi Librarian.search_entities.
+
+    python -m benchmarks.bench_entity_search --entities 100000 --queries 200
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.modules.librarian import Librarian
+
+BASE = [
+    "sqlite", "indeks", "cache", "embedding", "odluka", "arhiva", "pretraga", "chroma",
+    "worker", "ingest", "stemmer", "projekt", "konekcija", "transakcija", "latencija",
+    "memorija", "server", "upit", "vektor", "dokument", "generacija", "lock", "batch",
+]
+# Zipf vokabular: nekoliko vrlo čestih riječi i dugi rep
+WORDS = BASE + [f"{w}{n}" for n in range(100) for w in BASE]
+WEIGHTS = [1.0 / (rank ** 1.1) for rank in range(1, len(WORDS) + 1)]
+
+
+def populate(lib, count, seed=7):
+    rng = random.Random(seed)
+    types = ["decision", "problem", "solution", "task"]
+    rows = []
+    for i in range(count):
+        content = " ".join(rng.choices(WORDS, weights=WEIGHTS, k=12)) + f" entitet{i}"
+        rows.append((f"docs/file_{i % 500}.md", f"projekt{i % 5}", types[i % 4], content, "2025-01-01"))
+    conn = lib._get_sqlite_conn()
+    with conn:
+        conn.executemany(
+            "INSERT INTO entities (file_path, project, type, content, created_at) VALUES (?, ?, ?, ?, ?)", rows
+        )
+    conn.close()
+
+
+def like_search(lib, query, etype=None, project=None, limit=5):
+    conn = lib._get_sqlite_conn()
+    sql = "SELECT id, file_path, project, type, content, created_at FROM entities WHERE content LIKE ?"
+    params = [f"%{query}%"]
+    if etype:
+        sql += " AND type = ?"
+        params.append(etype)
+    if project:
+        sql += " AND project = ?"
+        params.append(project)
+    sql += " ORDER BY created_at DESC LIMIT ?"
+    params.append(limit)
+    rows = conn.execute(sql, params).fetchall()
+    conn.close()
+    return rows
+
+
+def run(entities, queries):
+    rng = random.Random(11)
+    workloads = {
+        "rijedak token": [(f"entitet{rng.randrange(entities)}", rng.choice([None, "decision"]),
+                           rng.choice([None, "projekt1"])) for _ in range(queries)],
+        "srednji token": [(rng.choice(WORDS[200:1000]), rng.choice([None, "decision"]),
+                           rng.choice([None, "projekt1"])) for _ in range(queries)],
+        "najčešći token": [(rng.choice(WORDS[:5]), rng.choice([None, "decision"]),
+                            rng.choice([None, "projekt1"])) for _ in range(queries)],
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        lib = Librarian(tmp)
+        start = time.perf_counter()
+        populate(lib, entities)
+        print(f"Entities: {entities} (insert + FTS triggeri: {time.perf_counter() - start:.1f}s) | queries: {queries}")
+
+        for name, workload in workloads.items():
+            for label, fn in (("LIKE '%q%'", lambda q, **kw: like_search(lib, q, **kw)),
+                              ("FTS5 bm25", lib.search_entities)):
+                start = time.perf_counter()
+                for q, etype, project in workload:
+                    fn(q, etype=etype, project=project)
+                duration = time.perf_counter() - start
+                print(f"  {name:15s} {label:12s} {duration / queries * 1000:8.2f} ms/query")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entities", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    run(args.entities, args.queries)
@@ -0,0 +1,246 @@
+"""
+Benchmark FastPath-a: warmup nad --entities entiteta i paralelna pretraga
+iz --threads threadova.
+
+Warmup: puni warmup (SQLite + Python indeksi + Rust engine). Ako je
+kronos_core izgrađen, Rust dio se mjeri i zasebno: insert po ključu (stari
+način, FFI poziv po ključu) naspram jednog insert_many poziva.
+
+Memorija: stari Python indeks (dict exact + dict-of-dicts trie s dokumentom
+po čvoru) naspram CompactIndex-a (sortirani ključevi u blobu, dokumenti
+jednom u areni), mjereno tracemallocom, te bajtovi po ključu iz stats().
+
+Hladni start: puni warmup naspram start() iz snapshota
+(data/cache/fastpath.idx, mmap) do prvog odgovora brze staze.
+
+Pretraga: isti upiti kroz staru shemu (Python ReadWriteLock oko svake
+pretrage) i novu (snapshot bez Python locka; Rust pretražuje bez GIL-a).
+
+    python -m benchmarks.bench_fast_path --entities 100000 --threads 16
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import warnings
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from src.modules.fast_path import FastPath
+from src.modules.librarian import Librarian
+from src.utils.rwlock import ReadWriteLock
+
+WORDS = ["replikacija", "baza", "indeks", "upit", "migracija", "backup", "latencija",
+         "cache", "shema", "particija", "klaster", "monitoring", "deploy", "rollback"]
+
+
+def fill(lib, entities, rng):
+    rows = []
+    for i in range(entities):
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 8)))
+        if i % 50 == 0:
+            text = f"kontakt osoba{i}@example.com"
+        rows.append((f"projekt{i % 20}", rng.choice(["decision", "problem", "task"]), f"T{i:06d} {text}"))
+    conn = lib._get_sqlite_conn()
+    with conn:
+        conn.executemany("INSERT INTO entities (project, type, content) VALUES (?, ?, ?)", rows)
+        conn.executemany("INSERT INTO files (path, project) VALUES (?, ?)",
+                         [(f"docs/{p}.md", f"projekt{p}") for p in range(20)])
+    conn.close()
+    return rows
+
+
+class LegacyPrefixTrie:
+    """Stari Python trie: čvor (dict) po znaku, dokumenti u svakom čvoru."""
+
+    def __init__(self):
+        self.root = {"docs": [], "children": {}}
+
+    def insert(self, key, document):
+        node = self.root
+        for char in key.lower():
+            if char not in node["children"]:
+                node["children"][char] = {"docs": [], "children": {}}
+            node = node["children"][char]
+        if len(node["docs"]) < 10:
+            node["docs"].append(document)
+
+
+def legacy_index(rows):
+    exact, trie = {}, LegacyPrefixTrie()
+    for etype, content, path, project in rows:
+        doc = {"content": content, "metadata": {"source": path, "project": project, "type": etype}, "score": 1.0}
+        if len(content) < 100:
+            exact[content.lower().strip()] = doc
+        for word in content.split():
+            word_clean = word.lower().strip().strip(".,!?\"'()")
+            if len(word_clean) > 2:
+                trie.insert(word_clean, doc)
+        if "@" in content:
+            trie.insert(content.lower().strip(), doc)
+    return exact, trie
+
+
+def bench_memory(lib, entities):
+    conn = lib._get_sqlite_conn()
+    rows = conn.execute("SELECT type, content, file_path, project FROM entities LIMIT ?", (entities,)).fetchall()
+    conn.close()
+
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    legacy = legacy_index(rows)
+    legacy_bytes = tracemalloc.get_traced_memory()[0] - base
+    del legacy
+    fp = FastPath(lib)
+    fp.ENTITY_LIMIT = entities
+    fp._rust_cls = None
+    base = tracemalloc.get_traced_memory()[0]
+    with contextlib.redirect_stdout(io.StringIO()):
+        fp.warmup()
+    compact_bytes = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+
+    stats = fp.index.stats()
+    print(f"  stari Python indeks      {legacy_bytes / 1048576:7.1f} MB")
+    print(f"  CompactIndex             {compact_bytes / 1048576:7.1f} MB  ({legacy_bytes / compact_bytes:.1f}x manje, "
+          f"{stats['keys']} ključeva, {stats['bytes_per_key']} B/ključ)")
+
+    queries = [w[:4] for w in WORDS] + ["t0001", "t05", "kontakt", "osoba1"]
+    start = time.perf_counter()
+    for _ in range(200):
+        for q in queries:
+            fp.index.search_prefix(q)
+    per_query = (time.perf_counter() - start) / (200 * len(queries))
+    print(f"  prefiks pretraga         {per_query * 1e6:7.1f} µs/upit")
+
+
+def bench_start(lib, entities, query):
+    fp = FastPath(lib)
+    fp.ENTITY_LIMIT = entities
+    fp._rust_cls = None
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fp.warmup()
+        assert fp.search(query)
+    cold = time.perf_counter() - start
+    size = os.path.getsize(fp.snapshot_path)
+
+    fp = FastPath(lib)
+    fp.ENTITY_LIMIT = entities
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fp.start()
+        assert fp.source == "snapshot" and fp.search(query)
+    warm = time.perf_counter() - start
+    print(f"  start: warmup            {cold * 1e3:7.1f} ms")
+    print(f"  start: mmap snapshot     {warm * 1e3:7.1f} ms  ({cold / warm:.0f}x, {size / 1048576:.1f} MB datoteka)")
+
+
+class Recorder:
+    """Zamjena Rust klase koja samo bilježi parove iz warmupa."""
+    items = []
+
+    def insert_many(self, items):
+        Recorder.items = items
+        return len(items)
+
+
+def bench_warmup(lib, entities):
+    fp = FastPath(lib)
+    fp.ENTITY_LIMIT = entities
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fp.warmup()
+    print(f"  warmup ({'Rust' if fp.rust_engine else 'Python'} engine)   {time.perf_counter() - start:7.2f} s")
+
+    rust_cls = fp._rust_cls
+    if rust_cls is None:
+        print("  kronos_core nije izgrađen (src/modules/kronos_core) - preskačem insert vs insert_many")
+        return fp
+    probe = FastPath(lib)
+    probe.ENTITY_LIMIT = entities
+    probe._rust_cls = Recorder
+    with contextlib.redirect_stdout(io.StringIO()):
+        probe.warmup()
+    items = Recorder.items
+
+    engine = rust_cls()
+    start = time.perf_counter()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)  # insert je zastario, mjeri se namjerno
+        for key, content in items:
+            engine.insert(key, content)
+    per_key = time.perf_counter() - start
+    engine = rust_cls()
+    start = time.perf_counter()
+    engine.insert_many(items)
+    bulk = time.perf_counter() - start
+    print(f"  Rust insert po ključu    {per_key:7.3f} s  ({len(items)} ključeva)")
+    print(f"  Rust insert_many         {bulk:7.3f} s  ({per_key / bulk:.1f}x)")
+    return fp
+
+
+def bench_search(fp, queries, threads, seconds):
+    lock = ReadWriteLock()
+
+    def old_search(query):
+        with lock.read_lock():
+            return fp.search(query)
+
+    for label, fn in (("Python read lock (staro)", old_search), ("bez Python locka", fp.search)):
+        for n in sorted({1, threads}):
+            counts = [0] * n
+            stop = threading.Event()
+
+            def worker(idx):
+                rng = random.Random(idx)
+                while not stop.is_set():
+                    fn(rng.choice(queries))
+                    counts[idx] += 1
+
+            pool = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+            with contextlib.redirect_stdout(io.StringIO()):
+                for t in pool:
+                    t.start()
+                time.sleep(seconds)
+                stop.set()
+                for t in pool:
+                    t.join()
+            total = sum(counts)
+            print(f"  {label:26s} {n:2d} thr  {total / seconds:9.0f} upita/s  "
+                  f"({seconds * 1e6 * n / max(total, 1):6.1f} µs/upit po threadu)")
+
+
+def run(entities, threads, seconds):
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory(dir=ROOT) as tmp:
+        lib = Librarian(tmp)
+        rows = fill(lib, entities, rng)
+        print(f"Entiteta: {entities} | threadova: {threads} | jezgri: {os.cpu_count()}")
+        fp = bench_warmup(lib, entities)
+        bench_memory(lib, entities)
+        bench_start(lib, entities, rows[1][2].lower())
+        if fp.rust_engine is not None:
+            stats = fp.stats()
+            print(f"  Rust indeks              {stats['bytes'] / 1048576:7.1f} MB  "
+                  f"({stats['keys']} ključeva, {stats['bytes_per_key']} B/ključ)")
+
+        queries = [content.lower() for _, _, content in rng.sample(rows, 200)]
+        queries += [w[:4] for w in WORDS] + [f"nepostoji{i}" for i in range(100)]
+        bench_search(fp, queries, threads, seconds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FastPath warmup i paralelna pretraga")
+    parser.add_argument("--entities", type=int, default=100_000)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+    run(args.entities, args.threads, args.seconds)
@@ -0,0 +1,68 @@
+"""
+Benchmark FTS upisa: stari obrazac (delete_fts + store_fts po chunku, svaki
+s vlastitom konekcijom i commitom) naspram Librarian.replace_file_chunks
+(jedna transakcija i executemany po datoteci).
+
+    python -m benchmarks.bench_fts_writes --files 50 --chunks 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.modules.librarian import Librarian
+from src.utils.stemmer import stem_text
+
+
+def make_files(files, chunks):
+    data = {}
+    for f in range(files):
+        rows = []
+        for c in range(chunks):
+            content = f"Datoteka {f}, chunk {c}: indeksiranje dokumentacije i pretraživanje odluka."
+            rows.append({
+                "content": content,
+                "stemmed": stem_text(content, mode="aggressive"),
+                "start_line": c * 10 + 1,
+                "end_line": c * 10 + 10,
+            })
+        data[f"docs/file_{f}.md"] = rows
+    return data
+
+
+def per_chunk(lib, data):
+    for path, rows in data.items():
+        lib.delete_fts(path)
+        for row in rows:
+            lib.store_fts(path, row["content"], row["stemmed"], project="bench",
+                          start_line=row["start_line"], end_line=row["end_line"])
+
+
+def bulk(lib, data):
+    for path, rows in data.items():
+        lib.replace_file_chunks(path, "bench", rows)
+
+
+def run(files, chunks):
+    data = make_files(files, chunks)
+    total_rows = files * chunks
+    print(f"Files: {files} | chunks/file: {chunks} | rows: {total_rows}")
+
+    for label, fn in (("per-chunk (prije)", per_chunk), ("replace_file_chunks", bulk)):
+        with tempfile.TemporaryDirectory() as tmp:
+            lib = Librarian(tmp)
+            start = time.perf_counter()
+            fn(lib, data)
+            duration = time.perf_counter() - start
+            print(f"  {label:22s} {duration:8.2f}s  {total_rows / duration:10.0f} rows/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=50)
+    parser.add_argument("--chunks", type=int, default=200)
+    args = parser.parse_args()
+    run(args.files, args.chunks)
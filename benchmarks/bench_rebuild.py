@@ -0,0 +1,111 @@
+"""
+Benchmark rebuilda iz arhive: stari replay (događaj po događaj kroz
+_replay_file_processed: FTS transakcija, upsert chunkova i upsert entiteta po
+datoteci) naspram batch enginea (rebuild) s dekodiranjem/stemiranjem u
+process poolu.
+
+Oracle i Chroma kolekcija su lokalne zamjene koje embediraju
+HashingEmbeddingFunction-om i simuliraju round-trip embedding API-ja
+(--latency-ms po upsert pozivu).
+
+    python -m benchmarks.bench_rebuild --files 500 --chunks 8 --jobs 1 2 4
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from src.modules.librarian import Librarian
+from src.rebuild_from_archive import _replay_file_processed, rebuild
+from src.utils.archive_writer import close_all_writers
+from src.utils.embedding_cache import HashingEmbeddingFunction
+from src.utils.event_archive import iter_events, migrate_archive
+
+
+class SimulatedOracle:
+    def __init__(self, latency):
+        self.latency = latency
+        self.embed = HashingEmbeddingFunction()
+        self.calls = 0
+
+    def safe_upsert(self, documents, metadatas, ids):
+        self.calls += 1
+        time.sleep(self.latency)
+        self.embed(documents)
+
+    def sync_chunks_many(self, project, files):
+        self.safe_upsert([doc for _, docs, _, _ in files for doc in docs], None, None)
+
+    # Librarian entitete upsertira u istu (simuliranu) kolekciju
+    def upsert(self, ids, documents, metadatas):
+        self.safe_upsert(documents, metadatas, ids)
+
+    def delete(self, ids=None, where=None):
+        pass
+
+
+def write_archive(lib, files, chunks):
+    os.makedirs(os.path.join(lib.data_path, "docs"))
+    for f in range(files):
+        source = os.path.join(lib.data_path, "docs", f"doc_{f}.md")
+        open(source, "w").close()
+        body = [{"content": f"Dokument {f}, odlomak {c}. Odlučili smo koristiti replikaciju baze "
+                            f"i pratiti performanse upita. " * 12, "start_line": c * 20 + 1, "end_line": c * 20 + 20}
+                for c in range(chunks)]
+        lib.log_event("file_processed", {
+            "chunks": body,
+            "metadata": {"source": source, "project": "bench"},
+            "entities": {"decisions": [f"Odluka {f}"], "problems": [f"Problem {f}"]},
+        })
+    close_all_writers(lib.data_path)
+    migrate_archive(lib.archive_path)
+
+
+def old_replay(lib, oracle):
+    lib.wipe_all(keep_archive=True)
+    lib._collection = oracle
+    start = time.perf_counter()
+    for record in iter_events(lib.archive_path):
+        if record.get("event") == "file_processed":
+            _replay_file_processed(lib, oracle, record["data"])
+    return time.perf_counter() - start
+
+
+def run(files, chunks, jobs_list, latency_ms):
+    with tempfile.TemporaryDirectory(dir=ROOT) as tmp:
+        lib = Librarian(tmp)
+        oracle = SimulatedOracle(latency_ms / 1000)
+        lib._get_collection = lambda: lib._collection or oracle
+        write_archive(lib, files, chunks)
+        print(f"Datoteka: {files}, {chunks} chunkova po datoteci | latencija {latency_ms} ms | "
+              f"jezgri: {os.cpu_count()}")
+
+        oracle.calls = 0
+        with contextlib.redirect_stdout(io.StringIO()):
+            old_s = old_replay(lib, oracle)
+        print(f"  stari replay         {old_s:7.2f} s  ({files / old_s:6.0f} datoteka/s, {oracle.calls} upserta)")
+
+        for jobs in jobs_list:
+            oracle.calls = 0
+            with contextlib.redirect_stdout(io.StringIO()):
+                stats = rebuild(jobs=jobs, lib=lib, oracle=oracle)
+            new_s = stats["seconds"]
+            print(f"  batch engine j={jobs:<2d}   {new_s:7.2f} s  ({files / new_s:6.0f} datoteka/s, "
+                  f"{oracle.calls} upserta, {old_s / new_s:.1f}x)")
+        close_all_writers(lib.data_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stari replay vs batch rebuild engine")
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--chunks", type=int, default=8)
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    args = parser.parse_args()
+    run(args.files, args.chunks, args.jobs, args.latency_ms)
@@ -0,0 +1,71 @@
+"""
+Benchmark re-ingesta nepromijenjenog repozitorija.
+
+Generira sintetički repo, ingestira ga dvaput (drugi put kao "nakon restarta",
+nova Ingestor instanca) i broji tekstove poslane embedding funkciji.
+Sa stabilnim chunk ID-jevima drugi prolaz mora imati 0 embedding poziva.
+
+    python -m benchmarks.bench_reingest --files 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def make_repo(root, files, paragraphs):
+    os.makedirs(root, exist_ok=True)
+    for i in range(files):
+        with open(os.path.join(root, f"modul_{i}.md"), "w", encoding="utf-8") as f:
+            f.write(f"# Modul {i}\n\n")
+            for p in range(paragraphs):
+                f.write(f"## Sekcija {p}\nModul {i} koristi komponentu {p} za obradu upita i indeksiranje.\n" * 8)
+                f.write("\n")
+
+
+def run(files, paragraphs):
+    with tempfile.TemporaryDirectory() as tmp:
+        # Putanje u tmp moraju proći is_safe_path; env se čita pri importu
+        os.environ["KRONOS_ALLOWED_ROOTS"] = tmp
+        os.environ["KRONOS_EMBEDDER"] = "local"
+        os.environ["KRONOS_EMBED_CACHE"] = "0"  # mjerimo ID-jeve, ne cache embeddinga
+        os.chdir(tmp)
+
+        from src.utils import embedding_cache
+        from src.modules.ingestor import Ingestor
+
+        embedded = {"texts": 0}
+        original_call = embedding_cache.HashingEmbeddingFunction.__call__
+
+        def counting_call(self, input):
+            embedded["texts"] += len(input)
+            return original_call(self, input)
+
+        embedding_cache.HashingEmbeddingFunction.__call__ = counting_call
+
+        repo = os.path.join(tmp, "repo")
+        data = os.path.join(tmp, "data")
+        make_repo(repo, files, paragraphs)
+        os.makedirs(data, exist_ok=True)
+
+        for label in ("prvi ingest", "re-ingest (nepromijenjeno)"):
+            embedded["texts"] = 0
+            ingestor = Ingestor(db_path=data)
+            ingestor.oracle.librarian = ingestor.librarian
+            start = time.perf_counter()
+            ingestor.run(repo, project_name="bench", recursive=True, silent=True)
+            duration = time.perf_counter() - start
+            total = ingestor.oracle.collection.count()
+            print(f"  {label:28s} {duration:7.2f}s  embedirano: {embedded['texts']:6d}  vektora u kolekciji: {total}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--paragraphs", type=int, default=6)
+    args = parser.parse_args()
+    print(f"Files: {args.files} | paragraphs/file: {args.paragraphs}")
+    run(args.files, args.paragraphs)
@@ -0,0 +1,76 @@
+"""
+Benchmark overheada SQLite konekcija po upitu.
+
+Uspoređuje stari obrazac (sqlite3.connect + PRAGMA journal_mode=WAL + close
+pri svakom pozivu) s keširanim konekcijama iz src.utils.sqlite_pool na
+tipičnom nizu Librarian poziva jednog /query zahtjeva.
+
+    python -m benchmarks.bench_sqlite_pool --queries 2000
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.modules.librarian import Librarian
+from src.utils.stemmer import stem_text
+
+
+def legacy_conn(self):
+    conn = sqlite3.connect(self.meta_path, timeout=30)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+    except sqlite3.Error:
+        pass
+    return conn
+
+
+def one_query(lib, q):
+    # Otprilike ono što Oracle.ask radi prema SQLite-u
+    lib.get_generation()
+    stemmed = stem_text(q)
+    lib.search_fts(stemmed, limit=5)
+    lib.search_fts(stemmed, limit=5, mode="or")
+    lib.search_entities(q, limit=3)
+
+
+def run(queries, rows):
+    with tempfile.TemporaryDirectory() as tmp:
+        lib = Librarian(tmp)
+        lib.replace_fts_many([(
+            f"docs/file_{i}.md", "bench",
+            [(f"Dokument {i} o indeksiranju i pretrazi", stem_text(f"Dokument {i} o indeksiranju i pretrazi"), 1, 5)]
+        ) for i in range(rows)])
+        words = ["indeksiranje", "pretraga", "dokument", "kronos", "odluka"]
+        workload = [f"{words[i % 5]} {i}" for i in range(queries)]
+
+        # Tišina: search_fts logira debug poruke
+        import logging
+        logging.getLogger("Kronos").setLevel(logging.WARNING)
+
+        results = {}
+        for label, getter in (("fresh connect", legacy_conn), ("pooled", Librarian._get_sqlite_conn)):
+            Librarian._get_sqlite_conn, original = getter, Librarian._get_sqlite_conn
+            try:
+                start = time.perf_counter()
+                for q in workload:
+                    one_query(lib, q)
+                results[label] = time.perf_counter() - start
+            finally:
+                Librarian._get_sqlite_conn = original
+
+    print(f"Queries: {queries} | FTS rows: {rows}")
+    for label, duration in results.items():
+        print(f"  {label:14s} {duration:7.2f}s  {duration / queries * 1e6:8.0f} µs/query")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--rows", type=int, default=5000)
+    args = parser.parse_args()
+    run(args.queries, args.rows)
@@ -0,0 +1,125 @@
+"""
+Benchmark stemmera na razini ingesta: stem_text nad chunkovima iz
+dokumentacije repozitorija (Markdown datoteke, ponovljene do --words riječi).
+
+Uspoređuje izvorni linearni prolaz (endswith po cijeloj listi sufiksa u
+svakom prolazu petlje) s tablicama po duljini sufiksa, bez cachea i s LRU
+cacheom (hladni i topli prolaz), te s Rust `stem_text_batch` iz kronos_core
+ako je modul izgrađen.
+
+    python -m benchmarks.bench_stemmer --words 500000 --chunk-words 200
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+from src.utils import stemmer as stemmer_module
+from src.utils.stemmer import CroStemmer
+
+
+class LinearStemmer(CroStemmer):
+    """Izvorni algoritam: linearni prolaz po listi sufiksa, bez cachea."""
+
+    def stem(self, word, mode="aggressive"):
+        return self._stem_uncached(word, mode)
+
+    def stem_many(self, words, mode="aggressive"):
+        return [self._stem_uncached(word, mode) for word in words]
+
+    def _stem_uncached(self, word, mode):
+        word = ''.join(c for c in word.lower().strip() if c.isalnum())
+        if not word:
+            return word
+        if word in self.EXCEPTIONS:
+            return self.EXCEPTIONS[word]
+        suffixes = self.SUFFIXES_AGGRESSIVE if mode == "aggressive" else self.SUFFIXES_CONSERVATIVE
+        current = word
+        while True:
+            found = False
+            for suffix in suffixes:
+                if current.endswith(suffix):
+                    potential_root = current[:-len(suffix)]
+                    if self._is_suffix_strippable(suffix, potential_root, mode):
+                        current = potential_root
+                        found = True
+                        break
+            if not found:
+                break
+        for prefix in self.PREFIXES:
+            if current.startswith(prefix) and len(current) - len(prefix) >= 3:
+                current = current[len(prefix):]
+                break
+        current = self.VOICE_RULES.get(current, current)
+        if mode == "conservative":
+            current = self.LEMMA_RULES.get(current, current)
+        return current
+
+
+def load_chunks(total_words, chunk_words):
+    words = []
+    for path in sorted(glob.glob(os.path.join(ROOT, "**", "*.md"), recursive=True)):
+        if "node_modules" in path:
+            continue
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            words.extend(f.read().split())
+    if not words:
+        raise SystemExit("Nema Markdown datoteka za korpus")
+    words = (words * (total_words // len(words) + 1))[:total_words]
+    return [" ".join(words[i:i + chunk_words]) for i in range(0, len(words), chunk_words)]
+
+
+def timed(stemmer, chunks, mode):
+    start = time.perf_counter()
+    out = [stemmer.stem_text(chunk, mode) for chunk in chunks]
+    return time.perf_counter() - start, out
+
+
+def run(total_words, chunk_words, mode, cache_size):
+    chunks = load_chunks(total_words, chunk_words)
+    vocab = len({w for chunk in chunks for w in chunk.split()})
+    print(f"Riječi: {total_words}, chunkova: {len(chunks)}, vokabular: {vocab} | mod: {mode}")
+
+    linear_s, expected = timed(LinearStemmer(cache_size=0), chunks, mode)
+    print(f"  linearni prolaz      {linear_s:7.2f} s  ({total_words / linear_s:9.0f} riječi/s)")
+
+    table_s, out = timed(CroStemmer(cache_size=0), chunks, mode)
+    assert out == expected
+    print(f"  tablice, bez cachea  {table_s:7.2f} s  ({total_words / table_s:9.0f} riječi/s, "
+          f"{linear_s / table_s:.1f}x)")
+
+    cached = CroStemmer(cache_size=cache_size)
+    cold_s, out = timed(cached, chunks, mode)
+    assert out == expected
+    info = cached.cache_info(mode)
+    print(f"  tablice + LRU        {cold_s:7.2f} s  ({total_words / cold_s:9.0f} riječi/s, "
+          f"{linear_s / cold_s:.1f}x, pogoci {info.hits / max(1, info.hits + info.misses):.1%})")
+    warm_s, out = timed(cached, chunks, mode)
+    assert out == expected
+    print(f"  tablice + LRU, topli {warm_s:7.2f} s  ({total_words / warm_s:9.0f} riječi/s, "
+          f"{linear_s / warm_s:.1f}x)")
+
+    native = stemmer_module._native_stem_text_batch
+    if native is None:
+        print("  kronos_core          nije izgrađen (src/modules/kronos_core)")
+        return
+    start = time.perf_counter()
+    out = native(chunks, mode)
+    native_s = time.perf_counter() - start
+    assert out == expected
+    print(f"  kronos_core batch    {native_s:7.2f} s  ({total_words / native_s:9.0f} riječi/s, "
+          f"{linear_s / native_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Linearni stemmer vs tablice sufiksa + LRU cache")
+    parser.add_argument("--words", type=int, default=500_000)
+    parser.add_argument("--chunk-words", type=int, default=200)
+    parser.add_argument("--mode", choices=["aggressive", "conservative"], default="aggressive")
+    parser.add_argument("--cache-size", type=int, default=65536)
+    args = parser.parse_args()
+    run(args.words, args.chunk_words, args.mode, args.cache_size)
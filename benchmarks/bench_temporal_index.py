@@ -0,0 +1,107 @@
+"""
+Benchmark temporalnih upita nad odlukama: stari upiti (usporedba ISO stringova
+valid_from/valid_to) naspram R*Tree indeksa decision_validity u epoch-danima.
+
+50k odluka kroz 5 godina povijesti; svaka vrijedi od nekoliko dana do godinu
+dana, dio je otvoren (bez valid_to).
+
+    python -m benchmarks.bench_temporal_index --decisions 50000 --queries 200
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.modules.librarian import Librarian
+
+START = date(2020, 1, 1)
+DAYS = 5 * 365
+
+OLD_ACTIVE = (
+    "SELECT id, content, valid_from, valid_to, superseded_by, file_path, project FROM entities "
+    "WHERE type = 'decision' AND (valid_from IS NULL OR valid_from <= ?) AND (valid_to IS NULL OR valid_to >= ?)"
+)
+OLD_CHANGED = (
+    "SELECT id, content, valid_from, valid_to, superseded_by, file_path, project FROM entities "
+    "WHERE type = 'decision' AND ((valid_from >= ? AND valid_from <= ?) OR (valid_to >= ? AND valid_to <= ?)) "
+    "ORDER BY COALESCE(valid_from, valid_to), id"
+)
+
+
+def populate(lib, n, rng):
+    rows = []
+    for i in range(n):
+        begin = START + timedelta(days=rng.randrange(DAYS))
+        end = None if rng.random() < 0.05 else begin + timedelta(days=rng.randint(3, 365))
+        rows.append((f"docs/adr_{i % 500}.md", f"p{i % 8}", f"Odluka {i}", begin.isoformat(),
+                     end.isoformat() if end else None))
+    conn = lib._get_sqlite_conn()
+    with conn:
+        conn.executemany(
+            "INSERT INTO entities (file_path, project, type, content, valid_from, valid_to) "
+            "VALUES (?, ?, 'decision', ?, ?, ?)", rows
+        )
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+def timed(fn, args_list):
+    start = time.perf_counter()
+    total = 0
+    for args in args_list:
+        total += len(fn(*args))
+    return (time.perf_counter() - start) * 1000 / len(args_list), total
+
+
+def run(decisions, queries):
+    rng = random.Random(42)
+    dates = [(START + timedelta(days=rng.randrange(DAYS))).isoformat() for _ in range(queries)]
+    ranges = []
+    for d in dates:
+        end = date.fromisoformat(d) + timedelta(days=7)
+        ranges.append((d, end.isoformat()))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        lib = Librarian(tmp)
+        start = time.perf_counter()
+        populate(lib, decisions, rng)
+        print(f"Decisions: {decisions} (5 godina) | upita: {queries} | insert: {time.perf_counter() - start:.2f}s")
+
+        def old_active(d):
+            conn = lib._get_sqlite_conn()
+            try:
+                return conn.execute(OLD_ACTIVE, (d, d)).fetchall()
+            finally:
+                conn.close()
+
+        def old_changed(a, b):
+            conn = lib._get_sqlite_conn()
+            try:
+                return conn.execute(OLD_CHANGED, (a, b, a, b)).fetchall()
+            finally:
+                conn.close()
+
+        cases = (
+            ("aktivne na dan", old_active, lib.get_active_decisions, [(d,) for d in dates],
+             [(None, d) for d in dates]),
+            ("promijenjene u 7 dana", old_changed, lib.get_decisions_changed_between, ranges, ranges),
+        )
+        for label, old_fn, new_fn, old_args, new_args in cases:
+            old_ms, old_rows = timed(old_fn, old_args)
+            new_ms, new_rows = timed(new_fn, new_args)
+            assert old_rows == new_rows, f"{label}: {old_rows} != {new_rows}"
+            print(f"  {label:22s} string scan {old_ms:7.2f} ms  R*Tree {new_ms:7.2f} ms  "
+                  f"({old_ms / new_ms:.1f}x, prosj. {new_rows / len(new_args):.0f} redova)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="String scan vs R*Tree indeks valjanosti odluka")
+    parser.add_argument("--decisions", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    run(args.decisions, args.queries)
@@ -0,0 +1,309 @@
+//! Kompaktni indeks brze staze: umjesto čvora (Box + HashMap<char, _>) po
+//! znaku i kopije sadržaja u svakom čvoru, ključevi su sortirani u jednom
+//! bloku bajtova s u32 offsetima, a sadržaji su jednom u areni i
+//! referencirani u32 ID-evima. Exact i prefiks pretraga su binarno traženje.
+//!
+//! Između `insert_many` poziva indeks je nepromjenjiv; insert spaja postojeće
+//! i nove unose i gradi tablice iznova (warmup šalje sve ključeve odjednom).
+
+use std::cmp::Ordering;
+use std::collections::HashMap;
+use std::mem::size_of;
+
+/// Koliko sadržaja pamtimo po prefiks ključu (kao stari trie čvor).
+const MAX_CONTENTS_PER_KEY: usize = 10;
+
+/// Niz stringova u jednom bloku bajtova; `offsets` ima n + 1 elemenata.
+struct StrArena {
+    bytes: Vec<u8>,
+    offsets: Vec<u32>,
+}
+
+impl StrArena {
+    fn new() -> Self {
+        Self {
+            bytes: Vec::new(),
+            offsets: vec![0],
+        }
+    }
+
+    fn len(&self) -> usize {
+        self.offsets.len() - 1
+    }
+
+    fn push(&mut self, s: &str) {
+        self.bytes.extend_from_slice(s.as_bytes());
+        self.offsets.push(self.bytes.len() as u32);
+    }
+
+    fn bytes_at(&self, i: usize) -> &[u8] {
+        &self.bytes[self.offsets[i] as usize..self.offsets[i + 1] as usize]
+    }
+
+    fn get(&self, i: usize) -> &str {
+        // SAFETY: u arenu se upisuju samo cijeli &str, pa je svaki raspon valjan UTF-8
+        unsafe { std::str::from_utf8_unchecked(self.bytes_at(i)) }
+    }
+
+    fn shrink(&mut self) {
+        self.bytes.shrink_to_fit();
+        self.offsets.shrink_to_fit();
+    }
+
+    fn heap_bytes(&self) -> usize {
+        self.bytes.capacity() + self.offsets.capacity() * size_of::<u32>()
+    }
+}
+
+/// Sortirani jedinstveni ključevi -> ID-evi sadržaja.
+struct KeyTable {
+    keys: StrArena,
+    starts: Vec<u32>,
+    ids: Vec<u32>,
+}
+
+impl KeyTable {
+    fn build(mut entries: Vec<(String, Vec<u32>)>) -> Self {
+        entries.sort_unstable_by(|a, b| a.0.cmp(&b.0)); // String poredak = poredak UTF-8 bajtova
+        let mut table = Self {
+            keys: StrArena::new(),
+            starts: Vec::with_capacity(entries.len() + 1),
+            ids: Vec::new(),
+        };
+        table.starts.push(0);
+        for (key, ids) in &entries {
+            table.keys.push(key);
+            table.ids.extend_from_slice(ids);
+            table.starts.push(table.ids.len() as u32);
+        }
+        table.keys.shrink();
+        table.ids.shrink_to_fit();
+        table
+    }
+
+    fn len(&self) -> usize {
+        self.keys.len()
+    }
+
+    /// Indeks ključa (Ok) ili mjesto gdje bi bio (Err), kao `binary_search`.
+    fn find(&self, key: &[u8]) -> Result<usize, usize> {
+        let (mut lo, mut hi) = (0, self.len());
+        while lo < hi {
+            let mid = (lo + hi) / 2;
+            match self.keys.bytes_at(mid).cmp(key) {
+                Ordering::Less => lo = mid + 1,
+                Ordering::Greater => hi = mid,
+                Ordering::Equal => return Ok(mid),
+            }
+        }
+        Err(lo)
+    }
+
+    fn postings(&self, i: usize) -> &[u32] {
+        &self.ids[self.starts[i] as usize..self.starts[i + 1] as usize]
+    }
+
+    fn get(&self, key: &str) -> Option<&[u32]> {
+        self.find(key.as_bytes()).ok().map(|i| self.postings(i))
+    }
+
+    /// Do `limit` jedinstvenih ID-eva za ključeve s prefiksom, po redu ključeva.
+    fn prefix(&self, prefix: &str, limit: usize) -> Vec<u32> {
+        let needle = prefix.as_bytes();
+        let mut found = Vec::new();
+        let mut i = self.find(needle).unwrap_or_else(|i| i);
+        while i < self.len() && found.len() < limit && self.keys.bytes_at(i).starts_with(needle) {
+            for &id in self.postings(i) {
+                if found.len() >= limit {
+                    break;
+                }
+                if !found.contains(&id) {
+                    found.push(id);
+                }
+            }
+            i += 1;
+        }
+        found
+    }
+
+    fn entries(&self) -> impl Iterator<Item = (&str, &[u32])> {
+        (0..self.len()).map(move |i| (self.keys.get(i), self.postings(i)))
+    }
+
+    fn heap_bytes(&self) -> usize {
+        self.keys.heap_bytes() + (self.starts.capacity() + self.ids.capacity()) * size_of::<u32>()
+    }
+}
+
+fn add_prefix(prefix: &mut HashMap<String, Vec<u32>>, key: &str, id: u32) {
+    let ids = prefix.entry(key.to_owned()).or_default();
+    if ids.len() < MAX_CONTENTS_PER_KEY && !ids.contains(&id) {
+        ids.push(id);
+    }
+}
+
+pub struct CompactIndex {
+    exact: KeyTable,    // normalizirani ključ -> zadnji sadržaj
+    prefix: KeyTable,   // riječ / kratki ključ -> do MAX_CONTENTS_PER_KEY sadržaja
+    contents: StrArena, // svaki sadržaj jednom
+}
+
+pub struct IndexStats {
+    pub exact_keys: usize,
+    pub prefix_keys: usize,
+    pub contents: usize,
+    pub bytes: usize,
+}
+
+impl CompactIndex {
+    pub fn new() -> Self {
+        Self {
+            exact: KeyTable::build(Vec::new()),
+            prefix: KeyTable::build(Vec::new()),
+            contents: StrArena::new(),
+        }
+    }
+
+    pub fn len(&self) -> usize {
+        self.exact.len()
+    }
+
+    pub fn insert_many<'a, I>(&mut self, items: I)
+    where
+        I: IntoIterator<Item = (&'a str, &'a str)>,
+    {
+        // Privremene mape za spajanje; nakon izgradnje ostaju samo kompaktne tablice
+        let mut contents: Vec<String> = (0..self.contents.len()).map(|i| self.contents.get(i).to_owned()).collect();
+        let mut content_ids: HashMap<String, u32> =
+            contents.iter().enumerate().map(|(i, c)| (c.clone(), i as u32)).collect();
+        let mut exact: HashMap<String, u32> =
+            self.exact.entries().map(|(key, ids)| (key.to_owned(), ids[0])).collect();
+        let mut prefix: HashMap<String, Vec<u32>> =
+            self.prefix.entries().map(|(key, ids)| (key.to_owned(), ids.to_vec())).collect();
+
+        for (key, content) in items {
+            let id = *content_ids.entry(content.to_owned()).or_insert_with(|| {
+                contents.push(content.to_owned());
+                (contents.len() - 1) as u32
+            });
+            let normalized = key.trim().to_lowercase();
+
+            // Također indeksiramo riječi za prefiks
+            for word in normalized.split_whitespace().take(3) {
+                if word.len() > 2 {
+                    add_prefix(&mut prefix, word, id);
+                }
+            }
+
+            // Specijalno za emailove ili cijele ključeve
+            if normalized.contains('@') || normalized.len() < 50 {
+                add_prefix(&mut prefix, &normalized, id);
+            }
+            exact.insert(normalized, id);
+        }
+
+        let mut arena = StrArena::new();
+        for content in &contents {
+            arena.push(content);
+        }
+        arena.shrink();
+        self.contents = arena;
+        self.exact = KeyTable::build(exact.into_iter().map(|(key, id)| (key, vec![id])).collect());
+        self.prefix = KeyTable::build(prefix.into_iter().collect());
+    }
+
+    /// (tip, confidence, sadržaj) ili None.
+    pub fn search(&self, query: &str) -> Option<(&'static str, f64, String)> {
+        let normalized = query.trim().to_lowercase();
+
+        // 1. Exact Match
+        if let Some(ids) = self.exact.get(&normalized) {
+            return Some(("ExactMatch", 1.0, self.contents.get(ids[0] as usize).to_owned()));
+        }
+
+        // 2. Prefix Match
+        if normalized.len() >= 3 {
+            if let Some(&first) = self.prefix.prefix(&normalized, 5).first() {
+                let content = self.contents.get(first as usize);
+                if content.to_lowercase().starts_with(&normalized) {
+                    return Some(("PrefixMatch", 0.9, content.to_owned()));
+                }
+            }
+        }
+
+        None
+    }
+
+    pub fn stats(&self) -> IndexStats {
+        IndexStats {
+            exact_keys: self.exact.len(),
+            prefix_keys: self.prefix.len(),
+            contents: self.contents.len(),
+            bytes: size_of::<Self>()
+                + self.exact.heap_bytes()
+                + self.prefix.heap_bytes()
+                + self.contents.heap_bytes(),
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn index(items: &[(&str, &str)]) -> CompactIndex {
+        let mut index = CompactIndex::new();
+        index.insert_many(items.iter().copied());
+        index
+    }
+
+    #[test]
+    fn exact_and_prefix_lookup() {
+        let index = index(&[
+            ("Odluka T034: replikacija", "Odluka T034: replikacija"),
+            ("ana@example.com", "Kontakt: ana@example.com"),
+            ("čvor", "Čvor klastera"),
+        ]);
+        assert_eq!(index.len(), 3);
+        let exact = index.search("  odluka t034: REPLIKACIJA ").unwrap();
+        assert_eq!((exact.0, exact.1), ("ExactMatch", 1.0));
+        assert_eq!(exact.2, "Odluka T034: replikacija");
+        assert_eq!(index.search("ana@example.com").unwrap().2, "Kontakt: ana@example.com");
+
+        // Prefiks pogađa samo ako sadržaj počinje upitom
+        let prefix = index.search("odlu").unwrap();
+        assert_eq!((prefix.0, prefix.2.as_str()), ("PrefixMatch", "Odluka T034: replikacija"));
+        assert_eq!(index.search("čvo").unwrap().2, "Čvor klastera");
+        assert!(index.search("ana").is_none()); // "Kontakt: ..." ne počinje s "ana"
+        assert!(index.search("od").is_none()); // prekratko za prefiks
+        assert!(index.search("nepostoji").is_none());
+    }
+
+    #[test]
+    fn repeated_insert_many_merges() {
+        let mut merged = index(&[("alfa", "Alfa 1"), ("beta", "Beta")]);
+        merged.insert_many([("alfa", "Alfa 2"), ("gama", "Gama"), ("beta", "Beta")]);
+        let once = index(&[("alfa", "Alfa 1"), ("beta", "Beta"), ("alfa", "Alfa 2"), ("gama", "Gama")]);
+
+        assert_eq!(merged.len(), 3);
+        assert_eq!(merged.search("alfa").unwrap().2, "Alfa 2"); // zadnji insert pobjeđuje
+        assert_eq!(merged.search("beta").unwrap().2, "Beta");
+        assert_eq!(merged.search("gama").unwrap().2, "Gama");
+        for query in ["alfa", "alf", "bet", "gam", "x"] {
+            assert_eq!(merged.search(query), once.search(query), "{query}");
+        }
+        let (a, b) = (merged.stats(), once.stats());
+        assert_eq!((a.exact_keys, a.prefix_keys, a.contents), (b.exact_keys, b.prefix_keys, b.contents));
+        assert_eq!(a.contents, 4); // isti sadržaj ("Beta") se ne duplicira
+    }
+
+    #[test]
+    fn prefix_keeps_at_most_max_contents_per_key() {
+        let items: Vec<(String, String)> =
+            (0..25).map(|i| (format!("baza {i}"), format!("Baza broj {i}"))).collect();
+        let index = index(&items.iter().map(|(k, c)| (k.as_str(), c.as_str())).collect::<Vec<_>>());
+        let ids = index.prefix.get("baza").unwrap();
+        assert_eq!(ids.len(), MAX_CONTENTS_PER_KEY);
+        assert_eq!(index.prefix.prefix("baz", 100).len(), 25);
+    }
+}
@@ -1,161 +1,119 @@
+use pyo3::exceptions::PyDeprecationWarning;
 use pyo3::prelude::*;
 use pyo3::types::PyDict;
-use std::collections::HashMap;
+use rayon::prelude::*;
+use std::sync::{RwLock, RwLockReadGuard, RwLockWriteGuard};
 
-#[derive(Clone)]
-struct TrieNode {
-    children: HashMap<char, Box<TrieNode>>,
-    contents: Vec<String>,
-}
+mod compact;
+mod py_alnum;
+mod stemmer;
 
-impl TrieNode {
-    fn new() -> Self {
-        Self {
-            children: HashMap::new(),
-            contents: Vec::new(),
-        }
-    }
-}
+use compact::CompactIndex;
+use stemmer::{CroStemmer, Mode};
 
-#[derive(Clone)]
-struct PrefixTrie {
-    root: TrieNode,
+/// Indeks iza RwLock-a: pretrage (bez GIL-a) idu paralelno, insert/clear
+/// uzimaju write lock. `frozen` jer svu sinkronizaciju radi RwLock, pa
+/// PyO3 ne treba runtime borrow provjere.
+#[pyclass(frozen)]
+pub struct FastPath {
+    index: RwLock<CompactIndex>,
 }
 
-impl PrefixTrie {
-    fn new() -> Self {
-        Self {
-            root: TrieNode::new(),
-        }
-    }
-
-    fn insert(&mut self, key: &str, content: &str) {
-        let normalized = key.trim().to_lowercase();
-        let mut node = &mut self.root;
-
-        for ch in normalized.chars() {
-            node = node
-                .children
-                .entry(ch)
-                .or_insert_with(|| Box::new(TrieNode::new()));
-        }
-
-        if node.contents.len() < 10 {
-            node.contents.push(content.to_string());
-        }
-    }
-
-    fn search(&self, prefix: &str, limit: usize) -> Vec<String> {
-        let normalized = prefix.trim().to_lowercase();
-        let mut node = &self.root;
-
-        for ch in normalized.chars() {
-            if let Some(next_node) = node.children.get(&ch) {
-                node = next_node;
-            } else {
-                return Vec::new();
-            }
-        }
-
-        let mut results = Vec::new();
-        self.collect_recursive(node, &mut results, limit);
-        results
+impl FastPath {
+    fn read(&self) -> RwLockReadGuard<'_, CompactIndex> {
+        // Panika usred inserta ne smije trajno onesposobiti pretragu
+        self.index.read().unwrap_or_else(|e| e.into_inner())
     }
 
-    fn collect_recursive(&self, node: &TrieNode, results: &mut Vec<String>, limit: usize) {
-        for content in &node.contents {
-            if results.len() >= limit {
-                return;
-            }
-            if !results.contains(content) {
-                results.push(content.clone());
-            }
-        }
-
-        for child in node.children.values() {
-            if results.len() >= limit {
-                return;
-            }
-            self.collect_recursive(child, results, limit);
-        }
+    fn write(&self) -> RwLockWriteGuard<'_, CompactIndex> {
+        self.index.write().unwrap_or_else(|e| e.into_inner())
     }
 }
 
-#[pyclass]
-pub struct FastPath {
-    exact_index: HashMap<String, String>, // key -> content
-    prefix_trie: PrefixTrie,
-}
-
 #[pymethods]
 impl FastPath {
     #[new]
     pub fn new() -> Self {
         Self {
-            exact_index: HashMap::new(),
-            prefix_trie: PrefixTrie::new(),
+            index: RwLock::new(CompactIndex::new()),
         }
     }
 
-    pub fn insert(&mut self, key: String, content: String) {
-        let normalized = key.trim().to_lowercase();
-        self.exact_index.insert(normalized.clone(), content.clone());
-        
-        // Također indeksiramo riječi za prefiks
-        for word in normalized.split_whitespace().take(3) {
-            if word.len() > 2 {
-                self.prefix_trie.insert(word, &content);
-            }
-        }
-        
-        // Specijalno za emailove ili cijele ključeve
-        if normalized.contains('@') || normalized.len() < 50 {
-            self.prefix_trie.insert(&normalized, &content);
-        }
+    /// Zastarjelo: svaki poziv spaja jedan ključ u kompaktni indeks, što je
+    /// O(N) po pozivu (kvadratično kroz warmup). Koristi `insert_many`.
+    pub fn insert(&self, py: Python<'_>, key: String, content: String) -> PyResult<()> {
+        PyErr::warn_bound(
+            py,
+            &py.get_type_bound::<PyDeprecationWarning>(),
+            "FastPath.insert je O(N) po pozivu; koristi insert_many",
+            1,
+        )?;
+        py.allow_threads(|| self.write().insert_many([(key.as_str(), content.as_str())]));
+        Ok(())
     }
 
-    pub fn search<'py>(&self, py: Python<'py>, query: String) -> PyResult<Option<Bound<'py, PyDict>>> {
-        let normalized = query.trim().to_lowercase();
-
-        // 1. Exact Match
-        if let Some(content) = self.exact_index.get(&normalized) {
-            let res = PyDict::new_bound(py);
-            res.set_item("type", "ExactMatch")?;
-            res.set_item("confidence", 1.0)?;
-            res.set_item("content", content.clone())?;
-            return Ok(Some(res));
-        }
+    /// Bulk insert liste (ključ, sadržaj) parova: jedan FFI poziv i jedan
+    /// write lock za cijeli warmup umjesto poziva po ključu.
+    pub fn insert_many(&self, py: Python<'_>, items: Vec<(String, String)>) -> usize {
+        py.allow_threads(|| {
+            self.write().insert_many(items.iter().map(|(key, content)| (key.as_str(), content.as_str())));
+            items.len()
+        })
+    }
 
-        // 2. Prefix Match
-        if normalized.len() >= 3 {
-            let results = self.prefix_trie.search(&normalized, 5);
-            if !results.is_empty() {
-                let first = &results[0];
-                if first.to_lowercase().starts_with(&normalized) {
-                    let res = PyDict::new_bound(py);
-                    res.set_item("type", "PrefixMatch")?;
-                    res.set_item("confidence", 0.9)?;
-                    res.set_item("content", first.clone())?;
-                    return Ok(Some(res));
-                }
+    pub fn search<'py>(&self, py: Python<'py>, query: String) -> PyResult<Option<Bound<'py, PyDict>>> {
+        let found = py.allow_threads(|| self.read().search(&query));
+        match found {
+            Some((kind, confidence, content)) => {
+                let res = PyDict::new_bound(py);
+                res.set_item("type", kind)?;
+                res.set_item("confidence", confidence)?;
+                res.set_item("content", content)?;
+                Ok(Some(res))
             }
+            None => Ok(None),
         }
-
-        Ok(None)
     }
-    
-    pub fn clear(&mut self) {
-        self.exact_index.clear();
-        self.prefix_trie = PrefixTrie::new();
+
+    pub fn clear(&self, py: Python<'_>) {
+        py.allow_threads(|| *self.write() = CompactIndex::new());
     }
-    
+
     pub fn __len__(&self) -> usize {
-        self.exact_index.len()
+        self.read().len()
     }
+
+    /// Veličina indeksa: broj ključeva, sadržaja i zauzeti bajtovi.
+    pub fn stats<'py>(&self, py: Python<'py>) -> PyResult<Bound<'py, PyDict>> {
+        let stats = self.read().stats();
+        let res = PyDict::new_bound(py);
+        res.set_item("exact_keys", stats.exact_keys)?;
+        res.set_item("prefix_keys", stats.prefix_keys)?;
+        res.set_item("contents", stats.contents)?;
+        res.set_item("bytes", stats.bytes)?;
+        Ok(res)
+    }
+}
+
+/// Stemira listu tekstova (ekvivalent `stem_text` za svaki). Radi bez GIL-a,
+/// a tekstove raspoređuje po rayon dretvama.
+#[pyfunction]
+#[pyo3(signature = (texts, mode="aggressive"))]
+fn stem_text_batch(py: Python<'_>, texts: Vec<String>, mode: &str) -> Vec<String> {
+    let mode = Mode::parse(mode);
+    let stemmer = CroStemmer::global();
+    py.allow_threads(|| {
+        if texts.len() < 2 {
+            texts.iter().map(|text| stemmer.stem_text(text, mode)).collect()
+        } else {
+            texts.par_iter().map(|text| stemmer.stem_text(text, mode)).collect()
+        }
+    })
 }
 
 #[pymodule]
 fn kronos_core(m: &Bound<'_, PyModule>) -> PyResult<()> {
     m.add_class::<FastPath>()?;
+    m.add_function(wrap_pyfunction!(stem_text_batch, m)?)?;
     Ok(())
 }
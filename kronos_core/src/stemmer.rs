@@ -0,0 +1,256 @@
+//! CroStem: hrvatski stemmer, isti algoritam kao `src/utils/stemmer.py`.
+//!
+//! Tablice su prepisane iz Python `CroStemmer`-a; paritet provjerava
+//! `tests/test_stemmer.py` nad zlatnim korpusom. Duljine se (kao u Pythonu)
+//! broje u znakovima, ne bajtovima.
+
+use std::collections::HashMap;
+use std::sync::OnceLock;
+
+use crate::py_alnum::is_py_alnum;
+
+// Sufiksi za agresivni mod (redoslijed je bitan: pobjeđuje prvi koji se smije skinuti)
+const SUFFIXES_AGGRESSIVE: &[&str] = &[
+    "ovijega", "ovijemu", "ovijeg", "ovijem", "ovijim", "ovijih", "ovijoj", "ijega",
+    "ijemu", "ijem", "ijih", "ijim", "ijog", "ijoj", "nijeg", "nijem", "nijih", "nijim",
+    "nija", "nije", "niji", "niju", "asmo", "aste", "ahu", "ismo", "iste", "jesmo", "jeste",
+    "jesu", "ajući", "ujući", "ivši", "avši", "jevši", "nuti", "iti", "ati", "eti", "uti",
+    "ela", "ala", "alo", "ilo", "ili", "njak", "nost", "anje", "enje", "stvo", "ica", "ika",
+    "ice", "ike", "jemu", "jega", "ama", "ima", "om", "em", "ev", "og", "eg", "im", "ih",
+    "oj", "oh", "iš", "ov", "ši", "ga", "mu", "en", "ski", "jeh", "eš", "aš", "am", "osmo",
+    "este", "oše", "a", "e", "i", "o", "u", "la", "lo", "li", "te", "mo", "je",
+];
+
+// Sufiksi za konzervativni mod
+const SUFFIXES_CONSERVATIVE: &[&str] = &[
+    "ovijega", "ovijemu", "ovijeg", "ovijem", "ovijim", "ovijih", "ovijoj", "ijega",
+    "ijemu", "ijem", "ijih", "ijim", "ijog", "ijoj", "nijeg", "nijem", "nijih", "nijim",
+    "nija", "nije", "niji", "niju", "asmo", "aste", "ahu", "ismo", "iste", "jesmo", "jeste",
+    "jesu", "ajući", "ujući", "ivši", "avši", "nuti", "iti", "ati", "eti", "uti", "ela",
+    "ala", "alo", "ilo", "ili", "njak", "nost", "anje", "enje", "stvo", "ica", "ika", "ice",
+    "ike", "jemu", "jega", "ama", "ima", "om", "em", "og", "im", "ih", "oj", "oh", "iš",
+    "ov", "ši", "ga", "mu", "a", "e", "i", "o", "u", "la", "lo", "li", "te", "mo",
+];
+
+const PREFIXES: &[&str] = &["naj", "pre", "iz", "na", "po", "do", "uz"];
+
+const EXCEPTIONS: &[(&str, &str)] = &[
+    ("ljudi", "ljud"), ("osoba", "osoba"), ("psa", "pas"), ("psi", "pas"), ("oca", "otac"),
+    ("očevi", "otac"), ("oči", "oko"), ("uši", "uho"), ("djeca", "dijete"),
+    ("vrapca", "vrabac"), ("vrapci", "vrabac"),
+];
+
+const VOICE_RULES: &[(&str, &str)] = &[
+    ("učenic", "učenik"), ("majc", "majk"), ("ruc", "ruk"), ("ruz", "ruk"), ("noz", "nog"),
+    ("knjiz", "knjig"), ("dječac", "dječak"), ("dus", "duh"), ("jezic", "jezik"),
+    ("supruz", "suprug"), ("rekoš", "rek"), ("snjeg", "snijeg"), ("pjesnic", "pjesnik"),
+    ("momc", "momak"), ("pekl", "pek"), ("gledal", "gled"), ("djetet", "djet"),
+    ("pjes", "pjesm"), ("peć", "pek"), ("striž", "strig"), ("vuč", "vuk"), ("kaž", "kaz"),
+    ("maš", "mah"), ("pij", "pi"), ("draž", "drag"), ("brž", "brz"), ("slađ", "slad"),
+    ("vraz", "vrag"), ("siromas", "siromah"), ("skač", "skak"), ("svrs", "svrha"),
+    ("vuc", "vuk"), ("oblac", "oblak"), ("viš", "vis"), ("bolj", "dobar"), ("jač", "jak"),
+    ("već", "velik"), ("duž", "dug"), ("bjelj", "bijel"), ("gorč", "gork"), ("reć", "rek"),
+    ("ora", "orl"), ("dijet", "djet"), ("tež", "teg"), ("sunc", "sunc"),
+    ("vremen", "vremen"), ("djevojč", "djevojčic"), ("oras", "orah"), ("src", "src"),
+    ("dra", "drag"), ("pečen", "pek"), ("rađen", "rad"), ("viđ", "vid"), ("momk", "momak"),
+    ("vrapc", "vrab"), ("vidj", "vid"), ("ptič", "ptič"), ("snj", "snijeg"),
+    ("hrvatsk", "hrvat"), ("mislima", "misao"), ("šalic", "šalic"), ("stručnj", "struč"),
+    ("jest", "jed"), ("pit", "pi"), ("čut", "ču"), ("znat", "zna"), ("htj", "htje"),
+    ("moć", "mog"), ("reč", "rek"), ("teč", "tek"), ("vrš", "vrh"), ("dobar", "dobr"),
+    ("kratak", "kratk"), ("uzak", "uzk"), ("nizak", "nizk"), ("težak", "težk"),
+    ("topao", "topl"), ("hladan", "hladn"), ("tjedn", "tjedan"), ("dvorc", "dvorac"),
+    ("trenuc", "trenutak"), ("bitak", "bitka"), ("bajak", "bajka"), ("dasak", "daska"),
+    ("djevojak", "djevojka"), ("momak", "momak"), ("top", "topl"), ("vidjev", "vid"),
+    ("ljep", "lijep"), ("crv", "crven"), ("peč", "pek"), ("piš", "pis"), ("duš", "duh"),
+    ("čovječ", "čovjek"), ("čovjec", "čovjek"),
+];
+
+// Samo konzervativni mod
+const LEMMA_RULES: &[(&str, &str)] = &[
+    ("majk", "majka"), ("ruk", "ruka"), ("nog", "noga"), ("knjig", "knjiga"),
+    ("vrijem", "vrijeme"), ("djet", "dijete"), ("pjesm", "pjesma"), ("kuć", "kuća"),
+    ("škol", "škola"), ("polj", "polje"), ("mor", "more"), ("sunc", "sunce"),
+    ("dobr", "dobar"), ("sret", "sretan"), ("pamet", "pametan"), ("tužn", "tužan"),
+    ("tuž", "tužan"), ("duž", "dug"), ("već", "velik"), ("manj", "malen"),
+    ("bolj", "dobar"), ("lošij", "loš"), ("pis", "pisati"), ("vidj", "vidjeti"),
+    ("vid", "vidjeti"), ("htje", "htjeti"), ("mog", "moći"), ("rek", "reći"),
+    ("pek", "peći"),
+];
+
+#[derive(Clone, Copy, PartialEq, Eq)]
+pub enum Mode {
+    Aggressive,
+    Conservative,
+    /// Nepoznat mod: kao u Pythonu, konzervativni sufiksi bez lemma pravila.
+    Other,
+}
+
+impl Mode {
+    pub fn parse(mode: &str) -> Self {
+        match mode {
+            "aggressive" => Mode::Aggressive,
+            "conservative" => Mode::Conservative,
+            _ => Mode::Other,
+        }
+    }
+}
+
+/// Sufiksi grupirani po duljini (dulji prvi): sufiks -> (rang u listi, minimalni korijen).
+type SuffixTable = Vec<(usize, HashMap<&'static str, (usize, usize)>)>;
+
+pub struct CroStemmer {
+    aggressive: SuffixTable,
+    conservative: SuffixTable,
+    exceptions: HashMap<&'static str, &'static str>,
+    voice_rules: HashMap<&'static str, &'static str>,
+    lemma_rules: HashMap<&'static str, &'static str>,
+}
+
+/// `_is_suffix_strippable` iz Pythona, izražen kao minimalna duljina korijena.
+fn min_root(suffix: &str, aggressive: bool) -> usize {
+    if !aggressive {
+        return 3;
+    }
+    match suffix {
+        "em" | "ov" | "ev" => 3,
+        "en" | "ica" | "ice" | "ika" | "ike" => 4,
+        _ if suffix.chars().count() == 1 => 3,
+        _ => 2,
+    }
+}
+
+fn compile(suffixes: &[&'static str], aggressive: bool) -> SuffixTable {
+    let mut buckets: HashMap<usize, HashMap<&'static str, (usize, usize)>> = HashMap::new();
+    for (rank, suffix) in suffixes.iter().enumerate() {
+        buckets
+            .entry(suffix.chars().count())
+            .or_default()
+            .entry(*suffix)
+            .or_insert((rank, min_root(suffix, aggressive)));
+    }
+    let mut table: SuffixTable = buckets.into_iter().collect();
+    table.sort_by(|a, b| b.0.cmp(&a.0));
+    table
+}
+
+/// Razmak kao u Pythonovom `str.split()` (uključuje i separatore \x1c-\x1f).
+fn is_py_space(c: char) -> bool {
+    c.is_whitespace() || ('\u{1c}'..='\u{1f}').contains(&c)
+}
+
+impl CroStemmer {
+    pub fn new() -> Self {
+        Self {
+            aggressive: compile(SUFFIXES_AGGRESSIVE, true),
+            conservative: compile(SUFFIXES_CONSERVATIVE, false),
+            exceptions: EXCEPTIONS.iter().copied().collect(),
+            voice_rules: VOICE_RULES.iter().copied().collect(),
+            lemma_rules: LEMMA_RULES.iter().copied().collect(),
+        }
+    }
+
+    pub fn global() -> &'static CroStemmer {
+        static STEMMER: OnceLock<CroStemmer> = OnceLock::new();
+        STEMMER.get_or_init(CroStemmer::new)
+    }
+
+    pub fn stem(&self, word: &str, mode: Mode) -> String {
+        // 1. Lowercase i čišćenje (slova i brojke, kao str.isalnum)
+        let word: String = word.to_lowercase().chars().filter(|c| is_py_alnum(*c)).collect();
+        if word.is_empty() {
+            return word;
+        }
+
+        // 2. Izuzetci
+        if let Some(exception) = self.exceptions.get(word.as_str()) {
+            return exception.to_string();
+        }
+
+        // 3. Suffix stripping (prvi sufiks po redoslijedu liste koji se smije skinuti)
+        let table = if mode == Mode::Aggressive { &self.aggressive } else { &self.conservative };
+        let mut current: &str = &word;
+        loop {
+            let size = current.chars().count();
+            let mut best: Option<(usize, usize)> = None; // (rang, bajtni početak sufiksa)
+            for (length, bucket) in table {
+                if *length > size {
+                    continue;
+                }
+                let start = current.char_indices().rev().nth(length - 1).map_or(0, |(i, _)| i);
+                if let Some(&(rank, min_root)) = bucket.get(&current[start..]) {
+                    if size - length >= min_root && best.map_or(true, |(r, _)| rank < r) {
+                        best = Some((rank, start));
+                    }
+                }
+            }
+            match best {
+                Some((_, start)) => current = &current[..start],
+                None => break,
+            }
+        }
+
+        // 4. Prefix stripping
+        for prefix in PREFIXES {
+            if let Some(root) = current.strip_prefix(prefix) {
+                if root.chars().count() >= 3 {
+                    current = root;
+                    break;
+                }
+            }
+        }
+
+        // 5. Voice rules, 6. Lemma rules (samo konzervativni mod)
+        let mut stemmed = self.voice_rules.get(current).copied().unwrap_or(current);
+        if mode == Mode::Conservative {
+            stemmed = self.lemma_rules.get(stemmed).copied().unwrap_or(stemmed);
+        }
+        stemmed.to_string()
+    }
+
+    pub fn stem_text(&self, text: &str, mode: Mode) -> String {
+        let mut out = String::with_capacity(text.len());
+        for word in text.split(is_py_space).filter(|w| !w.is_empty()) {
+            if !out.is_empty() {
+                out.push(' ');
+            }
+            out.push_str(&self.stem(word, mode));
+        }
+        out
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    // Očekivane vrijednosti iz Python CroStemmer-a (src/utils/stemmer.py)
+    #[test]
+    fn stems_like_python() {
+        let stemmer = CroStemmer::new();
+        let cases = [
+            ("Kuće", "kuć", "kuća"),
+            ("knjigama", "knjig", "knjiga"),
+            ("odlukama", "odluk", "odluk"),
+            ("najbolji", "dobar", "dobar"),
+            ("Ivana!", "ivan", "ivan"),
+            ("čovjek", "čovjek", "čovjek"),
+            ("radili", "rad", "rad"),
+            ("T034", "t034", "t034"),
+        ];
+        for (word, aggressive, conservative) in cases {
+            assert_eq!(stemmer.stem(word, Mode::Aggressive), aggressive, "{word}");
+            assert_eq!(stemmer.stem(word, Mode::Conservative), conservative, "{word}");
+        }
+        assert_eq!(stemmer.stem("!?", Mode::Aggressive), "");
+    }
+
+    #[test]
+    fn stem_text_splits_like_str_split() {
+        let stemmer = CroStemmer::global();
+        assert_eq!(
+            stemmer.stem_text("Odluke  o\treplikaciji baza\x1cpodataka", Mode::Aggressive),
+            "odluk o replikacij baz datak"
+        );
+        assert_eq!(stemmer.stem_text(" \n ", Mode::Aggressive), "");
+    }
+}
@@ -1,22 +1,32 @@
-import sqlite3
 import os
+import sys
 
-db_path = 'data/metadata.db'
-conn = sqlite3.connect(db_path)
-cursor = conn.cursor()
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from src.modules.librarian import Librarian
+
+lib = Librarian()
 
 print("--- Pretraživanje za 'cortex' ---")
-query = "SELECT type, content, project, file_path FROM entities WHERE content LIKE ? OR project LIKE ? OR file_path LIKE ? ORDER BY rowid DESC LIMIT 30"
-cursor.execute(query, ('%cortex%', '%cortex%', '%cortex%'))
+# Sadržaj: FTS5 (entities_fts, bm25) umjesto LIKE '%cortex%' skeniranja cijele tablice
+rows = lib.search_entities("cortex", limit=30)
+
+# Projekt i putanja i dalje po podnizu (kao prije); FTS pokriva samo sadržaj
+conn = lib._get_sqlite_conn()
+seen = {r["id"] for r in rows}
+for eid, file_path, project, etype, content in conn.execute(
+    "SELECT id, file_path, project, type, content FROM entities"
+    " WHERE project LIKE ? OR file_path LIKE ? ORDER BY id DESC LIMIT 30",
+    ("%cortex%", "%cortex%")
+):
+    if eid not in seen:
+        rows.append({"id": eid, "file_path": file_path, "project": project, "type": etype, "content": content})
+conn.close()
+rows = rows[:30]
 
-rows = cursor.fetchall()
 if not rows:
     print("Nije pronađeno ništa za 'cortex'.")
 else:
     for row in rows:
-        etype, content, project, file_path = row
-        print(f"[{etype}] Project: {project} | File: {os.path.basename(file_path)}")
-        print(f"  Content: {content[:200]}...")
+        print(f"[{row['type']}] Project: {row['project']} | File: {os.path.basename(row['file_path'] or '')}")
+        print(f"  Content: {(row['content'] or '')[:200]}...")
         print("-" * 20)
-
-conn.close()
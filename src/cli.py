@@ -32,7 +32,9 @@ app = typer.Typer(help="Kronos: Semantička Memorija za AI Agente", add_completi
 def ingest(
     path: str = typer.Argument(..., help="Putanja do direktorija ili datoteke"),
     project: Optional[str] = typer.Option(None, "--project", "-p", help="Ime projekta"),
-    recursive: bool = typer.Option(False, "--recursive", "-r", help="Rekurzivno pretraživanje")
+    recursive: bool = typer.Option(False, "--recursive", "-r", help="Rekurzivno pretraživanje"),
+    incremental: bool = typer.Option(False, "--incremental", "-i", help="Preskoči datoteke nepromijenjenog sadržaja (SHA-256)"),
+    jobs: int = typer.Option(1, "--jobs", "-j", help="Broj procesa za obradu (čitanje, chunking, stemiranje)")
 ):
     """
     Učitava dokumente i stvara semantičku memoriju.
@@ -42,7 +44,7 @@ def ingest(
     ingestor = Ingestor()
     
     # Ako projekt nije zadan, Ingestor će ga sam detektirati iz putanje u .run()
-    ingestor.run(path, project_name=project, recursive=recursive, silent=False)
+    run_stats = ingestor.run(path, project_name=project, recursive=recursive, silent=False, incremental=incremental, jobs=jobs)
 
     # Prikaži statistiku nakon unosa
     stats = Librarian().get_stats()
@@ -50,6 +52,11 @@ def ingest(
     table.add_column("Metrika", style="accent")
     table.add_column("Vrijednost", justify="right")
     
+    if run_stats:
+        table.add_row("Obrađeno datoteka", str(run_stats["processed"]))
+        table.add_row("Preskočeno (nepromijenjeno)", str(run_stats["skipped"]))
+        table.add_row("Datoteka/s", str(run_stats["files_per_s"]))
+    
     table.add_row("Ukupno datoteka", str(stats.get('total_files', 0)))
     table.add_row("Ukupno chunkova", str(stats.get('total_chunks', 0)))
     
@@ -472,7 +479,12 @@ def history(
     
     for i, dec in enumerate(history_list):
         is_current = dec['id'] == decision_id
-        arrow = "🟢 [bold white]SADA[/]" if is_current else "⚪ [dim]PRIJE[/]"
+        if is_current:
+            arrow = "🟢 [bold white]SADA[/]"
+        elif dec.get('depth', 0) < 0:
+            arrow = "⚪ [dim]PRIJE[/]"
+        else:
+            arrow = "🔵 [dim]POSLIJE[/]"
         
         status = "[red]ZAMIJENJENA[/]" if dec.get('superseded_by') else "[green]AKTIVNA[/]"
         
@@ -622,15 +634,18 @@ def mcp():
 @app.command()
 def backup(
     output: Optional[str] = typer.Option(None, "--output", "-o", help="Putanja za backup datoteku (default: backups/)"),
+    incremental: bool = typer.Option(False, "--incremental", "-i", help="Zapiši samo datoteke promijenjene od zadnjeg backupa"),
+    base: Optional[str] = typer.Option(None, "--base", help="Bazni backup za inkrementalni (default: najnoviji u backups/)"),
 ):
     """
     Kreira sigurnosnu kopiju Kronos baze podataka.
     
-    Sprema SQLite bazu i ChromaDB store u ZIP arhivu s vremenskom oznakom.
+    SQLite baze se kopiraju backup API-jem (server može raditi), vektorska baza
+    na istoj generaciji indeksa, sve u ZIP s manifestom i checksumima.
     """
-    import zipfile
-    import shutil
     from datetime import datetime
+    from src.utils.archive_writer import flush_all_writers
+    from src.utils.backup import create_backup, latest_backup
     
     console.print(Panel("[bold accent]Kronos Backup[/]\n[info]Kreiram sigurnosnu kopiju...[/]", border_style="accent"))
     
@@ -643,22 +658,24 @@ def backup(
     
     # Generiraj ime backup datoteke
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_filename = output or os.path.join(backup_dir, f"kronos_backup_{timestamp}.zip")
+    suffix = "_inc" if incremental else ""
+    backup_filename = output or os.path.join(backup_dir, f"kronos_backup_{timestamp}{suffix}.zip")
     
     # Provjeri postoji li data direktorij
     if not os.path.exists(data_dir):
         console.print("[error]❌ Data direktorij ne postoji. Nema podataka za backup.[/]")
         return
+
+    if incremental and base is None:
+        base = latest_backup(os.path.dirname(os.path.abspath(backup_filename)))
+        if base is None:
+            console.print("[warning]⚠️ Nema prethodnog backupa s manifestom, radim puni backup.[/]")
     
     with console.status("[bold cyan]Kreiram ZIP arhivu..."):
         try:
-            with zipfile.ZipFile(backup_filename, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                # Dodaj sve datoteke iz data direktorija
-                for root, dirs, files in os.walk(data_dir):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        arcname = os.path.relpath(file_path, ".")
-                        zipf.write(file_path, arcname)
+            # Događaji iz reda archive writera moraju biti u datoteci prije kopiranja
+            flush_all_writers(data_dir)
+            result = create_backup(data_dir, backup_filename, base=base if incremental else None)
                         
             # Statistika
             backup_size = os.path.getsize(backup_filename) / (1024 * 1024)
@@ -666,6 +683,10 @@ def backup(
             console.print(f"\n[bold success]✅ Backup uspješno kreiran![/]")
             console.print(f"   📁 Datoteka: [cyan]{backup_filename}[/]")
             console.print(f"   📦 Veličina: [cyan]{backup_size:.2f} MB[/]")
+            console.print(f"   🧾 Datoteka: [cyan]{result['written']} zapisano, {result['reused']} iz {result['base'] or '-'}[/]")
+            console.print(f"   🔢 Generacija: [cyan]{result['generation']}[/]")
+            if not result["vector_store_consistent"]:
+                console.print("[warning]⚠️ Indeks se mijenjao tijekom snimanja; vektorska baza možda nije na istoj generaciji.[/]")
             
         except Exception as e:
             console.print(f"[error]❌ Greška pri kreiranju backupa: {e}[/]")
@@ -680,9 +701,6 @@ def restore(
     
     UPOZORENJE: Ovo će prebrisati postojeće podatke!
     """
-    import zipfile
-    import shutil
-    
     if not os.path.exists(backup_file):
         console.print(f"[error]❌ Backup datoteka ne postoji: {backup_file}[/]")
         return
@@ -708,33 +726,115 @@ def restore(
     
     with console.status("[bold cyan]Vraćam podatke iz backupa..."):
         try:
-            # Obriši postojeći data direktorij
-            if os.path.exists(data_dir):
-                shutil.rmtree(data_dir)
-            
-            # Raspakiraj backup
-            with zipfile.ZipFile(backup_file, 'r') as zipf:
-                zipf.extractall(".")
+            # Zatvori writere i keširane SQLite konekcije prije zamjene direktorija
+            from src.utils.archive_writer import close_all_writers
+            from src.utils.backup import restore_backup
+            from src.utils.sqlite_pool import close_all_pools
+            close_all_writers(data_dir)
+            close_all_pools(data_dir)
+            # Raspakiranje i provjera checksuma idu u privremeni direktorij; data/ se mijenja tek na kraju
+            manifest = restore_backup(backup_file, data_dir)
             
             console.print(f"\n[bold success]✅ Restore uspješan![/]")
             console.print(f"   📁 Podaci vraćeni iz: [cyan]{backup_file}[/]")
+            if manifest.get("files"):
+                console.print(f"   🧾 Provjereno datoteka: [cyan]{len(manifest['files'])}[/] (generacija {manifest.get('generation')})")
             
         except Exception as e:
             console.print(f"[error]❌ Greška pri vraćanju podataka: {e}[/]")
 
 @app.command()
-def rebuild():
+def rebuild(
+    since: Optional[str] = typer.Option(None, "--since", help="Replay samo događaja od ISO timestampa (bez brisanja baze)"),
+    resume: bool = typer.Option(False, "--resume", help="Nastavi prekinuti rebuild od zadnjeg checkpointa"),
+    jobs: Optional[int] = typer.Option(None, "--jobs", "-j", help="Broj procesa za dekodiranje/stemiranje (default: broj jezgri)"),
+):
     """
-    Rekonstruira SQLite i ChromaDB baze iz archive.jsonl datoteke.
+    Rekonstruira SQLite i ChromaDB baze iz arhive događaja.
     Korisno kod migracija ili gubitka podataka.
     """
-    confirm = typer.confirm("Ovo će obrisati trenutnu bazu i učitati sve iz arhive. Nastaviti?", default=False)
+    if since is None and not resume:
+        confirm = typer.confirm("Ovo će obrisati trenutnu bazu i učitati sve iz arhive. Nastaviti?", default=False)
+    else:
+        confirm = True
     if confirm:
         from src.rebuild_from_archive import rebuild as run_rebuild
-        run_rebuild()
+        run_rebuild(since=since, resume=resume, jobs=jobs)
     else:
         console.print("[info]Otkazano.[/]")
 
+archive_app = typer.Typer(help="Segmentirana arhiva događaja (archive.jsonl + data/archive/)")
+app.add_typer(archive_app, name="archive")
+
+@archive_app.command("migrate")
+def archive_migrate(
+    segment_mb: Optional[float] = typer.Option(None, "--segment-mb", help="Veličina segmenta (default KRONOS_ARCHIVE_SEGMENT_MB)"),
+):
+    """
+    Pretvara postojeću archive.jsonl u komprimirane segmente s indeksom.
+    """
+    from src.utils.archive_writer import close_all_writers
+    from src.utils.event_archive import migrate_archive
+
+    lib = Librarian()
+    close_all_writers(lib.data_path)
+    with console.status("[bold cyan]Zatvaram segmente..."):
+        created = migrate_archive(lib.archive_path, int(segment_mb * 1024 * 1024) if segment_mb else None)
+    console.print(f"[bold success]✅ Novih segmenata: {len(created)}[/]")
+
+@archive_app.command("compact")
+def archive_compact(
+    dry_run: bool = typer.Option(False, "--dry-run", help="Samo izračunaj uštedu, ne mijenjaj arhivu"),
+):
+    """
+    Zadržava samo zadnji file_processed događaj po datoteci (radi i dok server piše).
+    """
+    from src.utils.event_archive import compact_archive
+
+    with console.status("[bold cyan]Kompaktiram arhivu..."):
+        result = compact_archive(Librarian().archive_path, dry_run=dry_run)
+
+    def _mb(n):
+        return f"{n / 1048576:.2f} MB"
+
+    def _pct(before, after):
+        return f"-{100 * (1 - after / before):.0f}%" if before else "-"
+
+    compressed = (f"Gzip:              [white]{_mb(result['compressed_bytes_before'])} → "
+                  f"{_mb(result['compressed_bytes_after'])} ({_pct(result['compressed_bytes_before'], result['compressed_bytes_after'])})[/]\n"
+                  if not dry_run else "")
+    console.print(Panel(
+        f"[bold cyan]🗜️ Kompakcija arhive{' (dry run)' if dry_run else ''}[/]\n\n"
+        f"Događaja:          [white]{result['events_before']} → {result['events_after']}[/]\n"
+        f"file_processed:    [white]{result['file_processed_before']} → {result['file_processed_after']}[/]\n"
+        f"Chunkova za replay:[white] {result['chunks_before']} → {result['chunks_after']} "
+        f"({_pct(result['chunks_before'], result['chunks_after'])} rebuild posla)[/]\n"
+        f"Sirovo:            [white]{_mb(result['raw_bytes_before'])} → {_mb(result['raw_bytes_after'])} "
+        f"({_pct(result['raw_bytes_before'], result['raw_bytes_after'])})[/]\n"
+        f"{compressed}",
+        border_style="cyan"
+    ))
+
+@archive_app.command("stats")
+def archive_stats_cmd():
+    """
+    Prikazuje segmente, broj događaja i omjer kompresije arhive.
+    """
+    from src.utils.event_archive import archive_stats
+
+    data = archive_stats(Librarian().archive_path)
+    raw = data["sealed_raw_bytes"]
+    ratio = raw / data["sealed_compressed_bytes"] if data["sealed_compressed_bytes"] else 0
+    console.print(Panel(
+        f"[bold cyan]🗄️ Arhiva događaja[/]\n\n"
+        f"Segmenata:        [white]{data['segments']}[/]\n"
+        f"Događaja (zatv.): [white]{data['sealed_events']}[/]\n"
+        f"Sirovo / gzip:    [white]{raw / 1048576:.2f} MB / {data['sealed_compressed_bytes'] / 1048576:.2f} MB ({ratio:.1f}x)[/]\n"
+        f"Aktivni segment:  [white]{data['active_bytes'] / 1048576:.2f} MB[/]\n"
+        f"Praćenih datoteka: [white]{data['files_tracked']}[/]",
+        border_style="cyan"
+    ))
+
 @app.command()
 def reindex():
     """
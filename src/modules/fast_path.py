@@ -1,139 +1,505 @@
+import json
+import mmap
 import os
 import re
+import struct
+import sys
 import threading
-from typing import List, Dict, Any, Optional
-
-class PrefixTrie:
-    """Simulacija Rust PrefixTrie-a u Pythonu."""
-    def __init__(self):
-        self.root = {"docs": [], "children": {}}
-
-    def insert(self, key: str, document: Dict[str, Any]):
-        node = self.root
-        for char in key.lower():
-            if char not in node["children"]:
-                node["children"][char] = {"docs": [], "children": {}}
-            node = node["children"][char]
-        # Spremi dokument u čvor (možemo limitirati broj da ne raste previše)
-        if len(node["docs"]) < 10:
-            node["docs"].append(document)
-
-    def search(self, prefix: str) -> List[Dict[str, Any]]:
-        node = self.root
-        for char in prefix.lower():
-            if char not in node["children"]:
-                return []
-            node = node["children"][char]
-        
-        return self._collect_recursive(node, limit=10)
-
-    def _collect_recursive(self, node: Dict[str, Any], limit: int) -> List[Dict[str, Any]]:
-        results = list(node["docs"])
-        for char in node["children"]:
-            if len(results) >= limit:
+from array import array
+from bisect import bisect_left
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+from src.utils.logger import logger
+
+# Snapshot indeksa (data/cache/fastpath.idx): magic, verzija, duljina JSON
+# zaglavlja, zaglavlje, pa sekcije poravnate na 8 bajtova.
+SNAPSHOT_MAGIC = b"KRONOSFP"
+SNAPSHOT_VERSION = 1
+
+
+class _KeyView:
+    """Sekvenca ključeva (UTF-8 bytes) nad jednim blobom, za bisect."""
+    __slots__ = ("blob", "offsets", "base")
+
+    def __init__(self, blob, offsets, base=0):
+        self.blob = blob
+        self.offsets = offsets
+        self.base = base
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.blob[self.base + self.offsets[i]:self.base + self.offsets[i + 1]]
+
+
+class _DocArena:
+    """Dokumenti iz snapshota: JSON po dokumentu u blobu, dekodira se tek pri pogotku."""
+
+    def __init__(self, blob, offsets, base=0):
+        self._docs = _KeyView(blob, offsets, base)
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __getitem__(self, i):
+        return tuple(json.loads(self._docs[i]))
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def raw(self):
+        view = self._docs
+        return view.blob[view.base:view.base + view.offsets[-1]], view.offsets
+
+    def nbytes(self) -> int:
+        offsets = self._docs.offsets
+        return offsets[-1] + offsets.itemsize * len(offsets)
+
+
+class KeyTable:
+    """
+    Nepromjenjiva tablica ključ -> ID-evi dokumenata (Python ekvivalent Rust
+    indeksa): ključevi sortirani po UTF-8 bajtovima u jednom blobu s u32
+    offsetima, ID-evi dokumenata u array('I'). Exact i prefiks pretraga su
+    binarno traženje po blobu, bez čvora po znaku.
+
+    Iz snapshota blob je mmap datoteke (ključevi od `base`), a nizovi su
+    memoryview nad njim, pa učitavanje ne kopira podatke.
+    """
+
+    def __init__(self, blob: bytes = b"", offsets=None, starts=None, ids=None, base: int = 0):
+        self.blob = blob
+        self.base = base
+        self.offsets = offsets if offsets is not None else array("I", [0])
+        self.starts = starts if starts is not None else array("I", [0])
+        self.ids = ids if ids is not None else array("I")
+        self._keys = _KeyView(self.blob, self.offsets, base)
+
+    @classmethod
+    def build(cls, entries: Iterable[Tuple[str, List[int]]]) -> "KeyTable":
+        """`entries` su (ključ, [ID-evi]); ključevi moraju biti jedinstveni."""
+        encoded = sorted((key.encode("utf-8"), ids) for key, ids in entries)
+        offsets, starts, ids = array("I", [0]), array("I", [0]), array("I")
+        for key, doc_ids in encoded:
+            offsets.append(offsets[-1] + len(key))
+            ids.extend(doc_ids)
+            starts.append(len(ids))
+        return cls(b"".join(key for key, _ in encoded), offsets, starts, ids)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def get(self, key: str):
+        """ID-evi za točan ključ (prazno ako ga nema)."""
+        needle = key.encode("utf-8")
+        i = bisect_left(self._keys, needle)
+        if i < len(self._keys) and self._keys[i] == needle:
+            return self.ids[self.starts[i]:self.starts[i + 1]]
+        return ()
+
+    def prefix(self, prefix: str, limit: int) -> List[int]:
+        """Do `limit` jedinstvenih ID-eva za ključeve s danim prefiksom, po redu ključeva."""
+        needle = prefix.encode("utf-8")
+        found: List[int] = []
+        i = bisect_left(self._keys, needle)
+        while i < len(self._keys) and len(found) < limit:
+            if not self._keys[i].startswith(needle):
                 break
-            results.extend(self._collect_recursive(node["children"][char], limit - len(results)))
-        return results[:limit]
+            for doc_id in self.ids[self.starts[i]:self.starts[i + 1]]:
+                if doc_id not in found:
+                    found.append(doc_id)
+                    if len(found) >= limit:
+                        break
+            i += 1
+        return found
+
+    def nbytes(self) -> int:
+        return self.offsets[-1] + sum(a.itemsize * len(a) for a in (self.offsets, self.starts, self.ids))
+
+    def sections(self, name: str) -> Dict[str, bytes]:
+        return {
+            f"{name}.blob": self.blob[self.base:self.base + self.offsets[-1]],
+            f"{name}.offsets": self.offsets.tobytes(),
+            f"{name}.starts": self.starts.tobytes(),
+            f"{name}.ids": self.ids.tobytes(),
+        }
+
+
+class CompactIndex:
+    """
+    Indeks brze staze: exact tablica (ključ -> zadnji dokument), prefiks
+    tablica (riječ/ključ -> do MAX_DOCS_PER_KEY dokumenata) i arena
+    dokumenata. Svaki dokument je u areni jednom, kao tuple
+    (content, source, project, type); dict za odgovor se gradi tek pri pogotku.
+    """
+    MAX_DOCS_PER_KEY = 10
+
+    def __init__(self, exact: KeyTable = None, prefix: KeyTable = None, docs: List[tuple] = None):
+        self.exact = exact or KeyTable()
+        self.prefix = prefix or KeyTable()
+        self.docs = docs or []
+
+    @classmethod
+    def build(cls, docs: List[tuple], exact: Dict[str, int], prefix: Dict[str, List[int]]) -> "CompactIndex":
+        return cls(KeyTable.build((key, [doc_id]) for key, doc_id in exact.items()),
+                   KeyTable.build(prefix.items()), docs)
+
+    def doc(self, doc_id: int) -> Dict[str, Any]:
+        content, source, project, etype = self.docs[doc_id]
+        if etype == "PROJECT_METADATA":
+            metadata = {"project": project, "type": etype}
+        else:
+            metadata = {"source": source, "project": project, "type": etype}
+        return {"content": content, "metadata": metadata, "score": 1.0}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        ids = self.exact.get(key)
+        return self.doc(ids[0]) if ids else None
+
+    def search_prefix(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        return [self.doc(doc_id) for doc_id in self.prefix.prefix(prefix, limit)]
+
+    def stats(self) -> Dict[str, Any]:
+        """Procjena memorije: blobovi i nizovi + arena dokumenata (tuple i stringovi)."""
+        if isinstance(self.docs, _DocArena):
+            docs_bytes = self.docs.nbytes()
+        else:
+            docs_bytes = sys.getsizeof(self.docs) + sum(
+                sys.getsizeof(doc) + sum(sys.getsizeof(v) for v in doc if v is not None) for doc in self.docs)
+        keys = len(self.exact) + len(self.prefix)
+        total = self.exact.nbytes() + self.prefix.nbytes() + docs_bytes
+        return {"keys": keys, "docs": len(self.docs), "bytes": total,
+                "bytes_per_key": round(total / keys, 1) if keys else 0.0}
+
+    def save(self, path: str, meta: Dict[str, Any]):
+        """Zapisuje indeks u snapshot (atomarno: privremena datoteka + os.replace)."""
+        if isinstance(self.docs, _DocArena):
+            docs_blob, docs_offsets = self.docs.raw()
+        else:
+            encoded = [json.dumps(doc, ensure_ascii=False).encode("utf-8") for doc in self.docs]
+            docs_offsets = array("I", [0])
+            for doc in encoded:
+                docs_offsets.append(docs_offsets[-1] + len(doc))
+            docs_blob = b"".join(encoded)
+        sections = {**self.exact.sections("exact"), **self.prefix.sections("prefix"),
+                    "docs.blob": docs_blob, "docs.offsets": docs_offsets.tobytes()}
+
+        header = dict(meta, itemsize=array("I").itemsize, byteorder=sys.byteorder, sections={})
+        # Duljina zaglavlja ovisi o offsetima sekcija, pa ih računamo s rezervom
+        placeholder = json.dumps(dict(header, sections={k: [2 ** 40, len(v)] for k, v in sections.items()}))
+        position = _align(16 + len(placeholder.encode("utf-8")))
+        for name, data in sections.items():
+            header["sections"][name] = [position, len(data)]
+            position = _align(position + len(data))
+        header_bytes = json.dumps(header).encode("utf-8")
+
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        try:
+            with open(tmp, "wb") as f:
+                f.write(SNAPSHOT_MAGIC + struct.pack("<II", SNAPSHOT_VERSION, len(header_bytes)) + header_bytes)
+                for name, data in sections.items():
+                    f.seek(header["sections"][name][0])
+                    f.write(data)
+                f.truncate(position)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    @classmethod
+    def load(cls, path: str) -> Tuple["CompactIndex", Dict[str, Any]]:
+        """
+        Memory-mapa snapshot; vraća (indeks, zaglavlje). ValueError za
+        nepoznat ili oštećen format. Stranice se učitavaju tek pri pretrazi.
+        """
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if mm[:8] != SNAPSHOT_MAGIC:
+                raise ValueError("nije FastPath snapshot")
+            version, header_len = struct.unpack_from("<II", mm, 8)
+            if version != SNAPSHOT_VERSION:
+                raise ValueError(f"nepoznata verzija snapshota: {version}")
+            header = json.loads(mm[16:16 + header_len])
+            if header.get("itemsize") != array("I").itemsize or header.get("byteorder") != sys.byteorder:
+                raise ValueError("snapshot je zapisan na drugoj platformi")
+            sections = header["sections"]
+            if any(start + size > len(mm) for start, size in sections.values()):
+                raise ValueError("snapshot je skraćen")
+        except (ValueError, KeyError, TypeError, struct.error):
+            mm.close()
+            raise
+        view = memoryview(mm)
+
+        def ints(name):
+            start, size = sections[name]
+            return view[start:start + size].cast("I")
+
+        def table(name):
+            return KeyTable(mm, ints(f"{name}.offsets"), ints(f"{name}.starts"), ints(f"{name}.ids"),
+                            base=sections[f"{name}.blob"][0])
+
+        docs = _DocArena(mm, ints("docs.offsets"), base=sections["docs.blob"][0])
+        return cls(table("exact"), table("prefix"), docs), header
+
+
+def _align(position: int) -> int:
+    return (position + 7) & ~7
+
+
+def _rust_items(docs) -> Iterable[Tuple[str, str]]:
+    """
+    (ključ, sadržaj) parovi za Rust engine, redom dokumenata iz arene (warmup
+    i punjenje iz snapshota daju iste parove, pa i isti engine).
+    """
+    for content, _, project, etype in docs:
+        if etype == "PROJECT_METADATA":
+            yield project.lower(), content
+            continue
+        content_lower = content.lower().strip()
+        if len(content) < 100:
+            yield content_lower, content
+        for word in content.split():
+            word_clean = word.lower().strip().strip(".,!?\"'()")
+            # Također dodajemo važne riječi u Rust engine kao ključeve
+            if len(word_clean) > 3 or (len(word_clean) > 2 and any(c.isdigit() for c in word_clean)):
+                yield word_clean, content
+        if "@" in content:  # Specijalno za emailove
+            yield content_lower, content
+
 
 class FastPath:
     """
     Simulacija Rust Kronos strukture za brzu pretragu.
     Sada koristi pravi Rust modul (kronos_core) ako je dostupan.
+
+    Indeks (CompactIndex, rust_engine) je nepromjenjiv snapshot koji warmup
+    gradi sa strane i objavljuje jednom dodjelom atributa, pa pretraga ne
+    treba Python lock; Rust engine ima vlastiti RwLock i pretražuje bez GIL-a.
+
+    Python indeks se nakon warmupa sprema u data/cache/fastpath.idx s
+    generacijom indeksa; start() ga memory-mapa pa je brza staza spremna
+    odmah, a ponovni warmup ide u pozadini samo kad se generacija promijeni.
+    Rust engine se ne sprema: nakon učitavanja snapshota puni se u pozadini
+    iz arene dokumenata (isti ključevi kao u warmupu).
     """
-    def __init__(self, librarian=None):
+    # Koliko entiteta warmup učitava (KRONOS_FASTPATH_ENTITIES)
+    ENTITY_LIMIT = int(os.getenv("KRONOS_FASTPATH_ENTITIES", "1000"))
+
+    def __init__(self, librarian=None, snapshot_path: Optional[str] = None):
         self.librarian = librarian
         self.is_warmed_up = False
-        self._lock = threading.Lock() # Thread safety for Rust FFI
-        
-        # Baseline structures
-        self.exact_index: Dict[str, Dict[str, Any]] = {}
-        self.prefix_trie = PrefixTrie()
+        self.generation = None  # generacija iz koje je izgrađen aktivni indeks
+        self.source = None      # "snapshot" ili "warmup"
+        self._rebuilding = threading.Lock()
+        if snapshot_path is None and librarian is not None:
+            snapshot_path = os.path.join(librarian.data_path, "cache", "fastpath.idx")
+        self.snapshot_path = snapshot_path
 
         # Rust Engine (Phase 9 - Real Rust)
-        self.rust_engine = None
+        self._rust_cls = None
+        rust_engine = None
         try:
             from src.modules.kronos_core import FastPath as RustFastPath
-            self.rust_engine = RustFastPath()
+            self._rust_cls = RustFastPath
+            rust_engine = RustFastPath()
             # print("--- FastPath: Rust engine ucitan! ---")
         except ImportError:
             # print("INFO: FastPath: Rust engine nije pronadjen, koristim Python fallback.")
             pass
 
+        self._index = (CompactIndex(), rust_engine)
+
+    @property
+    def index(self) -> CompactIndex:
+        return self._index[0]
+
+    @property
+    def rust_engine(self):
+        return self._index[1]
+
+    def stats(self) -> Dict[str, Any]:
+        """Veličina aktivnog indeksa (Rust engine ako je učitan, inače Python)."""
+        index, rust_engine = self._index
+        if rust_engine is not None:
+            stats = dict(rust_engine.stats())
+            keys = stats["exact_keys"] + stats["prefix_keys"]
+            stats.update(engine="rust", keys=keys,
+                         bytes_per_key=round(stats["bytes"] / keys, 1) if keys else 0.0)
+            return stats
+        return dict(index.stats(), engine="python")
+
+    def status(self) -> Dict[str, Any]:
+        """Spremnost brze staze za /health."""
+        current = self._current_generation()
+        return {
+            "ready": self.is_warmed_up,
+            "source": self.source,
+            "generation": self.generation,
+            "stale": self.is_warmed_up and current is not None and current != self.generation,
+            "rebuilding": self._rebuilding.locked(),
+            "engine": "rust" if self.rust_engine is not None else "python",
+        }
+
+    def start(self):
+        """
+        Pokretanje servisa: učita snapshot s diska (ako postoji) i pokrene
+        pozadinski warmup samo ako snapshot nedostaje ili je zastario.
+        """
+        if not self.librarian:
+            return
+        loaded = self.load_snapshot()
+        if not self.refresh(self._current_generation()) and loaded and self._rust_cls:
+            self._in_background(self._fill_rust_engine)
+
+    def refresh(self, generation=None):
+        """Pokreće pozadinski warmup ako je indeks izgrađen iz druge generacije."""
+        if not self.librarian or (self.is_warmed_up and generation == self.generation):
+            return False
+        return self._in_background(self.warmup)
+
+    def _in_background(self, task) -> bool:
+        """Pokreće task u pozadinskom threadu; najviše jedan odjednom (False ako je zauzet)."""
+        if not self._rebuilding.acquire(blocking=False):
+            return False
+
+        def run():
+            try:
+                task()
+            except Exception as e:
+                logger.warning(f"FastPath: {task.__name__} nije uspio: {e}")
+            finally:
+                self._rebuilding.release()
+
+        threading.Thread(target=run, daemon=True).start()
+        return True
+
+    def _fill_rust_engine(self):
+        """Puni Rust engine iz učitanog snapshota i objavljuje ga uz isti indeks."""
+        index = self.index
+        rust_engine = self._rust_cls()
+        rust_engine.insert_many(list(_rust_items(index.docs)))
+        if self._index[0] is index:  # u međuvremenu nije objavljen novi warmup
+            self._index = (index, rust_engine)
+
+    def load_snapshot(self) -> bool:
+        """
+        Memory-mapa snapshot ako odgovara postavkama. Dok start() ne napuni
+        Rust engine, pretražuje Python indeks.
+        """
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            index, header = CompactIndex.load(self.snapshot_path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"FastPath: snapshot {self.snapshot_path} nije čitljiv ({e}), gradim iznova")
+            return False
+        if header.get("entity_limit") != self.ENTITY_LIMIT:
+            return False
+        self._index = (index, None)
+        self.generation = header.get("generation")
+        self.source = "snapshot"
+        self.is_warmed_up = True
+        return True
+
+    def save_snapshot(self):
+        if not self.snapshot_path:
+            return
+        try:
+            self.index.save(self.snapshot_path, {"generation": self.generation, "entity_limit": self.ENTITY_LIMIT})
+        except OSError as e:
+            logger.warning(f"FastPath: snapshot nije spremljen: {e}")
+
+    def _current_generation(self):
+        if not self.librarian:
+            return None
+        try:
+            return self.librarian.get_generation()
+        except Exception:
+            return None
+
     def warmup(self):
-        """Puni memorijski indeks najvažnijim entitetima radi brzine."""
+        """
+        Puni memorijski indeks najvažnijim entitetima radi brzine.
+        Novi indeks se gradi sa strane i zamjenjuje postojeći atomarno,
+        tako da paralelne pretrage nikad ne vide napola napunjen indeks.
+        """
         if not self.librarian:
             return
-            
+
         print("--- FastPath: Zagrijavam memorijski indeks... ---")
+        # Generaciju čitamo prije upita: promjena tijekom warmupa ostavlja
+        # indeks zastarjelim pa ga idući refresh gradi ponovo
+        generation = self._current_generation()
+        docs: List[tuple] = []
+        exact: Dict[str, int] = {}
+        prefix: Dict[str, List[int]] = {}
+        rust_engine = self._rust_cls() if self._rust_cls else None
+
+        def add_prefix(key, doc_id):
+            ids = prefix.setdefault(key, [])
+            if len(ids) < CompactIndex.MAX_DOCS_PER_KEY and doc_id not in ids:
+                ids.append(doc_id)
+
         # 1. Dohvati sve entitete (odluke, naslove, emailove)
         # Ovdje simuliramo punjenje iz SQLite-a
         stats = self.librarian.get_stats()
         if stats.get('entities'):
             # Koristimo direktan upit za brzinu
-            import sqlite3
-            conn = sqlite3.connect(self.librarian.meta_path)
+            conn = self.librarian._get_sqlite_conn()
             cursor = conn.cursor()
-            cursor.execute("SELECT type, content, file_path, project FROM entities LIMIT 1000")
+            cursor.execute("SELECT type, content, file_path, project FROM entities LIMIT ?", (self.ENTITY_LIMIT,))
             rows = cursor.fetchall()
             conn.close()
 
             for etype, content, path, project in rows:
                 if content is None:
                     continue
-                
-                doc = {
-                    "content": content,
-                    "metadata": {"source": path, "project": project, "type": etype},
-                    "score": 1.0
-                }
+
+                doc_id = len(docs)
+                docs.append((content, path, project, etype))
 
                 # Index za literal match (emailovi, kratki stringovi)
                 content_lower = content.lower().strip()
                 if len(content) < 100:
-                    self.exact_index[content_lower] = doc
-                    if self.rust_engine:
-                        with self._lock:
-                            self.rust_engine.insert(content_lower, content)
-                
+                    exact[content_lower] = doc_id
+
                 # Index za prefix i ključne riječi (pomaže da 'T034' nadje cijelu rečenicu)
                 words = content.split()
-                for word in words: 
+                for word in words:
                     word_clean = word.lower().strip().strip(".,!?\"'()")
                     if len(word_clean) > 2:
-                        self.prefix_trie.insert(word_clean, doc)
-                        # Također dodajemo važne riječi u Rust engine kao ključeve
-                        if self.rust_engine and (len(word_clean) > 3 or any(c.isdigit() for c in word_clean)):
-                            with self._lock:
-                                self.rust_engine.insert(word_clean, content)
-                
+                        add_prefix(word_clean, doc_id)
+
                 if "@" in content: # Specijalno za emailove
-                    self.prefix_trie.insert(content_lower, doc)
-                    if self.rust_engine:
-                        with self._lock:
-                            self.rust_engine.insert(content_lower, content)
+                    add_prefix(content_lower, doc_id)
 
             # 2. DODATNO: Indexiraj imena projekata kao super-brze ulaze
-            from src.modules.librarian import Librarian
-            lib = Librarian()
-            proj_stats = lib.get_project_stats()
+            proj_stats = self.librarian.get_project_stats()
             for p_name in proj_stats.keys():
                 if p_name:
                     p_name_lower = p_name.lower()
-                    if self.rust_engine:
-                        with self._lock:
-                            self.rust_engine.insert(p_name_lower, f"Projekt: {p_name}")
-                    
-                    p_doc = {
-                        "content": f"Projekt: {p_name}",
-                        "metadata": {"project": p_name, "type": "PROJECT_METADATA"},
-                        "score": 1.0
-                    }
-                    self.exact_index[p_name_lower] = p_doc
-                    self.prefix_trie.insert(p_name_lower, p_doc)
+                    doc_id = len(docs)
+                    docs.append((f"Projekt: {p_name}", None, p_name, "PROJECT_METADATA"))
+                    exact[p_name_lower] = doc_id
+                    add_prefix(p_name_lower, doc_id)
+
+        index = CompactIndex.build(docs, exact, prefix)
+        if rust_engine is not None:
+            rust_engine.insert_many(list(_rust_items(docs)))
 
+        # 3. Atomarna zamjena indeksa (jedna dodjela; stari indeks ostaje živ
+        #    dok ga drže pretrage u tijeku)
+        self._index = (index, rust_engine)
+        self.generation = generation
+        self.source = "warmup"
         self.is_warmed_up = True
-        # with self._lock:
-        #     count = self.rust_engine.__len__() if self.rust_engine else len(self.exact_index)
+        self.save_snapshot()
+        # count = self.rust_engine.__len__() if self.rust_engine else len(self.index.exact)
         # print(f"DONE: FastPath zagrijan s {count} literalnih ulaza.")
 
     def search(self, query: str) -> Optional[Dict[str, Any]]:
@@ -141,10 +507,10 @@ class FastPath:
         Glavna pretraga brze staze.
         Vraća rezultate samo ako je 'confidence' maksimalan.
         """
-        if self.rust_engine:
-            with self._lock:
-                rust_res = self.rust_engine.search(query)
-            
+        index, rust_engine = self._index
+        if rust_engine:
+            rust_res = rust_engine.search(query)
+
             if rust_res:
                 print(f"DEBUG: FastPath Rust Match found for '{query}': {rust_res.get('type')}")
                 return {
@@ -164,8 +530,8 @@ class FastPath:
         normalized_query = query.lower().strip()
 
         # 1. L0: Exact Match (0.01ms)
-        if normalized_query in self.exact_index:
-            res = self.exact_index[normalized_query]
+        res = index.get(normalized_query)
+        if res is not None:
             print(f"DEBUG: FastPath ExactMatch found for '{normalized_query}'")
             return {
                 "type": "ExactMatch",
@@ -176,17 +542,17 @@ class FastPath:
         # 2. L1: Email/Literal detection (Regex fast path)
         email_match = re.search(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', query)
         if email_match:
-            email = email_match.group(0).lower()
-            if email in self.exact_index:
+            res = index.get(email_match.group(0).lower())
+            if res is not None:
                 return {
                     "type": "LiteralEmailMatch",
                     "confidence": 1.0,
-                    "data": {"entities": [self.exact_index[email]], "chunks": []}
+                    "data": {"entities": [res], "chunks": []}
                 }
 
         # 3. L1: Prefix Search (0.1ms)
         if len(normalized_query) >= 3:
-            prefix_results = self.prefix_trie.search(normalized_query)
+            prefix_results = index.search_prefix(normalized_query)
             if prefix_results:
                 # Provjeri je li prvi rezultat baš dobar (npr. query je cijeli prefiks prve riječi)
                 first = prefix_results[0]
@@ -0,0 +1,251 @@
+"""
+Višejezgreni ingest pipeline.
+
+Faze:
+1. Process pool (N jezgri): čitanje, dekodiranje, chunking, stemiranje, ekstrakcija.
+   Sve je čisti CPU rad bez pristupa bazama, pa ide u zasebne procese (GIL).
+2. Batching: pripremljene datoteke se grupiraju dok ne skupe dovoljno chunkova
+   za jedan veći embedding poziv.
+3. Jedan writer thread: jedini piše u SQLite i Chroma, batch po batch
+   (velike transakcije, bez natjecanja za lock baze).
+
+Isti process pool koristi i rebuild iz arhive (prepare_events): dekodiranje
+JSON linija i stemiranje chunkova.
+
+Ovaj modul je namjerno lagan (bez Chroma/Oracle importa) jer ga spawn-ani
+procesi importaju pri pokretanju.
+"""
+import os
+import json
+import queue
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Optional
+
+from src.utils.stemmer import stem_text, stem_text_batch
+from src.modules.extractor import Extractor
+
+_extractor = None
+
+
+def file_sha256(file_path, block_size=1024 * 1024):
+    """SHA-256 sirovog sadržaja datoteke (None ako se ne može pročitati)."""
+    digest = hashlib.sha256()
+    try:
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(block_size), b""):
+                digest.update(block)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def chunk_content(text, chunk_size=1000):
+    """
+    Chunking koji prati brojeve linija.
+    Vraća listu dict-ova: [{'content': str, 'start_line': int, 'end_line': int}]
+    """
+    lines = text.splitlines(keepends=True)
+    chunks = []
+    current_chunk_lines = []
+    current_start_line = 1
+    current_size = 0
+
+    for i, line in enumerate(lines):
+        line_num = i + 1
+        line_len = len(line)
+
+        # Ako dodavanje linije prelazi chunk_size, spremi trenutni chunk
+        if current_size + line_len > chunk_size and current_chunk_lines:
+            chunks.append({
+                "content": "".join(current_chunk_lines).strip(),
+                "start_line": current_start_line,
+                "end_line": line_num - 1
+            })
+            current_chunk_lines = []
+            current_start_line = line_num
+            current_size = 0
+
+        current_chunk_lines.append(line)
+        current_size += line_len
+
+    if current_chunk_lines:
+        chunks.append({
+            "content": "".join(current_chunk_lines).strip(),
+            "start_line": current_start_line,
+            "end_line": len(lines)
+        })
+
+    return chunks
+
+
+def prepare_file(file_path, project="default", chunk_size=1000, content_hash=None) -> Optional[Dict[str, Any]]:
+    """
+    CPU faza obrade jedne datoteke (bez pisanja u baze).
+    Vraća dict spreman za Ingestor._write_batch; prazna datoteka nema chunkova
+    (samo se označi obrađenom s hashom, da je inkrementalni ingest preskače).
+    """
+    global _extractor
+    from src.utils.file_helper import detect_encoding
+    encoding = detect_encoding(file_path)
+    with open(file_path, 'r', encoding=encoding, errors='replace') as f:
+        content = f.read()
+
+    if not content.strip():
+        return {
+            "path": file_path,
+            "project": project,
+            "chunks": [],
+            "stemmed": [],
+            "extracted": {},
+            "content_hash": content_hash or file_sha256(file_path),
+        }
+
+    if _extractor is None:
+        _extractor = Extractor()
+
+    chunks = chunk_content(content, chunk_size)
+    return {
+        "path": file_path,
+        "project": project,
+        "chunks": chunks,
+        "stemmed": stem_text_batch([c["content"] for c in chunks], mode="aggressive"),
+        "extracted": _extractor.extract(content),
+        "content_hash": content_hash or file_sha256(file_path),
+    }
+
+
+def prepare_events(lines, since=None) -> List[tuple]:
+    """
+    CPU faza rebuilda za komad arhive: `lines` su (pozicija, sirova linija).
+    Vraća [(pozicija, zapis ili None)]; file_processed dobiva data["stemmed"]
+    (paralelno s chunks), legacy zapis polje "stemmed". None = neispravna
+    linija ili događaj stariji od `since`.
+    """
+    prepared = []
+    for position, line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            prepared.append((position, None))
+            continue
+        if since and (record.get("timestamp") or "") < since:
+            prepared.append((position, None))
+            continue
+        if record.get("event") == "file_processed":
+            data = record.get("data") or {}
+            data["stemmed"] = stem_text_batch(
+                [c if isinstance(c, str) else c.get("content", "") for c in data.get("chunks") or []],
+                mode="aggressive",
+            )
+        elif "event" not in record:
+            record["stemmed"] = stem_text(record.get("content", ""), mode="aggressive")
+        prepared.append((position, record))
+    return prepared
+
+
+def run_pipeline(
+    files: List[str],
+    project: str,
+    write_batch: Callable[[List[Dict[str, Any]]], None],
+    jobs: int = 2,
+    chunk_size: int = 1000,
+    hashes: Optional[Dict[str, str]] = None,
+    batch_chunks: int = 256,
+    on_error: Optional[Callable[[str, Exception], None]] = None,
+    on_written: Optional[Callable[[int], None]] = None,
+) -> Dict[str, int]:
+    """
+    Pokreće pipeline nad listom datoteka.
+
+    write_batch(prepared_list) se zove samo iz writer threada. Vraća
+    {"processed": n, "failed": n}.
+    """
+    hashes = hashes or {}
+    counts = {"processed": 0, "failed": 0}
+    results: "queue.Queue" = queue.Queue(maxsize=jobs * 4)
+    writer_error: List[BaseException] = []
+    _done = object()
+
+    def report_error(path, exc):
+        counts["failed"] += 1
+        if on_error:
+            on_error(path, exc)
+
+    def writer():
+        batch, batch_size = [], 0
+
+        def flush():
+            nonlocal batch, batch_size
+            if not batch:
+                return
+            try:
+                write_batch(batch)
+                counts["processed"] += len(batch)
+            except Exception as e:
+                for item in batch:
+                    report_error(item["path"], e)
+            if on_written:
+                on_written(counts["processed"] + counts["failed"])
+            batch, batch_size = [], 0
+
+        try:
+            while True:
+                item = results.get()
+                if item is _done:
+                    break
+                if isinstance(item, tuple):  # (path, exception) iz process poola
+                    report_error(*item)
+                    continue
+                batch.append(item)
+                batch_size += len(item["chunks"])
+                if batch_size >= batch_chunks:
+                    flush()
+            flush()
+        except BaseException as e:  # npr. InterruptedError iz on_written
+            writer_error.append(e)
+            # Isprazni red da feeder ne ostane blokiran
+            while results.get() is not _done:
+                pass
+
+    writer_thread = threading.Thread(target=writer, name="KronosIngestWriter", daemon=True)
+    writer_thread.start()
+
+    # spawn: roditelj drži threadove (Oracle pool, FastPath warmup), fork bi ih kopirao u nepoznatom stanju
+    ctx = multiprocessing.get_context("spawn")
+    max_in_flight = jobs * 4
+    try:
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=ctx) as pool:
+            pending = {}
+            remaining = iter(files)
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < max_in_flight and not writer_error:
+                    path = next(remaining, None)
+                    if path is None:
+                        exhausted = True
+                        break
+                    future = pool.submit(prepare_file, path, project, chunk_size, hashes.get(path))
+                    pending[future] = path
+                if writer_error:
+                    for future in pending:
+                        future.cancel()
+                    break
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = pending.pop(future)
+                    try:
+                        results.put(future.result())
+                    except Exception as e:
+                        results.put((path, e))
+    finally:
+        results.put(_done)
+        writer_thread.join()
+
+    if writer_error:
+        raise writer_error[0]
+    return counts
@@ -1,10 +1,14 @@
 import os
 import glob
+import time
+from concurrent.futures import ThreadPoolExecutor
 from src.utils.logger import logger
-from src.utils.stemmer import stem_text
+from src.utils.metadata_helper import chunk_ids
 from src.modules.librarian import Librarian
 from src.modules.oracle import Oracle
 from src.modules.extractor import Extractor
+from src.utils.event_archive import archive_exists
+from src.modules.ingest_pipeline import chunk_content, file_sha256, prepare_file, run_pipeline
 
 class Ingestor:
     def __init__(self, chunk_size=1000, db_path="data"):
@@ -13,12 +17,13 @@ class Ingestor:
         self.oracle = Oracle(os.path.join(db_path, "store"))
         self.extractor = Extractor()
         
-        if not os.path.exists(os.path.join(db_path, "archive.jsonl")):
+        if not archive_exists(self.librarian.archive_path):
             logger.warning("🚧 Kreiram novu arhivu...")
 
-    def run(self, path, project_name=None, recursive=False, silent=False):
+    def run(self, path, project_name=None, recursive=False, silent=False, incremental=False, jobs=1):
         """
         Glavna metoda za pokretanje ingestije na cijeloj putanji (folder ili file).
+        Vraća statistiku batcha (vidi run_batch).
         """
         # Detektiraj ime projekta ako nije zadan
         if not project_name:
@@ -31,26 +36,114 @@ class Ingestor:
             logger.info(f"Pokrećem Ingestora na projektu [bold cyan]{project_name}[/] (putanja: {path})")
         
         files = self._scan_files(path, recursive)
-        self.run_batch(files, project_name=project_name, silent=silent)
+        return self.run_batch(files, project_name=project_name, silent=silent, incremental=incremental, jobs=jobs)
 
-    def run_batch(self, files, project_name="default", silent=False):
+    def run_batch(self, files, project_name="default", silent=False, incremental=False, jobs=1, on_progress=None):
         """
         Obrađuje listu datoteka.
+        
+        U inkrementalnom načinu datoteke se prvo bulk stat-aju i hashiraju, a
+        preskaču se one čiji se SHA-256 sadržaja poklapa s files.hash.
+        
+        jobs > 1 pokreće višejezgreni pipeline (vidi ingest_pipeline): process pool
+        za CPU fazu i jedan writer thread za SQLite/Chroma.
+        on_progress(done, total) se zove nakon svake zapisane datoteke/batcha.
         """
+        stats = {"files": len(files or []), "processed": 0, "skipped": 0, "failed": 0,
+                 "duration_s": 0.0, "files_per_s": 0.0}
         if not files:
-            return
+            return stats
 
         if not silent:
-            logger.info(f"Ingestor obrađuje batch od {len(files)} datoteka.")
+            mode = " (inkrementalno)" if incremental else ""
+            if jobs > 1:
+                mode += f" [{jobs} procesa]"
+            logger.info(f"Ingestor obrađuje batch od {len(files)} datoteka{mode}.")
+
+        start = time.perf_counter()
+        existing = [f for f in files if os.path.exists(f)]
+        if incremental:
+            to_process, hashes, skipped = self._plan_incremental(existing)
+            stats["skipped"] = skipped
+        else:
+            to_process, hashes = existing, {}
+
+        total = len(to_process)
+        if jobs > 1 and total > 1:
+            counts = run_pipeline(
+                to_process,
+                project_name,
+                write_batch=lambda batch: self._write_batch(batch, project_name, silent=silent),
+                jobs=jobs,
+                chunk_size=self.chunk_size,
+                hashes=hashes,
+                batch_chunks=int(os.getenv("KRONOS_INGEST_BATCH_CHUNKS", "256")),
+                on_error=lambda path, e: logger.error(f"Greška pri čitanju {path}: {e}"),
+                on_written=(lambda done: on_progress(done, total)) if on_progress else None,
+            )
+            stats["processed"] += counts["processed"]
+            stats["failed"] += counts["failed"]
+        else:
+            for i, file_path in enumerate(to_process):
+                if self._process_file(file_path, project=project_name, silent=silent,
+                                      content_hash=hashes.get(file_path)):
+                    stats["processed"] += 1
+                else:
+                    stats["failed"] += 1
+                if on_progress:
+                    on_progress(i + 1, total)
 
-        processed_count = 0
-        for file_path in files:
-            if os.path.exists(file_path):
-                self._process_file(file_path, project=project_name, silent=silent)
-                processed_count += 1
+        duration = time.perf_counter() - start
+        stats["duration_s"] = round(duration, 3)
+        stats["files_per_s"] = round(len(existing) / duration, 1) if duration > 0 else 0.0
             
         if not silent:
-            logger.success(f"Batch završen. Obrađeno {processed_count} datoteka.")
+            logger.success(
+                f"Batch završen. Obrađeno {stats['processed']}, preskočeno {stats['skipped']} "
+                f"(nepromijenjeno), greške {stats['failed']} - {stats['files_per_s']} datoteka/s."
+            )
+        return stats
+
+    def _plan_incremental(self, files):
+        """
+        Vraća (datoteke_za_obradu, {path: sha256}, broj_preskočenih).
+        
+        - isti mtime i postoji hash -> preskoči (košta samo stat)
+        - drugačiji mtime, isti hash (git checkout, save bez promjene) -> preskoči,
+          osvježi mtime u bazi (košta samo hash)
+        - inače -> obradi
+        """
+        known = self.librarian.get_file_states(files)
+        mtimes = {}
+        to_hash = []
+        skipped = 0
+        for path in files:
+            try:
+                mtimes[path] = os.stat(path).st_mtime
+            except OSError:
+                continue
+            state = known.get(path)
+            if state and state[1] and state[0] == mtimes[path]:
+                skipped += 1
+            else:
+                to_hash.append(path)
+
+        # Hashiranje je I/O vezano, hashlib otpušta GIL za veće blokove
+        with ThreadPoolExecutor(max_workers=min(8, len(to_hash)) or 1) as pool:
+            hashes = dict(zip(to_hash, pool.map(file_sha256, to_hash)))
+
+        to_process = []
+        touched = {}
+        for path in to_hash:
+            state = known.get(path)
+            if state and state[1] and hashes[path] and state[1] == hashes[path]:
+                touched[path] = mtimes[path]
+                skipped += 1
+            else:
+                to_process.append(path)
+
+        self.librarian.update_file_mtimes(touched)
+        return to_process, hashes, skipped
 
     def _scan_files(self, path, recursive):
         """
@@ -96,117 +189,90 @@ class Ingestor:
         
         return list(set(files)) # Unique files
     
-    def _process_file(self, file_path, project="default", silent=False):
+    def _process_file(self, file_path, project="default", silent=False, content_hash=None):
         """
         Čita datoteku, dijeli je na chunkove i sprema.
+        Vraća False ako obrada nije uspjela.
         """
         try:
-            from src.utils.file_helper import detect_encoding
-            encoding = detect_encoding(file_path)
-            with open(file_path, 'r', encoding=encoding, errors='replace') as f:
-                content = f.read()
-                
-            if not content.strip():
-                return
-                
-            chunks = self._chunk_content(content)
+            prepared = prepare_file(file_path, project, self.chunk_size, content_hash)
+            self._write_batch([prepared], project, silent=silent)
+            return True
+            
+        except Exception as e:
+            logger.error(f"Greška pri čitanju {file_path}: {e}")
+            return False
+
+    def _write_batch(self, prepared, project="default", silent=False):
+        """
+        Faza pisanja za pripremljene datoteke (prepare_file): FTS u jednoj
+        transakciji, entiteti, arhiva, jedan Chroma sync za cijeli batch.
+        Prazne datoteke se samo označe obrađenima (s hashom).
+        """
+        written = [item for item in prepared if item["chunks"]]
+
+        # 1. FTS (stari zapisi se brišu u istoj transakciji)
+        self.librarian.replace_fts_many([
+            (item["path"], project, [
+                (c["content"], stemmed, c.get("start_line", 1), c.get("end_line", 1))
+                for c, stemmed in zip(item["chunks"], item["stemmed"])
+            ])
+            for item in written
+        ])
+
+        sync_files = []
+        for item in written:
+            file_path = item["path"]
+            chunks = item["chunks"]
+            extracted_data = item["extracted"]
             file_meta = {
                 "source": file_path, 
                 "filename": os.path.basename(file_path),
                 "project": project
             }
-            
-            # 1. Pripremi FTS (očisti stare zapise)
-            self.librarian.delete_fts(file_path)
 
-            for chunk_data in chunks:
-                chunk_text = chunk_data["content"]
-                stemmed_chunk = stem_text(chunk_text, mode="aggressive")
-                self.librarian.store_fts(
-                    file_path, 
-                    chunk_text, 
-                    stemmed_chunk, 
-                    project=project,
-                    start_line=chunk_data.get("start_line", 1),
-                    end_line=chunk_data.get("end_line", 1)
-                )
-            
-            # 2. Ekstrakcija i pohrana strukturiranih podataka
-            extracted_data = self.extractor.extract(content)
+            # 2. Pohrana strukturiranih podataka
             if any(extracted_data.values()):
                 self.librarian.store_extracted_data(file_path, extracted_data, project=project)
-                summary = self.extractor.summarize_extraction(extracted_data)
                 if not silent:
+                    summary = self.extractor.summarize_extraction(extracted_data)
                     logger.info(f"   Strukturirano znanje: {summary}")
 
             # 3. Spremi u arhivu (JSONL)
             self.librarian.store_archive(chunks, file_meta, extracted_data=extracted_data)
-            
-            # Vektorizacija (ChromaDB)
-            ids = []
+
             final_metas = []
             final_docs = []
-            
-            for i, chunk_data in enumerate(chunks):
-                uid = f"{os.path.basename(file_path)}_{i}_{hash(chunk_data['content'])}"
-                ids.append(uid)
-                
+            for chunk_data in chunks:
                 chunk_meta = file_meta.copy()
                 chunk_meta["start_line"] = chunk_data["start_line"]
                 chunk_meta["end_line"] = chunk_data["end_line"]
-                
                 final_metas.append(chunk_meta)
                 final_docs.append(chunk_data["content"])
-            
-            self.oracle.safe_upsert(
-                documents=final_docs,
-                metadatas=final_metas,
-                ids=ids
+            sync_files.append((file_path, final_docs, final_metas, chunk_ids(project, file_path, final_docs)))
+
+        # 4. Označi kao obrađeno i invalidiraj cacheve upita; ide pod lockom
+        # vektorske baze zajedno s upisom, da backup ne snimi upis bez bumpa
+        def mark_written():
+            self.librarian.mark_files_processed([(item["path"], project, item["content_hash"]) for item in prepared])
+            self.librarian.bump_generation()
+
+        # Vektorizacija (ChromaDB) - stabilni ID-jevi, upisuju se samo novi/promijenjeni chunkovi
+        sync = self.oracle.sync_chunks_many(project, sync_files, on_written=mark_written)
+
+        if not silent and written:
+            names = ", ".join(os.path.basename(item["path"]) for item in written[:3])
+            if len(written) > 3:
+                names += f" (+{len(written) - 3})"
+            logger.success(
+                f"Vektorizirano: {names} [{project}] "
+                f"(+{sync['added']} / -{sync['deleted']}, nepromijenjeno {sync['unchanged']})"
             )
-            
-            # 4. Označi kao obrađeno
-            self.librarian.mark_as_processed(file_path, project=project)
-            
-            if not silent:
-                logger.success(f"Vektorizirano: {os.path.basename(file_path)} [{project}]")
-            
-        except Exception as e:
-            logger.error(f"Greška pri čitanju {file_path}: {e}")
+        return sync
 
     def _chunk_content(self, text):
         """
         Chunking koji prati brojeve linija.
         Vraća listu dict-ova: [{'content': str, 'start_line': int, 'end_line': int}]
         """
-        lines = text.splitlines(keepends=True)
-        chunks = []
-        current_chunk_lines = []
-        current_start_line = 1
-        current_size = 0
-        
-        for i, line in enumerate(lines):
-            line_num = i + 1
-            line_len = len(line)
-            
-            # Ako dodavanje linije prelazi chunk_size, spremi trenutni chunk
-            if current_size + line_len > self.chunk_size and current_chunk_lines:
-                chunks.append({
-                    "content": "".join(current_chunk_lines).strip(),
-                    "start_line": current_start_line,
-                    "end_line": line_num - 1
-                })
-                current_chunk_lines = []
-                current_start_line = line_num
-                current_size = 0
-            
-            current_chunk_lines.append(line)
-            current_size += line_len
-            
-        if current_chunk_lines:
-            chunks.append({
-                "content": "".join(current_chunk_lines).strip(),
-                "start_line": current_start_line,
-                "end_line": len(lines)
-            })
-            
-        return chunks
+        return chunk_content(text, self.chunk_size)
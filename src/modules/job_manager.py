@@ -7,6 +7,8 @@ from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any, Union
 import os
 
+from src.utils.sqlite_pool import get_connection
+
 class JobManager:
     """
     Manages the persistent job queue using SQLite.
@@ -26,20 +28,12 @@ class JobManager:
             os.makedirs(directory, exist_ok=True)
 
     def _get_connection(self):
-        """Returns a sqlite3 connection with Row factory."""
-        conn = sqlite3.connect(self.db_path, timeout=30)
-        conn.row_factory = sqlite3.Row
-        # Omogući WAL mode za bolju konkurentnost na Windowsima
-        try:
-            conn.execute("PRAGMA journal_mode=WAL")
-        except:
-            pass
-        return conn
+        """Returns the calling thread's pooled sqlite3 connection with Row factory (close() releases it)."""
+        return get_connection(self.db_path, row_factory=sqlite3.Row)
 
     def _execute(self, query: str, params: tuple = (), fetch_one: bool = False, fetch_all: bool = False) -> Any:
         """Helper to execute a query and close the connection."""
         conn = self._get_connection()
-        conn.row_factory = sqlite3.Row
         try:
             cursor = conn.cursor()
             cursor.execute(query, params)
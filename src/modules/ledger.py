@@ -1,9 +1,10 @@
-import sqlite3
 import time
 import os
 from dataclasses import dataclass
 from typing import Dict, Any, List
 
+from src.utils.sqlite_pool import get_connection
+
 @dataclass
 class SavingsRecord:
     timestamp: float
@@ -22,7 +23,7 @@ class SavingsLedger:
     def _init_db(self):
         """Kreira tablicu ako ne postoji."""
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-        with sqlite3.connect(self.db_path) as conn:
+        with get_connection(self.db_path) as conn:
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS savings_log (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -44,7 +45,7 @@ class SavingsLedger:
         saved = max(0, potential - actual)
         timestamp = time.time()
         
-        with sqlite3.connect(self.db_path) as conn:
+        with get_connection(self.db_path) as conn:
             conn.execute("""
                 INSERT INTO savings_log 
                 (timestamp, query, model, tokens_potential, tokens_actual, tokens_saved, usd_saved)
@@ -56,7 +57,7 @@ class SavingsLedger:
         """Vraća ukupnu statistiku za zadnjih N dana."""
         cutoff = time.time() - (days * 86400)
         
-        with sqlite3.connect(self.db_path) as conn:
+        with get_connection(self.db_path) as conn:
             # Ukupno
             cursor = conn.execute("""
                 SELECT 
@@ -92,7 +93,7 @@ class SavingsLedger:
 
     def get_recent_transactions(self, limit: int = 5) -> List[SavingsRecord]:
         """Vraća zadnjih N transakcija."""
-        with sqlite3.connect(self.db_path) as conn:
+        with get_connection(self.db_path) as conn:
             cursor = conn.execute("""
                 SELECT timestamp, query, model, tokens_potential, tokens_actual, tokens_saved, usd_saved 
                 FROM savings_log 
@@ -1,12 +1,118 @@
 import os
+import re
 import sqlite3
 import json
 import hashlib
-from datetime import datetime
+from datetime import date, datetime
 from colorama import Fore, Style
 from src.utils.logger import logger
 import chromadb
-from src.utils.metadata_helper import validate_metadata, enrich_metadata
+from src.utils.metadata_helper import validate_metadata, enrich_metadata, entity_key
+from src.utils.stemmer import stem_text_batch
+from src.utils.sqlite_pool import get_connection
+from src.utils.archive_writer import get_archive_writer, flush_all_writers, close_all_writers
+from src.utils.event_archive import segment_dir
+
+# Otvoreni krajevi intervala valjanosti (epoch-dani; R*Tree koordinate su float32,
+# cijeli brojevi do 2^24 su egzaktni)
+OPEN_START_DAY = -1_000_000
+OPEN_END_DAY = 10_000_000
+_EPOCH = date(1970, 1, 1)
+
+
+def epoch_day(value):
+    """ISO datum ('YYYY-MM-DD', opcionalno s vremenom) -> broj dana od 1970-01-01, ili None."""
+    if not value:
+        return None
+    try:
+        return (date.fromisoformat(str(value)[:10]) - _EPOCH).days
+    except ValueError:
+        return None
+
+
+def _sql_epoch_day(column, open_bound):
+    # date() vraća NULL za neispravan datum -> otvoreni kraj intervala
+    return f"COALESCE(CAST(julianday(date({column})) - 2440587.5 AS INTEGER), {int(open_bound)})"
+
+
+# Verzionirane migracije sheme (PRAGMA user_version). Svaka se izvršava jednom,
+# redom; nova verzija = novi unos na kraju liste, postojeći se ne mijenjaju.
+SCHEMA_MIGRATIONS = [
+    (1, [
+        # store_extracted_data / _delete_entities: DELETE ... WHERE file_path = ?
+        "CREATE INDEX IF NOT EXISTS idx_entities_file_path ON entities(file_path)",
+        # save_entity duplikati (type, content, project); get_decisions / get_active_decisions (type, project)
+        "CREATE INDEX IF NOT EXISTS idx_entities_type_project_content ON entities(type, project, content)",
+        # get_project_stats: GROUP BY project, type (covering)
+        "CREATE INDEX IF NOT EXISTS idx_entities_project_type ON entities(project, type)",
+        # get_project_stats: files GROUP BY project (covering)
+        "CREATE INDEX IF NOT EXISTS idx_files_project ON files(project)",
+    ]),
+    (2, [
+        # Pravi FK lanca odluka umjesto parsiranja "Decision #N" iz teksta
+        "ALTER TABLE entities ADD COLUMN superseded_by_id INTEGER REFERENCES entities(id)",
+        # Postojeći zapisi: CAST uzima vodeći broj iz "N: tekst" iza "Decision #"
+        """
+        UPDATE entities SET superseded_by_id = (
+            SELECT t.id FROM entities t
+            WHERE t.id = CAST(substr(entities.superseded_by, instr(entities.superseded_by, 'Decision #') + 10) AS INTEGER)
+        )
+        WHERE instr(superseded_by, 'Decision #') > 0
+        """,
+        # get_decision_history: pretci (WHERE superseded_by_id = ?)
+        "CREATE INDEX IF NOT EXISTS idx_entities_superseded_by_id ON entities(superseded_by_id)",
+    ]),
+    (3, [
+        # Interval indeks valjanosti odluka u epoch-danima: "aktivne na dan X" i
+        # "promijenjene između A i B" su R*Tree pretrage umjesto usporedbe ISO stringova
+        "CREATE VIRTUAL TABLE IF NOT EXISTS decision_validity USING rtree(id, valid_from_day, valid_to_day)",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS decision_validity_ai AFTER INSERT ON entities WHEN new.type = 'decision' BEGIN
+            INSERT INTO decision_validity (id, valid_from_day, valid_to_day)
+            VALUES (new.id, {_sql_epoch_day('new.valid_from', OPEN_START_DAY)}, {_sql_epoch_day('new.valid_to', OPEN_END_DAY)});
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS decision_validity_ad AFTER DELETE ON entities WHEN old.type = 'decision' BEGIN
+            DELETE FROM decision_validity WHERE id = old.id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS decision_validity_au AFTER UPDATE OF type, valid_from, valid_to ON entities BEGIN
+            DELETE FROM decision_validity WHERE id = old.id;
+            INSERT INTO decision_validity (id, valid_from_day, valid_to_day)
+            SELECT new.id, {_sql_epoch_day('new.valid_from', OPEN_START_DAY)}, {_sql_epoch_day('new.valid_to', OPEN_END_DAY)}
+            WHERE new.type = 'decision';
+        END
+        """,
+        f"""
+        INSERT OR REPLACE INTO decision_validity (id, valid_from_day, valid_to_day)
+        SELECT id, {_sql_epoch_day('valid_from', OPEN_START_DAY)}, {_sql_epoch_day('valid_to', OPEN_END_DAY)}
+        FROM entities WHERE type = 'decision'
+        """,
+    ]),
+    (4, [
+        # Porijeklo entiteta: 'extracted' (store_extracted_data), 'supersede', 'manual'.
+        # Diff u store_extracted_data briše samo ekstrahirane; NULL = zapis od prije migracije
+        "ALTER TABLE entities ADD COLUMN origin TEXT",
+    ]),
+]
+
+# Maksimalna dubina lanca odluka (zaštita od ciklusa u WITH RECURSIVE)
+LINEAGE_MAX_DEPTH = 1000
+
+
+def parse_superseded_id(superseded_by):
+    """Vraća ID iz "Decision #N[: tekst]" ili None."""
+    if not superseded_by:
+        return None
+    match = re.search(r'Decision #(\d+)', str(superseded_by))
+    return int(match.group(1)) if match else None
+
+
+def _ref_key(etype, content, preview):
+    """Hash iz entity_key kakav koristi diff u store_extracted_data."""
+    return entity_key(etype, content, preview if etype == 'code' else None)[1]
 
 class Librarian:
     def __init__(self, data_path="data"):
@@ -34,83 +140,107 @@ class Librarian:
         
         self.api_key = os.getenv("GEMINI_API_KEY")
         self.embedding_function = None
-        if self.api_key:
-            try:
-                from chromadb.utils import embedding_functions
-                self.embedding_function = embedding_functions.GoogleGenerativeAiEmbeddingFunction(
-                    api_key=self.api_key,
-                    model_name="models/gemini-embedding-001"
-                )
-            except Exception as e:
-                print(f"⚠️ Librarian: Could not init Gemini embeddings: {e}")
+        try:
+            from src.utils.embedding_cache import build_embedding_function
+            self.embedding_function = build_embedding_function(
+                self.api_key, os.path.join(self.data_path, "cache")
+            )
+        except Exception as e:
+            print(f"⚠️ Librarian: Could not init Gemini embeddings: {e}")
 
         # Chroma se inicijalizira lazy (na prvi poziv)
         self.chroma_client = None
+        self._collection = None
         
     def _get_sqlite_conn(self):
-        """Vraća SQLite konekciju s WAL modom i timeoutom."""
-        conn = sqlite3.connect(self.meta_path, timeout=30)
-        try:
-            conn.execute("PRAGMA journal_mode=WAL")
-        except:
-            pass
-        return conn
+        """
+        Vraća keširanu SQLite konekciju trenutnog threada (WAL, pragme, statement cache).
+        close() je vraća u pool, ne zatvara je.
+        """
+        return get_connection(self.meta_path)
 
     def _get_collection(self):
-        """Helper za dohvat ChromaDB kolekcije."""
+        """Helper za dohvat ChromaDB kolekcije (handle se kešira nakon prvog poziva)."""
+        if self._collection is not None:
+            return self._collection
         if not self.chroma_client:
             self.chroma_client = chromadb.PersistentClient(path=self.store_path)
         
-        # Ako imamo custom embedding function (npr. Gemini), koristi je.
+        # Ako imamo custom embedding function (npr. Gemini), vektore računa ona.
         # Inače, ChromaDB koristi default model (all-MiniLM-L6-v2).
-        kwargs = {"name": "kronos_memory"}
-        if self.embedding_function is not None:
-            kwargs["embedding_function"] = self.embedding_function
-            
-        return self.chroma_client.get_or_create_collection(**kwargs)
+        from src.utils.embedding_cache import open_collection
+        self._collection = open_collection(self.chroma_client, "kronos_memory", self.embedding_function,
+                                           store_dir=self.store_path)
+        return self._collection
 
     def _index_entity(self, eid, etype, content, project=None, source=None):
         """Indeksira entitet u ChromaDB za semantičku pretragu."""
-        if not content or not content.strip():
-            return
-            
-        try:
-            collection = self._get_collection()
+        self._index_entities([(eid, etype, content, project, source)])
+
+    def _index_entities(self, items, batch_size=None):
+        """
+        Batch indeksiranje entiteta u ChromaDB.
+        items: iterable (eid, etype, content, project, source). Upsert ide u
+        komadima od batch_size (KRONOS_ENTITY_BATCH, default 256), pa se
+        embedding funkcija zove jednom po komadu, a ne po entitetu.
+        Vraća broj indeksiranih entiteta.
+        """
+        batch_size = batch_size or int(os.getenv("KRONOS_ENTITY_BATCH", "256"))
+        created_at = datetime.now().isoformat()
+        ids, documents, metadatas = [], [], []
+        for eid, etype, content, project, source in items:
+            if not content or not content.strip():
+                continue
             meta = {
                 "source": source or "manual",
                 "project": project or "default",
                 "type": "entity",
                 "entity_type": etype,
                 "entity_id": eid,
-                "created_at": datetime.now().isoformat()
+                "created_at": created_at
             }
             
             if not validate_metadata(meta):
                 print(f"{Fore.RED}ERROR: Metadata Validation Failed for entity_{eid}. Skipping.{Style.RESET_ALL}")
-                return
+                continue
                 
+            ids.append(f"entity_{eid}")
+            documents.append(content)
             # Enrich metadata
-            final_meta = enrich_metadata(content, meta)
-            
-            collection.upsert(
-                ids=[f"entity_{eid}"],
-                documents=[content],
-                metadatas=[final_meta]
-            )
+            metadatas.append(enrich_metadata(content, meta))
+
+        if not ids:
+            return 0
+
+        indexed = 0
+        try:
+            collection = self._get_collection()
         except Exception as e:
-            print(f"{Fore.RED}Greška pri indeksiranju entiteta #{eid}: {e}{Style.RESET_ALL}")
+            print(f"{Fore.RED}Greška pri indeksiranju entiteta: {e}{Style.RESET_ALL}")
+            return 0
+        for i in range(0, len(ids), batch_size):
+            try:
+                collection.upsert(
+                    ids=ids[i:i + batch_size],
+                    documents=documents[i:i + batch_size],
+                    metadatas=metadatas[i:i + batch_size]
+                )
+                indexed += len(ids[i:i + batch_size])
+            except Exception as e:
+                print(f"{Fore.RED}Greška pri indeksiranju entiteta ({ids[i]}..): {e}{Style.RESET_ALL}")
+        return indexed
 
-    def _delete_entities_from_chroma(self, source_path):
-        """Briše sve entitete vezane uz datoteku iz ChromaDB."""
+    def _delete_entity_vectors(self, entity_ids):
+        """Briše vektore zadanih entiteta iz ChromaDB."""
+        if not entity_ids:
+            return
         try:
             collection = self._get_collection()
-            # Brisanje po metapodatku 'source' i 'type'='entity'
-            collection.delete(where={"$and": [{"source": source_path}, {"type": "entity"}]})
+            collection.delete(ids=[f"entity_{eid}" for eid in entity_ids])
         except Exception as e:
             # Ignoriraj ako kolekcija ne postoji ili je prazna
             pass
 
-
     def _init_sqlite(self):
         """Kreira tablice za praćenje datoteka i FTS pretragu."""
         conn = self._get_sqlite_conn()
@@ -167,6 +297,56 @@ class Librarian:
             )
         ''')
         
+        # 3b. FTS5 indeks nad sadržajem entiteta (external content), sinkroniziran triggerima
+        try:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'entities_fts'")
+            fts_exists = cursor.fetchone() is not None
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS entities_fts USING fts5(
+                    content,
+                    type UNINDEXED,
+                    project UNINDEXED,
+                    content='entities',
+                    content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+            ''')
+            cursor.execute('''
+                CREATE TRIGGER IF NOT EXISTS entities_fts_ai AFTER INSERT ON entities BEGIN
+                    INSERT INTO entities_fts(rowid, content, type, project)
+                    VALUES (new.id, new.content, new.type, new.project);
+                END
+            ''')
+            cursor.execute('''
+                CREATE TRIGGER IF NOT EXISTS entities_fts_ad AFTER DELETE ON entities BEGIN
+                    INSERT INTO entities_fts(entities_fts, rowid, content, type, project)
+                    VALUES ('delete', old.id, old.content, old.type, old.project);
+                END
+            ''')
+            cursor.execute('''
+                CREATE TRIGGER IF NOT EXISTS entities_fts_au AFTER UPDATE OF content, type, project ON entities BEGIN
+                    INSERT INTO entities_fts(entities_fts, rowid, content, type, project)
+                    VALUES ('delete', old.id, old.content, old.type, old.project);
+                    INSERT INTO entities_fts(rowid, content, type, project)
+                    VALUES (new.id, new.content, new.type, new.project);
+                END
+            ''')
+            if not fts_exists:
+                # Postojeća baza: napuni indeks iz entities
+                cursor.execute("INSERT INTO entities_fts(entities_fts) VALUES ('rebuild')")
+            self.entities_fts_available = True
+        except sqlite3.OperationalError:
+            self.entities_fts_available = False
+
+        # 4. Generacija indeksa - raste pri svakoj promjeni znanja (invalidacija cacheva)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS index_state (
+                key TEXT PRIMARY KEY,
+                value INTEGER
+            )
+        ''')
+        cursor.execute("INSERT OR IGNORE INTO index_state (key, value) VALUES ('generation', 0)")
+        
         # PROVJERA: Ako tablice postoje ali nemaju nove stupce, dodaj ih (migracija)
         try:
             cursor.execute("ALTER TABLE files ADD COLUMN project TEXT")
@@ -186,30 +366,96 @@ class Librarian:
                 pass
             
         conn.commit()
+        self._migrate(conn)
         conn.close()
 
+    def _migrate(self, conn):
+        """Primjenjuje migracije novije od PRAGMA user_version i zatim pokreće ANALYZE."""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        pending = [(v, statements) for v, statements in SCHEMA_MIGRATIONS if v > version]
+        if not pending:
+            return
+        for target, statements in pending:
+            with conn:
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {int(target)}")
+            logger.info(f"INFO: Migracija sheme metadata.db -> v{target}")
+        # Statistika za query planner (sqlite_stat1) nakon novih indeksa
+        conn.execute("ANALYZE")
+        conn.commit()
+
+    def get_generation(self):
+        """Vraća trenutnu generaciju indeksa (0 ako nije dostupna)."""
+        conn = self._get_sqlite_conn()
+        try:
+            row = conn.execute("SELECT value FROM index_state WHERE key = 'generation'").fetchone()
+            return row[0] if row else 0
+        except sqlite3.Error:
+            return 0
+        finally:
+            conn.close()
+
+    def _bump_generation(self, cursor):
+        """Povećava generaciju indeksa unutar postojeće transakcije."""
+        cursor.execute("UPDATE index_state SET value = value + 1 WHERE key = 'generation'")
+
+    def bump_generation(self):
+        """Označava da se indeks promijenio (npr. nakon obrade datoteke)."""
+        conn = self._get_sqlite_conn()
+        try:
+            self._bump_generation(conn.cursor())
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"{Fore.RED}Greška pri povećanju generacije indeksa: {e}{Style.RESET_ALL}")
+        finally:
+            conn.close()
+
     def search_entities(self, query, etype=None, project=None, limit=5):
-        """Pretražuje ekstrahirane entitete po sadržaju."""
+        """
+        Pretražuje ekstrahirane entitete po sadržaju.
+        FTS5 (entities_fts) s bm25 rangiranjem; LIKE samo ako FTS5 nije dostupan.
+        """
+        match = self._entity_match_query(query)
+        if not match:
+            return []
+
         conn = self._get_sqlite_conn()
         cursor = conn.cursor()
-        
-        sql = "SELECT id, file_path, project, type, content, created_at FROM entities WHERE content LIKE ?"
-        params = [f"%{query}%"]
-        
-        if etype:
-            sql += " AND type = ?"
-            params.append(etype)
-        
-        if project:
-            sql += " AND project = ?"
-            params.append(project)
+        try:
+            if self.entities_fts_available:
+                sql = '''
+                    SELECT e.id, e.file_path, e.project, e.type, e.content, e.created_at
+                    FROM entities_fts f JOIN entities e ON e.id = f.rowid
+                    WHERE entities_fts MATCH ?
+                '''
+                params = [match]
+                if etype:
+                    sql += " AND e.type = ?"
+                    params.append(etype)
+                if project:
+                    sql += " AND e.project = ?"
+                    params.append(project)
+                sql += " ORDER BY bm25(entities_fts) LIMIT ?"
+            else:
+                sql = "SELECT id, file_path, project, type, content, created_at FROM entities e WHERE content LIKE ?"
+                params = [f"%{query}%"]
+                if etype:
+                    sql += " AND type = ?"
+                    params.append(etype)
+                if project:
+                    sql += " AND project = ?"
+                    params.append(project)
+                sql += " ORDER BY created_at DESC LIMIT ?"
+            params.append(limit)
             
-        sql += " ORDER BY created_at DESC LIMIT ?"
-        params.append(limit)
-        
-        cursor.execute(sql, tuple(params))
-        results = cursor.fetchall()
-        conn.close()
+            cursor.execute(sql, tuple(params))
+            results = cursor.fetchall()
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Entity FTS greška za '{query}': {e}")
+            results = []
+        finally:
+            conn.close()
         
         return [
             {
@@ -223,6 +469,13 @@ class Librarian:
             for r in results
         ]
 
+    def _entity_match_query(self, query):
+        """Pretvara slobodan tekst u FTS5 upit: svi tokeni moraju postojati, kao prefiksi."""
+        if not isinstance(query, str):
+            return ""
+        tokens = re.findall(r"\w+", query, flags=re.UNICODE)
+        return " AND ".join(f'"{t}"*' for t in tokens)
+
     def _escape_fts_token(self, token: str) -> str:
         """
         Escapes special characters for FTS5 queries to prevent syntax errors.
@@ -326,72 +579,185 @@ class Librarian:
             print(f"{Fore.RED}Greška pri brisanju iz FTS-a: {e}{Style.RESET_ALL}")
         conn.close()
 
+    def replace_file_chunks(self, path, project, chunks):
+        """
+        Bulk zamjena FTS zapisa jedne datoteke: DELETE + executemany INSERT u
+        jednoj transakciji na jednoj konekciji (umjesto konekcije i commita po chunku).
+        
+        `chunks` su dict-ovi {'content', 'start_line', 'end_line', opcionalno 'stemmed'}
+        ili obični stringovi (stari format arhive).
+        """
+        chunks = [{"content": c} if isinstance(c, str) else c for c in chunks]
+        missing = [c.get("content", "") for c in chunks if c.get("stemmed") is None]
+        stemmed_missing = iter(stem_text_batch(missing, mode="aggressive"))
+        rows = []
+        for chunk in chunks:
+            stemmed = chunk.get("stemmed")
+            if stemmed is None:
+                stemmed = next(stemmed_missing)
+            rows.append((chunk.get("content", ""), stemmed, chunk.get("start_line", 1), chunk.get("end_line", 1)))
+        self.replace_fts_many([(path, project, rows)])
+        return len(rows)
+
+    def replace_fts_many(self, entries):
+        """
+        Zamjenjuje FTS zapise za više datoteka u jednoj transakciji.
+        `entries` je lista (path, project, rows), rows = [(content, stemmed, start_line, end_line), ...].
+        """
+        if not entries:
+            return
+        conn = self._get_sqlite_conn()
+        try:
+            with conn:
+                conn.executemany('DELETE FROM knowledge_fts WHERE path = ?', [(path,) for path, _, _ in entries])
+                conn.executemany('''
+                    INSERT INTO knowledge_fts (path, content, stemmed_content, project, start_line, end_line)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', [
+                    (path, content, stemmed, project, start_line, end_line)
+                    for path, project, rows in entries
+                    for content, stemmed, start_line, end_line in rows
+                ])
+        finally:
+            conn.close()
+
+    def begin_bulk_load(self):
+        """
+        Rebuild: isključuje FTS5 automerge za knowledge_fts, pa se b-tree
+        segmenti ne spajaju nakon svakog batcha nego jednom u end_bulk_load.
+        Postavka je trajna u bazi, pa i prekinuti rebuild završava s --resume.
+        """
+        conn = self._get_sqlite_conn()
+        try:
+            with conn:
+                conn.execute("INSERT INTO knowledge_fts(knowledge_fts, rank) VALUES ('automerge', 0)")
+        except sqlite3.Error:
+            pass  # bez FTS5
+        finally:
+            conn.close()
+
+    def end_bulk_load(self):
+        """Spaja FTS5 segmente (optimize) i vraća zadani automerge."""
+        conn = self._get_sqlite_conn()
+        try:
+            with conn:
+                conn.execute("INSERT INTO knowledge_fts(knowledge_fts) VALUES ('optimize')")
+                conn.execute("INSERT INTO knowledge_fts(knowledge_fts, rank) VALUES ('automerge', 4)")
+        except sqlite3.Error:
+            pass
+        finally:
+            conn.close()
+
     def store_extracted_data(self, file_path, data, project=None):
-        """Sprema ekstrahirane podatke u entities tablicu."""
+        """
+        Sprema ekstrahirane podatke u entities tablicu.
+
+        Diff po (datoteka, tip, hash normaliziranog sadržaja): nepromijenjeni
+        entiteti zadržavaju ID i vektor, brišu se samo nestali, a u SQLite i
+        ChromaDB se dodaju samo novi. Vraća {"inserted", "deleted", "updated", "unchanged"}.
+        """
+        # 1. Željeno stanje datoteke: (type, content, preview, meta_extra)
+        wanted = []
+        for item in data.get('problems', []):
+            wanted.append(('problem', item, "", None))
+        for item in data.get('solutions', []):
+            wanted.append(('solution', item, "", None))
+        for item in data.get('decisions', []):
+            if isinstance(item, dict):
+                wanted.append(('decision', item.get('content', ''), "", item))
+            else:
+                wanted.append(('decision', item, "", None))
+        for item in data.get('tasks', []):
+            status_icon = "✅" if item['status'] == 'done' else "todo"
+            # Taskove možda ne želimo vektorizirati kao 'knowledge', ali neka budu za sad.
+            wanted.append(('task', f"[{status_icon}] {item['content']}", "", None))
+        # Kodne blokove NE vektoriziramo kao entitete jer su već u chunkovima;
+        # u SQLite ide samo jezik + preview
+        for item in data.get('code_snippets', []):
+            wanted.append(('code', item['language'], item['preview'], None))
+
+        stats = {"inserted": 0, "deleted": 0, "updated": 0, "unchanged": 0}
         conn = self._get_sqlite_conn()
         cursor = conn.cursor()
         
         try:
-            # Prvo obriši stare entitete za ovaj file (SQLite + Chroma)
-            cursor.execute('DELETE FROM entities WHERE file_path = ?', (file_path,))
-            self._delete_entities_from_chroma(file_path) # <--- NOVO
-            
+            # 2. Postojeći entiteti datoteke, grupirani po identitetu (duplikati redom po ID-u)
+            # Brisati se smiju samo entiteti iz ekstrakcije: nova odluka iz
+            # supersede_decision dijeli file_path stare, a na nju pokazuje superseded_by_id
+            cursor.execute('''
+                SELECT id, project, type, content, context_preview, valid_from, valid_to, superseded_by,
+                       COALESCE(origin, 'extracted') = 'extracted'
+                       AND NOT EXISTS (SELECT 1 FROM entities r WHERE r.superseded_by_id = entities.id)
+                FROM entities WHERE file_path = ? ORDER BY id
+            ''', (file_path,))
+            existing = {}
+            stale = []
+            for row in cursor.fetchall():
+                eid, row_project, etype, content, preview = row[:5]
+                if row_project != project:
+                    if row[8]:
+                        stale.append((eid, etype))
+                    continue
+                key = entity_key(etype, content, preview if etype == 'code' else None)
+                existing.setdefault(key, []).append(row)
+
             timestamp = datetime.now().isoformat()
-            
-            # Helper za insert
-            def insert_entity(etype, content, preview="", meta_extra=None):
-                # 1. SQLite
+            pending = []
+            for etype, content, preview, meta_extra in wanted:
+                key = entity_key(etype, content, preview if etype == 'code' else None)
+                matches = existing.get(key)
+                if matches:
+                    row = matches.pop(0)
+                    # Temporalna polja iz datoteke; None ne briše vrijednosti koje je
+                    # postavio supersede_decision
+                    changes = {}
+                    if meta_extra:
+                        for col, current in zip(('valid_from', 'valid_to', 'superseded_by'), row[5:8]):
+                            value = meta_extra.get(col)
+                            if value is not None and value != current:
+                                changes[col] = value
+                    if 'superseded_by' in changes:
+                        changes['superseded_by_id'] = parse_superseded_id(changes['superseded_by'])
+                    if changes:
+                        assignments = ", ".join(f"{col} = ?" for col in changes)
+                        cursor.execute(f"UPDATE entities SET {assignments} WHERE id = ?", (*changes.values(), row[0]))
+                        stats["updated"] += 1
+                    else:
+                        stats["unchanged"] += 1
+                    continue
+
                 v_from = meta_extra.get('valid_from') if meta_extra else None
                 v_to = meta_extra.get('valid_to') if meta_extra else None
                 sup_by = meta_extra.get('superseded_by') if meta_extra else None
-                
                 cursor.execute('''
-                    INSERT INTO entities (file_path, project, type, content, context_preview, valid_from, valid_to, superseded_by, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (file_path, project, etype, content, preview, v_from, v_to, sup_by, timestamp))
-                
-                # 2. ChromaDB
-                new_id = cursor.lastrowid
-                self._index_entity(new_id, etype, content, project, source=file_path)
+                    INSERT INTO entities (file_path, project, type, content, context_preview, valid_from, valid_to,
+                                          superseded_by, superseded_by_id, created_at, origin)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'extracted')
+                ''', (file_path, project, etype, content, preview, v_from, v_to, sup_by,
+                      parse_superseded_id(sup_by), timestamp))
+                stats["inserted"] += 1
+                if etype != 'code':
+                    # ChromaDB: skupljamo, indeksira se u batchu nakon commita
+                    pending.append((cursor.lastrowid, etype, content, project, file_path))
 
-            # Spremi probleme
-            for item in data.get('problems', []):
-                insert_entity('problem', item)
-                
-            # Spremi rješenja
-            for item in data.get('solutions', []):
-                insert_entity('solution', item)
-                
-            # Spremi odluke
-            for item in data.get('decisions', []):
-                if isinstance(item, dict):
-                    content = item.get('content', '')
-                    insert_entity('decision', content, meta_extra=item)
-                else:
-                    insert_entity('decision', item)
-                
-            # Spremi zadatke
-            for item in data.get('tasks', []):
-                status_icon = "✅" if item['status'] == 'done' else "todo"
-                # Taskove možda ne želimo vektorizirati kao 'knowledge', ali neka budu za sad.
-                insert_entity('task', f"[{status_icon}] {item['content']}")
-
-            # Kodne blokove NE vektoriziramo kao entitete jer su već u chunkovima
-            # (ili možemo ako želimo search po kodu)
-            for item in data.get('code_snippets', []):
-                # insert_entity('code', item['language'], item['preview'])
-                # Samo SQLite za code snippet preview
-                cursor.execute('''
-                    INSERT INTO entities (file_path, project, type, content, context_preview, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (file_path, project, 'code', item['language'], item['preview'], timestamp))
+            # 3. Nestali entiteti
+            stale.extend((row[0], row[2]) for rows in existing.values() for row in rows if row[8])
+            if stale:
+                cursor.executemany("DELETE FROM entities WHERE id = ?", [(eid,) for eid, _ in stale])
+                stats["deleted"] = len(stale)
 
+            if stats["inserted"] or stats["deleted"] or stats["updated"]:
+                self._bump_generation(cursor)
             conn.commit()
+
+            self._delete_entity_vectors([eid for eid, etype in stale if etype != 'code'])
+            self._index_entities(pending)
             
         except Exception as e:
             print(f"{Fore.RED}Greška pri spremanju entiteta: {e}{Style.RESET_ALL}")
             
         conn.close()
+        return stats
 
     def save_entity(self, etype, content, project=None):
         """Ručno sprema entitet u bazu."""
@@ -407,10 +773,11 @@ class Librarian:
         timestamp = datetime.now().isoformat()
         try:
             cursor.execute('''
-                INSERT INTO entities (project, type, content, created_at)
-                VALUES (?, ?, ?, ?)
+                INSERT INTO entities (project, type, content, created_at, origin)
+                VALUES (?, ?, ?, ?, 'manual')
             ''', (project, etype, content, timestamp))
             new_id = cursor.lastrowid
+            self._bump_generation(cursor)
             conn.commit()
             
             # Log event
@@ -449,32 +816,92 @@ class Librarian:
             return True # Već obrađeno i nije mijenjano
         return False
 
-    def mark_as_processed(self, file_path, project=None):
-        """Zabilježi da je datoteka obrađena."""
+    def mark_as_processed(self, file_path, project=None, content_hash=None):
+        """Zabilježi da je datoteka obrađena (uz SHA-256 sadržaja za inkrementalni ingest)."""
         current_mtime = os.path.getmtime(file_path)
         
         conn = self._get_sqlite_conn()
         cursor = conn.cursor()
         cursor.execute('''
-            INSERT OR REPLACE INTO files (path, project, last_modified, processed_at)
-            VALUES (?, ?, ?, ?)
-        ''', (file_path, project, current_mtime, datetime.now().isoformat()))
+            INSERT OR REPLACE INTO files (path, project, last_modified, hash, processed_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (file_path, project, current_mtime, content_hash, datetime.now().isoformat()))
+        conn.commit()
+        conn.close()
+
+    def mark_files_processed(self, entries):
+        """Bulk mark_as_processed: `entries` je lista (path, project, content_hash)."""
+        rows = []
+        now = datetime.now().isoformat()
+        for path, project, content_hash in entries:
+            try:
+                rows.append((path, project, os.path.getmtime(path), content_hash, now))
+            except OSError:
+                continue
+        if not rows:
+            return
+        conn = self._get_sqlite_conn()
+        conn.executemany('''
+            INSERT OR REPLACE INTO files (path, project, last_modified, hash, processed_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', rows)
+        conn.commit()
+        conn.close()
+
+    def get_file_states(self, paths):
+        """Bulk dohvat {path: (last_modified, hash)} za listu putanja."""
+        states = {}
+        if not paths:
+            return states
+        conn = self._get_sqlite_conn()
+        cursor = conn.cursor()
+        # SQLite limit varijabli: dohvaćamo u komadima
+        for i in range(0, len(paths), 500):
+            part = list(paths[i:i + 500])
+            placeholders = ",".join("?" * len(part))
+            cursor.execute(
+                f"SELECT path, last_modified, hash FROM files WHERE path IN ({placeholders})", part
+            )
+            for path, mtime, content_hash in cursor.fetchall():
+                states[path] = (mtime, content_hash)
+        conn.close()
+        return states
+
+    def update_file_mtimes(self, mtimes):
+        """
+        Bulk update last_modified za datoteke koje su dirnute, ali im se sadržaj nije promijenio.
+        Sljedeći inkrementalni ingest ih tada preskače već na razini stat-a, bez hashiranja.
+        """
+        if not mtimes:
+            return
+        conn = self._get_sqlite_conn()
+        conn.executemany(
+            "UPDATE files SET last_modified = ? WHERE path = ?",
+            [(mtime, path) for path, mtime in mtimes.items()]
+        )
         conn.commit()
         conn.close()
 
     def log_event(self, event_type, data):
-        """Sprema događaj u JSONL arhivu (Event Sourcing)."""
+        """
+        Sprema događaj u JSONL arhivu (Event Sourcing).
+        Zapis ide u red group-commit writera (src/utils/archive_writer.py);
+        flush_archive() čeka da bude na disku.
+        """
         try:
             record = {
                 "event": event_type,
                 "timestamp": datetime.now().isoformat(),
                 "data": data
             }
-            with open(self.archive_path, 'a', encoding='utf-8') as f:
-                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            get_archive_writer(self.archive_path).append(json.dumps(record, ensure_ascii=False))
         except Exception as e:
             print(f"{Fore.RED}ERROR: Greska pri logiranju dogadjaja: {e}{Style.RESET_ALL}")
 
+    def flush_archive(self):
+        """Čeka da svi događaji predani log_event-u budu zapisani i fsyncani."""
+        flush_all_writers(self.data_path)
+
     def store_archive(self, chunks, file_metadata, extracted_data=None):
         """Sprema chunkove i entitete u JSONL arhivu kao EVENT."""
         data = {
@@ -575,6 +1002,7 @@ class Librarian:
 
     def wipe_all(self, keep_archive=False):
         """Briše sve lokalne podatke."""
+        import shutil
         # 1. Obriši SQLite podatke
         conn = self._get_sqlite_conn()
         cursor = conn.cursor()
@@ -582,22 +1010,31 @@ class Librarian:
             cursor.execute("DELETE FROM files")
             cursor.execute("DELETE FROM knowledge_fts")
             cursor.execute("DELETE FROM entities")
+            # Rebuild iz arhive mora dobiti iste ID-jeve (decision_* događaji ih referenciraju)
+            cursor.execute("DELETE FROM sqlite_sequence WHERE name = 'entities'")
+            self._bump_generation(cursor)
             conn.commit()
         except Exception as e:
             print(f"Greška pri brisanju SQLite podataka: {e}")
         finally:
             conn.close()
         
-        # 2. Obriši JSONL
-        if not keep_archive and os.path.exists(self.archive_path):
+        # 2. Obriši JSONL i zatvorene segmente (writer prvo zapisuje sve iz reda;
+        # nakon brisanja otvara novu datoteku)
+        close_all_writers(self.data_path)
+        if not keep_archive:
             try:
-                os.remove(self.archive_path)
+                if os.path.exists(self.archive_path):
+                    os.remove(self.archive_path)
+                if os.path.isdir(segment_dir(self.archive_path)):
+                    shutil.rmtree(segment_dir(self.archive_path))
             except Exception as e:
                 print(f"Greška pri brisanju arhive: {e}")
             
         # 3. ChromaDB se briše tako da pobrišemo direktorij store
         # NAPOMENA: Ovo može raditi probleme ako je Oracle objekt aktivan
-        import shutil
+        self._collection = None
+        self.chroma_client = None
         if os.path.exists(self.store_path):
             try:
                 shutil.rmtree(self.store_path)
@@ -612,25 +1049,29 @@ class Librarian:
         if date is None:
             date = datetime.now().strftime("%Y-%m-%d")
 
-        conn = self._get_sqlite_conn()
-        cursor = conn.cursor()
+        day = epoch_day(date)
+        if day is None:
+            raise ValueError(f"Neispravan datum: {date!r} (očekivano YYYY-MM-DD)")
 
+        # R*Tree: interval [valid_from_day, valid_to_day] sadrži traženi dan.
+        # CROSS JOIN fiksira redoslijed: R*Tree vanjska petlja, entities po PK
+        # (inače planner skenira entities i radi R*Tree lookup po id-u).
         query = '''
-            SELECT id, content, valid_from, valid_to, superseded_by, file_path, project
-            FROM entities
-            WHERE type = 'decision'
-            AND (valid_from IS NULL OR valid_from <= ?)
-            AND (valid_to IS NULL OR valid_to >= ?)
+            SELECT e.id, e.content, e.valid_from, e.valid_to, e.superseded_by, e.file_path, e.project
+            FROM decision_validity v CROSS JOIN entities e ON e.id = v.id
+            WHERE v.valid_from_day <= ? AND v.valid_to_day >= ?
         '''
-        params = [date, date]
+        params = [day, day]
 
         if project:
-            query += " AND project = ?"
+            query += " AND e.project = ?"
             params.append(project)
 
-        cursor.execute(query, tuple(params))
-        results = cursor.fetchall()
-        conn.close()
+        conn = self._get_sqlite_conn()
+        try:
+            results = conn.execute(query, tuple(params)).fetchall()
+        finally:
+            conn.close()
         
         return [
             {
@@ -645,6 +1086,48 @@ class Librarian:
             for r in results
         ]
 
+    def get_decisions_changed_between(self, start, end, project=None):
+        """
+        Vraća odluke kojima je valjanost počela ili završila u [start, end]
+        (ISO datumi, uključivo), sortirane po datumu promjene.
+        """
+        start_day, end_day = epoch_day(start), epoch_day(end)
+        if start_day is None or end_day is None:
+            raise ValueError(f"Neispravan raspon: {start!r} - {end!r} (očekivano YYYY-MM-DD)")
+
+        project_filter = " AND e.project = :project" if project else ""
+        # Dvije R*Tree pretrage (početak u rasponu, kraj u rasponu), spojene po id-u
+        query = f'''
+            SELECT e.id, e.content, e.valid_from, e.valid_to, e.superseded_by, e.file_path, e.project
+            FROM (
+                SELECT id FROM decision_validity
+                WHERE valid_from_day >= :start AND valid_from_day <= :end
+                UNION
+                SELECT id FROM decision_validity
+                WHERE valid_to_day >= :start AND valid_to_day <= :end
+            ) changed CROSS JOIN entities e ON e.id = changed.id
+            WHERE 1 = 1{project_filter}
+            ORDER BY COALESCE(e.valid_from, e.valid_to), e.id
+        '''
+        conn = self._get_sqlite_conn()
+        try:
+            results = conn.execute(query, {"start": start_day, "end": end_day, "project": project}).fetchall()
+        finally:
+            conn.close()
+
+        return [
+            {
+                "id": r[0],
+                "content": r[1],
+                "valid_from": r[2],
+                "valid_to": r[3],
+                "superseded_by": r[4],
+                "file_path": r[5],
+                "project": r[6]
+            }
+            for r in results
+        ]
+
     def get_decisions(self, project=None, include_superseded=False):
         """
         Vraća sve odluke iz baze podataka.
@@ -696,7 +1179,7 @@ class Librarian:
         cursor = conn.cursor()
 
         cursor.execute('''
-            SELECT id, content, valid_from, valid_to, superseded_by, file_path, project, created_at
+            SELECT id, content, valid_from, valid_to, superseded_by, file_path, project, created_at, superseded_by_id
             FROM entities
             WHERE id = ? AND type = 'decision'
         ''', (decision_id,))
@@ -715,54 +1198,66 @@ class Librarian:
             "superseded_by": result[4],
             "file_path": result[5],
             "project": result[6],
-            "created_at": result[7]
+            "created_at": result[7],
+            "superseded_by_id": result[8]
         }
 
     def get_decision_history(self, decision_id):
-        """Dohvaća cijeli lanac promjena za jednu odluku (unatrag i unaprijed)."""
+        """
+        Dohvaća cijeli lanac promjena za jednu odluku (unatrag i unaprijed).
+        Jedan WITH RECURSIVE upit preko superseded_by_id; depth < 0 su pretci,
+        0 je tražena odluka, depth > 0 su odluke koje su je zamijenile.
+        """
         conn = self._get_sqlite_conn()
-        cursor = conn.cursor()
-        
-        # 1. Nađi korijensku odluku (prvu u lancu) ili idi ciklički
-        # Za sada ćemo samo uzeti trenutnu i tražiti sve koji su je zamijenili 
-        # ili koje je ona zamijenila.
-        
-        # Pojednostavljeno: nađi sve odluke koje imaju isti 'content' (približno) 
-        # ili su povezane preko superseded_by (Decision #ID format).
-        
-        all_decisions = []
-        
-        def find_related(current_id):
-            cursor.execute("SELECT id, content, valid_from, valid_to, superseded_by, created_at FROM entities WHERE id = ?", (current_id,))
-            res = cursor.fetchone()
-            if not res: return
-            
-            dec = {
-                "id": res[0],
-                "content": res[1],
-                "valid_from": res[2],
-                "valid_to": res[3],
-                "superseded_by": res[4],
-                "created_at": res[5]
+        try:
+            rows = conn.execute('''
+                WITH RECURSIVE
+                ancestors(id, depth) AS (
+                    SELECT id, 0 FROM entities WHERE id = :id
+                    UNION
+                    SELECT e.id, a.depth - 1 FROM entities e
+                    JOIN ancestors a ON e.superseded_by_id = a.id
+                    WHERE a.depth > -:max_depth
+                ),
+                descendants(id, depth) AS (
+                    SELECT id, 0 FROM entities WHERE id = :id
+                    UNION
+                    SELECT e.superseded_by_id, d.depth + 1 FROM entities e
+                    JOIN descendants d ON e.id = d.id
+                    WHERE e.superseded_by_id IS NOT NULL AND d.depth < :max_depth
+                ),
+                lineage(id, depth) AS (
+                    SELECT id, depth FROM ancestors
+                    UNION ALL
+                    SELECT id, depth FROM descendants
+                )
+                SELECT e.id, e.content, e.valid_from, e.valid_to, e.superseded_by, e.superseded_by_id,
+                       e.created_at, CASE WHEN MIN(l.depth) < 0 THEN MIN(l.depth) ELSE MAX(l.depth) END AS depth
+                FROM lineage l JOIN entities e ON e.id = l.id
+                GROUP BY e.id
+                ORDER BY depth, e.created_at
+            ''', {"id": decision_id, "max_depth": LINEAGE_MAX_DEPTH}).fetchall()
+        finally:
+            conn.close()
+
+        return [
+            {
+                "id": r[0],
+                "content": r[1],
+                "valid_from": r[2],
+                "valid_to": r[3],
+                "superseded_by": r[4],
+                "superseded_by_id": r[5],
+                "created_at": r[6],
+                "depth": r[7],
             }
-            all_decisions.append(dec)
-            
-            # Ako ima superseded_by, prati lanac unaprijed
-            if dec["superseded_by"] and "Decision #" in dec["superseded_by"]:
-                import re
-                match = re.search(r'Decision #(\d+)', dec["superseded_by"])
-                if match:
-                    next_id = int(match.group(1))
-                    if next_id != current_id: # Spriječi infinit loop
-                        find_related(next_id)
-
-        find_related(decision_id)
-        conn.close()
-        return sorted(all_decisions, key=lambda x: x['created_at'])
+            for r in rows
+        ]
 
-    def ratify_decision(self, decision_id, valid_from=None, valid_to=None, superseded_by=None):
+    def ratify_decision(self, decision_id, valid_from=None, valid_to=None, superseded_by=None, superseded_by_id=None):
         """
         Ratificira odluke - ažurira njene temporalne parametre.
+        superseded_by_id se, ako nije zadan, čita iz "Decision #N" u superseded_by.
         """
         conn = self._get_sqlite_conn()
         cursor = conn.cursor()
@@ -786,6 +1281,13 @@ class Librarian:
         if superseded_by is not None:
             updates.append("superseded_by = ?")
             params.append(superseded_by)
+            if superseded_by_id is None:
+                superseded_by_id = parse_superseded_id(superseded_by)
+        if superseded_by_id is not None:
+            cursor.execute("SELECT 1 FROM entities WHERE id = ?", (superseded_by_id,))
+            if cursor.fetchone() and superseded_by_id != decision_id:
+                updates.append("superseded_by_id = ?")
+                params.append(superseded_by_id)
 
         if not updates:
             conn.close()
@@ -795,21 +1297,68 @@ class Librarian:
         query = f"UPDATE entities SET {', '.join(updates)} WHERE id = ?"
         
         cursor.execute(query, tuple(params))
+        self._bump_generation(cursor)
         conn.commit()
         conn.close()
         
-        # Log event
-        self.log_event("decision_ratified", {
+        # Log event (ref: ID-evi se mijenjaju nakon kompakcije arhive)
+        event = {
             "decision_id": decision_id,
+            "decision_ref": self.entity_ref(decision_id),
             "updates": {
                 "valid_from": valid_from,
                 "valid_to": valid_to,
-                "superseded_by": superseded_by
+                "superseded_by": superseded_by,
+                "superseded_by_id": superseded_by_id
             }
-        })
-        
+        }
+        if superseded_by_id is not None:
+            event["superseded_by_ref"] = self.entity_ref(superseded_by_id)
+        self.log_event("decision_ratified", event)
+
         return True
 
+    def entity_ref(self, entity_id):
+        """
+        Stabilna referenca na entitet za događaje u arhivi: datoteka, projekt,
+        tip, hash sadržaja (entity_key) i redni broj među entitetima datoteke s
+        istim ključem. Za razliku od ID-a preživljava kompakciju arhive.
+        """
+        conn = self._get_sqlite_conn()
+        try:
+            row = conn.execute(
+                "SELECT file_path, project, type, content, context_preview FROM entities WHERE id = ?",
+                (entity_id,)).fetchone()
+            if not row:
+                return None
+            file_path, project, etype = row[:3]
+            key = _ref_key(etype, row[3], row[4])
+            rows = conn.execute(
+                "SELECT content, context_preview FROM entities"
+                " WHERE file_path IS ? AND project IS ? AND type = ? AND id < ?",
+                (file_path, project, etype, entity_id)).fetchall()
+        finally:
+            conn.close()
+        n = sum(1 for content, preview in rows if _ref_key(etype, content, preview) == key)
+        return {"file_path": file_path, "project": project, "type": etype, "key": key, "n": n}
+
+    def resolve_entity_ref(self, ref):
+        """ID entiteta za referencu iz entity_ref (None ako ga nema)."""
+        if not ref:
+            return None
+        etype = ref.get("type")
+        conn = self._get_sqlite_conn()
+        try:
+            rows = conn.execute(
+                "SELECT id, content, context_preview FROM entities"
+                " WHERE file_path IS ? AND project IS ? AND type = ? ORDER BY id",
+                (ref.get("file_path"), ref.get("project"), etype)).fetchall()
+        finally:
+            conn.close()
+        matches = [eid for eid, content, preview in rows if _ref_key(etype, content, preview) == ref.get("key")]
+        n = ref.get("n", 0)
+        return matches[n] if n < len(matches) else None
+
     def supersede_decision(self, old_decision_id, new_decision_text, valid_from=None):
         """
         Zamjenjuje staru odluku novom.
@@ -829,7 +1378,7 @@ class Librarian:
         if valid_from is None:
             valid_from = today
 
-        conn = sqlite3.connect(self.meta_path)
+        conn = self._get_sqlite_conn()
         cursor = conn.cursor()
 
         # Dohvati staru odluku
@@ -848,8 +1397,8 @@ class Librarian:
         # Kreiraj novu odluku
         timestamp = datetime.now().isoformat()
         cursor.execute('''
-            INSERT INTO entities (file_path, project, type, content, valid_from, created_at)
-            VALUES (?, ?, 'decision', ?, ?, ?)
+            INSERT INTO entities (file_path, project, type, content, valid_from, created_at, origin)
+            VALUES (?, ?, 'decision', ?, ?, ?, 'supersede')
         ''', (old_file_path, old_project, new_decision_text, valid_from, timestamp))
         
         new_id = cursor.lastrowid
@@ -857,16 +1406,18 @@ class Librarian:
         # Ažuriraj staru odluku
         cursor.execute('''
             UPDATE entities 
-            SET valid_to = ?, superseded_by = ?
+            SET valid_to = ?, superseded_by = ?, superseded_by_id = ?
             WHERE id = ?
-        ''', (today, f"Decision #{new_id}: {new_decision_text[:50]}", old_decision_id))
+        ''', (today, f"Decision #{new_id}: {new_decision_text[:50]}", new_id, old_decision_id))
 
+        self._bump_generation(cursor)
         conn.commit()
         conn.close()
         
         # Log event
         self.log_event("decision_superseded", {
             "old_decision_id": old_decision_id,
+            "old_decision_ref": self.entity_ref(old_decision_id),
             "new_decision_id": new_id,
             "new_decision_text": new_decision_text,
             "valid_from": valid_from
@@ -1,4 +1,5 @@
 import re
+import time
 import hashlib
 import threading
 from datetime import datetime
@@ -13,6 +14,9 @@ from src.utils.metadata_helper import validate_metadata, enrich_metadata
 from src.modules.types import QueryType, Pointer, SearchResult
 from src.utils.metrics import metrics
 from src.utils.logger import logger
+from src.utils.rwlock import ReadWriteLock
+from src.utils.store_lock import vector_store_lock
+from src.utils.query_cache import QueryCache
 
 # Import Graph (v0.6.1+)
 try:
@@ -35,7 +39,23 @@ def resilient_vector_query(collection, query, n_results=5, where=None):
 class Oracle:
     def __init__(self, db_path="data/store"):
         self.db_path = db_path
-        self._lock = threading.Lock() # Global lock for thread safety
+        # Upiti (ask) uzimaju read lock i rade paralelno; write lock samo za
+        # stvarne mutacije (upsert, kreiranje kolekcije)
+        self._lock = ReadWriteLock()
+
+        # LRU cache rezultata upita, invalidiran generacijom indeksa
+        self.query_cache = QueryCache(
+            max_bytes=int(os.getenv("KRONOS_QUERY_CACHE_MB", "32")) * 1024 * 1024,
+            max_entries=int(os.getenv("KRONOS_QUERY_CACHE_ENTRIES", "1024"))
+        )
+
+        # Zajednički pool za fan-out dohvata (vector, FTS, varijante upita).
+        # Zadaci su listovi (ne submitaju nove zadatke), pa nema deadlocka ni
+        # kad više ask poziva dijeli isti pool.
+        self._retrieval_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("KRONOS_RETRIEVAL_WORKERS", "16")),
+            thread_name_prefix="KronosRetrieval"
+        )
         
         # Učitaj varijable iz .agent/.env datoteke
         project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -44,18 +64,14 @@ class Oracle:
         load_dotenv(env_path)
         
         # Use Gemini for embeddings to avoid local model crashes on Windows
+        # (kroz perzistentni cache embeddinga u data/cache/embeddings.db)
         api_key = os.getenv("GEMINI_API_KEY")
-        if api_key:
-            try:
-                from chromadb.utils import embedding_functions
-                self.embedding_function = embedding_functions.GoogleGenerativeAiEmbeddingFunction(
-                    api_key=api_key,
-                    model_name="models/gemini-embedding-001"
-                )
-            except Exception as e:
-                print(f"⚠️ Warning: Could not init Gemini embeddings: {e}")
-                self.embedding_function = None
-        else:
+        try:
+            from src.utils.embedding_cache import build_embedding_function
+            cache_dir = os.path.join(os.path.dirname(os.path.abspath(db_path)), "cache")
+            self.embedding_function = build_embedding_function(api_key, cache_dir)
+        except Exception as e:
+            print(f"⚠️ Warning: Could not init Gemini embeddings: {e}")
             self.embedding_function = None
 
         # Initialize Knowledge Graph (v0.6.1+)
@@ -82,12 +98,12 @@ class Oracle:
                 else:
                     raise e
 
-        # Ako imamo custom embedding function (Gemini), koristi je.
+        # Ako imamo custom embedding function (Gemini), vektore računa ona.
         # Inače, ChromaDB koristi default model (all-MiniLM-L6-v2).
-        collection_kwargs = {"name": "kronos_memory"}
-        if self.embedding_function is not None:
-            collection_kwargs["embedding_function"] = self.embedding_function
-        self.collection = self.client.get_or_create_collection(**collection_kwargs)
+        from src.utils.embedding_cache import open_collection
+        with self._lock.write_lock():
+            self.collection = open_collection(self.client, "kronos_memory", self.embedding_function,
+                                              store_dir=db_path)
         
         from src.modules.librarian import Librarian
         self.librarian = Librarian()
@@ -96,8 +112,8 @@ class Oracle:
         try:
             from src.modules.fast_path import FastPath
             self.fast_path = FastPath(self.librarian)
-            # Pokrećemo warmup u zasebnom threadu (sada sigurno uz lockove)
-            threading.Thread(target=self.fast_path.warmup, daemon=True).start()
+            # Snapshot s diska odmah; warmup u pozadini samo ako je zastario
+            self.fast_path.start()
         except ImportError:
             self.fast_path = None
 
@@ -113,10 +129,8 @@ class Oracle:
         except ImportError:
             pass
 
-    def safe_upsert(self, documents, metadatas, ids):
-        """
-        Wrapper oko collection.upsert s validacijom i obogaćivanjem metapodataka.
-        """
+    def _validate_for_upsert(self, documents, metadatas, ids):
+        """Validacija i obogaćivanje metapodataka prije upisa u kolekciju."""
         valid_docs = []
         valid_metas = []
         valid_ids = []
@@ -132,14 +146,125 @@ class Oracle:
             valid_docs.append(doc)
             valid_metas.append(enriched_meta)
             valid_ids.append(uid)
+        return valid_docs, valid_metas, valid_ids
+
+    def safe_upsert(self, documents, metadatas, ids):
+        """
+        Wrapper oko collection.upsert s validacijom i obogaćivanjem metapodataka.
+        """
+        valid_docs, valid_metas, valid_ids = self._validate_for_upsert(documents, metadatas, ids)
             
         if valid_docs:
-            with self._lock:
-                self.collection.upsert(
-                    documents=valid_docs,
-                    metadatas=valid_metas,
-                    ids=valid_ids
-                )
+            embeddings = self._embed_documents(valid_docs)
+            with self._lock.write_lock():
+                self._upsert(valid_docs, valid_metas, valid_ids, embeddings)
+
+    def _embed_documents(self, documents):
+        """
+        Embeddinzi izvan write locka: embedding je mrežni poziv (Gemini) i pod
+        lockom bi blokirao sve upite. Bez vlastite embedding funkcije vraća None
+        i kolekcija embedira sama u upsertu (Chroma default model je lokalan).
+        """
+        if self.embedding_function is None:
+            return None
+        return self.embedding_function(list(documents)) if documents else []
+
+    def _upsert(self, documents, metadatas, ids, embeddings=None):
+        kwargs = {} if embeddings is None else {"embeddings": embeddings}
+        self.collection.upsert(documents=documents, metadatas=metadatas, ids=ids, **kwargs)
+
+    def sync_file_chunks(self, source, project, documents, metadatas, ids):
+        """
+        Diff upis chunkova jedne datoteke (ID-jevi su sadržajem adresirani, vidi chunk_id).
+        
+        - novi ID-jevi -> upsert (samo oni se embediraju)
+        - postojeći ID-jevi -> samo update metapodataka ako su se pomaknule linije
+        - ID-jevi kojih više nema (uklj. stare hash() ID-jeve) -> delete
+        """
+        return self.sync_chunks_many(project, [(source, documents, metadatas, ids)])
+
+    def sync_chunks_many(self, project, files, on_written=None):
+        """
+        Isto kao sync_file_chunks, ali za više datoteka odjednom:
+        jedan get, jedan delete i jedan upsert (jedan batch embeddinga) za cijeli batch.
+        `files` je lista (source, documents, metadatas, ids).
+        `on_written` se zove nakon upisa, još pod lockom vektorske baze
+        (Ingestor tu povećava generaciju, pa je backup ne vidi između upisa i bumpa).
+        """
+        valid_docs, valid_metas, valid_ids = [], [], []
+        for source, documents, metadatas, ids in files:
+            docs, metas, uids = self._validate_for_upsert(documents, metadatas, ids)
+            valid_docs.extend(docs)
+            valid_metas.extend(metas)
+            valid_ids.extend(uids)
+
+        sources = list(dict.fromkeys(f[0] for f in files))
+        if not sources:
+            if on_written is not None:
+                on_written()
+            return {"added": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+        source_filter = {"source": sources[0]} if len(sources) == 1 else {"source": {"$in": sources}}
+        where = {"$and": [source_filter, {"project": project}]}
+
+        # Novi chunkovi se embediraju prije write locka; ako se kolekcija u
+        # međuvremenu promijenila pa pod lockom ima novih bez embeddinga, ponovi.
+        embeddings = {}
+        while True:
+            with self._lock.read_lock():
+                existing_meta = self._existing_chunks(where)
+            pending = [
+                (doc, uid) for doc, uid in zip(valid_docs, valid_ids)
+                if uid not in existing_meta and uid not in embeddings
+            ]
+            vectors = self._embed_documents([doc for doc, _ in pending])
+            if vectors is not None:
+                embeddings.update(zip((uid for _, uid in pending), vectors))
+
+            with self._lock.write_lock(), vector_store_lock(self.db_path):
+                existing_meta = self._existing_chunks(where)
+                new_docs, new_metas, new_ids = [], [], []
+                moved_metas, moved_ids = [], []
+                for doc, meta, uid in zip(valid_docs, valid_metas, valid_ids):
+                    if uid not in existing_meta:
+                        new_docs.append(doc)
+                        new_metas.append(meta)
+                        new_ids.append(uid)
+                        continue
+                    old = existing_meta[uid] or {}
+                    if old.get("start_line") != meta.get("start_line") or old.get("end_line") != meta.get("end_line"):
+                        moved_metas.append(meta)
+                        moved_ids.append(uid)
+                if vectors is not None and any(uid not in embeddings for uid in new_ids):
+                    continue
+
+                wanted = set(valid_ids)
+                stale = [uid for uid in existing_meta if uid not in wanted]
+                if stale:
+                    self.collection.delete(ids=stale)
+                if new_ids:
+                    new_embeddings = None if vectors is None else [embeddings[uid] for uid in new_ids]
+                    self._upsert(new_docs, new_metas, new_ids, new_embeddings)
+                if moved_ids:
+                    # update bez documents ne poziva embedding funkciju
+                    self.collection.update(ids=moved_ids, metadatas=moved_metas)
+                if on_written is not None:
+                    on_written()
+                break
+
+        return {
+            "added": len(new_ids),
+            "updated": len(moved_ids),
+            "deleted": len(stale),
+            "unchanged": len(valid_ids) - len(new_ids) - len(moved_ids),
+        }
+
+    def _existing_chunks(self, where):
+        existing = self.collection.get(where=where, include=["metadatas"])
+        # Entiteti dijele 'source' s chunkovima datoteke, njima upravlja Librarian
+        return {
+            uid: meta for uid, meta in zip(existing.get("ids") or [], existing.get("metadatas") or [])
+            if (meta or {}).get("type") != "entity"
+        }
 
     def detect_query_type(self, query: str) -> QueryType:
         """
@@ -295,8 +420,8 @@ class Oracle:
         
         return unique_keywords
 
-    def _retrieve_candidates(self, query, project=None, limit=10, hyde=False, silent=False):
-        """Privatna metoda za fetch, poziva se unutar ask locka"""
+    def _vector_search(self, query, project=None, limit=10, hyde=False):
+        """Vektorski dohvat (s opcionalnim HyDE korakom) za jedan upit."""
         vector_query = query
         if hyde and self.hypothesizer:
              print(f"DEBUG: Oracle: generating hypothesis for '{query}'...")
@@ -306,7 +431,6 @@ class Oracle:
         if project:
              where_filter = {"project": project}
              
-        # print(f"DEBUG: Oracle: querying vector collection for '{vector_query[:50]}...'")
         metrics.log_query()
         try:
             vector_candidates = resilient_vector_query(
@@ -318,20 +442,8 @@ class Oracle:
         except Exception as e:
             logger.error(f"Vector query failed after retries: {e}")
             vector_candidates = {'ids': [[]]} # Fallback
-            
-        # print("DEBUG: Oracle: vector query done.")
-        
-        # Stemmed query za FTS (Hybrid AND mode by default)
-        try:
-            from src.utils.stemmer import stem_text
-            stemmed_query = stem_text(query)
-        except ImportError:
-            stemmed_query = query.lower()
-            
-        fts_candidates = self.librarian.search_fts(stemmed_query, project=project, limit=limit * 4, mode="and")
 
         candidates = []
-        # Vector
         if vector_candidates and vector_candidates['ids']:
             for i in range(len(vector_candidates['ids'][0])):
                 candidates.append({
@@ -341,8 +453,19 @@ class Oracle:
                     "score": 1.0 - vector_candidates['distances'][0][i],
                     "method": "Vector"
                 })
+        return candidates
+
+    def _fts_search(self, query, project=None, limit=10):
+        """Stemirani FTS dohvat (AND mode, Librarian sam pada na OR ako nema pogodaka)."""
+        try:
+            from src.utils.stemmer import stem_text
+            stemmed_query = stem_text(query)
+        except ImportError:
+            stemmed_query = query.lower()
             
-        # FTS
+        fts_candidates = self.librarian.search_fts(stemmed_query, project=project, limit=limit * 4, mode="and")
+
+        candidates = []
         for c in fts_candidates:
              path, content, start_line, end_line = c 
              candidates.append({
@@ -356,7 +479,73 @@ class Oracle:
                  "score": 0.7,
                  "method": "Keyword"
              })
-             
+        return candidates
+
+    def _fts_wide_search(self, query, project=None, limit=10):
+        """Širi FTS (OR mode) za recall kad ostali kanali vrate premalo kandidata."""
+        stemmed_q = query.lower()
+        wider_fts = self.librarian.search_fts(stemmed_q, project=project, limit=limit, mode="or")
+        candidates = []
+        for c in wider_fts:
+            path, content, start, end = c
+            candidates.append({
+                "id": f"fts_or_{path}_{hash(content)}",
+                "content": content,
+                "metadata": {"source": path, "start_line": start, "end_line": end},
+                "score": 0.5,
+                "method": "Keyword-Wide"
+            })
+        return candidates
+
+    @staticmethod
+    def _timed(fn, *args, **kwargs):
+        """Izvršava fn i vraća (rezultat, trajanje u ms)."""
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        return result, (time.perf_counter() - start) * 1000
+
+    def _fan_out(self, queries, project=None, limit=10, hyde=False, wide_query=None):
+        """
+        Paralelno šalje vector i FTS upit za svaku varijantu upita (te opcionalno
+        široki OR FTS) i spaja rezultate redoslijedom varijanti.
+
+        Returns:
+            (candidates, wide_candidates, timings) gdje su timings maksimalna
+            trajanja po backendu u ms (latencija = najsporiji backend, ne zbroj).
+        """
+        start = time.perf_counter()
+        jobs = []
+        for q in queries:
+            jobs.append(("vector", q, self._retrieval_executor.submit(
+                self._timed, self._vector_search, q, project=project, limit=limit, hyde=hyde)))
+            jobs.append(("fts", q, self._retrieval_executor.submit(
+                self._timed, self._fts_search, q, project=project, limit=limit)))
+        if wide_query is not None:
+            jobs.append(("fts_or", wide_query, self._retrieval_executor.submit(
+                self._timed, self._fts_wide_search, wide_query, project=project, limit=limit)))
+
+        candidates = []
+        wide_candidates = []
+        timings = {}
+        for backend, q, future in jobs:
+            try:
+                result, elapsed = future.result()
+            except Exception as e:
+                print(f"{Fore.YELLOW}⚠️ Retrieval error [{backend}] for query '{q}': {e}{Style.RESET_ALL}")
+                continue
+            key = f"{backend}_ms"
+            timings[key] = round(max(timings.get(key, 0.0), elapsed), 2)
+            if backend == "fts_or":
+                wide_candidates.extend(result)
+            else:
+                candidates.extend(result)
+
+        timings["retrieval_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return candidates, wide_candidates, timings
+
+    def _retrieve_candidates(self, query, project=None, limit=10, hyde=False, silent=False):
+        """Dohvat kandidata za jedan upit (vector + FTS paralelno)."""
+        candidates, _, _ = self._fan_out([query], project=project, limit=limit, hyde=hyde)
         return candidates
 
     def get_graph_context(self, query: str, max_results: int = 5) -> Dict:
@@ -425,13 +614,38 @@ class Oracle:
     def ask(self, query, project=None, limit=10, silent=False, hyde=True, expand=False):
         """
         Thread-safe metoda za upit s robusnim error handlingom i Fallback lancem.
+        Više upita radi paralelno (read lock); čeka se samo na upsert u tijeku.
+        Ponovljeni upiti na istoj generaciji indeksa poslužuju se iz QueryCache-a.
         """
+        key = QueryCache.make_key(query, project=project, limit=limit, hyde=hyde, expand=expand)
         try:
-            with self._lock:
+            generation = self.librarian.get_generation()
+        except Exception:
+            generation = None
+
+        if generation is not None:
+            if self.fast_path:
+                self.fast_path.refresh(generation)
+            cached = self.query_cache.get(key, generation)
+            if cached is not None:
+                cached["cached"] = True
+                return cached
+
+        resp = self._ask(query, project=project, limit=limit, silent=silent, hyde=hyde, expand=expand)
+        if generation is not None and resp.get("status") != "error":
+            self.query_cache.put(key, resp, generation)
+        return resp
+
+    def _ask(self, query, project=None, limit=10, silent=False, hyde=True, expand=False):
+        """Puni pipeline upita (FastPath, HyDE, fan-out, rangiranje, klasteriranje)."""
+        try:
+            with self._lock.read_lock():
+                timings = {}
                 # 0. Fast Path (L0/L1) - High confidence exact matches
                 if self.fast_path:
                     try:
-                        fast_res = self.fast_path.search(query)
+                        fast_res, fp_ms = self._timed(self.fast_path.search, query)
+                        timings["fast_path_ms"] = round(fp_ms, 2)
                         if fast_res and fast_res["confidence"] >= 0.9:
                             if not silent: 
                                 # print(f"{Fore.GREEN}⚡ FastPath: {fast_res['type']} detektiran!{Style.RESET_ALL}")
@@ -445,7 +659,8 @@ class Oracle:
                                 } for e in fast_res.get("data", {}).get("entities", [])],
                                 "chunks": [],
                                 "pointers": [],
-                                "method": fast_res.get("type", "FastPath")
+                                "method": fast_res.get("type", "FastPath"),
+                                "timings": timings
                             }
                     except Exception as e:
                         print(f"{Fore.YELLOW}⚠️ FastPath error: {e}{Style.RESET_ALL}")
@@ -475,38 +690,26 @@ class Oracle:
                     except Exception:
                         queries = [query]
 
-                # 3. Retrieval Loop
-                all_candidates = []
-                for q in queries:
-                    try:
-                        use_hyde = hyde or (query_type == QueryType.SEMANTIC)
-                        retrieved = self._retrieve_candidates(q, project=project, limit=limit, hyde=use_hyde)
-                        if retrieved:
-                            all_candidates.extend(retrieved)
-                    except Exception as e:
-                        print(f"{Fore.YELLOW}⚠️ Retrieval error for query '{q}': {e}{Style.RESET_ALL}")
+                # 3. Retrieval Fan-out (sve varijante + vector/FTS paralelno)
+                # Široki OR FTS se šalje spekulativno u istom valu i koristi
+                # samo ako ostali kanali vrate premalo kandidata.
+                use_hyde = hyde or (query_type == QueryType.SEMANTIC)
+                all_candidates, wide_candidates, fan_timings = self._fan_out(
+                    queries, project=project, limit=limit, hyde=use_hyde, wide_query=query
+                )
+                timings.update(fan_timings)
                 
                 # FTS FALLBACK / RECALL IMPROVEMENT
-                # Ako imamo malo kandidata, pokušaj širi FTS (OR mode)
+                # Ako imamo malo kandidata, koristi širi FTS (OR mode)
                 if len(all_candidates) < 5:
-                    try:
-                        stemmed_q = query.lower()
-                        wider_fts = self.librarian.search_fts(stemmed_q, project=project, limit=limit, mode="or")
-                        for c in wider_fts:
-                            path, content, start, end = c
-                            all_candidates.append({
-                                "id": f"fts_or_{path}_{hash(content)}",
-                                "content": content,
-                                "metadata": {"source": path, "start_line": start, "end_line": end},
-                                "score": 0.5,
-                                "method": "Keyword-Wide"
-                            })
-                    except Exception: pass
+                    all_candidates.extend(wide_candidates)
 
                 # DEFENSE: Check candidates validity
                 if not all_candidates:
                     if not silent: print(f"{Fore.YELLOW}WARNING: No candidates found for query '{query}'.{Style.RESET_ALL}")
-                    return self._empty_response("No relevant information found.")
+                    resp = self._empty_response("No relevant information found.")
+                    resp["timings"] = timings
+                    return resp
                 else:
                     if not silent: print(f"{Fore.CYAN}DEBUG: Oracle.ask() found {len(all_candidates)} candidates initially.{Style.RESET_ALL}")
 
@@ -514,6 +717,9 @@ class Oracle:
                 seen_ids = set()
                 unique_candidates = []
                 
+                # Jedan "sada" za sve kandidate (ne datetime.now() po kandidatu)
+                current_time = datetime.now().timestamp()
+
                 def calculate_boosted_score(c):
                     try:
                         base_score = float(c.get('score', 0.0))
@@ -521,7 +727,6 @@ class Oracle:
                             # Pokušaj dobiti timestamp iz metapodataka
                             meta = c.get('metadata', {})
                             last_mod = float(meta.get('last_modified', 0))
-                            current_time = datetime.now().timestamp()
                             age_seconds = current_time - last_mod
                             
                             # Temporalni boost: progresivno veći za novije stvari
@@ -621,6 +826,7 @@ class Oracle:
                 resp["entities"] = final_entities
                 resp["query_type"] = query_type.value
                 resp["method"] = "Hybrid-Pointer-System"
+                resp["timings"] = timings
                 
                 return resp
         except Exception as e:
@@ -191,6 +191,8 @@ class Worker:
         path = params.get("path")
         project = params.get("project")
         recursive = params.get("recursive", False)
+        incremental = params.get("incremental", False)
+        jobs = int(params.get("jobs", 1))
         
         if not path:
             raise ValueError("Missing 'path' parameter for ingest job")
@@ -203,7 +205,7 @@ class Worker:
         self.manager.update_progress(job['id'], 10)
         
         ingestor = Ingestor()
-        ingestor.run(path, project_name=project, recursive=recursive, silent=True)
+        run_stats = ingestor.run(path, project_name=project, recursive=recursive, silent=True, incremental=incremental, jobs=jobs)
         
         self.manager.update_progress(job['id'], 90)
         
@@ -213,6 +215,7 @@ class Worker:
         return {
             "path": path,
             "status": "ingested",
+            "ingest_stats": run_stats,
             "db_stats": stats
         }
 
@@ -229,18 +232,20 @@ class Worker:
         self.manager.update_progress(job['id'], 5)
         
         ingestor = Ingestor()
+        jobs = int(params.get("jobs", 1))
         
-        # We can update progress per file
-        total = len(files)
-        for i, file_path in enumerate(files):
+        # We can update progress per file (5 to 95 range)
+        def on_progress(done, total):
             if self._shutdown_event.is_set():
                 raise InterruptedError("Worker shutting down")
-                
-            ingestor._process_file(file_path, project=project, silent=True)
+            self.manager.update_progress(job['id'], int(5 + done / total * 90))
             
-            # Update progress (5 to 95 range)
-            progress = int(5 + (i + 1) / total * 90)
-            self.manager.update_progress(job['id'], progress)
+        if self._shutdown_event.is_set():
+            raise InterruptedError("Worker shutting down")
+        run_stats = ingestor.run_batch(
+            files, project_name=project, silent=True,
+            incremental=params.get("incremental", False), jobs=jobs, on_progress=on_progress
+        )
 
         self.manager.update_progress(job['id'], 100)
         
@@ -250,5 +255,6 @@ class Worker:
         return {
             "count": len(files),
             "status": "completed",
-             "db_stats": stats
+            "ingest_stats": run_stats,
+            "db_stats": stats
         }
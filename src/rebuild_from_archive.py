@@ -1,36 +1,345 @@
+"""
+Rekonstrukcija metadata.db i ChromaDB iz arhive događaja.
+
+- process pool (KRONOS_REBUILD_JOBS, default broj jezgri) dekodira JSON linije
+  arhive i stemira chunkove (prepare_events iz ingest_pipeline)
+- jedan writer (glavni thread) redom primjenjuje događaje: uzastopni
+  file_processed se skupljaju u batch (KRONOS_REBUILD_BATCH_CHUNKS chunkova) s
+  jednom FTS transakcijom, jednim upsertom chunk vektora i jednim upsertom
+  vektora entiteta; decision_* događaji prvo isprazne batch (redoslijed ID-jeva)
+- FTS5 automerge je isključen do kraja rebuilda (begin/end_bulk_load)
+- nakon svakog batcha checkpoint (data/rebuild.checkpoint.json) bilježi
+  poziciju u arhivi i generaciju indeksa; `kronos rebuild --resume` nastavlja od nje
+"""
 import json
+import multiprocessing
 import os
+import re
 import sys
-import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import islice
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
 from src.modules.librarian import Librarian
 from src.modules.oracle import Oracle
 from src.utils.stemmer import stem_text
+from src.utils.metadata_helper import chunk_id, chunk_ids
+from src.modules.ingest_pipeline import prepare_events
+from src.utils.event_archive import archive_exists, count_events, iter_lines, load_index
 
 console = Console()
 
-def rebuild():
-    lib = Librarian()
-    oracle = Oracle()
-    
-    archive_path = os.path.join("data", "archive.jsonl")
-    if not os.path.exists(archive_path):
-        console.print(f"[bold red]❌ Arhiva ne postoji na: {archive_path}[/]")
+CHECKPOINT_NAME = "rebuild.checkpoint.json"
+
+
+def checkpoint_path(lib):
+    return os.path.join(lib.data_path, CHECKPOINT_NAME)
+
+
+def load_checkpoint(lib):
+    try:
+        with open(checkpoint_path(lib), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_checkpoint(lib, state):
+    path = checkpoint_path(lib)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _resume_problem(lib, state):
+    """Razlog zašto se rebuild ne može nastaviti (None ako može)."""
+    segments = {s["name"]: s["offset_events"] for s in load_index(lib.archive_path)["segments"]}
+    for name, offset in state["segments"]:
+        if offset < state["position"] and segments.get(name) != offset:
+            return "arhiva je kompaktirana ili zamijenjena nakon checkpointa"
+    if state["position"] and not lib.get_stats().get("total_files"):
+        return "baza je obrisana nakon checkpointa"
+    return None
+
+
+class _BufferedCollection:
+    """
+    Skuplja upserte i brisanja vektora entiteta iz store_extracted_data u po
+    jedan poziv po batchu (entity ID-jevi se ne ponavljaju, pa je redoslijed nebitan).
+    """
+
+    def __init__(self, target):
+        self.target = target
+        self._pending = {}
+        self._deleted = set()
+
+    def upsert(self, ids, documents, metadatas):
+        for uid, doc, meta in zip(ids, documents, metadatas):
+            self._deleted.discard(uid)
+            self._pending[uid] = (doc, meta)
+
+    def delete(self, ids=None, where=None):
+        if ids is None:
+            self.flush()
+            self.target.delete(where=where)
+            return
+        for uid in ids:
+            if self._pending.pop(uid, None) is None:
+                self._deleted.add(uid)
+
+    def flush(self):
+        deleted, self._deleted = self._deleted, set()
+        pending, self._pending = self._pending, {}
+        if deleted:
+            self.target.delete(ids=list(deleted))
+        if pending:
+            docs, metas = zip(*pending.values())
+            self.target.upsert(ids=list(pending), documents=list(docs), metadatas=list(metas))
+
+    def __getattr__(self, name):
+        return getattr(self.target, name)
+
+
+class _Replayer:
+    """Writer strana rebuilda: primjenjuje pripremljene događaje redom, u batchevima."""
+
+    def __init__(self, lib, oracle, state, batch_chunks, buffer=None):
+        self.lib = lib
+        self.oracle = oracle
+        self.state = state
+        self.batch_chunks = batch_chunks
+        self.buffer = buffer
+        self.files = []
+        self.file_chunks = 0
+        self.legacy = []
+        self.position = state["position"]  # prva pozicija nakon zadnjeg dodanog događaja
+        self.stats = {"events": 0, "files": 0, "batches": 0}
+
+    def add(self, position, record):
+        """Checkpoint se piše samo kad su svi događaji prije pozicije upisani."""
+        self.position = position + 1
+        if record is None:
+            return
+        self.stats["events"] += 1
+        if "event" not in record:
+            # STARI FORMAT (Legacy)
+            if self.files:
+                self._flush_files()
+                self._checkpoint(position)
+            self.legacy.append(record)
+            if len(self.legacy) >= 50:
+                self._flush_legacy()
+                self._checkpoint(position + 1)
+        elif record["event"] == "file_processed":
+            if self.legacy:
+                self._flush_legacy()
+                self._checkpoint(position)
+            self.files.append(record["data"])
+            self.file_chunks += len(record["data"].get("chunks") or [])
+            if self.file_chunks >= self.batch_chunks:
+                self._flush_files()
+                self._checkpoint(position + 1)
+        else:
+            self.flush(position)
+            self._apply_event(record)
+
+    def flush(self, position=None):
+        self._flush_files()
+        self._flush_legacy()
+        self._checkpoint(self.position if position is None else position)
+
+    def _checkpoint(self, position):
+        if position <= self.state["position"]:
+            return
+        self.state["position"] = position
+        self.state["generation"] = self.lib.get_generation()
+        _save_checkpoint(self.lib, self.state)
+
+    def _apply_event(self, record):
+        data = record["data"]
+        try:
+            if record["event"] == "decision_ratified":
+                decision_id = self._entity_id(data, "decision_ref", data["decision_id"])
+                updates = dict(data["updates"])
+                if "superseded_by_ref" in data:
+                    new_id = self._entity_id(data, "superseded_by_ref", None)
+                    updates["superseded_by_id"] = new_id
+                    if updates.get("superseded_by"):
+                        # "Decision #N" u tekstu nosi stari ID (ratify_decision ga inače parsira)
+                        updates["superseded_by"] = re.sub(
+                            r"Decision #\d+", f"Decision #{new_id}" if new_id else "Decision",
+                            updates["superseded_by"])
+                if decision_id is None:
+                    console.print(f"[yellow]⚠️ Odluka iz događaja ne postoji: {data.get('decision_ref')}[/]")
+                else:
+                    self.lib.ratify_decision(decision_id, **updates)
+        except Exception as e:
+            console.print(f"[red]Greška u događaju {record['event']}: {e}[/]")
+
+    def _entity_id(self, data, ref_field, legacy_id):
+        """
+        Novi događaji referenciraju entitet stabilnim ključem (entity_ref) jer
+        kompakcija arhive mijenja ID-eve; stari imaju samo ID.
+        """
+        if ref_field in data:
+            return self.lib.resolve_entity_ref(data[ref_field])
+        return legacy_id
+
+    def _flush_legacy(self):
+        if self.legacy:
+            _replay_legacy_batch(self.lib, self.oracle, self.legacy)
+            self.legacy = []
+
+    def _flush_files(self):
+        if not self.files:
+            return
+        files, self.files, self.file_chunks = self.files, [], 0
+        self.stats["files"] += len(files)
+        self.stats["batches"] += 1
+
+        fts = {}       # path -> (project, rows); ista datoteka dvaput u batchu -> zadnja verzija
+        vectors = {}   # path -> (project, docs, metas); također zadnja verzija
+        processed = {}
+        for data in files:
+            meta = data["metadata"]
+            file_path = meta["source"]
+            project = meta.get("project", "default")
+            rows, docs, metas = [], [], []
+            for chunk, stemmed in zip(data["chunks"], data["stemmed"]):
+                if isinstance(chunk, str):
+                    rows.append((chunk, stemmed, 1, 1))
+                    docs.append(chunk)
+                    metas.append(meta)
+                else:
+                    start_line, end_line = chunk.get("start_line", 1), chunk.get("end_line", 1)
+                    rows.append((chunk["content"], stemmed, start_line, end_line))
+                    docs.append(chunk["content"])
+                    metas.append({**meta, "start_line": start_line, "end_line": end_line})
+            fts[file_path] = (project, rows)
+            vectors[file_path] = (project, docs, metas)
+            processed[file_path] = project
+
+        try:
+            self.lib.replace_fts_many([(path, project, rows) for path, (project, rows) in fts.items()])
+        except Exception as e:
+            console.print(f"[red]Greška u FTS batchu: {e}[/]")
+
+        for data in files:
+            if data.get("entities"):
+                meta = data["metadata"]
+                try:
+                    self.lib.store_extracted_data(meta["source"], data["entities"],
+                                                  project=meta.get("project", "default"))
+                except Exception as e:
+                    console.print(f"[red]Greška pri entitetima ({meta['source']}): {e}[/]")
+        if self.buffer is not None:
+            try:
+                self.buffer.flush()
+            except Exception as e:
+                console.print(f"[red]Greška pri indeksiranju entiteta: {e}[/]")
+
+        # Kao i FTS: vektori datoteke se zamjenjuju (sync briše ID-jeve starijih verzija),
+        # inače bi rebuild vratio svaki povijesni chunk (ID-jevi su adresirani sadržajem)
+        by_project = {}
+        for path, (project, docs, metas) in vectors.items():
+            by_project.setdefault(project, []).append((path, docs, metas, chunk_ids(project, path, docs)))
+        for project, project_files in by_project.items():
+            try:
+                self.oracle.sync_chunks_many(project, project_files)
+            except Exception as e:
+                console.print(f"[red]Greška pri upsertu vektora: {e}[/]")
+
+        self.lib.mark_files_processed([(path, project, None) for path, project in processed.items()])
+
+
+def _prepared_chunks(archive_path, since, start, jobs, chunk_events=256):
+    """Pripremljeni komadi arhive redom; dekodiranje i stemiranje u process poolu."""
+    lines = iter_lines(archive_path, since=since, start=start)
+    chunks = iter(lambda: list(islice(lines, chunk_events)), [])
+    if jobs <= 1:
+        for chunk in chunks:
+            yield prepare_events(chunk, since)
         return
 
-    console.print("[bold cyan]🔄 Započinjem rekonstrukciju baze iz arhive...[/]")
+    # spawn: isti razlog kao u ingest pipelineu (roditelj drži threadove)
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=ctx) as pool:
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(pool.submit(prepare_events, chunk, since))
+            if len(in_flight) >= jobs * 2:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def rebuild(since=None, resume=False, jobs=None, batch_chunks=None, lib=None, oracle=None):
+    """
+    Replay arhive u bazu. Bez `since` briše bazu i puni sve; sa `since`
+    (ISO timestamp) dopunjava postojeću bazu samo događajima od tog trenutka,
+    a zatvoreni segmenti stariji od njega se ni ne otvaraju. `resume` nastavlja
+    prekinuti rebuild od zadnjeg checkpointa. Vraća statistiku (None ako nije pokrenut).
+    """
+    lib = lib or Librarian()
+    oracle = oracle or Oracle()
+    jobs = jobs or int(os.getenv("KRONOS_REBUILD_JOBS", str(os.cpu_count() or 1)))
+    batch_chunks = batch_chunks or int(os.getenv("KRONOS_REBUILD_BATCH_CHUNKS", "512"))
     
-    # 1. Resetiraj baze (ali sačuvaj arhivu)
-    lib.wipe_all(keep_archive=True)
-    console.print("[dim]💨 Baza resetirana (metadata.db & vector store).[/]")
+    archive_path = lib.archive_path
+    if not archive_exists(archive_path):
+        console.print(f"[bold red]❌ Arhiva ne postoji na: {archive_path}[/]")
+        return None
+
+    if resume:
+        state = load_checkpoint(lib)
+        if state is None:
+            console.print("[bold red]❌ Nema checkpointa za nastavak (pokreni `kronos rebuild`).[/]")
+            return None
+        problem = _resume_problem(lib, state)
+        if problem:
+            console.print(f"[bold red]❌ Nastavak nije moguć: {problem}. Pokreni puni rebuild.[/]")
+            return None
+        if lib.get_generation() != state["generation"]:
+            # Zadnji (prekinuti) batch je djelomično upisan; replay batcha je idempotentan
+            console.print("[yellow]⚠️ Baza je mijenjana nakon checkpointa; ponavljam od zadnjeg batcha.[/]")
+        since = state["since"]
+        console.print(f"[bold cyan]🔄 Nastavljam rekonstrukciju od događaja {state['position']}...[/]")
+    else:
+        console.print("[bold cyan]🔄 Započinjem rekonstrukciju baze iz arhive...[/]")
+        # 1. Resetiraj baze (ali sačuvaj arhivu)
+        if since is None:
+            lib.wipe_all(keep_archive=True)
+            console.print("[dim]💨 Baza resetirana (metadata.db & vector store).[/]")
+        else:
+            console.print(f"[dim]⏩ Replay događaja od {since}.[/]")
+        state = {
+            "position": 0,
+            "since": since,
+            "generation": lib.get_generation(),
+            "segments": [[s["name"], s["offset_events"]] for s in load_index(archive_path)["segments"]],
+            "started_at": datetime.now().isoformat(),
+        }
+        _save_checkpoint(lib, state)
 
-    # 2. Brojanje linija za progress bar
-    total_lines = 0
-    with open(archive_path, 'r', encoding='utf-8') as f:
-        for _ in f:
-            total_lines += 1
+    # 2. Ukupno za progress bar (iz indeksa segmenata; broji se samo aktivni segment)
+    total_events = count_events(archive_path, since=since)
+    start = state["position"]
+
+    buffer = None
+    try:
+        buffer = _BufferedCollection(lib._get_collection())
+        lib._collection = buffer
+    except Exception as e:
+        console.print(f"[yellow]⚠️ Vektorska baza nedostupna za entitete: {e}[/]")
+    replayer = _Replayer(lib, oracle, state, batch_chunks, buffer)
+    lib.begin_bulk_load()
+    started = time.perf_counter()
 
     with Progress(
         SpinnerColumn(),
@@ -40,49 +349,32 @@ def rebuild():
         console=console,
     ) as progress:
         
-        task = progress.add_task("[cyan]Replay events...", total=total_lines)
-        
-        legacy_batch = []
-        batch_size = 50
-        
-        with open(archive_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                try:
-                    record = json.loads(line)
-                    
-                    if "event" in record:
-                        # Prije procesiranja eventa, isprazni legacy batch
-                        if legacy_batch:
-                            _replay_legacy_batch(lib, oracle, legacy_batch)
-                            legacy_batch = []
-                            
-                        event_type = record["event"]
-                        data = record["data"]
-                        
-                        if event_type == "file_processed":
-                            _replay_file_processed(lib, oracle, data)
-                        elif event_type == "decision_ratified":
-                            lib.ratify_decision(data["decision_id"], **data["updates"])
-                    else:
-                        # STARI FORMAT (Legacy) - Dodaj u batch
-                        legacy_batch.append(record)
-                        if len(legacy_batch) >= batch_size:
-                            _replay_legacy_batch(lib, oracle, legacy_batch)
-                            legacy_batch = []
-                except Exception as e:
-                    console.print(f"[red]Greška u liniji: {e}[/]")
-                
-                progress.advance(task)
-        
-        # Zadnji batch
-        if legacy_batch:
-            _replay_legacy_batch(lib, oracle, legacy_batch)
+        task = progress.add_task("[cyan]Replay events...", total=total_events,
+                                 completed=0 if since else min(start, total_events))
+        try:
+            for prepared in _prepared_chunks(archive_path, since, start, jobs):
+                for position, record in prepared:
+                    replayer.add(position, record)
+                progress.advance(task, len(prepared))
+            replayer.flush()
+        finally:
+            if buffer is not None:
+                lib._collection = buffer.target
+
+    lib.end_bulk_load()
+    os.remove(checkpoint_path(lib))
+    elapsed = time.perf_counter() - started
+    stats = {**replayer.stats, "jobs": jobs, "seconds": round(elapsed, 2),
+             "events_per_s": round(replayer.stats["events"] / elapsed, 1) if elapsed else 0.0}
 
     console.print(f"\n[bold success]✅ Rekonstrukcija završena![/]")
     # Prikaži statse
-    stats = lib.get_stats()
-    console.print(f"Indeksirano datoteka: {stats.get('total_files')}")
-    console.print(f"Ukupno chunkova: {stats.get('total_chunks')}")
+    db_stats = lib.get_stats()
+    console.print(f"Indeksirano datoteka: {db_stats.get('total_files')}")
+    console.print(f"Ukupno chunkova: {db_stats.get('total_chunks')}")
+    console.print(f"[dim]{stats['events']} događaja u {stats['batches']} batcheva, "
+                  f"{stats['events_per_s']} događaja/s ({jobs} procesa)[/]")
+    return stats
 
 def _replay_file_processed(lib, oracle, data):
     chunks = data["chunks"]
@@ -91,20 +383,27 @@ def _replay_file_processed(lib, oracle, data):
     file_path = meta["source"]
     project = meta.get("project", "default")
 
-    # FTS
-    for chunk in chunks:
-        stemmed = stem_text(chunk, mode="aggressive")
-        lib.store_fts(file_path, chunk, stemmed, project=project)
+    # FTS (jedna transakcija po datoteci)
+    lib.replace_file_chunks(file_path, project, chunks)
 
     # Entiteti
     if entities:
         lib.store_extracted_data(file_path, entities, project=project)
 
-    # Vektori
-    ids = [f"{os.path.basename(file_path)}_{i}_{hash(chunk)}" for i in range(len(chunks))]
+    # Vektori (arhiva sadrži ili stringove ili dict-ove s brojevima linija)
+    docs = []
+    metas = []
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            docs.append(chunk)
+            metas.append(meta)
+        else:
+            docs.append(chunk["content"])
+            metas.append({**meta, "start_line": chunk.get("start_line", 1), "end_line": chunk.get("end_line", 1)})
+    ids = chunk_ids(project, file_path, docs)
     oracle.safe_upsert(
-        documents=chunks,
-        metadatas=[meta for _ in chunks],
+        documents=docs,
+        metadatas=metas,
         ids=ids
     )
     
@@ -117,7 +416,7 @@ def _replay_legacy_batch(lib, oracle, records):
     metas = []
     ids = []
     
-    conn = sqlite3.connect(lib.meta_path)
+    conn = lib._get_sqlite_conn()
     cursor = conn.cursor()
     
     seen_batch_ids = set()
@@ -128,10 +427,10 @@ def _replay_legacy_batch(lib, oracle, records):
             meta = record["metadata"]
             file_path = meta["source"]
             project = meta.get("project", "default")
-            doc_id = f"{os.path.basename(file_path)}_{hash(content)}"
+            doc_id = chunk_id(project, file_path, content)
             
             # FTS (Directly using cursor for speed)
-            stemmed = stem_text(content, mode="aggressive")
+            stemmed = record.get("stemmed") or stem_text(content, mode="aggressive")
             cursor.execute('''
                 INSERT INTO knowledge_fts (path, content, stemmed_content, project)
                 VALUES (?, ?, ?, ?)
@@ -1,52 +1,69 @@
-import sqlite3
+import os
+import time
 from src.modules.librarian import Librarian
+from src.utils.sqlite_pool import get_connection
 from rich.console import Console
-from rich.progress import track
+from rich.progress import Progress
 
 console = Console()
 
-def reindex_entities():
+def reindex_entities(librarian=None, page_size=None, batch_size=None):
     """
     Učitava sve entitete iz SQLite baze i šalje ih u ChromaDB (vektorsku bazu).
     Ovo je potrebno jer smo upravo dodali 'Entity-First' pretragu, a stari entiteti
     nisu bili automatski vektorizirani.
+
+    Entiteti se čitaju po stranicama (keyset po id-u, KRONOS_REINDEX_PAGE, default 5000)
+    i upsertaju u batchevima preko jednog keširanog Chroma handlea.
+    Vraća {"total", "indexed", "duration_s", "entities_per_s"}.
     """
-    librarian = Librarian()
-    
+    librarian = librarian or Librarian()
+    page_size = page_size or int(os.getenv("KRONOS_REINDEX_PAGE", "5000"))
+
     console.print("[bold cyan]🔄 Re-indeksiranje entiteta: SQLite -> ChromaDB[/]")
-    
-    # 1. Dohvati sve entitete
-    conn = sqlite3.connect(librarian.meta_path)
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, type, content, project, file_path FROM entities")
-    rows = cursor.fetchall()
-    conn.close()
-    
-    total = len(rows)
+
+    # Ignoriraj 'code' jer to nisu semantički entiteti za pretragu
+    conn = get_connection(librarian.meta_path)
+    try:
+        total = conn.execute("SELECT count(*) FROM entities WHERE type != 'code'").fetchone()[0]
+    finally:
+        conn.close()
     console.print(f"Pronađeno [bold]{total}[/] entiteta u bazi.")
-    
-    # 2. Inicijaliziraj Chroma klijenta
-    collection = librarian._get_collection()
-    
-    # 3. Batch processing
+
     success_count = 0
-    
-    for row in track(rows, description="Indeksiranje..."):
-        eid, etype, content, project, file_path = row
-        
-        # Ignoriraj 'code' jer to nisu semantički entiteti za pretragu
-        if etype == 'code':
-            continue
-            
-        try:
-            # Koristimo internu metodu za indeksiranje
-            librarian._index_entity(eid, etype, content, project=project, source=file_path)
-            success_count += 1
-        except Exception as e:
-            console.print(f"[red]Greška na ID {eid}: {e}[/]")
-            
-    console.print(f"\n[bold green]✅ Završeno! Uspješno indeksirano {success_count}/{total} entiteta.[/]")
+    last_id = 0
+    start = time.perf_counter()
+
+    with Progress(console=console) as progress:
+        task = progress.add_task("Indeksiranje...", total=total)
+        while True:
+            conn = get_connection(librarian.meta_path)
+            try:
+                rows = conn.execute('''
+                    SELECT id, type, content, project, file_path FROM entities
+                    WHERE id > ? AND type != 'code'
+                    ORDER BY id LIMIT ?
+                ''', (last_id, page_size)).fetchall()
+            finally:
+                conn.close()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            success_count += librarian._index_entities(rows, batch_size=batch_size)
+            progress.update(task, advance=len(rows))
+
+    duration = time.perf_counter() - start
+    rate = success_count / duration if duration > 0 else 0.0
+    console.print(f"\n[bold green]✅ Završeno! Uspješno indeksirano {success_count}/{total} entiteta "
+                  f"({duration:.1f}s, {rate:.0f} entiteta/s).[/]")
     console.print("[dim]Sada 'audit' i 'chat' mogu pronaći sve stare odluke.[/]")
+    return {
+        "total": total,
+        "indexed": success_count,
+        "duration_s": round(duration, 3),
+        "entities_per_s": round(rate, 1),
+    }
 
 if __name__ == "__main__":
     reindex_entities()
@@ -58,6 +58,10 @@ async def lifespan(app: FastAPI):
     if _worker_instance:
         print("🛑 Zaustavljam Worker...")
         _worker_instance.stop()
+    from src.utils.archive_writer import close_all_writers
+    close_all_writers()
+    from src.utils.sqlite_pool import close_all_pools
+    close_all_pools()
     print("🔌 Server shutdown complete.")
 
 app = FastAPI(
@@ -100,7 +104,9 @@ def health_check():
         "health_score": metrics.health_score(),
         "fts_failure_rate": metrics.fts_failures / max(metrics.total_queries, 1),
         "vector_failure_rate": metrics.vector_failures / max(metrics.total_queries, 1),
-        "total_queries": metrics.total_queries
+        "total_queries": metrics.total_queries,
+        "fast_path": _oracle_instance.fast_path.status()
+        if _oracle_instance is not None and _oracle_instance.fast_path else {"ready": False},
     }
 
 @app.get("/stream")
@@ -337,6 +343,7 @@ def query_memory(request: QueryRequest):
                 "global_limit": composer.config.global_limit,
                 "items_count": len(composer.items),
                 "used_latency_ms": round(total_latency, 2),
+                "backend_timings": retrieval_results.get("timings", {}),
                 "search_method": method
             }
         }
@@ -384,29 +391,48 @@ def fetch_exact(request: FetchExactRequest):
 def get_stats():
     """Vraća statistiku memorije."""
     try:
-        return Librarian().get_stats()
+        stats = Librarian().get_stats()
+        if _oracle_instance is not None:
+            stats["query_cache"] = _oracle_instance.query_cache.stats()
+        return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/entities")
-def get_entities(type: Optional[str] = None):
-    """Vraća ekstrahirane entitete."""
-    import sqlite3
+def get_entities(type: Optional[str] = None, q: Optional[str] = None, project: Optional[str] = None, limit: int = 100):
+    """Vraća ekstrahirane entitete (q = FTS5 pretraga sadržaja, bm25 poredak)."""
     lib = Librarian()
-    conn = sqlite3.connect(lib.meta_path)
+    if q:
+        rows = lib.search_entities(q, etype=type, project=project, limit=limit)
+        return {"entities": [
+            {
+                "file": os.path.basename(r["file_path"] or ""),
+                "type": r["type"],
+                "content": r["content"],
+                "project": r["project"],
+            }
+            for r in rows
+        ]}
+
+    conn = lib._get_sqlite_conn()
     cursor = conn.cursor()
     
     try:
+        sql = "SELECT file_path, type, content, context_preview FROM entities WHERE 1=1"
+        params = []
         if type:
-            cursor.execute("SELECT file_path, type, content, context_preview FROM entities WHERE type = ?", (type,))
-        else:
-            cursor.execute("SELECT file_path, type, content, context_preview FROM entities")
+            sql += " AND type = ?"
+            params.append(type)
+        if project:
+            sql += " AND project = ?"
+            params.append(project)
+        cursor.execute(sql, tuple(params))
         
         rows = cursor.fetchall()
         entities = []
         for row in rows:
             entities.append({
-                "file": os.path.basename(row[0]),
+                "file": os.path.basename(row[0] or ""),
                 "type": row[1],
                 "content": row[2],
                 "preview": row[3]
@@ -426,6 +452,17 @@ def wipe_memory():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/archive/compact")
+def compact_archive_endpoint(dry_run: bool = False):
+    """Kompakcija arhive događaja (zadnji file_processed po datoteci)."""
+    from src.utils.event_archive import compact_archive
+    try:
+        lib = Librarian()
+        lib.flush_archive()
+        return {"status": "success", "stats": compact_archive(lib.archive_path, dry_run=dry_run)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 
 # ==================== DECISION API ====================
 
@@ -433,6 +470,7 @@ class RatifyRequest(BaseModel):
     valid_from: Optional[str] = None
     valid_to: Optional[str] = None
     superseded_by: Optional[str] = None
+    superseded_by_id: Optional[int] = None
 
 class SupersedeRequest(BaseModel):
     old_decision_id: int
@@ -474,6 +512,30 @@ def get_active_decisions(
         lib = Librarian()
         decisions = lib.get_active_decisions(project=project, date=date)
         return {"decisions": decisions, "count": len(decisions), "active_on": date or "today"}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/decisions/changes")
+def get_decision_changes(
+    start: str,
+    end: str,
+    project: Optional[str] = None
+):
+    """
+    Vraća odluke kojima je valjanost počela ili završila između dva datuma.
+    
+    - **start**, **end**: Datumi u formatu YYYY-MM-DD (uključivo)
+    - **project**: Filtriraj po imenu projekta
+    """
+    try:
+        lib = Librarian()
+        decisions = lib.get_decisions_changed_between(start, end, project=project)
+        return {"decisions": decisions, "count": len(decisions), "start": start, "end": end}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -493,6 +555,21 @@ def get_decision(decision_id: int):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/decisions/{decision_id}/history")
+def get_decision_history(decision_id: int):
+    """Vraća cijeli lanac odluke (pretci i nasljednici), od najstarije prema najnovijoj."""
+    try:
+        lib = Librarian()
+        history = lib.get_decision_history(decision_id)
+        if not history:
+            raise HTTPException(status_code=404, detail=f"Odluka s ID-om {decision_id} nije pronađena.")
+        return {"decision_id": decision_id, "history": history, "count": len(history)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.put("/decisions/{decision_id}/ratify")
 def ratify_decision(decision_id: int, request: RatifyRequest):
     """
@@ -512,7 +589,8 @@ def ratify_decision(decision_id: int, request: RatifyRequest):
             decision_id,
             valid_from=request.valid_from,
             valid_to=request.valid_to,
-            superseded_by=request.superseded_by
+            superseded_by=request.superseded_by,
+            superseded_by_id=request.superseded_by_id
         )
         if not success:
             raise HTTPException(status_code=404, detail=f"Odluka s ID-om {decision_id} nije pronađena.")
@@ -0,0 +1,296 @@
+"""
+Group-commit writer za archive.jsonl (event sourcing).
+
+Umjesto open/append/close po događaju iz više threadova:
+
+- producenti (log_event) samo serijaliziraju zapis i stave liniju u ograničeni
+  red (pun red blokira producenta - backpressure umjesto neograničene memorije)
+- jedan pozadinski thread po datoteci skuplja sve što je u redu i piše to
+  jednim write() pozivom, pod ekskluzivnim lockom (<arhiva>.lock) da se
+  zapisi iz drugih procesa (CLI dok server radi) ne isprepliću
+- fsync ide svakih KRONOS_ARCHIVE_FSYNC_MS ms ili nakon KRONOS_ARCHIVE_FSYNC_BYTES
+  nezapisanih bajtova, a odmah kad netko čeka flush()
+- flush() čeka da sve do tada predano bude na disku (ili diže grešku zapisa);
+  flush_all_writers() čeka najviše KRONOS_ARCHIVE_FLUSH_TIMEOUT sekundi;
+  close_all_writers() (atexit, server shutdown, wipe, restore) prazni red i zatvara datoteke
+
+Kad aktivni segment prijeđe veličinu (ili starost) segmenta, writer ga pod istim
+lockom zatvara u komprimirani segment (src/utils/event_archive.py).
+Ako je arhiva obrisana ili zamijenjena (wipe_all, restore, seal), writer je ponovno otvara.
+"""
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from src.utils.event_archive import (
+    archive_lock, seal_active, segment_bytes_default, segment_seconds_default,
+)
+
+
+class ArchiveWriter:
+    """Jedan pozadinski writer po JSONL datoteci."""
+
+    _STOP = object()
+    _WAKE = object()
+
+    def __init__(self, path: str, max_queue: Optional[int] = None,
+                 fsync_interval: Optional[float] = None, fsync_bytes: Optional[int] = None,
+                 segment_bytes: Optional[int] = None, segment_seconds: Optional[float] = None):
+        self.path = path
+        self.max_queue = max_queue or int(os.getenv("KRONOS_ARCHIVE_QUEUE", "10000"))
+        self.fsync_interval = fsync_interval if fsync_interval is not None else \
+            int(os.getenv("KRONOS_ARCHIVE_FSYNC_MS", "200")) / 1000
+        self.fsync_bytes = fsync_bytes or int(os.getenv("KRONOS_ARCHIVE_FSYNC_BYTES", str(1024 * 1024)))
+        self.segment_bytes = segment_bytes or segment_bytes_default()
+        self.segment_seconds = segment_seconds if segment_seconds is not None else segment_seconds_default()
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=self.max_queue)
+        self._cond = threading.Condition()
+        self._submitted = 0   # broj predanih linija
+        self._synced = 0      # broj linija koje su zapisane i fsyncane
+        self._sync_requested = False
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._appending = 0   # append() između provjere _closed i put()
+        self._lock = archive_lock(path)
+        self._file = None
+        self._file_id = None
+        self._active_started = None  # wall-clock početak aktivnog segmenta
+
+        self.events = 0
+        self.batches = 0
+        self.fsyncs = 0
+        self.seals = 0
+
+        self._thread = threading.Thread(target=self._run, name="KronosArchiveWriter", daemon=True)
+        self._thread.start()
+
+    # --- producenti -------------------------------------------------------
+
+    def append(self, line: str):
+        """Predaje jednu JSON liniju (bez '\\n'). Blokira ako je red pun."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f"ArchiveWriter za {self.path} je zatvoren")
+            self._submitted += 1
+            self._appending += 1
+        # put() može blokirati (pun red), pa ide izvan _cond; close() čeka
+        # da sve prihvaćene linije uđu u red prije STOP-a
+        try:
+            self._queue.put(line)
+        finally:
+            with self._cond:
+                self._appending -= 1
+                self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Čeka da sve dosad predane linije budu zapisane i fsyncane. Diže
+        grešku zapisa ako je writer neku imao; False nakon isteka `timeout`.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            target = self._submitted
+            if self._synced >= target:
+                return True
+            self._sync_requested = True
+        try:
+            self._queue.put_nowait(self._WAKE)  # ne čekaj fsync interval
+        except queue.Full:
+            pass  # writer je ionako zauzet
+        with self._cond:
+            while self._synced < target and self._thread.is_alive() and self._error is None:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining if remaining is not None else 0.5)
+            if self._error is not None:
+                error, self._error = self._error, None
+                raise error
+            return self._synced >= target
+
+    def close(self):
+        """Zapisuje sve iz reda, fsync i zatvara datoteku."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            while self._appending:
+                self._cond.wait()
+        self._queue.put(self._STOP)
+        self._thread.join()
+        self._lock.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "events": self.events,
+            "batches": self.batches,
+            "fsyncs": self.fsyncs,
+            "seals": self.seals,
+            "queued": self._queue.qsize(),
+        }
+
+    # --- writer thread ----------------------------------------------------
+
+    def _ensure_open(self):
+        try:
+            st = os.stat(self.path)
+            current = (st.st_dev, st.st_ino)
+        except OSError:
+            current = None
+        if self._file is not None and current == self._file_id:
+            return
+        if self._file is not None:
+            self._file.close()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "ab")
+        st = os.fstat(self._file.fileno())
+        self._file_id = (st.st_dev, st.st_ino)
+        self._active_started = self._first_timestamp() if st.st_size else None
+
+    def _first_timestamp(self) -> Optional[float]:
+        try:
+            with open(self.path, "rb") as f:
+                ts = json.loads(f.readline()).get("timestamp")
+            return datetime.fromisoformat(ts).timestamp()
+        except Exception:
+            return os.path.getmtime(self.path)
+
+    def _should_seal(self) -> bool:
+        if self._file.tell() >= self.segment_bytes:
+            return True
+        return bool(self.segment_seconds and self._active_started
+                    and time.time() - self._active_started >= self.segment_seconds)
+
+    def _run(self):
+        unsynced_lines = 0
+        unsynced_bytes = 0
+        last_sync = time.monotonic()
+        stopping = False
+
+        while not stopping:
+            try:
+                items = [self._queue.get(timeout=self.fsync_interval or 0.05)]
+            except queue.Empty:
+                items = []
+            # Group commit: sve što je trenutno u redu ide u isti write
+            while items and len(items) < self.max_queue:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = any(item is self._STOP for item in items)
+            lines = [item for item in items if item is not self._STOP and item is not self._WAKE]
+            # Linije se broje odmah: i neuspjeli zapis mora pomaknuti _synced, inače flush() nikad ne završi
+            unsynced_lines += len(lines)
+
+            try:
+                if lines:
+                    payload = ("\n".join(lines) + "\n").encode("utf-8")
+                    with self._lock:
+                        self._ensure_open()
+                        if self._active_started is None:
+                            self._active_started = time.time()
+                        self._file.write(payload)
+                        self._file.flush()
+                        self.events += len(lines)
+                        self.batches += 1
+                        unsynced_bytes += len(payload)
+                        if self._should_seal():
+                            # fsync pa zatvaranje segmenta; sljedeći write otvara novi archive.jsonl
+                            os.fsync(self._file.fileno())
+                            self._file.close()
+                            self._file = None
+                            seal_active(self.path, self.segment_bytes)
+                            self.seals += 1
+                            self.fsyncs += 1
+                            last_sync = time.monotonic()
+                            self._mark_synced(unsynced_lines)
+                            unsynced_lines = unsynced_bytes = 0
+
+                with self._cond:
+                    sync_requested = self._sync_requested
+                due = (time.monotonic() - last_sync) >= self.fsync_interval or unsynced_bytes >= self.fsync_bytes
+                if unsynced_lines and (due or sync_requested or stopping):
+                    os.fsync(self._file.fileno())
+                    self.fsyncs += 1
+                    last_sync = time.monotonic()
+                    self._mark_synced(unsynced_lines)
+                    unsynced_lines = unsynced_bytes = 0
+            except Exception as e:
+                # Izgubljene linije se ne ponavljaju; flush() prijavljuje grešku
+                with self._cond:
+                    self._error = e
+                if self._file is not None:
+                    try:
+                        self._file.close()
+                    except OSError:
+                        pass
+                    self._file = None  # sljedeći batch ponovno otvara arhivu
+                self._mark_synced(unsynced_lines)
+                unsynced_lines = unsynced_bytes = 0
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _mark_synced(self, count):
+        with self._cond:
+            self._synced += count
+            if self._synced >= self._submitted:
+                self._sync_requested = False
+            self._cond.notify_all()
+
+
+_writers: Dict[str, ArchiveWriter] = {}
+_writers_pid: Dict[str, int] = {}
+_writers_lock = threading.Lock()
+
+
+def get_archive_writer(path: str) -> ArchiveWriter:
+    """Writer za danu arhivu (jedan po datoteci po procesu)."""
+    key = os.path.abspath(path)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None or _writers_pid.get(key) != os.getpid():
+            writer = _writers[key] = ArchiveWriter(key)
+            _writers_pid[key] = os.getpid()
+        return writer
+
+
+def flush_all_writers(under: Optional[str] = None, timeout: Optional[float] = None):
+    """
+    fsync svih (ili samo onih unutar direktorija `under`) arhiva. Diže grešku
+    zapisa iz writera ili TimeoutError nakon `timeout` sekundi po writeru
+    (default KRONOS_ARCHIVE_FLUSH_TIMEOUT).
+    """
+    if timeout is None:
+        timeout = float(os.getenv("KRONOS_ARCHIVE_FLUSH_TIMEOUT", "30"))
+    prefix = os.path.abspath(under) + os.sep if under else None
+    with _writers_lock:
+        writers = [w for p, w in _writers.items() if prefix is None or p.startswith(prefix)]
+    for writer in writers:
+        if not writer.flush(timeout=timeout):
+            raise TimeoutError(f"Arhiva {writer.path} nije zapisana unutar {timeout:g} s")
+
+
+def close_all_writers(under: Optional[str] = None):
+    """Prazni red i zatvara writere (sve ili samo one unutar direktorija `under`)."""
+    prefix = os.path.abspath(under) + os.sep if under else None
+    with _writers_lock:
+        paths = [p for p in _writers if prefix is None or p.startswith(prefix)]
+        writers = [_writers.pop(p) for p in paths]
+        for p in paths:
+            _writers_pid.pop(p, None)
+    for writer in writers:
+        writer.close()
+
+
+atexit.register(close_all_writers)
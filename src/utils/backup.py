@@ -0,0 +1,378 @@
+"""
+Online backup data/ direktorija (bez zaustavljanja servera).
+
+- SQLite baze (metadata.db, jobs.db, knowledge_graph.db, chroma.sqlite3, ...)
+  kopiraju se sqlite3 backup API-jem u koracima od KRONOS_BACKUP_PAGES stranica;
+  između koraka pisci nisu blokirani, a rezultat je konzistentan snimak
+  (nema kidanja WAL-a kao kod kopiranja bajtova s diska)
+- vektorska baza (data/store) i metadata.db snimaju se pod lockom vektorske
+  baze (src/utils/store_lock.py) i na istoj generaciji indeksa: ako se
+  generacija promijeni tijekom snimanja, snimanje se ponavlja
+- arhiva događaja: zatvoreni segmenti su nepromjenjivi, aktivni segment se
+  kopira do veličine zabilježene pod lockom arhive; kompakcija čeka kraj backupa
+- sve ide u ZIP (deflate) s manifest.json: sha256 i veličina svake datoteke,
+  generacija, konzistentnost vektorske baze
+- inkrementalni backup ne zapisuje datoteke koje su u prethodnom backupu
+  identične (nepromijenjeni segmenti, baze, HNSW datoteke) nego ih u
+  manifestu referencira; restore ih uzima iz tog (baznog) ZIP-a
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import time
+import zipfile
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from src.utils.event_archive import archive_lock, compaction_lock, load_index, segment_dir
+from src.utils.store_lock import vector_store_lock
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+ARC_PREFIX = "data/"
+_SQLITE_MAGIC = b"SQLite format 3\x00"
+_COPY_BLOCK = 1024 * 1024
+# Pomoćne datoteke koje se ne backupiraju (WAL se ugrađuje kroz backup API)
+_SKIP_SUFFIXES = ("-wal", "-shm", "-journal", ".lock", ".tmp")
+
+
+def _is_sqlite(path: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(16) == _SQLITE_MAGIC
+    except OSError:
+        return False
+
+
+def _live_generation(data_dir: str) -> Optional[int]:
+    path = os.path.join(data_dir, "metadata.db")
+    if not os.path.exists(path):
+        return None
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=30)
+    try:
+        row = conn.execute("SELECT value FROM index_state WHERE key = 'generation'").fetchone()
+        return row[0] if row else None
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+
+
+class _Restarted(Exception):
+    pass
+
+
+def snapshot_sqlite(src_path: str, dst_path: str, pages: Optional[int] = None, max_restarts: int = 3):
+    """
+    Konzistentna kopija žive SQLite baze (backup API, `pages` stranica po koraku).
+    Upis iz druge konekcije između koraka restarta kopiranje; ako se to ponovi
+    više od `max_restarts` puta, kopira se u jednom koraku (jedna read
+    transakcija - u WAL modu i dalje ne blokira pisce).
+    """
+    pages = pages or int(os.getenv("KRONOS_BACKUP_PAGES", "1024"))
+    state = {"remaining": None, "restarts": 0}
+
+    def progress(status, remaining, total):
+        if state["remaining"] is not None and remaining > state["remaining"]:
+            state["restarts"] += 1
+            if state["restarts"] > max_restarts:
+                raise _Restarted()
+        state["remaining"] = remaining
+
+    src = sqlite3.connect(src_path, timeout=30)
+    try:
+        dst = sqlite3.connect(dst_path)
+        try:
+            src.backup(dst, pages=pages, progress=progress, sleep=0.01)
+        except _Restarted:
+            src.backup(dst, pages=-1)
+        finally:
+            dst.close()
+    finally:
+        src.close()
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_COPY_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_manifest(backup_file: str) -> Optional[Dict[str, Any]]:
+    """Manifest backupa (None za stare backupe bez manifesta)."""
+    with zipfile.ZipFile(backup_file) as zf:
+        if MANIFEST_NAME not in zf.namelist():
+            return None
+        return json.loads(zf.read(MANIFEST_NAME))
+
+
+def latest_backup(backup_dir: str) -> Optional[str]:
+    """Najnoviji backup s manifestom u direktoriju (baza za inkrementalni)."""
+    candidates = []
+    for name in os.listdir(backup_dir) if os.path.isdir(backup_dir) else []:
+        path = os.path.join(backup_dir, name)
+        if not name.endswith(".zip"):
+            continue
+        try:
+            manifest = read_manifest(path)
+        except (OSError, zipfile.BadZipFile):
+            continue
+        if manifest:
+            candidates.append((manifest["created_at"], path))
+    return max(candidates)[1] if candidates else None
+
+
+class _BackupWriter:
+    """Streama datoteke u ZIP i puni manifest; preskače one identične u baznom backupu."""
+
+    def __init__(self, zf, base_name, base_manifest):
+        self.zf = zf
+        self.base_name = base_name
+        self.base_files = (base_manifest or {}).get("files", {})
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.written = 0
+        self.reused = 0
+
+    def _reuse(self, rel, sha, size):
+        base = self.base_files.get(rel)
+        if base and base["sha256"] == sha and base["size"] == size:
+            self.files[rel] = {"sha256": sha, "size": size, "source": base.get("source") or self.base_name}
+            self.reused += 1
+            return True
+        return False
+
+    def add_file(self, rel, path, immutable=False):
+        size = os.path.getsize(path)
+        base = self.base_files.get(rel)
+        if immutable and base and base["size"] == size:
+            # Zatvoreni segment: isto ime i veličina -> ista datoteka, bez ponovnog čitanja
+            return self._reuse(rel, base["sha256"], size)
+        if self._reuse(rel, _sha256(path), size):
+            return True
+        with open(path, "rb") as src:
+            self.add_stream(rel, src, size)
+        return False
+
+    def add_stream(self, rel, src, size):
+        """Zapisuje prvih `size` bajtova otvorene datoteke (npr. aktivni segment arhive)."""
+        digest = hashlib.sha256()
+        remaining = size
+        with self.zf.open(ARC_PREFIX + rel, "w", force_zip64=True) as dst:
+            while remaining > 0:
+                block = src.read(min(_COPY_BLOCK, remaining))
+                if not block:
+                    break
+                digest.update(block)
+                dst.write(block)
+                remaining -= len(block)
+        self.files[rel] = {"sha256": digest.hexdigest(), "size": size - remaining, "source": None}
+        self.written += 1
+
+
+def _copy_tree(src_dir, dst_dir, pages):
+    """Kopija direktorija: SQLite datoteke backup API-jem, ostalo bajtovima."""
+    for root, dirs, files in os.walk(src_dir):
+        target = os.path.join(dst_dir, os.path.relpath(root, src_dir))
+        os.makedirs(target, exist_ok=True)
+        for name in files:
+            if name.endswith(_SKIP_SUFFIXES):
+                continue
+            src = os.path.join(root, name)
+            if _is_sqlite(src):
+                snapshot_sqlite(src, os.path.join(target, name), pages)
+            else:
+                shutil.copy2(src, os.path.join(target, name))
+
+
+def create_backup(data_dir: str, output: str, base: Optional[str] = None,
+                  pages: Optional[int] = None, retries: int = 3) -> Dict[str, Any]:
+    """
+    Kreira backup data_dir u ZIP `output`. `base` je prethodni backup za
+    inkrementalni način. Vraća manifest (uz "written"/"reused" brojače).
+    """
+    data_dir = os.path.abspath(data_dir)
+    base_manifest = read_manifest(base) if base else None
+    if base and base_manifest is None:
+        raise ValueError(f"Bazni backup nema manifest: {base}")
+
+    archive_path = os.path.join(data_dir, "archive.jsonl")
+    archive_segments = segment_dir(archive_path)
+    store_dir = os.path.join(data_dir, "store")
+    staging = tempfile.mkdtemp(prefix=".backup-", dir=os.path.dirname(os.path.abspath(output)) or ".")
+    compact_lock = compaction_lock(archive_path)
+    try:
+        with compact_lock, zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as zf:
+            writer = _BackupWriter(zf, os.path.basename(base) if base else None, base_manifest)
+
+            # 1. metadata.db + vektorska baza na istoj generaciji. Pisci Chrome drže
+            # vector_store_lock od upisa do bump_generation, pa pod njim store nije
+            # usred upisa; ista generacija prije i poslije znači i isti metadata.db.
+            consistent = False
+            generation = None
+            for _ in range(max(retries, 1)):
+                shutil.rmtree(os.path.join(staging, "state"), ignore_errors=True)
+                os.makedirs(os.path.join(staging, "state"))
+                with vector_store_lock(store_dir):
+                    before = _live_generation(data_dir)
+                    if os.path.exists(os.path.join(data_dir, "metadata.db")):
+                        snapshot_sqlite(os.path.join(data_dir, "metadata.db"),
+                                        os.path.join(staging, "state", "metadata.db"), pages)
+                    if os.path.isdir(store_dir):
+                        _copy_tree(store_dir, os.path.join(staging, "state", "store"), pages)
+                    generation = _live_generation(data_dir)
+                if before == generation:
+                    consistent = True
+                    break
+                time.sleep(0.2)
+            for root, _, files in os.walk(os.path.join(staging, "state")):
+                for name in sorted(files):
+                    path = os.path.join(root, name)
+                    writer.add_file(os.path.relpath(path, os.path.join(staging, "state")).replace(os.sep, "/"), path)
+
+            # 2. Arhiva događaja: snimka indeksa i veličine aktivnog segmenta pod lockom
+            lock = archive_lock(archive_path)
+            try:
+                with lock:
+                    index = load_index(archive_path)
+                    active_size = os.path.getsize(archive_path) if os.path.exists(archive_path) else None
+                    active = open(archive_path, "rb") if active_size else None
+            finally:
+                lock.close()
+            if active is not None:
+                with active:
+                    writer.add_stream("archive.jsonl", active, active_size)
+            if index["segments"]:
+                index_copy = os.path.join(staging, "index.json")
+                with open(index_copy, "w", encoding="utf-8") as f:
+                    json.dump(index, f, ensure_ascii=False)
+                writer.add_file("archive/index.json", index_copy)
+                for segment in index["segments"]:
+                    writer.add_file(f"archive/{segment['name']}",
+                                    os.path.join(archive_segments, segment["name"]), immutable=True)
+
+            # 3. Ostale datoteke (jobs.db, knowledge_graph.db, cache, ...)
+            handled = {os.path.join(data_dir, "metadata.db"), archive_path}
+            for root, dirs, files in os.walk(data_dir):
+                dirs[:] = [d for d in dirs if os.path.join(root, d) not in (store_dir, archive_segments)]
+                for name in sorted(files):
+                    path = os.path.join(root, name)
+                    if path in handled or name.endswith(_SKIP_SUFFIXES) or name.startswith("rebuild.checkpoint"):
+                        continue
+                    rel = os.path.relpath(path, data_dir).replace(os.sep, "/")
+                    if _is_sqlite(path):
+                        copy = os.path.join(staging, "db-" + rel.replace("/", "_"))
+                        snapshot_sqlite(path, copy, pages)
+                        writer.add_file(rel, copy)
+                        os.remove(copy)
+                    else:
+                        writer.add_file(rel, path)
+
+            manifest = {
+                "version": MANIFEST_VERSION,
+                "created_at": datetime.now().isoformat(),
+                "base": os.path.basename(base) if base else None,
+                "generation": generation,
+                "vector_store_consistent": consistent,
+                "files": writer.files,
+            }
+            zf.writestr(MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=1))
+        return {**manifest, "written": writer.written, "reused": writer.reused}
+    except BaseException:
+        if os.path.exists(output):
+            os.remove(output)
+        raise
+    finally:
+        compact_lock.close()
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def _restore_target(staging: str, rel: str) -> str:
+    """Putanja unutar staging direktorija; ValueError za apsolutne putanje i '..'."""
+    parts = rel.replace("\\", "/").split("/")
+    if not rel or rel.startswith("/") or re.match(r"^[A-Za-z]:", rel) or any(p in ("", ".", "..") for p in parts):
+        raise ValueError(f"Nesigurna putanja u backupu: {rel!r}")
+    target = os.path.join(staging, *parts)
+    root = os.path.realpath(staging)
+    if os.path.commonpath([root, os.path.realpath(target)]) != root:
+        raise ValueError(f"Nesigurna putanja u backupu: {rel!r}")
+    return target
+
+
+def restore_backup(backup_file: str, data_dir: str) -> Dict[str, Any]:
+    """
+    Vraća data_dir iz backupa. Datoteke se raspakiraju u privremeni direktorij
+    i provjere (sha256) prije nego što se postojeći podaci zamijene; referencirane
+    datoteke inkrementalnog backupa čitaju se iz baznih ZIP-ova (isti direktorij).
+    Backupi bez manifesta (stari format) se samo raspakiraju. Putanje iz
+    manifesta i ZIP-a ne smiju izaći iz data_dir.
+
+    Zamjena ide preimenovanjem: data_dir -> <data_dir>.restore-old, staging ->
+    data_dir, pa brisanje starog. Ako zamjena padne, stari podaci se vraćaju;
+    prekinuta zamjena (pad procesa) dovršava se pri sljedećem restoreu.
+    """
+    data_dir = os.path.abspath(data_dir)
+    staging = data_dir + ".restore-tmp"
+    old = data_dir + ".restore-old"
+    if os.path.exists(old) and not os.path.exists(data_dir):
+        os.replace(old, data_dir)  # pad između dva preimenovanja
+    shutil.rmtree(staging, ignore_errors=True)
+    shutil.rmtree(old, ignore_errors=True)
+    manifest = read_manifest(backup_file)
+    backup_dir = os.path.dirname(os.path.abspath(backup_file))
+    archives: Dict[Optional[str], zipfile.ZipFile] = {}
+    try:
+        archives[None] = zipfile.ZipFile(backup_file)
+        if manifest is None:
+            members = [n for n in archives[None].namelist() if n.startswith(ARC_PREFIX)]
+            for name in members:
+                if name.endswith("/"):
+                    continue  # direktorij
+                target = _restore_target(staging, name[len(ARC_PREFIX):])
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with archives[None].open(name) as src, open(target, "wb") as dst:
+                    shutil.copyfileobj(src, dst, _COPY_BLOCK)
+        else:
+            for rel, entry in manifest["files"].items():
+                source = entry.get("source")
+                if source is not None and os.path.basename(source) != source:
+                    raise ValueError(f"Nesigurno ime baznog backupa: {source!r}")
+                target = _restore_target(staging, rel)
+                if source not in archives:
+                    path = os.path.join(backup_dir, source)
+                    if not os.path.exists(path):
+                        raise FileNotFoundError(f"Nedostaje bazni backup {source} (potreban za {rel})")
+                    archives[source] = zipfile.ZipFile(path)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                digest = hashlib.sha256()
+                with archives[source].open(ARC_PREFIX + rel) as src, open(target, "wb") as dst:
+                    for block in iter(lambda: src.read(_COPY_BLOCK), b""):
+                        digest.update(block)
+                        dst.write(block)
+                if digest.hexdigest() != entry["sha256"]:
+                    raise ValueError(f"Checksum ne odgovara za {rel}")
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    finally:
+        for zf in archives.values():
+            zf.close()
+
+    os.makedirs(staging, exist_ok=True)
+    had_data = os.path.exists(data_dir)
+    if had_data:
+        os.replace(data_dir, old)
+    try:
+        os.replace(staging, data_dir)
+    except BaseException:
+        if had_data:
+            os.replace(old, data_dir)
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    shutil.rmtree(old, ignore_errors=True)
+    return manifest or {"files": {}}
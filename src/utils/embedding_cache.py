@@ -0,0 +1,336 @@
+"""
+Perzistentni cache embeddinga ispred Chroma embedding funkcije.
+
+Svaki collection.query(query_texts=...) i collection.upsert(documents=...)
+prolazi kroz embedding funkciju. CachedEmbeddingFunction omata pravu funkciju
+(Gemini) i sprema vektore u SQLite (data/cache/embeddings.db) kao float16,
+ključ je model + SHA-256 teksta. Stari unosi se izbacuju po LRU.
+
+open_collection() otvara kolekciju s embedding funkcijom s kojom je stvorena
+(chroma 1.x odbija drugačiju) i vraća EmbeddedCollection, koja vektore računa
+Kronosovom funkcijom i Chromi predaje gotove `embeddings`.
+
+HashingEmbeddingFunction je lokalni, deterministički zamjenski embedder
+(feature hashing) za offline benchmark i testove bez API ključa.
+"""
+import contextlib
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import struct
+import threading
+import time
+from typing import Dict, List, Optional
+
+from src.utils.store_lock import vector_store_lock
+
+try:
+    from chromadb.api.types import EmbeddingFunction as _ChromaEmbeddingFunction
+except Exception:  # chromadb nije instaliran ili je drugačije verzije
+    _ChromaEmbeddingFunction = object
+
+GEMINI_EMBEDDING_MODEL = "models/gemini-embedding-001"
+
+
+def _pack_f16(vector) -> bytes:
+    return struct.pack(f"<{len(vector)}e", *vector)
+
+
+def _unpack_f16(blob: bytes, dim: int) -> List[float]:
+    return list(struct.unpack(f"<{dim}e", blob))
+
+
+class EmbeddingStore:
+    """SQLite pohrana vektora (float16) s LRU evikcijom po last_used."""
+
+    def __init__(self, db_path: str, max_entries: int = 200_000):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        try:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        except sqlite3.Error:
+            pass
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                dim INTEGER NOT NULL,
+                vec BLOB NOT NULL,
+                last_used REAL NOT NULL
+            )
+        ''')
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+        self._conn.commit()
+        self._inserts_since_evict = 0
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        if not keys:
+            return {}
+        found = {}
+        now = time.time()
+        with self._lock:
+            # SQLite limit varijabli: dohvaćamo u komadima
+            for i in range(0, len(keys), 500):
+                part = keys[i:i + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT key, dim, vec FROM embeddings WHERE key IN ({placeholders})", part
+                ).fetchall()
+                for key, dim, blob in rows:
+                    found[key] = _unpack_f16(blob, dim)
+            if found:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, k) for k in found]
+                )
+                self._conn.commit()
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]):
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, dim, vec, last_used) VALUES (?, ?, ?, ?)",
+                [(k, len(v), _pack_f16(v), now) for k, v in items.items()]
+            )
+            self._inserts_since_evict += len(items)
+            if self._inserts_since_evict >= 1000:
+                self._evict_locked()
+            self._conn.commit()
+
+    def _evict_locked(self):
+        self._inserts_since_evict = 0
+        count = self._conn.execute("SELECT count(*) FROM embeddings").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute('''
+                DELETE FROM embeddings WHERE key IN (
+                    SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?
+                )
+            ''', (overflow,))
+
+    def evict(self):
+        with self._lock:
+            self._evict_locked()
+            self._conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM embeddings").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Jedna pohrana po datoteci unutar procesa (Oracle i Librarian je dijele)
+_stores: Dict[str, EmbeddingStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_embedding_store(db_path: str, max_entries: Optional[int] = None) -> EmbeddingStore:
+    path = os.path.abspath(db_path)
+    with _stores_lock:
+        if path not in _stores:
+            if max_entries is None:
+                max_entries = int(os.getenv("KRONOS_EMBED_CACHE_ENTRIES", "200000"))
+            _stores[path] = EmbeddingStore(path, max_entries=max_entries)
+        return _stores[path]
+
+
+class CachedEmbeddingFunction(_ChromaEmbeddingFunction):
+    """Chroma embedding funkcija koja prvo gleda u EmbeddingStore, a vani zove samo promašaje."""
+
+    def __init__(self, inner, model_name: str, store: EmbeddingStore):
+        self.inner = inner
+        self.model_name = model_name
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8", errors="replace")).hexdigest()
+        return f"{self.model_name}:{digest}"
+
+    def __call__(self, input):
+        texts = list(input)
+        keys = [self._key(t) for t in texts]
+        cached = self.store.get_many(list(set(keys)))
+
+        missing_idx = [i for i, k in enumerate(keys) if k not in cached]
+        self.hits += len(texts) - len(missing_idx)
+        self.misses += len(missing_idx)
+
+        if missing_idx:
+            # Dedupliciraj unutar poziva - isti tekst se embedira jednom
+            unique_texts = {}
+            for i in missing_idx:
+                unique_texts.setdefault(keys[i], texts[i])
+            fresh = self.inner(list(unique_texts.values()))
+            computed = {}
+            for key, vec in zip(unique_texts.keys(), fresh):
+                # Zaokruži na float16 i za promašaje, da hit i miss vraćaju isti vektor
+                computed[key] = _unpack_f16(_pack_f16([float(x) for x in vec]), len(vec))
+            self.store.put_many(computed)
+            cached.update(computed)
+
+        return [cached[k] for k in keys]
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    # Nova kolekcija bilježi konfiguraciju prave funkcije (npr. Gemini), ne
+    # cachea, pa je vanjski klijenti (i stari Kronos) otvaraju bez konflikta
+
+    def name(self) -> str:
+        name = getattr(self.inner, "name", None)
+        return name() if callable(name) else "kronos-cached"
+
+    def get_config(self):
+        get_config = getattr(self.inner, "get_config", None)
+        return get_config() if callable(get_config) else NotImplemented
+
+    def default_space(self):
+        default_space = getattr(self.inner, "default_space", None)
+        return default_space() if callable(default_space) else "l2"
+
+
+class HashingEmbeddingFunction(_ChromaEmbeddingFunction):
+    """
+    Lokalni deterministički embedder (feature hashing nad tokenima).
+    Nije semantički kvalitetan, ali je stabilan između procesa i ne treba mrežu.
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.calls = 0
+
+    def name(self) -> str:
+        return "kronos-hashing"
+
+    def get_config(self):
+        return NotImplemented  # vidi CachedEmbeddingFunction.get_config
+
+    def __call__(self, input):
+        self.calls += 1
+        vectors = []
+        for text in input:
+            vec = [0.0] * self.dim
+            for token in re.findall(r"\w+", (text or "").lower()):
+                h = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+                vec[h % self.dim] += 1.0 if (h >> 63) else -1.0
+            norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+            vectors.append([v / norm for v in vec])
+        return vectors
+
+
+class EmbeddedCollection:
+    """
+    Chroma kolekcija čije vektore računa `embedding_function` (s cacheom).
+
+    upsert/add/update s `documents` i query s `query_texts` dobivaju gotove
+    embeddinge; sve ostalo ide ravno na kolekciju. Bez embedding funkcije
+    Chroma embedira sama (perzistirana ili default funkcija kolekcije).
+    Mutacije idu pod vector_store_lock(store_dir) (backup kopira store pod njim).
+    """
+
+    def __init__(self, collection, embedding_function=None, store_dir: Optional[str] = None):
+        self.collection = collection
+        self.embedding_function = embedding_function
+        self.store_dir = store_dir
+
+    def _locked(self):
+        if self.store_dir is None:
+            return contextlib.nullcontext()
+        return vector_store_lock(self.store_dir)
+
+    def _embeddings(self, documents, embeddings):
+        if embeddings is not None or documents is None or self.embedding_function is None:
+            return embeddings
+        return self.embedding_function(list(documents)) if documents else []
+
+    def upsert(self, ids, embeddings=None, metadatas=None, documents=None, **kwargs):
+        embeddings = self._embeddings(documents, embeddings)
+        with self._locked():
+            return self.collection.upsert(ids=ids, embeddings=embeddings,
+                                          metadatas=metadatas, documents=documents, **kwargs)
+
+    def add(self, ids, embeddings=None, metadatas=None, documents=None, **kwargs):
+        embeddings = self._embeddings(documents, embeddings)
+        with self._locked():
+            return self.collection.add(ids=ids, embeddings=embeddings,
+                                       metadatas=metadatas, documents=documents, **kwargs)
+
+    def update(self, ids, embeddings=None, metadatas=None, documents=None, **kwargs):
+        embeddings = self._embeddings(documents, embeddings)
+        with self._locked():
+            return self.collection.update(ids=ids, embeddings=embeddings,
+                                          metadatas=metadatas, documents=documents, **kwargs)
+
+    def delete(self, ids=None, where=None, **kwargs):
+        with self._locked():
+            return self.collection.delete(ids=ids, where=where, **kwargs)
+
+    def query(self, query_embeddings=None, query_texts=None, **kwargs):
+        query_embeddings = self._embeddings(query_texts, query_embeddings)
+        if query_embeddings is not None:
+            return self.collection.query(query_embeddings=query_embeddings, **kwargs)
+        return self.collection.query(query_texts=query_texts, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+
+def open_collection(client, name: str, embedding_function=None,
+                    store_dir: Optional[str] = None) -> EmbeddedCollection:
+    """
+    Otvara ili stvara kolekciju `name`.
+
+    Postojeća kolekcija zadržava perzistiranu embedding funkciju (npr. Gemini
+    ili default iz starijih instalacija); chroma 1.x bi drugačiji name() odbila
+    s "Embedding function conflict". Nova kolekcija se stvara s
+    `embedding_function`. U oba slučaja vektore računa `embedding_function`.
+    """
+    try:
+        collection = client.get_collection(name=name)
+    except Exception:  # ne postoji (NotFoundError / ValueError ovisno o verziji)
+        kwargs = {"name": name}
+        if embedding_function is not None:
+            kwargs["embedding_function"] = embedding_function
+        collection = client.get_or_create_collection(**kwargs)
+    return EmbeddedCollection(collection, embedding_function, store_dir)
+
+
+def build_embedding_function(api_key: Optional[str], cache_dir: str):
+    """
+    Vraća embedding funkciju za Chroma kolekciju ili None (Chroma default model).
+
+    - KRONOS_EMBEDDER=local -> HashingEmbeddingFunction (offline)
+    - inače Gemini ako postoji API ključ
+    Obje varijante idu kroz perzistentni cache osim ako je KRONOS_EMBED_CACHE=0.
+    """
+    if os.getenv("KRONOS_EMBEDDER", "").lower() == "local":
+        inner, model_name = HashingEmbeddingFunction(), "local-hashing-256"
+    elif api_key:
+        from chromadb.utils import embedding_functions
+        inner = embedding_functions.GoogleGenerativeAiEmbeddingFunction(
+            api_key=api_key,
+            model_name=GEMINI_EMBEDDING_MODEL
+        )
+        model_name = GEMINI_EMBEDDING_MODEL
+    else:
+        return None
+
+    if os.getenv("KRONOS_EMBED_CACHE", "1") == "0":
+        return inner
+    store = get_embedding_store(os.path.join(cache_dir, "embeddings.db"))
+    return CachedEmbeddingFunction(inner, model_name, store)
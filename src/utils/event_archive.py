@@ -0,0 +1,569 @@
+"""
+Segmentirana, komprimirana arhiva događaja (event sourcing).
+
+Raspored na disku (uz data/archive.jsonl):
+
+    data/archive.jsonl                  aktivni segment (ArchiveWriter dopisuje)
+    data/archive.jsonl.lock             lock između procesa
+    data/archive/segment-000001.jsonl.gz  zatvoreni segmenti (gzip, nepromjenjivi)
+    data/archive/index.json             sidecar indeks
+
+Kad aktivni segment prijeđe KRONOS_ARCHIVE_SEGMENT_MB (ili KRONOS_ARCHIVE_SEGMENT_HOURS),
+seal_active ga atomarno preimenuje u data/archive/pending-*.jsonl, razreže na
+segmente te veličine, komprimira i upiše u indeks. Indeks po segmentu čuva
+broj događaja, pomake (događaji i bajtovi) i raspon timestampova, a za svaku
+datoteku pokazivač na njen zadnji file_processed događaj. Brojanje za progress
+bar i replay "od trenutka T" tako ne trebaju čitati cijelu arhivu.
+
+Postojeća (velika) archive.jsonl se migrira istim putem: automatski pri prvom
+zatvaranju segmenta ili ručno (`kronos archive migrate`). `kronos archive compact`
+preko tih pokazivača izbacuje zamijenjene file_processed događaje.
+Sve funkcije koje mijenjaju arhivu pozivaju se pod archive_lock.
+"""
+import glob
+import gzip
+import json
+import os
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import msvcrt
+    HAS_MSVCRT = True
+except ImportError:
+    HAS_MSVCRT = False
+    try:
+        import fcntl
+        HAS_FCNTL = True
+    except ImportError:
+        HAS_FCNTL = False
+
+INDEX_VERSION = 1
+_SEGMENT_RE = re.compile(r"segment-(\d+)\.jsonl\.gz$")
+
+
+class _FileLock:
+    """Ekskluzivni lock između procesa preko zasebne .lock datoteke."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+
+    def __enter__(self):
+        if self._fd is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if HAS_MSVCRT:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+        elif HAS_FCNTL:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if HAS_MSVCRT:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        elif HAS_FCNTL:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def archive_lock(archive_path: str) -> _FileLock:
+    return _FileLock(archive_path + ".lock")
+
+
+def compaction_lock(archive_path: str) -> _FileLock:
+    """Drži ga kompakcija (i backup) - zatvoreni segmenti se za to vrijeme ne brišu."""
+    return _FileLock(archive_path + ".compact.lock")
+
+
+def segment_dir(archive_path: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(archive_path)), "archive")
+
+
+def segment_bytes_default() -> int:
+    return int(float(os.getenv("KRONOS_ARCHIVE_SEGMENT_MB", "64")) * 1024 * 1024)
+
+
+def segment_seconds_default() -> float:
+    return float(os.getenv("KRONOS_ARCHIVE_SEGMENT_HOURS", "0")) * 3600
+
+
+# --- indeks -----------------------------------------------------------------
+
+def _empty_index() -> Dict[str, Any]:
+    return {"version": INDEX_VERSION, "segments": [], "latest": {}}
+
+
+def load_index(archive_path: str) -> Dict[str, Any]:
+    path = os.path.join(segment_dir(archive_path), "index.json")
+    try:
+        with open(path, encoding="utf-8") as f:
+            index = json.load(f)
+    except FileNotFoundError:
+        return _empty_index()
+    if index.get("version") != INDEX_VERSION:
+        raise ValueError(f"Nepodržana verzija indeksa arhive: {index.get('version')}")
+    return index
+
+
+def _write_json_atomic(path: str, data: Dict[str, Any]):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _save_index(archive_path: str, index: Dict[str, Any]):
+    _write_json_atomic(os.path.join(segment_dir(archive_path), "index.json"), index)
+
+
+def event_source(record: Dict[str, Any]) -> Optional[str]:
+    """Datoteka na koju se događaj odnosi (file_processed i legacy chunk zapisi)."""
+    if record.get("event") == "file_processed":
+        return ((record.get("data") or {}).get("metadata") or {}).get("source")
+    if "event" not in record:
+        return (record.get("metadata") or {}).get("source")
+    return None
+
+
+# --- zatvaranje segmenata ----------------------------------------------------
+
+def _next_seq(index: Dict[str, Any], directory: str) -> int:
+    seqs = [int(m.group(1)) for s in index["segments"] if (m := _SEGMENT_RE.search(s["name"]))]
+    seqs += [int(m.group(1)) for p in glob.glob(os.path.join(directory, "segment-*.jsonl.gz"))
+             if (m := _SEGMENT_RE.search(p))]
+    return max(seqs, default=0) + 1
+
+
+def _seal_pending(archive_path: str, pending: str, index: Dict[str, Any], segment_bytes: int) -> List[str]:
+    """Reže pending datoteku na gzip segmente; nastavlja od zadnjeg indeksiranog pomaka."""
+    directory = segment_dir(archive_path)
+    pending_name = os.path.basename(pending)
+    start = max((s["source_end"] for s in index["segments"] if s.get("source") == pending_name), default=0)
+    created = []
+
+    with open(pending, "rb") as src:
+        src.seek(start)
+        while True:
+            seq = _next_seq(index, directory)
+            name = f"segment-{seq:06d}.jsonl.gz"
+            last = index["segments"][-1] if index["segments"] else None
+            entry = {
+                "name": name,
+                "events": 0,
+                "raw_bytes": 0,
+                "offset_events": (last["offset_events"] + last["events"]) if last else 0,
+                "offset_bytes": (last["offset_bytes"] + last["raw_bytes"]) if last else 0,
+                "first_ts": None,
+                "last_ts": None,
+                "source": pending_name,
+                "source_end": start,
+            }
+            latest = {}
+            tmp = os.path.join(directory, name + ".tmp")
+            with gzip.open(tmp, "wb", compresslevel=6) as out:
+                for line in src:
+                    if not line.strip():
+                        entry["raw_bytes"] += len(line)
+                        continue
+                    if not line.endswith(b"\n"):
+                        line += b"\n"
+                    out.write(line)
+                    entry["raw_bytes"] += len(line)
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        record = {}
+                    ts = record.get("timestamp")
+                    if ts:
+                        entry["first_ts"] = entry["first_ts"] or ts
+                        entry["last_ts"] = ts
+                    source = event_source(record)
+                    if source and record.get("event") == "file_processed":
+                        latest[source] = {"segment": name, "event": entry["events"], "timestamp": ts}
+                    entry["events"] += 1
+                    if entry["raw_bytes"] >= segment_bytes:
+                        break
+            if entry["events"] == 0:
+                os.remove(tmp)
+                break
+            with open(tmp, "r+b") as f:
+                os.fsync(f.fileno())
+            os.replace(tmp, os.path.join(directory, name))
+            start += entry["raw_bytes"]
+            entry["source_end"] = start
+            index["segments"].append(entry)
+            index["latest"].update(latest)
+            _save_index(archive_path, index)
+            created.append(name)
+            src.seek(start)
+
+    os.remove(pending)
+    return created
+
+
+def recover_pending(archive_path: str, index: Optional[Dict[str, Any]] = None) -> List[str]:
+    """Dovršava zatvaranje segmenata prekinuto padom procesa."""
+    index = index if index is not None else load_index(archive_path)
+    created = []
+    for pending in sorted(glob.glob(os.path.join(segment_dir(archive_path), "pending-*.jsonl"))):
+        created += _seal_pending(archive_path, pending, index, segment_bytes_default())
+    return created
+
+
+def seal_active(archive_path: str, segment_bytes: Optional[int] = None) -> List[str]:
+    """
+    Zatvara aktivni segment (archive.jsonl) u jedan ili više gzip segmenata.
+    Poziva se pod archive_lock. Vraća imena novih segmenata.
+    """
+    segment_bytes = segment_bytes or segment_bytes_default()
+    directory = segment_dir(archive_path)
+    os.makedirs(directory, exist_ok=True)
+    index = load_index(archive_path)
+    created = recover_pending(archive_path, index)
+
+    try:
+        if os.path.getsize(archive_path) == 0:
+            return created
+    except OSError:
+        return created
+
+    # Atomarno: aktivni segment nestaje iz archive.jsonl i pojavljuje se kao pending
+    pending = os.path.join(directory, f"pending-{_next_seq(index, directory):06d}.jsonl")
+    os.replace(archive_path, pending)
+    return created + _seal_pending(archive_path, pending, index, segment_bytes)
+
+
+def migrate_archive(archive_path: str, segment_bytes: Optional[int] = None) -> List[str]:
+    """Migracija postojeće archive.jsonl u segmente (pod lockom)."""
+    lock = archive_lock(archive_path)
+    try:
+        with lock:
+            return seal_active(archive_path, segment_bytes)
+    finally:
+        lock.close()
+
+
+# --- kompakcija ----------------------------------------------------------------
+
+def _segment_entry(name: str, last: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "name": name,
+        "events": 0,
+        "raw_bytes": 0,
+        "offset_events": (last["offset_events"] + last["events"]) if last else 0,
+        "offset_bytes": (last["offset_bytes"] + last["raw_bytes"]) if last else 0,
+        "first_ts": None,
+        "last_ts": None,
+        "source": None,
+        "source_end": 0,
+    }
+
+
+def _plan_compaction(directory: str, segments: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Prvi prolaz kompakcije: koji file_processed događaji ostaju.
+
+    Rebuild dodjeljuje ID-eve entitetima redom replaya, pa izbacivanje
+    događaja mijenja ID-eve. Novi decision_* događaji zato nose stabilne
+    reference (`*_ref`, Librarian.entity_ref); za svaku datoteku na koju se
+    referenciraju ostaje i zadnji file_processed prije njih, da entitet
+    postoji kad rebuild dođe do odluke. Stari decision_* događaji imaju samo
+    ID, pa svi file_processed prije zadnjeg takvog ostaju netaknuti.
+
+    Vraća keep (redni brojevi zadržanih file_processed), chunks i sizes po
+    file_processed, te (timestamp, datoteka) po događaju za drugi prolaz.
+    """
+    keep = set()
+    chunks: Dict[int, int] = {}
+    sizes: Dict[int, int] = {}
+    events: List[Tuple[Optional[str], Optional[str]]] = []
+    last_by_file: Dict[str, int] = {}
+    legacy_barrier = 0  # file_processed prije ovog rednog broja se ne diraju
+    n = -1
+    for segment in segments:
+        with gzip.open(os.path.join(directory, segment["name"]), "rb") as f:
+            for line in f:
+                n += 1
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = {}
+                event = record.get("event") or ""
+                source = event_source(record) if event == "file_processed" else None
+                events.append((record.get("timestamp"), source))
+                if event == "file_processed":
+                    chunks[n] = len((record.get("data") or {}).get("chunks") or [])
+                    sizes[n] = len(line)
+                    if source:
+                        last_by_file[source] = n
+                    else:
+                        keep.add(n)
+                elif event.startswith("decision_"):
+                    data = record.get("data") or {}
+                    refs = [v for k, v in data.items() if k.endswith("_ref")]
+                    if not refs:
+                        legacy_barrier = n
+                    for ref in refs:
+                        if ref and ref.get("file_path") in last_by_file:
+                            keep.add(last_by_file[ref["file_path"]])
+    keep.update(last_by_file.values())
+    keep.update(i for i in chunks if i < legacy_barrier)
+    return {"keep": keep, "chunks": chunks, "sizes": sizes, "events": events}
+
+
+def compact_archive(archive_path: str, segment_bytes: Optional[int] = None,
+                    dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Izbacuje file_processed događaje koje je kasniji file_processed za istu
+    datoteku zamijenio (replay ionako zamjenjuje chunkove i entitete cijele
+    datoteke). Ostali događaji (decision_*, entity_saved, legacy zapisi) ostaju
+    redom, zadržani file_processed ostaju na svom mjestu, a decision_* događaji
+    ostaju ispravni nakon rebuilda (vidi _plan_compaction).
+
+    Radi i dok server piše: pod lockom se aktivni segment zatvori i uzme snimka
+    indeksa, novi segmenti se pišu bez locka, a zamjena indeksa (atomarni
+    os.replace) ponovno ide pod lockom i zadržava segmente zatvorene u međuvremenu.
+    """
+    compact_lock = compaction_lock(archive_path)  # jedna kompakcija odjednom
+    try:
+        with compact_lock:
+            return _compact(archive_path, segment_bytes or segment_bytes_default(), dry_run)
+    finally:
+        compact_lock.close()
+
+
+def _compact(archive_path: str, segment_bytes: int, dry_run: bool) -> Dict[str, Any]:
+    directory = segment_dir(archive_path)
+    os.makedirs(directory, exist_ok=True)
+    lock = archive_lock(archive_path)
+    try:
+        with lock:
+            seal_active(archive_path, segment_bytes)
+            snapshot = load_index(archive_path)
+        for stale in glob.glob(os.path.join(directory, "compact-*.tmp")):
+            os.remove(stale)  # ostaci prekinute kompakcije
+
+        plan = _plan_compaction(directory, snapshot["segments"])
+        keep = plan["keep"]
+        stats = {
+            "events_before": sum(s["events"] for s in snapshot["segments"]),
+            "raw_bytes_before": sum(s["raw_bytes"] for s in snapshot["segments"]),
+            "compressed_bytes_before": sum(
+                os.path.getsize(os.path.join(directory, s["name"])) for s in snapshot["segments"]
+            ),
+            "events_after": 0,
+            "raw_bytes_after": 0,
+            "compressed_bytes_after": 0,
+            "file_processed_before": len(plan["chunks"]),
+            "file_processed_after": len(keep),
+            "chunks_before": sum(plan["chunks"].values()),  # chunkovi koje rebuild re-embedira
+            "chunks_after": sum(plan["chunks"][n] for n in keep),
+            "segments_before": len(snapshot["segments"]),
+            "segments_after": 0,
+        }
+        stats["events_after"] = stats["events_before"] - stats["file_processed_before"] + len(keep)
+        if dry_run:
+            stats["raw_bytes_after"] = stats["raw_bytes_before"] - sum(
+                size for n, size in plan["sizes"].items() if n not in keep)
+            return stats
+
+        staged: List[Dict[str, Any]] = []
+        latest: Dict[str, Dict[str, Any]] = {}
+        out = entry = None
+        n = -1
+        for segment in snapshot["segments"]:
+            with gzip.open(os.path.join(directory, segment["name"]), "rb") as f:
+                for line in f:
+                    n += 1
+                    if n in plan["chunks"] and n not in keep:
+                        continue
+                    stats["raw_bytes_after"] += len(line)
+                    if out is None:
+                        entry = _segment_entry(f"compact-{len(staged) + 1:06d}.tmp",
+                                               staged[-1] if staged else None)
+                        out = gzip.open(os.path.join(directory, entry["name"]), "wb", compresslevel=6)
+                    out.write(line)
+                    ts, source = plan["events"][n]
+                    if ts:
+                        entry["first_ts"] = entry["first_ts"] or ts
+                        entry["last_ts"] = ts
+                    if n in keep:
+                        latest[source] = {"segment": entry, "event": entry["events"], "timestamp": ts}
+                    entry["events"] += 1
+                    entry["raw_bytes"] += len(line)
+                    if entry["raw_bytes"] >= segment_bytes:
+                        out.close()
+                        staged.append(entry)
+                        out = None
+        if out is not None:
+            out.close()
+            staged.append(entry)
+
+        for entry in staged:
+            with open(os.path.join(directory, entry["name"]), "r+b") as f:
+                os.fsync(f.fileno())
+
+        with lock:
+            current = load_index(archive_path)
+            snapshot_names = {s["name"] for s in snapshot["segments"]}
+            tail = [s for s in current["segments"] if s["name"] not in snapshot_names]
+            seq = _next_seq(current, directory)
+            for entry in staged:
+                name = f"segment-{seq:06d}.jsonl.gz"
+                os.replace(os.path.join(directory, entry["name"]), os.path.join(directory, name))
+                entry["name"] = name
+                seq += 1
+            last = staged[-1] if staged else None
+            for segment in tail:
+                segment["offset_events"] = (last["offset_events"] + last["events"]) if last else 0
+                segment["offset_bytes"] = (last["offset_bytes"] + last["raw_bytes"]) if last else 0
+                last = segment
+            tail_names = {s["name"] for s in tail}
+            new_latest = {path: {**p, "segment": p["segment"]["name"]} for path, p in latest.items()}
+            new_latest.update({path: p for path, p in current["latest"].items() if p["segment"] in tail_names})
+            _save_index(archive_path, {"version": INDEX_VERSION, "segments": staged + tail, "latest": new_latest})
+            for name in snapshot_names:
+                try:
+                    os.remove(os.path.join(directory, name))
+                except FileNotFoundError:
+                    pass
+
+        stats["segments_after"] = len(staged)
+        stats["compressed_bytes_after"] = sum(
+            os.path.getsize(os.path.join(directory, e["name"])) for e in staged
+        )
+        return stats
+    finally:
+        lock.close()
+
+
+# --- čitanje -----------------------------------------------------------------
+
+def _snapshot(archive_path: str):
+    """Konzistentan pogled: segmenti iz indeksa + otvoren aktivni segment do trenutne veličine."""
+    lock = archive_lock(archive_path)
+    try:
+        with lock:
+            index = load_index(archive_path)
+            active, active_size = None, 0
+            try:
+                active = open(archive_path, "rb")
+                active_size = os.fstat(active.fileno()).st_size
+            except FileNotFoundError:
+                pass
+        return index, active, active_size
+    finally:
+        lock.close()
+
+
+def archive_exists(archive_path: str) -> bool:
+    return os.path.exists(archive_path) or bool(load_index(archive_path)["segments"])
+
+
+def _iter_active(active, active_size) -> Iterator[bytes]:
+    read = 0
+    for line in active:
+        read += len(line)
+        if read > active_size:  # dopisano nakon snapshota
+            break
+        yield line
+
+
+def iter_lines(archive_path: str, since: Optional[str] = None, start: int = 0) -> Iterator[Tuple[int, bytes]]:
+    """
+    Sirove linije s apsolutnim rednim brojem događaja u arhivi. Segmenti koji
+    završavaju prije `start` ili čiji je last_ts stariji od `since` se preskaču
+    bez dekomprimiranja (nastavak rebuilda, replay od trenutka T).
+    """
+    index, active, active_size = _snapshot(archive_path)
+    directory = segment_dir(archive_path)
+    position = 0
+    try:
+        for segment in index["segments"]:
+            end = position + segment["events"]
+            if end <= start or (since and segment["last_ts"] and segment["last_ts"] < since):
+                position = end
+                continue
+            with gzip.open(os.path.join(directory, segment["name"]), "rb") as f:
+                for line in f:
+                    if position >= start:
+                        yield position, line
+                    position += 1
+        if active is not None:
+            for line in _iter_active(active, active_size):
+                if not line.strip():
+                    continue
+                if position >= start:
+                    yield position, line
+                position += 1
+    finally:
+        if active is not None:
+            active.close()
+
+
+def iter_events(archive_path: str, since: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Događaji redom (zatvoreni segmenti pa aktivni). `since` (ISO timestamp)
+    preskače cijele segmente čiji je last_ts stariji, bez dekomprimiranja;
+    zapisi bez timestampa (legacy) vraćaju se samo kad since nije zadan.
+    """
+    return _filter((line for _, line in iter_lines(archive_path, since)), since)
+
+
+def _filter(lines, since):
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue  # npr. nedovršena zadnja linija nakon pada
+        if since and (record.get("timestamp") or "") < since:
+            continue
+        yield record
+
+
+def count_events(archive_path: str, since: Optional[str] = None) -> int:
+    """
+    Broj događaja za progress bar: zatvoreni segmenti iz indeksa, aktivni se broji.
+    Uz `since` je gornja granica (segment koji obuhvaća T broji se cijeli).
+    """
+    index, active, active_size = _snapshot(archive_path)
+    total = sum(
+        s["events"] for s in index["segments"]
+        if not (since and s["last_ts"] and s["last_ts"] < since)
+    )
+    if active is not None:
+        with active:
+            total += sum(1 for line in _iter_active(active, active_size) if line.strip())
+    return total
+
+
+def archive_stats(archive_path: str) -> Dict[str, Any]:
+    index, active, active_size = _snapshot(archive_path)
+    if active is not None:
+        active.close()
+    directory = segment_dir(archive_path)
+    compressed = sum(
+        os.path.getsize(os.path.join(directory, s["name"]))
+        for s in index["segments"] if os.path.exists(os.path.join(directory, s["name"]))
+    )
+    return {
+        "segments": len(index["segments"]),
+        "sealed_events": sum(s["events"] for s in index["segments"]),
+        "sealed_raw_bytes": sum(s["raw_bytes"] for s in index["segments"]),
+        "sealed_compressed_bytes": compressed,
+        "active_bytes": active_size,
+        "files_tracked": len(index["latest"]),
+    }
@@ -156,3 +156,35 @@ def enrich_metadata(doc: str, metadata: dict) -> dict:
     if "content_hash" not in new_meta:
         new_meta["content_hash"] = hashlib.sha256(doc.encode()).hexdigest()
     return new_meta
+
+def chunk_id(project: str, path: str, content: str, occurrence: int = 0) -> str:
+    """
+    Stabilan, sadržajem adresiran ID chunka: SHA-256 od (projekt, putanja, hash sadržaja).
+    Isti chunk dobije isti ID u svakom procesu (za razliku od ugrađenog hash()),
+    pa se nepromijenjeni chunkovi pri re-ingestu ne embediraju ponovno.
+    `occurrence` razlikuje identične chunkove unutar iste datoteke.
+    """
+    content_hash = hashlib.sha256(content.encode("utf-8", errors="replace")).hexdigest()
+    key = f"{project or 'default'}\x00{os.path.normpath(path)}\x00{content_hash}\x00{occurrence}"
+    return hashlib.sha256(key.encode("utf-8", errors="replace")).hexdigest()
+
+def chunk_ids(project: str, path: str, contents: list) -> list:
+    """ID-jevi za sve chunkove jedne datoteke (duplikati dobiju redni broj pojave)."""
+    seen = {}
+    ids = []
+    for content in contents:
+        occurrence = seen.get(content, 0)
+        seen[content] = occurrence + 1
+        ids.append(chunk_id(project, path, content, occurrence))
+    return ids
+
+def entity_key(etype: str, content: str, preview: str = None) -> tuple:
+    """
+    Identitet entiteta unutar datoteke: (tip, SHA-256 normaliziranog sadržaja).
+    Normalizacija sažima razmake, pa preformatiranje ne stvara novi entitet.
+    `preview` se uključuje samo kad ga entitet koristi kao sadržaj (code snippeti).
+    """
+    normalized = " ".join((content or "").split())
+    if preview is not None:
+        normalized += "\x00" + " ".join(preview.split())
+    return (etype, hashlib.sha256(normalized.encode("utf-8", errors="replace")).hexdigest())
@@ -0,0 +1,114 @@
+"""
+QueryCache: LRU cache rezultata Oracle.ask s memorijskim limitom.
+
+Ključ je (normalizirani upit, projekt, limit, hyde, expand). Svaki unos je
+vezan uz generaciju indeksa (Librarian.get_generation); kad generacija
+naraste (ingest, entiteti, odluke), cijeli cache se odbacuje. Put/get sa
+starijom generacijom (upit započet prije bumpa) se ignorira.
+"""
+import copy
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase + sažimanje razmaka, da 'Što je  Kronos?' i 'što je kronos?' dijele unos."""
+    if not isinstance(query, str):
+        return ""
+    return re.sub(r"\s+", " ", query.strip().lower())
+
+
+class QueryCache:
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, max_entries: int = 1024):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple, Tuple[Any, int]]" = OrderedDict()
+        self._generation: Optional[int] = None
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(query, project=None, limit=10, hyde=True, expand=False) -> Tuple:
+        return (normalize_query(query), project, int(limit), bool(hyde), bool(expand))
+
+    @staticmethod
+    def _estimate_size(value: Any) -> int:
+        try:
+            return len(json.dumps(value, ensure_ascii=False, default=str))
+        except Exception:
+            return 4096
+
+    def _is_stale(self, generation: Optional[int]) -> bool:
+        """Generacija starija od trenutne (upit je počeo prije bumpa). Poziva se pod lockom."""
+        return generation is not None and self._generation is not None and generation < self._generation
+
+    def _sync_generation(self, generation: Optional[int]):
+        """Odbacuje sve unose ako je generacija indeksa novija. Poziva se pod lockom."""
+        if generation != self._generation:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.current_bytes = 0
+            self._generation = generation
+
+    def get(self, key: Tuple, generation: Optional[int]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if self._is_stale(generation):
+                # Ne briše unose novije generacije; zastarjeli čitač samo promaši
+                self.misses += 1
+                return None
+            self._sync_generation(generation)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[0]
+        return copy.deepcopy(value)
+
+    def put(self, key: Tuple, value: Dict[str, Any], generation: Optional[int]):
+        size = self._estimate_size(value)
+        if size > self.max_bytes:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            if self._is_stale(generation):
+                return  # rezultat spor upita izračunat prije bumpa
+            self._sync_generation(generation)
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            while self._entries and (self.current_bytes > self.max_bytes or len(self._entries) > self.max_entries):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "generation": self._generation,
+            }
@@ -0,0 +1,81 @@
+"""
+ReadWriteLock: više paralelnih čitača ili jedan pisač.
+
+Koristi se tamo gdje se dijeljeno stanje rijetko mijenja (upsert u kolekciju),
+a čita se stalno (svaki /query i kronos_query).
+"""
+import threading
+from contextlib import contextmanager
+
+
+class ReadWriteLock:
+    """
+    Lock s prednošću pisača.
+
+    - Čitači (upiti) rade paralelno dok nema aktivnog ili čekajućeg pisača.
+    - Pisač čeka da svi aktivni čitači izađu i zatim radi ekskluzivno.
+    - Čitanje je re-entrant po threadu (npr. Oracle.ask fallback unutar read sekcije),
+      pa čekajući pisač ne može izazvati deadlock ugniježđenog čitanja.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._writers_waiting = 0
+        self._local = threading.local()
+
+    def _held_reads(self) -> int:
+        return getattr(self._local, "reads", 0)
+
+    def acquire_read(self):
+        held = self._held_reads()
+        me = threading.get_ident()
+        with self._cond:
+            # Ugniježđeno čitanje (ili čitanje unutar vlastitog pisanja) ne čeka
+            if held == 0 and self._writer != me:
+                while self._writer is not None or self._writers_waiting:
+                    self._cond.wait()
+            self._readers += 1
+        self._local.reads = held + 1
+
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+        self._local.reads = self._held_reads() - 1
+
+    def acquire_write(self):
+        me = threading.get_ident()
+        if self._held_reads():
+            raise RuntimeError("ReadWriteLock: upgrade read -> write nije podržan")
+        with self._cond:
+            self._writers_waiting += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = me
+
+    def release_write(self):
+        with self._cond:
+            self._writer = None
+            self._cond.notify_all()
+
+    @contextmanager
+    def read_lock(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write_lock(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
@@ -0,0 +1,157 @@
+"""
+Zajednički manager SQLite konekcija (po datoteci, po threadu).
+
+Umjesto sqlite3.connect + PRAGMA journal_mode=WAL pri svakom pozivu metode,
+svaki thread dobije jednu keširanu konekciju po bazi:
+
+- pragme se postavljaju jednom (WAL, synchronous=NORMAL, mmap_size,
+  cache_size, temp_store=MEMORY)
+- statement cache konekcije (cached_statements) čuva pripremljene upite
+  između poziva
+- close() na vraćenoj konekciji je "release": rollback nedovršene transakcije,
+  a konekcija ostaje otvorena za sljedeći poziv u istom threadu
+- close_all_pools() (atexit, server shutdown, restore) stvarno zatvara sve
+
+Postojeći kod s obrascem `conn = ...; ...; conn.close()` radi bez izmjena.
+"""
+import atexit
+import os
+import sqlite3
+import threading
+import weakref
+from typing import Dict, Optional
+
+SQLITE_TIMEOUT = 30
+
+
+def _pragmas():
+    return (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA mmap_size={int(os.getenv('KRONOS_SQLITE_MMAP_MB', '256')) * 1024 * 1024}",
+        f"PRAGMA cache_size=-{int(os.getenv('KRONOS_SQLITE_CACHE_KB', '16384'))}",
+        "PRAGMA temp_store=MEMORY",
+    )
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3.Connection čiji close() samo vraća konekciju poolu."""
+
+    def close(self):
+        try:
+            if self.in_transaction:
+                self.rollback()
+        except sqlite3.Error:
+            pass
+
+    def _really_close(self):
+        super().close()
+
+
+class SQLitePool:
+    """Thread-local konekcije na jednu SQLite datoteku."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._all = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+
+    def _file_id(self):
+        try:
+            st = os.stat(self.db_path)
+            return (st.st_dev, st.st_ino)
+        except OSError:
+            return None
+
+    def _open(self) -> PooledConnection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=SQLITE_TIMEOUT,
+            factory=PooledConnection,
+            check_same_thread=False,  # koristi je samo vlasnik threada; close_all je zatvara iz drugog
+            cached_statements=256,
+        )
+        for pragma in _pragmas():
+            try:
+                conn.execute(pragma)
+            except sqlite3.Error:
+                pass
+        with self._lock:
+            self._all.add(conn)
+            self.connects += 1
+        return conn
+
+    def connection(self, row_factory=None) -> PooledConnection:
+        """Vraća konekciju trenutnog threada (otvara je pri prvom pozivu)."""
+        conn = getattr(self._local, "conn", None)
+        pid = getattr(self._local, "pid", None)
+        file_id = self._file_id()
+        # Nova konekcija nakon forka ili ako je datoteka obrisana/zamijenjena (wipe, restore)
+        if conn is None or pid != os.getpid() or file_id != self._local.file_id:
+            if conn is not None and pid == os.getpid():
+                conn._really_close()
+            conn = self._open()
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+            self._local.file_id = self._file_id()
+        elif conn.in_transaction:
+            # Zaostala transakcija (iznimka prije close()) ne smije držati lock baze
+            conn.rollback()
+        conn.row_factory = row_factory
+        self.checkouts += 1
+        return conn
+
+    def close_all(self):
+        with self._lock:
+            conns = list(self._all)
+            self._all = weakref.WeakSet()
+        for conn in conns:
+            try:
+                conn._really_close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+    def stats(self) -> Dict[str, int]:
+        return {"connects": self.connects, "checkouts": self.checkouts, "open": len(self._all)}
+
+
+_pools: Dict[str, SQLitePool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str) -> SQLitePool:
+    path = os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = _pools[path] = SQLitePool(path)
+        return pool
+
+
+def get_connection(db_path: str, row_factory=None) -> PooledConnection:
+    """Prečac: keširana konekcija trenutnog threada za danu bazu."""
+    return get_pool(db_path).connection(row_factory=row_factory)
+
+
+def close_pool(db_path: str):
+    with _pools_lock:
+        pool = _pools.pop(os.path.abspath(db_path), None)
+    if pool:
+        pool.close_all()
+
+
+def close_all_pools(under: Optional[str] = None):
+    """Zatvara sve konekcije (ili samo one na bazama unutar direktorija `under`)."""
+    prefix = os.path.abspath(under) + os.sep if under else None
+    with _pools_lock:
+        paths = [p for p in _pools if prefix is None or p.startswith(prefix)]
+        pools = [_pools.pop(p) for p in paths]
+    for pool in pools:
+        pool.close_all()
+
+
+atexit.register(close_all_pools)
@@ -1,7 +1,22 @@
 """
 CroStem: Hrvatski Stemmer
 Port of the CroStem Rust/PHP algorithm to Python.
+
+Sufiksi se pri inicijalizaciji kompajliraju u tablice po duljini sufiksa
+(sufiks -> rang u listi, minimalni korijen), pa jedan prolaz skidanja traži
+samo `current[-L:]` za svaku duljinu L umjesto `endswith` po cijeloj listi.
+Pobjeđuje sufiks s najmanjim rangom, kao u izvornom linearnom prolazu.
+Rezultati po riječi pamte se u ograničenom LRU cacheu (KRONOS_STEM_CACHE
+riječi po modu, 0 isključuje cache).
+
+`stem_text` i `stem_text_batch` koriste Rust implementaciju iz kronos_core
+(`stem_text_batch`, bez GIL-a, rayon po tekstovima) kad je modul izgrađen;
+inače (ili uz KRONOS_NATIVE_STEM=0) ovaj CroStemmer.
 """
+import os
+from functools import lru_cache
+from typing import Iterable, List
+
 
 class CroStemmer:
     """
@@ -89,6 +104,35 @@ class CroStemmer:
         "pek": "peći",
     }
 
+    def __init__(self, cache_size: int = None):
+        if cache_size is None:
+            cache_size = int(os.getenv("KRONOS_STEM_CACHE", "65536"))
+        self._tables = {
+            "aggressive": self._compile(self.SUFFIXES_AGGRESSIVE, "aggressive"),
+            "conservative": self._compile(self.SUFFIXES_CONSERVATIVE, "conservative"),
+        }
+        self._cached = {}
+        for mode in self._tables:
+            fn = lambda word, _mode=mode: self._stem_uncached(word, _mode)
+            self._cached[mode] = lru_cache(maxsize=cache_size)(fn) if cache_size else fn
+
+    def _engine(self, mode: str):
+        fn = self._cached.get(mode)
+        if fn is None:  # nepoznat mod: konzervativni sufiksi bez lemma pravila, bez cachea
+            fn = lambda word: self._stem_uncached(word, mode)
+        return fn
+
+    def _compile(self, suffixes: List[str], mode: str):
+        """Grupira sufikse po duljini: [(L, {sufiks: (rang, min_korijen)})], dulji prvi."""
+        buckets = {}
+        for rank, suffix in enumerate(suffixes):
+            bucket = buckets.setdefault(len(suffix), {})
+            if suffix not in bucket:  # duplikat u listi nikad ne pobjeđuje prvo pojavljivanje
+                min_root = next(n for n in range(8)
+                                if self._is_suffix_strippable(suffix, "x" * n, mode))
+                bucket[suffix] = (rank, min_root)
+        return sorted(buckets.items(), reverse=True)
+
     def stem(self, word: str, mode: str = "aggressive") -> str:
         """
         Stemira jednu riječ.
@@ -100,6 +144,19 @@ class CroStemmer:
         Returns:
             Stemirani korijen
         """
+        return self._engine(mode)(word)
+
+    def stem_many(self, words: Iterable[str], mode: str = "aggressive") -> List[str]:
+        """Stemira niz riječi (jedan lookup moda i cachea za cijeli batch)."""
+        fn = self._engine(mode)
+        return [fn(word) for word in words]
+
+    def cache_info(self, mode: str = "aggressive"):
+        """Statistika LRU cachea (None ako je cache isključen)."""
+        fn = self._engine(mode)
+        return fn.cache_info() if hasattr(fn, "cache_info") else None
+
+    def _stem_uncached(self, word: str, mode: str) -> str:
         # 1. Lowercase i čišćenje (dopuštamo brojeve za tehničke termine)
         word = word.lower().strip()
         word = ''.join(c for c in word if c.isalnum())
@@ -111,21 +168,22 @@ class CroStemmer:
         if word in self.EXCEPTIONS:
             return self.EXCEPTIONS[word]
             
-        # 3. Suffix stripping (longest match first)
-        suffixes = self.SUFFIXES_AGGRESSIVE if mode == "aggressive" else self.SUFFIXES_CONSERVATIVE
+        # 3. Suffix stripping (prvi sufiks po redoslijedu liste koji se smije skinuti)
+        tables = self._tables["aggressive" if mode == "aggressive" else "conservative"]
         current = word
         
         while True:
-            found = False
-            for suffix in suffixes:
-                if current.endswith(suffix):
-                    potential_root = current[:-len(suffix)]
-                    if self._is_suffix_strippable(suffix, potential_root, mode):
-                        current = potential_root
-                        found = True
-                        break
-            if not found:
+            size = len(current)
+            best_rank = best_len = None
+            for length, table in tables:
+                if length > size:
+                    continue
+                entry = table.get(current[-length:])
+                if entry and size - length >= entry[1] and (best_rank is None or entry[0] < best_rank):
+                    best_rank, best_len = entry[0], length
+            if best_len is None:
                 break
+            current = current[:-best_len]
                 
         # 4. Prefix stripping
         for prefix in self.PREFIXES:
@@ -172,25 +230,44 @@ class CroStemmer:
         Returns:
             Stemirani tekst
         """
-        words = text.split()
-        stemmed = [self.stem(word, mode) for word in words]
-        return ' '.join(stemmed)
+        return ' '.join(self.stem_many(text.split(), mode))
 
 
 # Singleton instanca
 stemmer = CroStemmer()
 
+_native_stem_text_batch = None
+if os.getenv("KRONOS_NATIVE_STEM", "1") != "0":
+    try:
+        from src.modules.kronos_core import stem_text_batch as _native_stem_text_batch
+    except ImportError:
+        pass
+
 
 def stem(word: str, mode: str = "aggressive") -> str:
     """Convenience funkcija za stemiranje jedne riječi."""
     return stemmer.stem(word, mode)
 
 
+def stem_many(words: Iterable[str], mode: str = "aggressive") -> List[str]:
+    """Convenience funkcija za stemiranje niza riječi."""
+    return stemmer.stem_many(words, mode)
+
+
 def stem_text(text: str, mode: str = "aggressive") -> str:
     """Convenience funkcija za stemiranje teksta."""
+    if _native_stem_text_batch is not None:
+        return _native_stem_text_batch([text], mode)[0]
     return stemmer.stem_text(text, mode)
 
 
+def stem_text_batch(texts: Iterable[str], mode: str = "aggressive") -> List[str]:
+    """Stemira više tekstova odjednom (npr. sve chunkove datoteke)."""
+    if _native_stem_text_batch is not None:
+        return _native_stem_text_batch(list(texts), mode)
+    return [stemmer.stem_text(text, mode) for text in texts]
+
+
 # Test
 if __name__ == "__main__":
     test_words = ["kuća", "kući", "kućom", "kućama", "knjiga", "knjigama", "čovjek", "ljudi"]
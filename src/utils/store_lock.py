@@ -0,0 +1,50 @@
+"""
+Lock vektorske baze (data/store) između procesa.
+
+Drže ga pisci za svaku mutaciju Chrome (EmbeddedCollection), Ingestor od
+Chroma synca do bump_generation, i backup dok kopira data/store. Bez njega bi
+backup mogao kopirati HNSW datoteke usred upisa, a generacija bi bila ista
+prije i poslije (bump dolazi tek nakon upisa u Chromu).
+
+Re-entrant je po threadu (Ingestor ga drži, a kolekcija ga unutar toga opet
+uzima); različiti threadovi i procesi se međusobno isključuju.
+"""
+import os
+import threading
+from contextlib import contextmanager
+
+from src.utils.event_archive import _FileLock
+
+_held = threading.local()
+
+
+def store_lock_path(store_dir: str) -> str:
+    # Pored data/store, ne unutra: kopija direktorija ne smije sadržavati lock
+    return os.path.abspath(store_dir) + ".lock"
+
+
+@contextmanager
+def vector_store_lock(store_dir: str):
+    path = store_lock_path(store_dir)
+    counts = getattr(_held, "counts", None)
+    if counts is None:
+        counts = _held.counts = {}
+    if counts.get(path):
+        counts[path] += 1
+        try:
+            yield
+        finally:
+            counts[path] -= 1
+        return
+
+    # Svaki ulaz otvara svoj deskriptor: flock na istom deskriptoru ne isključuje threadove
+    lock = _FileLock(path)
+    try:
+        with lock:
+            counts[path] = 1
+            try:
+                yield
+            finally:
+                counts[path] = 0
+    finally:
+        lock.close()
@@ -1,3 +1,5 @@
+from types import SimpleNamespace
+
 import pytest
 from fastapi.testclient import TestClient
 from src.server import app
@@ -9,10 +11,24 @@ def test_read_main():
     assert response.status_code == 200
     assert response.json()["status"] == "online"
 
-def test_health():
+def test_health(tmp_path, monkeypatch):
+    import src.server as server
+    from src.modules.fast_path import FastPath
+    from src.modules.librarian import Librarian
+
+    monkeypatch.setattr(server, "_oracle_instance", None)
     response = client.get("/health")
     assert response.status_code == 200
-    assert response.json() == {"status": "healthy"}
+    body = response.json()
+    assert body["status"] in ("ok", "degraded") and "health_score" in body
+    assert body["fast_path"] == {"ready": False}  # Oracle još nije učitan
+
+    fast_path = FastPath(Librarian(str(tmp_path)))
+    fast_path.warmup()
+    monkeypatch.setattr(server, "_oracle_instance", SimpleNamespace(fast_path=fast_path))
+    status = client.get("/health").json()["fast_path"]
+    assert status["ready"] and status["source"] == "warmup" and not status["stale"]
+    assert status["generation"] == fast_path.generation
 
 def test_stats_endpoint():
     # Testiramo da endpoint vraća 200, čak i ako je baza prazna
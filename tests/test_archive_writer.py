@@ -0,0 +1,178 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from src.modules.librarian import Librarian
+from src.utils.archive_writer import ArchiveWriter, close_all_writers, get_archive_writer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def _produce(append, producers, per_producer):
+    def producer(p):
+        for i in range(per_producer):
+            append(json.dumps({"event": "test", "data": {"producer": p, "seq": i, "pad": "x" * 200}}))
+
+    threads = [threading.Thread(target=producer, args=(p,)) for p in range(producers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return start
+
+
+def test_eight_concurrent_producers(tmp_path):
+    producers, per_producer = 8, 2500
+    total = producers * per_producer
+
+    # Stari obrazac: open/append/close po događaju, s fsync radi iste trajnosti
+    naive_path = tmp_path / "naive.jsonl"
+    lock = threading.Lock()
+
+    def naive_append(line):
+        with lock, open(naive_path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    start = _produce(naive_append, producers, per_producer // 10)
+    naive_rate = (total // 10) / (time.perf_counter() - start)
+
+    path = tmp_path / "archive.jsonl"
+    writer = ArchiveWriter(str(path), max_queue=1000, fsync_interval=0.05)
+    start = _produce(writer.append, producers, per_producer)
+    writer.flush()
+    rate = total / (time.perf_counter() - start)
+    stats = writer.stats()
+    writer.close()
+    print(f"\nnaive+fsync: {naive_rate:.0f} ev/s | group commit: {rate:.0f} ev/s | {stats}")
+
+    records = _read(path)
+    assert len(records) == total
+    for p in range(producers):
+        seqs = [r["data"]["seq"] for r in records if r["data"]["producer"] == p]
+        assert seqs == list(range(per_producer))  # redoslijed po producentu očuvan
+    assert stats["batches"] < total / 10
+    assert stats["fsyncs"] < stats["batches"] + 1
+    assert rate > naive_rate
+
+
+def test_flush_and_reopen_after_delete(tmp_path):
+    path = tmp_path / "archive.jsonl"
+    writer = ArchiveWriter(str(path), fsync_interval=10)
+    writer.append('{"n": 1}')
+    assert writer.flush(timeout=5)
+    assert _read(path) == [{"n": 1}]  # flush ne čeka fsync interval
+
+    os.remove(path)  # npr. wipe_all
+    writer.append('{"n": 2}')
+    writer.close()
+    assert _read(path) == [{"n": 2}]
+
+
+def test_cross_process_appends_do_not_interleave(tmp_path):
+    path = tmp_path / "archive.jsonl"
+    code = (
+        "import json, sys\n"
+        "from src.utils.archive_writer import ArchiveWriter\n"
+        "w = ArchiveWriter(sys.argv[1], fsync_interval=0)\n"
+        "for i in range(2000):\n"
+        "    w.append(json.dumps({'proc': 'child', 'seq': i, 'pad': 'y' * 500}))\n"
+        "w.close()\n"
+    )
+    child = subprocess.Popen([sys.executable, "-c", code, str(path)], cwd=ROOT)
+    writer = ArchiveWriter(str(path), fsync_interval=0)
+    for i in range(2000):
+        writer.append(json.dumps({"proc": "parent", "seq": i, "pad": "z" * 500}))
+    writer.close()
+    assert child.wait(timeout=60) == 0
+
+    records = _read(path)  # svaka linija je ispravan JSON
+    assert len(records) == 4000
+    for proc in ("parent", "child"):
+        assert [r["seq"] for r in records if r["proc"] == proc] == list(range(2000))
+
+
+def test_librarian_log_event_goes_through_writer(tmp_path):
+    lib = Librarian(str(tmp_path))
+    for i in range(50):
+        lib.log_event("entity_saved", {"id": i})
+    lib.flush_archive()
+    assert [r["data"]["id"] for r in _read(lib.archive_path)] == list(range(50))
+
+    lib.wipe_all()
+    assert not os.path.exists(lib.archive_path)
+    lib.log_event("entity_saved", {"id": "novi"})
+    close_all_writers(str(tmp_path))
+    assert [r["data"]["id"] for r in _read(lib.archive_path)] == ["novi"]
+
+
+def test_write_error_is_reported_and_writer_recovers(tmp_path):
+    path = tmp_path / "archive.jsonl"
+    writer = ArchiveWriter(str(path), fsync_interval=10)
+    ensure_open = writer._ensure_open
+    fail = [True]
+
+    def broken_open():
+        if fail.pop() if fail else False:
+            raise OSError("disk je pun")
+        ensure_open()
+
+    writer._ensure_open = broken_open
+    writer.append('{"n": 1}')
+    start = time.monotonic()
+    with pytest.raises(OSError, match="disk je pun"):
+        writer.flush(timeout=30)
+    assert time.monotonic() - start < 5  # greška se javlja odmah, ne nakon timeouta
+
+    writer.append('{"n": 2}')
+    assert writer.flush(timeout=5)  # izgubljena linija ne blokira kasnije flusheve
+    writer.close()
+    assert _read(path) == [{"n": 2}]
+
+
+def test_flush_all_writers_is_bounded(tmp_path, monkeypatch):
+    lib = Librarian(str(tmp_path))
+    lib.log_event("entity_saved", {"id": 1})
+    writer = get_archive_writer(lib.archive_path)
+    monkeypatch.setattr(writer, "flush", lambda timeout=None: False)
+    with pytest.raises(TimeoutError):
+        lib.flush_archive()
+    monkeypatch.undo()
+    close_all_writers(str(tmp_path))
+
+
+def test_append_racing_close_is_never_lost(tmp_path):
+    path = tmp_path / "archive.jsonl"
+    writer = ArchiveWriter(str(path), max_queue=4, fsync_interval=0)
+    accepted = []
+
+    def producer(p):
+        for i in range(500):
+            try:
+                writer.append(json.dumps({"p": p, "i": i}))
+            except RuntimeError:
+                return  # writer zatvoren: linija je odbijena, ne izgubljena
+            accepted.append((p, i))
+
+    threads = [threading.Thread(target=producer, args=(p,)) for p in range(4)]
+    for t in threads:
+        t.start()
+    time.sleep(0.01)
+    writer.close()
+    for t in threads:
+        t.join()
+    assert sorted((r["p"], r["i"]) for r in _read(path)) == sorted(accepted)
+    with pytest.raises(RuntimeError):
+        writer.append("{}")
@@ -0,0 +1,236 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zipfile
+
+import pytest
+
+from src.modules.job_manager import JobManager
+from src.modules.librarian import Librarian
+from src.utils.archive_writer import close_all_writers
+from src.utils.backup import create_backup, read_manifest, restore_backup
+from src.utils.event_archive import iter_events, migrate_archive
+from src.utils.store_lock import vector_store_lock
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    lib = Librarian(str(data))
+    conn = lib._get_sqlite_conn()
+    with conn:
+        conn.executemany("INSERT INTO entities (project, type, content) VALUES ('p', 'decision', ?)",
+                         [(f"Odluka {i}",) for i in range(200)])
+    conn.close()
+    JobManager(str(data / "jobs.db"))
+    store = data / "store"
+    store.mkdir()
+    chroma = sqlite3.connect(store / "chroma.sqlite3")
+    chroma.execute("CREATE TABLE embeddings (id TEXT, vec BLOB)")
+    chroma.commit()
+    chroma.close()
+    (store / "segment").mkdir()
+    (store / "segment" / "data_level0.bin").write_bytes(os.urandom(64 * 1024))
+    for i in range(300):
+        lib.log_event("entity_saved", {"id": i, "pad": "x" * 200})
+    close_all_writers(str(data))
+    migrate_archive(lib.archive_path, segment_bytes=16 * 1024)
+    lib.log_event("entity_saved", {"id": "aktivni"})
+    lib.flush_archive()
+    return data
+
+
+def _sha(path):
+    return hashlib.sha256(open(path, "rb").read()).hexdigest()
+
+
+def test_backup_while_writing_is_consistent(data_dir, tmp_path):
+    stop = threading.Event()
+
+    def writer():
+        conn = sqlite3.connect(data_dir / "metadata.db", timeout=30)
+        i = 0
+        while not stop.is_set():
+            with conn:
+                conn.execute("INSERT INTO entities (project, type, content) VALUES ('p', 'task', ?)", (f"t{i}",))
+            i += 1
+        conn.close()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        result = create_backup(str(data_dir), str(tmp_path / "full.zip"), pages=4)
+    finally:
+        stop.set()
+        thread.join()
+
+    manifest = read_manifest(str(tmp_path / "full.zip"))
+    assert manifest["files"] == result["files"]
+    assert {"metadata.db", "jobs.db", "store/chroma.sqlite3", "store/segment/data_level0.bin",
+            "archive/index.json", "archive.jsonl"} <= set(manifest["files"])
+    assert not any(name.endswith(("-wal", "-shm", ".lock")) for name in manifest["files"])
+    with zipfile.ZipFile(tmp_path / "full.zip") as zf:
+        for rel, entry in manifest["files"].items():
+            assert hashlib.sha256(zf.read("data/" + rel)).hexdigest() == entry["sha256"]
+
+    restored = tmp_path / "restored"
+    restore_backup(str(tmp_path / "full.zip"), str(restored))
+    conn = sqlite3.connect(restored / "metadata.db")
+    assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    assert conn.execute("SELECT count(*) FROM entities WHERE type = 'decision'").fetchone()[0] == 200
+    conn.close()
+    events = list(iter_events(str(restored / "archive.jsonl")))
+    assert len(events) == 301 and events[-1]["data"]["id"] == "aktivni"
+
+
+def test_backup_waits_for_vector_write_and_generation_bump(data_dir, tmp_path):
+    """Upis u Chromu i bump generacije su atomarni za backup (vector_store_lock)."""
+    segment = data_dir / "store" / "segment" / "data_level0.bin"
+    final = os.urandom(64 * 1024)
+    locked, done = threading.Event(), threading.Event()
+    lib = Librarian(str(data_dir))
+    generation = lib.get_generation()
+
+    def writer():
+        with vector_store_lock(str(data_dir / "store")):
+            locked.set()
+            with open(segment, "r+b") as f:
+                f.write(final[:1024])  # HNSW datoteka usred upisa
+                time.sleep(0.3)
+                f.write(final[1024:])
+            lib.bump_generation()
+        done.set()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    locked.wait()
+    result = create_backup(str(data_dir), str(tmp_path / "full.zip"))
+    thread.join()
+
+    assert done.is_set()
+    assert result["generation"] == generation + 1 and result["vector_store_consistent"]
+    with zipfile.ZipFile(tmp_path / "full.zip") as zf:
+        assert zf.read("data/store/segment/data_level0.bin") == final
+
+
+def test_ingest_bumps_generation_inside_vector_lock(tmp_path, monkeypatch):
+    from src.modules.oracle import Oracle
+
+    monkeypatch.setenv("KRONOS_EMBEDDER", "local")
+    oracle = Oracle(db_path=str(tmp_path / "store"))
+    acquired = threading.Event()
+    threads, held = [], []
+
+    def backup_side():
+        with vector_store_lock(str(tmp_path / "store")):
+            acquired.set()
+
+    def on_written():
+        # Drugi thread (npr. backup) ne smije dobiti lock dok traje bump
+        threads.append(threading.Thread(target=backup_side))
+        threads[0].start()
+        held.append(not acquired.wait(0.2))
+
+    meta = {"source": "a.md", "project": "p", "start_line": 1, "end_line": 1}
+    oracle.sync_chunks_many("p", [("a.md", ["tekst"], [meta], ["id1"])], on_written=on_written)
+    threads[0].join(timeout=5)
+    assert held == [True] and acquired.is_set()
+
+
+def test_incremental_reuses_unchanged_files(data_dir, tmp_path):
+    create_backup(str(data_dir), str(tmp_path / "full.zip"))
+    lib = Librarian(str(data_dir))
+    lib.log_event("entity_saved", {"id": "novi"})
+    lib.flush_archive()
+
+    result = create_backup(str(data_dir), str(tmp_path / "inc.zip"), base=str(tmp_path / "full.zip"))
+    assert result["base"] == "full.zip"
+    reused = {rel for rel, e in result["files"].items() if e["source"] == "full.zip"}
+    assert "store/segment/data_level0.bin" in reused
+    assert any(rel.startswith("archive/segment-") for rel in reused)
+    assert "archive.jsonl" not in reused
+    assert os.path.getsize(tmp_path / "inc.zip") < os.path.getsize(tmp_path / "full.zip") / 2
+
+    # Lanac: treći backup referencira izvorni ZIP, ne posrednika
+    result = create_backup(str(data_dir), str(tmp_path / "inc2.zip"), base=str(tmp_path / "inc.zip"))
+    assert result["files"]["store/segment/data_level0.bin"]["source"] == "full.zip"
+
+    restored = tmp_path / "restored"
+    restore_backup(str(tmp_path / "inc2.zip"), str(restored))
+    assert _sha(restored / "store" / "segment" / "data_level0.bin") == _sha(data_dir / "store" / "segment" / "data_level0.bin")
+    assert list(iter_events(str(restored / "archive.jsonl")))[-1]["data"]["id"] == "novi"
+    close_all_writers(str(data_dir))
+
+
+def test_restore_rejects_bad_checksum(data_dir, tmp_path):
+    create_backup(str(data_dir), str(tmp_path / "full.zip"))
+    with zipfile.ZipFile(tmp_path / "full.zip") as src, \
+            zipfile.ZipFile(tmp_path / "bad.zip", "w") as dst:
+        for item in src.infolist():
+            payload = src.read(item.filename)
+            if item.filename == "data/jobs.db":
+                payload = payload[:-1] + b"\x01"
+            dst.writestr(item, payload)
+
+    target = tmp_path / "current"
+    target.mkdir()
+    (target / "keep.txt").write_text("postojeći podaci")
+    with pytest.raises(ValueError):
+        restore_backup(str(tmp_path / "bad.zip"), str(target))
+    assert (target / "keep.txt").read_text() == "postojeći podaci"
+    assert not os.path.exists(str(target) + ".restore-tmp")
+
+
+def test_restore_legacy_zip_without_manifest(tmp_path):
+    with zipfile.ZipFile(tmp_path / "old.zip", "w") as zf:
+        zf.writestr("data/archive.jsonl", '{"event": "entity_saved", "data": {}}\n')
+    restore_backup(str(tmp_path / "old.zip"), str(tmp_path / "data"))
+    assert (tmp_path / "data" / "archive.jsonl").exists()
+
+
+@pytest.mark.parametrize("name", ["../escaped.txt", "store/../../escaped.txt", "/tmp/escaped.txt"])
+def test_restore_rejects_path_traversal(tmp_path, name):
+    payload = b"zlonamjerno"
+    manifest = {"version": 1, "files": {name: {"sha256": hashlib.sha256(payload).hexdigest(), "source": None}}}
+    with zipfile.ZipFile(tmp_path / "evil.zip", "w") as zf:
+        zf.writestr("manifest.json", json.dumps(manifest))
+        zf.writestr("data/" + name, payload)
+    with zipfile.ZipFile(tmp_path / "evil_legacy.zip", "w") as zf:
+        zf.writestr("data/" + name, payload)
+
+    for backup in ("evil.zip", "evil_legacy.zip"):
+        with pytest.raises(ValueError, match="Nesigurna putanja"):
+            restore_backup(str(tmp_path / backup), str(tmp_path / "data"))
+    assert not (tmp_path / "escaped.txt").exists()
+    assert not os.path.exists("/tmp/escaped.txt")
+
+
+def test_failed_swap_keeps_existing_data(data_dir, tmp_path, monkeypatch):
+    create_backup(str(data_dir), str(tmp_path / "full.zip"))
+    target = tmp_path / "current"
+    target.mkdir()
+    (target / "keep.txt").write_text("postojeći podaci")
+
+    real_replace = os.replace
+
+    def failing_replace(src, dst):
+        if str(src).endswith(".restore-tmp"):
+            raise OSError("simulirani pad")
+        real_replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", failing_replace)
+    with pytest.raises(OSError):
+        restore_backup(str(tmp_path / "full.zip"), str(target))
+    assert (target / "keep.txt").read_text() == "postojeći podaci"
+    monkeypatch.undo()
+
+    # Pad procesa između dva preimenovanja: sljedeći restore vraća stari direktorij i dovršava
+    os.replace(target, str(target) + ".restore-old")
+    restore_backup(str(tmp_path / "full.zip"), str(target))
+    assert (target / "jobs.db").exists() and not (target / "keep.txt").exists()
+    assert not os.path.exists(str(target) + ".restore-old")
+    close_all_writers(str(data_dir))
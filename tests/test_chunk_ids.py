@@ -0,0 +1,151 @@
+import pytest
+from chromadb import EmbeddingFunction
+
+from src.modules.oracle import Oracle
+from src.utils.metadata_helper import chunk_id, chunk_ids
+
+
+class CountingEmbedder(EmbeddingFunction):
+    def __init__(self):
+        self.texts = 0
+        self.lock = None
+        self.calls_under_write_lock = 0
+
+    def __call__(self, input):
+        self.texts += len(input)
+        if self.lock is not None and self.lock._writer is not None:
+            self.calls_under_write_lock += 1
+        return [[float(len(t)), 1.0, 0.0] for t in input]
+
+    def name(self):
+        return "counting-test"
+
+    def get_config(self):
+        return NotImplemented  # legacy: ne serijalizira se u konfiguraciju kolekcije
+
+
+@pytest.fixture
+def oracle(tmp_path):
+    o = Oracle(db_path=str(tmp_path / "store"))
+    o.embedder = o.embedding_function = CountingEmbedder()
+    o.embedder.lock = o._lock
+    o.collection = o.client.get_or_create_collection(name="chunk_ids_test", embedding_function=o.embedder)
+    return o
+
+
+def _sync(oracle, chunks, source="docs/a.md", project="kronos"):
+    metas = [
+        {"source": source, "project": project, "start_line": i * 10 + 1, "end_line": i * 10 + 5}
+        for i in range(len(chunks))
+    ]
+    return oracle.sync_file_chunks(source, project, chunks, metas, chunk_ids(project, source, chunks))
+
+
+def test_chunk_id_is_stable_and_scoped():
+    a = chunk_id("kronos", "docs/a.md", "# Naslov")
+    assert a == chunk_id("kronos", "docs/a.md", "# Naslov")
+    assert len(a) == 64
+    assert a != chunk_id("drugi", "docs/a.md", "# Naslov")
+    assert a != chunk_id("kronos", "docs/b.md", "# Naslov")
+    assert a != chunk_id("kronos", "docs/a.md", "# Naslov 2")
+
+
+def test_duplicate_chunks_get_distinct_ids():
+    ids = chunk_ids("kronos", "docs/a.md", ["isto", "isto", "drugo"])
+    assert len(set(ids)) == 3
+
+
+def test_unchanged_reingest_does_not_embed(oracle):
+    chunks = ["prvi chunk", "drugi chunk", "treći chunk"]
+    first = _sync(oracle, chunks)
+    assert first["added"] == 3
+    embedded = oracle.embedder.texts
+
+    second = _sync(oracle, chunks)
+    assert second == {"added": 0, "updated": 0, "deleted": 0, "unchanged": 3}
+    assert oracle.embedder.texts == embedded
+
+
+def test_changed_file_embeds_only_new_and_deletes_vanished(oracle):
+    _sync(oracle, ["prvi chunk", "drugi chunk", "treći chunk"])
+    embedded = oracle.embedder.texts
+
+    result = _sync(oracle, ["prvi chunk", "izmijenjeni chunk"])
+    assert result["added"] == 1
+    assert result["deleted"] == 2
+    assert oracle.embedder.texts == embedded + 1
+
+    remaining = oracle.collection.get(where={"source": "docs/a.md"})
+    assert sorted(remaining["documents"]) == ["izmijenjeni chunk", "prvi chunk"]
+
+
+def test_moved_chunk_updates_lines_without_embedding(oracle):
+    _sync(oracle, ["prvi chunk", "drugi chunk"])
+    embedded = oracle.embedder.texts
+
+    # 'drugi chunk' se pomaknuo na prvo mjesto -> nove linije, isti sadržaj
+    result = _sync(oracle, ["drugi chunk"])
+    assert result == {"added": 0, "updated": 1, "deleted": 1, "unchanged": 0}
+    assert oracle.embedder.texts == embedded
+
+    meta = oracle.collection.get(where={"source": "docs/a.md"})["metadatas"][0]
+    assert meta["start_line"] == 1
+
+
+def test_other_project_with_same_path_is_untouched(oracle):
+    _sync(oracle, ["zajednički"], project="alpha")
+    _sync(oracle, ["drugačiji"], project="beta")
+    assert len(oracle.collection.get(where={"source": "docs/a.md"})["ids"]) == 2
+
+
+def test_sync_keeps_entity_vectors_of_the_same_file(oracle):
+    oracle.collection.upsert(
+        ids=["entity_1"], documents=["Odluka: koristimo SQLite"],
+        metadatas=[{"source": "docs/a.md", "project": "kronos", "type": "entity"}]
+    )
+    _sync(oracle, ["prvi chunk"])
+    assert oracle.collection.get(ids=["entity_1"])["ids"] == ["entity_1"]
+
+
+def test_sync_many_embeds_whole_batch_at_once(oracle):
+    files = []
+    for name in ("docs/a.md", "docs/b.md"):
+        docs = [f"{name} chunk"]
+        metas = [{"source": name, "project": "kronos", "start_line": 1, "end_line": 1}]
+        files.append((name, docs, metas, chunk_ids("kronos", name, docs)))
+
+    result = oracle.sync_chunks_many("kronos", files)
+    assert result["added"] == 2
+    assert oracle.sync_chunks_many("kronos", files)["unchanged"] == 2
+
+
+def test_embedding_runs_outside_write_lock(oracle):
+    """Mrežni poziv embeddinga ne smije blokirati upite (write lock)."""
+    _sync(oracle, ["prvi chunk", "drugi chunk"])
+    _sync(oracle, ["drugi chunk", "novi chunk"])
+    meta = {"source": "docs/c.md", "project": "kronos", "start_line": 1, "end_line": 1}
+    oracle.safe_upsert(["safe chunk"], [meta], ["safe_1"])
+
+    assert oracle.embedder.texts == 4
+    assert oracle.embedder.calls_under_write_lock == 0
+    assert len(oracle.collection.get(where={"project": "kronos"})["ids"]) == 3
+
+
+def test_sync_reembeds_chunk_deleted_before_write_lock(oracle, monkeypatch):
+    """Ako se kolekcija promijeni između embeddinga i write locka, sync ponavlja diff."""
+    _sync(oracle, ["prvi chunk"])
+    original = oracle._existing_chunks
+    calls = []
+
+    def racing(where):
+        calls.append(where)
+        if len(calls) == 2:  # drugi upis je obrisao 'prvi chunk' dok se embediralo
+            oracle.collection.delete(ids=list(original(where)))
+        return original(where)
+
+    monkeypatch.setattr(oracle, "_existing_chunks", racing)
+    result = _sync(oracle, ["prvi chunk", "drugi chunk"])
+    assert result["added"] == 2
+    assert len(calls) == 4
+    assert oracle.embedder.calls_under_write_lock == 0
+    assert len(oracle.collection.get(where={"source": "docs/a.md"})["ids"]) == 2
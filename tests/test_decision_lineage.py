@@ -0,0 +1,82 @@
+import sqlite3
+
+from src.modules.librarian import Librarian
+
+
+def _chain(lib, length):
+    """Lanac odluka 1 -> 2 -> ... preko supersede_decision; vraća ID-jeve redom."""
+    lib.save_entity("decision", "Odluka v0", project="p")
+    conn = sqlite3.connect(lib.meta_path)
+    ids = [conn.execute("SELECT max(id) FROM entities").fetchone()[0]]
+    conn.close()
+    for i in range(1, length):
+        ids.append(lib.supersede_decision(ids[-1], f"Odluka v{i}"))
+    return ids
+
+
+def test_history_returns_ancestors_and_descendants(tmp_path):
+    lib = Librarian(str(tmp_path))
+    ids = _chain(lib, 5)
+
+    history = lib.get_decision_history(ids[2])
+
+    assert [d["id"] for d in history] == ids
+    assert [d["depth"] for d in history] == [-2, -1, 0, 1, 2]
+    assert history[0]["superseded_by_id"] == ids[1]
+    assert history[-1]["superseded_by_id"] is None
+    assert lib.get_decision_by_id(ids[0])["superseded_by_id"] == ids[1]
+    assert lib.get_decision_history(999999) == []
+
+
+def test_history_survives_cycles(tmp_path):
+    lib = Librarian(str(tmp_path))
+    ids = _chain(lib, 3)
+    assert lib.ratify_decision(ids[-1], superseded_by=f"Decision #{ids[0]}")
+
+    history = lib.get_decision_history(ids[1])
+    assert sorted(d["id"] for d in history) == sorted(ids)
+
+
+def test_ratify_parses_superseded_by_text(tmp_path):
+    lib = Librarian(str(tmp_path))
+    ids = _chain(lib, 2)
+    lib.save_entity("decision", "Neovisna odluka", project="p")
+    other = lib.search_entities("neovisna")[0]["id"]
+
+    lib.ratify_decision(other, superseded_by=f"Decision #{ids[0]}: vraćeno")
+    assert [d["id"] for d in lib.get_decision_history(other)] == [other, ids[0], ids[1]]
+
+
+def test_migration_parses_legacy_rows(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "metadata.db"))
+    conn.execute('''
+        CREATE TABLE entities (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, file_path TEXT, project TEXT, type TEXT,
+            content TEXT, context_preview TEXT, valid_from TEXT, valid_to TEXT,
+            superseded_by TEXT, created_at TEXT
+        )
+    ''')
+    conn.executemany(
+        "INSERT INTO entities (id, type, content, superseded_by, created_at) VALUES (?, 'decision', ?, ?, ?)",
+        [
+            (1, "Stara", "Decision #2: Srednja", "2024-01-01"),
+            (2, "Srednja", "Decision #3", "2024-02-01"),
+            (3, "Nova", None, "2024-03-01"),
+            (4, "Slobodan tekst", "sqlite-odluka", "2024-03-01"),
+            (5, "Nepostojeći cilj", "Decision #99", "2024-03-01"),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+    lib = Librarian(str(tmp_path))
+    conn = sqlite3.connect(lib.meta_path)
+    links = dict(conn.execute("SELECT id, superseded_by_id FROM entities").fetchall())
+    plan = " ".join(r[3] for r in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM entities WHERE superseded_by_id = ?", (1,)
+    ).fetchall())
+    conn.close()
+
+    assert links == {1: 2, 2: 3, 3: None, 4: None, 5: None}
+    assert "idx_entities_superseded_by_id" in plan
+    assert [d["id"] for d in lib.get_decision_history(3)] == [1, 2, 3]
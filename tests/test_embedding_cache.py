@@ -0,0 +1,146 @@
+import os
+
+import numpy as np
+import pytest
+from chromadb.api.types import EmbeddingFunction
+from chromadb.utils.embedding_functions import register_embedding_function
+
+from src.utils.embedding_cache import (
+    CachedEmbeddingFunction,
+    EmbeddingStore,
+    HashingEmbeddingFunction,
+    open_collection,
+)
+
+
+def _cached(tmp_path, max_entries=1000):
+    inner = HashingEmbeddingFunction(dim=64)
+    store = EmbeddingStore(os.path.join(str(tmp_path), "embeddings.db"), max_entries=max_entries)
+    return inner, CachedEmbeddingFunction(inner, "local-test", store)
+
+
+def test_hashing_embedder_is_deterministic():
+    emb = HashingEmbeddingFunction(dim=64)
+    a = emb(["Kako radi Context Budgeter?"])[0]
+    b = HashingEmbeddingFunction(dim=64)(["Kako radi Context Budgeter?"])[0]
+    np.testing.assert_allclose(a, b)
+    assert len(a) == 64
+    assert abs(sum(v * v for v in a) - 1.0) < 1e-6
+
+
+def test_repeated_texts_skip_inner_embedder(tmp_path):
+    inner, cached = _cached(tmp_path)
+    first = cached(["Što je Kronos?", "Kako radi Context Budgeter?"])
+    second = cached(["Što je Kronos?", "Kako radi Context Budgeter?"])
+
+    assert inner.calls == 1
+    np.testing.assert_allclose(first, second)
+    assert cached.stats() == {"hits": 2, "misses": 2}
+
+
+def test_duplicates_within_one_call_are_embedded_once(tmp_path):
+    inner, cached = _cached(tmp_path)
+    vectors = cached(["isti", "isti", "drugi"])
+    np.testing.assert_allclose(vectors[0], vectors[1])
+    assert inner.calls == 1
+    assert cached.store.count() == 2
+
+
+def test_cache_survives_restart(tmp_path):
+    _, cached = _cached(tmp_path)
+    original = cached(["perzistentno"])[0]
+    cached.store.close()
+
+    inner, reopened = _cached(tmp_path)
+    np.testing.assert_allclose(reopened(["perzistentno"])[0], original)
+    assert inner.calls == 0
+
+
+def test_model_name_is_part_of_key(tmp_path):
+    inner, cached = _cached(tmp_path)
+    cached(["tekst"])
+    other = CachedEmbeddingFunction(inner, "other-model", cached.store)
+    other(["tekst"])
+    assert inner.calls == 2
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    _, cached = _cached(tmp_path, max_entries=2)
+    cached(["a"])
+    cached(["b"])
+    cached(["a"])  # osvježi 'a'
+    cached(["c"])
+    cached.store.evict()
+
+    assert cached.store.count() == 2
+    assert cached._key("b") not in cached.store.get_many([cached._key("b")])
+    assert cached._key("a") in cached.store.get_many([cached._key("a")])
+
+
+def test_embedding_functions_work_with_chroma_collections(tmp_path):
+    import chromadb
+
+    _, cached = _cached(tmp_path)
+    # Cache se predstavlja imenom prave funkcije, pa je nova kolekcija bilježi
+    assert cached.name() == HashingEmbeddingFunction().name() == "kronos-hashing"
+    client = chromadb.PersistentClient(path=str(tmp_path / "store"))
+    collection = open_collection(client, "test", cached)
+    collection.upsert(ids=["a"], documents=["Što je Kronos?"])
+    again = open_collection(client, "test", cached)
+    assert again.query(query_texts=["Što je Kronos?"], n_results=1)["ids"] == [["a"]]
+
+
+@register_embedding_function
+class LegacyGeminiStandIn(EmbeddingFunction):
+    """Registrirana funkcija s kojom su kolekcije starijih instalacija stvorene."""
+
+    def __init__(self):
+        pass
+
+    def __call__(self, input):
+        raise AssertionError("vektore mora računati Kronosova embedding funkcija")
+
+    @staticmethod
+    def name():
+        return "kronos-test-legacy-gemini"
+
+    def get_config(self):
+        return {}
+
+    @staticmethod
+    def build_from_config(config):
+        return LegacyGeminiStandIn()
+
+
+@pytest.mark.parametrize("persisted", [None, LegacyGeminiStandIn])
+def test_open_collection_created_with_old_embedding_function(tmp_path, persisted):
+    import chromadb
+
+    client = chromadb.PersistentClient(path=str(tmp_path / "store"))
+    kwargs = {"embedding_function": persisted()} if persisted else {}  # None -> chroma default
+    client.create_collection("kronos_memory", **kwargs)
+    _, cached = _cached(tmp_path)
+    with pytest.raises(ValueError, match="conflict"):
+        client.get_or_create_collection("kronos_memory", embedding_function=cached)
+
+    collection = open_collection(chromadb.PersistentClient(path=str(tmp_path / "store")), "kronos_memory", cached)
+    collection.upsert(ids=["a", "b"], documents=["Što je Kronos?", "Context Budgeter"])
+    assert collection.query(query_texts=["Što je Kronos?"], n_results=1)["ids"] == [["a"]]
+    assert cached.stats()["misses"] == 2
+    persisted_name = collection.configuration_json["embedding_function"]["name"]
+    assert persisted_name == (persisted.name() if persisted else "default")
+
+
+def test_oracle_and_librarian_open_existing_default_collection(tmp_path, monkeypatch):
+    import chromadb
+    from src.modules.librarian import Librarian
+    from src.modules.oracle import Oracle
+
+    monkeypatch.setenv("KRONOS_EMBEDDER", "local")
+    store = tmp_path / "store"
+    chromadb.PersistentClient(path=str(store)).create_collection("kronos_memory")
+
+    oracle = Oracle(db_path=str(store))
+    oracle.safe_upsert(["Što je Kronos?"], [{"source": "a.md", "start_line": 1, "end_line": 1}], ["a"])
+    lib = Librarian(str(tmp_path))
+    assert lib._get_collection().get(ids=["a"])["ids"] == ["a"]
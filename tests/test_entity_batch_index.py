@@ -0,0 +1,77 @@
+import pytest
+
+from src.modules.librarian import Librarian
+from src.reindex import reindex_entities
+from src.utils import metadata_helper
+
+
+class CountingCollection:
+    """Zamjena za Chroma kolekciju koja broji upsert pozive i dokumente."""
+
+    def __init__(self):
+        self.upsert_calls = 0
+        self.items = {}
+
+    def upsert(self, ids, documents, metadatas):
+        self.upsert_calls += 1
+        for i, doc, meta in zip(ids, documents, metadatas):
+            self.items[i] = (doc, meta)
+
+    def delete(self, where=None, ids=None):
+        pass
+
+
+@pytest.fixture
+def librarian(tmp_path, monkeypatch):
+    monkeypatch.setattr(metadata_helper, "ALLOWED_ROOTS", metadata_helper.ALLOWED_ROOTS + [str(tmp_path)])
+    lib = Librarian(str(tmp_path))
+    lib._collection = CountingCollection()
+    return lib
+
+
+def _extracted(n):
+    return {
+        "problems": [f"Problem broj {i}" for i in range(n)],
+        "solutions": [f"Rješenje broj {i}" for i in range(n)],
+        "decisions": [{"content": f"Odluka {i}", "valid_from": "2024-01-01"} for i in range(n)],
+        "tasks": [{"status": "todo", "content": f"Zadatak {i}"} for i in range(n)],
+        "code_snippets": [{"language": "python", "preview": "print(1)"}],
+    }
+
+
+def test_store_extracted_data_upserts_file_in_one_batch(librarian, tmp_path):
+    source = str(tmp_path / "a.md")
+    librarian.store_extracted_data(source, _extracted(50), project="p")
+
+    collection = librarian._collection
+    assert len(collection.items) == 200  # code snippet se ne vektorizira
+    assert collection.upsert_calls == 1
+    meta = next(iter(collection.items.values()))[1]
+    assert meta["type"] == "entity"
+    assert meta["source"] == source
+
+
+def test_batches_are_capped_by_batch_size(librarian, tmp_path, monkeypatch):
+    monkeypatch.setenv("KRONOS_ENTITY_BATCH", "64")
+    librarian.store_extracted_data(str(tmp_path / "a.md"), _extracted(50), project="p")
+    assert len(librarian._collection.items) == 200
+    assert librarian._collection.upsert_calls == 4
+
+
+def test_collection_handle_is_cached(librarian):
+    assert librarian._get_collection() is librarian._get_collection()
+
+
+def test_reindex_pages_through_entities(librarian, tmp_path):
+    for i in range(5):
+        librarian.store_extracted_data(str(tmp_path / f"f{i}.md"), _extracted(10), project="p")
+    librarian._collection = CountingCollection()
+
+    stats = reindex_entities(librarian=librarian, page_size=30, batch_size=16)
+
+    assert stats["total"] == 200
+    assert stats["indexed"] == 200
+    assert len(librarian._collection.items) == 200
+    # 7 stranica (30, ..., 20), svaka u 2 batcha
+    assert librarian._collection.upsert_calls == 14
+    assert stats["entities_per_s"] > 0
@@ -0,0 +1,60 @@
+import sqlite3
+
+from src.modules.librarian import Librarian
+
+
+def _lib(tmp_path):
+    lib = Librarian(str(tmp_path))
+    lib._index_entities = lambda *args, **kwargs: 0  # bez Chrome
+    lib._delete_entity_vectors = lambda *args, **kwargs: None
+    return lib
+
+
+def test_search_uses_fts_with_filters(tmp_path):
+    lib = _lib(tmp_path)
+    lib.store_extracted_data("docs/a.md", {
+        "decisions": ["Koristimo SQLite za metapodatke"],
+        "problems": ["SQLite lock na Windowsima"],
+    }, project="kronos")
+    lib.store_extracted_data("docs/b.md", {"decisions": ["SQLite i u drugom projektu"]}, project="drugi")
+
+    assert len(lib.search_entities("sqlite", limit=10)) == 3
+    decisions = lib.search_entities("sqlite", etype="decision", project="kronos")
+    assert [d["content"] for d in decisions] == ["Koristimo SQLite za metapodatke"]
+    # Prefiks i dijakritici: "windows" pronalazi "Windowsima"
+    assert lib.search_entities("windows")[0]["type"] == "problem"
+    assert lib.search_entities("") == []
+    assert lib.search_entities('"(*') == []
+
+
+def test_triggers_keep_index_in_sync(tmp_path):
+    lib = _lib(tmp_path)
+    lib.store_extracted_data("docs/a.md", {"decisions": ["Stara odluka o cacheu"]}, project="kronos")
+    # Ponovni ingest briše stare entitete datoteke
+    lib.store_extracted_data("docs/a.md", {"decisions": ["Nova odluka o indeksu"]}, project="kronos")
+    assert lib.search_entities("cacheu") == []
+    assert len(lib.search_entities("indeksu")) == 1
+
+    conn = lib._get_sqlite_conn()
+    conn.execute("UPDATE entities SET content = 'Preimenovana odluka'")
+    conn.commit()
+    conn.close()
+    assert lib.search_entities("indeksu") == []
+    assert len(lib.search_entities("preimenovana")) == 1
+
+
+def test_existing_database_is_backfilled(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "metadata.db"))
+    conn.execute('''
+        CREATE TABLE entities (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, file_path TEXT, project TEXT, type TEXT,
+            content TEXT, context_preview TEXT, valid_from TEXT, valid_to TEXT,
+            superseded_by TEXT, created_at TEXT
+        )
+    ''')
+    conn.execute("INSERT INTO entities (project, type, content) VALUES ('kronos', 'decision', 'Legacy odluka')")
+    conn.commit()
+    conn.close()
+
+    lib = _lib(tmp_path)
+    assert lib.search_entities("legacy")[0]["content"] == "Legacy odluka"
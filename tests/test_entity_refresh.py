@@ -0,0 +1,135 @@
+import sqlite3
+
+import pytest
+
+from src.modules.librarian import Librarian
+from src.utils import metadata_helper
+
+
+class TrackingCollection:
+    """Zamjena za Chroma kolekciju koja pamti upsertane i obrisane ID-jeve."""
+
+    def __init__(self):
+        self.upserted = []
+        self.deleted = []
+
+    def upsert(self, ids, documents, metadatas):
+        self.upserted.extend(ids)
+
+    def delete(self, ids=None, where=None):
+        self.deleted.extend(ids or [])
+
+
+@pytest.fixture
+def librarian(tmp_path, monkeypatch):
+    monkeypatch.setattr(metadata_helper, "ALLOWED_ROOTS", metadata_helper.ALLOWED_ROOTS + [str(tmp_path)])
+    lib = Librarian(str(tmp_path))
+    lib._collection = TrackingCollection()
+    return lib
+
+
+def _entities(lib, path):
+    conn = sqlite3.connect(lib.meta_path)
+    rows = conn.execute(
+        "SELECT id, type, content, valid_to, superseded_by FROM entities WHERE file_path = ? ORDER BY id", (path,)
+    ).fetchall()
+    conn.close()
+    return rows
+
+
+DATA = {
+    "problems": ["Spor re-ingest", "Spor re-ingest"],
+    "decisions": [{"content": "Koristimo SQLite", "valid_from": "2024-01-01", "valid_to": None, "superseded_by": None}],
+    "tasks": [{"status": "todo", "content": "Napisati benchmark"}],
+    "code_snippets": [{"language": "python", "preview": "print(1)"}],
+}
+
+
+def test_unchanged_reingest_keeps_ids_and_vectors(librarian, tmp_path):
+    path = str(tmp_path / "a.md")
+    first = librarian.store_extracted_data(path, DATA, project="p")
+    assert first["inserted"] == 5
+    before = _entities(librarian, path)
+    generation = librarian.get_generation()
+    librarian._collection = TrackingCollection()
+
+    # Preformatiranje (razmaci) ne mijenja identitet
+    again = dict(DATA, problems=["Spor  re-ingest", "Spor re-ingest "])
+    stats = librarian.store_extracted_data(path, again, project="p")
+
+    assert stats == {"inserted": 0, "deleted": 0, "updated": 0, "unchanged": 5}
+    assert [r[0] for r in _entities(librarian, path)] == [r[0] for r in before]
+    assert librarian._collection.upserted == []
+    assert librarian._collection.deleted == []
+    assert librarian.get_generation() == generation
+
+
+def test_only_new_and_vanished_entities_change(librarian, tmp_path):
+    path = str(tmp_path / "a.md")
+    librarian.store_extracted_data(path, DATA, project="p")
+    before = {}
+    for eid, _, content, _, _ in _entities(librarian, path):
+        before.setdefault(content, eid)
+    librarian._collection = TrackingCollection()
+
+    changed = dict(DATA, problems=["Spor re-ingest"], tasks=[{"status": "done", "content": "Napisati benchmark"}])
+    stats = librarian.store_extracted_data(path, changed, project="p")
+
+    assert stats == {"inserted": 1, "deleted": 2, "updated": 0, "unchanged": 3}
+    after = {r[2]: r[0] for r in _entities(librarian, path)}
+    assert after["Koristimo SQLite"] == before["Koristimo SQLite"]
+    assert after["Spor re-ingest"] == before["Spor re-ingest"]
+    assert "[todo] Napisati benchmark" not in after
+    assert librarian._collection.upserted == [f"entity_{after['[✅] Napisati benchmark']}"]
+    assert len(librarian._collection.deleted) == 2
+
+
+def test_temporal_fields_update_in_place_and_supersede_link_survives(librarian, tmp_path):
+    path = str(tmp_path / "a.md")
+    librarian.store_extracted_data(path, DATA, project="p")
+    decision_id = next(r[0] for r in _entities(librarian, path) if r[1] == "decision")
+    new_id = librarian.supersede_decision(decision_id, "Koristimo Postgres")
+    librarian._collection = TrackingCollection()
+
+    data = dict(DATA, decisions=[dict(DATA["decisions"][0], valid_to="2025-01-01")])
+    stats = librarian.store_extracted_data(path, data, project="p")
+
+    assert stats["updated"] == 1
+    row = next(r for r in _entities(librarian, path) if r[0] == decision_id)
+    assert row[3] == "2025-01-01"
+    assert row[4].startswith(f"Decision #{new_id}")
+    assert f"entity_{decision_id}" not in librarian._collection.upserted
+
+
+def test_reingest_keeps_superseding_decision_and_history(librarian, tmp_path):
+    path = str(tmp_path / "a.md")
+    librarian.store_extracted_data(path, DATA, project="p")
+    decision_id = next(r[0] for r in _entities(librarian, path) if r[1] == "decision")
+    new_id = librarian.supersede_decision(decision_id, "Koristimo Postgres")
+    librarian._collection = TrackingCollection()
+
+    # Datoteka i dalje sadrži samo staru odluku
+    stats = librarian.store_extracted_data(path, DATA, project="p")
+
+    assert stats["deleted"] == 0
+    assert new_id in [r[0] for r in _entities(librarian, path)]
+    assert f"entity_{new_id}" not in librarian._collection.deleted
+    history = librarian.get_decision_history(decision_id)
+    assert [d["id"] for d in history] == [decision_id, new_id]
+
+
+def test_reingest_keeps_legacy_superseding_row(librarian, tmp_path):
+    """Zapis bez porijekla (prije migracije) ostaje ako na njega pokazuje superseded_by_id."""
+    path = str(tmp_path / "a.md")
+    librarian.store_extracted_data(path, DATA, project="p")
+    decision_id = next(r[0] for r in _entities(librarian, path) if r[1] == "decision")
+    new_id = librarian.supersede_decision(decision_id, "Koristimo Postgres")
+    conn = sqlite3.connect(librarian.meta_path)
+    conn.execute("UPDATE entities SET origin = NULL")
+    conn.commit()
+    conn.close()
+
+    stats = librarian.store_extracted_data(path, dict(DATA, problems=[]), project="p")
+
+    assert stats["deleted"] == 2  # samo dva nestala problema
+    assert new_id in [r[0] for r in _entities(librarian, path)]
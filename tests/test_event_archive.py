@@ -0,0 +1,207 @@
+import gzip
+import json
+import os
+import threading
+
+from src.modules.librarian import Librarian
+from src.utils.archive_writer import ArchiveWriter, close_all_writers
+from src.utils.event_archive import (
+    archive_stats, compact_archive, count_events, iter_events, load_index, migrate_archive,
+    recover_pending, segment_dir,
+)
+
+
+def _event(i, source=None):
+    record = {"timestamp": f"2025-01-01T00:{i // 60:02d}:{i % 60:02d}", "event": "entity_saved",
+              "data": {"n": i, "pad": "x" * 300}}
+    if source:
+        record["event"] = "file_processed"
+        record["data"] = {"n": i, "metadata": {"source": source}, "chunks": []}
+    return record
+
+
+def _write(path, records, **kwargs):
+    writer = ArchiveWriter(str(path), fsync_interval=0, **kwargs)
+    for record in records:
+        writer.append(json.dumps(record))
+        writer.flush()  # svaki događaj u svom batchu -> sealing po veličini je deterministički
+    stats = writer.stats()
+    writer.close()
+    return stats
+
+
+def test_writer_seals_segments_with_index(tmp_path):
+    path = tmp_path / "archive.jsonl"
+    records = [_event(i, source=f"f{i % 3}.md" if i % 5 == 0 else None) for i in range(200)]
+    stats = _write(path, records, segment_bytes=16 * 1024)
+
+    index = load_index(str(path))
+    assert stats["seals"] == len(index["segments"]) > 3
+    offset_events = offset_bytes = 0
+    for segment in index["segments"]:
+        assert segment["offset_events"] == offset_events
+        assert segment["offset_bytes"] == offset_bytes
+        with gzip.open(os.path.join(segment_dir(str(path)), segment["name"]), "rb") as f:
+            assert sum(1 for _ in f) == segment["events"]
+        offset_events += segment["events"]
+        offset_bytes += segment["raw_bytes"]
+
+    assert list(iter_events(str(path))) == records
+    assert count_events(str(path)) == 200
+
+    # Pokazivač na zadnji file_processed po datoteci (u zatvorenim segmentima)
+    latest = index["latest"]["f0.md"]
+    sealed = sum(s["events"] for s in index["segments"])
+    last_f0 = max(i for i in range(sealed) if i % 15 == 0)
+    assert latest["timestamp"] == records[last_f0]["timestamp"]
+    segment = next(s for s in index["segments"] if s["name"] == latest["segment"])
+    with gzip.open(os.path.join(segment_dir(str(path)), segment["name"]), "rb") as f:
+        pointed = json.loads(f.readlines()[latest["event"]])
+    assert pointed["data"]["metadata"]["source"] == "f0.md"
+
+
+def test_since_skips_old_segments(tmp_path):
+    path = tmp_path / "archive.jsonl"
+    records = [_event(i) for i in range(200)]
+    _write(path, records, segment_bytes=16 * 1024)
+
+    since = records[150]["timestamp"]
+    assert list(iter_events(str(path), since=since)) == records[150:]
+    # Gornja granica: cijeli segment koji sadrži T, ali bez starijih segmenata
+    assert 50 <= count_events(str(path), since=since) < 200
+
+
+def test_migrate_legacy_archive(tmp_path):
+    path = tmp_path / "archive.jsonl"
+    legacy = [{"content": f"chunk {i}", "metadata": {"source": "old.md"}} for i in range(30)]
+    events = [_event(i, source="new.md") for i in range(10)]
+    with open(path, "w", encoding="utf-8") as f:
+        for record in legacy + events:
+            f.write(json.dumps(record) + "\n")
+
+    created = migrate_archive(str(path), segment_bytes=1024)
+    assert len(created) > 1
+    assert not path.exists()
+    assert list(iter_events(str(path))) == legacy + events
+    assert load_index(str(path))["latest"]["new.md"]["timestamp"] == events[-1]["timestamp"]
+
+    # Ponovna migracija prazne aktivne arhive ne radi ništa
+    assert migrate_archive(str(path)) == []
+    assert archive_stats(str(path))["sealed_events"] == 40
+
+
+def test_recover_interrupted_seal(tmp_path):
+    path = tmp_path / "archive.jsonl"
+    records = [_event(i) for i in range(20)]
+    directory = segment_dir(str(path))
+    os.makedirs(directory)
+    # Pad između preimenovanja aktivnog segmenta i kompresije
+    with open(os.path.join(directory, "pending-000001.jsonl"), "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+    assert recover_pending(str(path))
+    assert not [p for p in os.listdir(directory) if p.startswith("pending-")]
+    assert list(iter_events(str(path))) == records
+
+
+def test_wipe_removes_segments(tmp_path):
+    lib = Librarian(str(tmp_path))
+    for i in range(5):
+        lib.log_event("entity_saved", {"id": i})
+    close_all_writers(str(tmp_path))
+    migrate_archive(lib.archive_path)
+    assert count_events(lib.archive_path) == 5
+
+    lib.wipe_all()
+    assert not os.path.exists(segment_dir(lib.archive_path))
+    assert count_events(lib.archive_path) == 0
+
+
+def _history(edits, files, legacy=False):
+    """
+    Svaka datoteka re-ingestirana `edits` puta, s ratifikacijom odluke iz
+    doc0.md nakon svakog kruga (`legacy`: stari format, samo ID).
+    """
+    records, i = [], 0
+    for edit in range(edits):
+        for f in range(files):
+            records.append({"timestamp": f"2025-02-01T{i // 3600:02d}:{i // 60 % 60:02d}:{i % 60:02d}",
+                            "event": "file_processed",
+                            "data": {"metadata": {"source": f"doc{f}.md"}, "chunks": [f"v{edit}"] * 5}})
+            i += 1
+        data = {"decision_id": edit, "updates": {}}
+        if not legacy:
+            data["decision_ref"] = {"file_path": "doc0.md", "project": None, "type": "decision", "key": "k", "n": 0}
+        records.append({"timestamp": f"2025-02-01T{i // 3600:02d}:{i // 60 % 60:02d}:{i % 60:02d}",
+                        "event": "decision_ratified", "data": data})
+        i += 1
+    return records
+
+
+def test_compact_keeps_latest_file_processed(tmp_path):
+    path = tmp_path / "archive.jsonl"
+    records = _history(edits=20, files=4)
+    _write(path, records, segment_bytes=4 * 1024)
+    before = list(iter_events(str(path)))
+
+    stats = compact_archive(str(path), segment_bytes=4 * 1024, dry_run=True)
+    assert list(iter_events(str(path))) == before  # dry run ne mijenja ništa
+
+    stats = compact_archive(str(path), segment_bytes=4 * 1024)
+    after = list(iter_events(str(path)))
+    # doc0.md ostaje prije svake ratifikacije koja ga referencira
+    expected = [r for r in records if r["event"] != "file_processed" or r["data"]["chunks"][0] == "v19"
+                or r["data"]["metadata"]["source"] == "doc0.md"]
+    assert after == expected
+    assert stats["file_processed_before"] == 80 and stats["file_processed_after"] == 23
+    assert stats["chunks_after"] == 115
+    assert stats["raw_bytes_after"] < stats["raw_bytes_before"]
+
+    index = load_index(str(path))
+    assert count_events(str(path)) == len(expected)
+    assert {s["name"] for s in index["segments"]} == set(
+        n for n in os.listdir(segment_dir(str(path))) if n.endswith(".jsonl.gz")
+    )
+    latest = index["latest"]["doc3.md"]
+    segment = next(s for s in index["segments"] if s["name"] == latest["segment"])
+    with gzip.open(os.path.join(segment_dir(str(path)), segment["name"]), "rb") as f:
+        assert json.loads(f.readlines()[latest["event"]])["data"]["chunks"][0] == "v19"
+
+    # Ponovljena kompakcija ne mijenja sadržaj
+    compact_archive(str(path), segment_bytes=4 * 1024)
+    assert list(iter_events(str(path))) == expected
+
+
+def test_compact_keeps_everything_before_legacy_decision(tmp_path):
+    path = tmp_path / "archive.jsonl"
+    records = _history(edits=5, files=3, legacy=True)
+    records += [r for r in _history(edits=3, files=3) if r["event"] == "file_processed"]
+    _write(path, records, segment_bytes=4 * 1024)
+    stats = compact_archive(str(path), segment_bytes=4 * 1024)
+    # Stari decision_ratified nosi samo ID: sve prije zadnjeg ostaje (ID-evi u rebuildu)
+    assert list(iter_events(str(path)))[:20] == records[:20]
+    assert stats["file_processed_after"] == 15 + 3
+
+
+def test_compact_while_writer_appends(tmp_path):
+    path = tmp_path / "archive.jsonl"
+    records = _history(edits=10, files=3)
+    _write(path, records, segment_bytes=2 * 1024)
+
+    writer = ArchiveWriter(str(path), fsync_interval=0, segment_bytes=2 * 1024)
+
+    def produce():
+        for i in range(300):
+            writer.append(json.dumps({"timestamp": f"2025-03-01T00:{i // 60:02d}:{i % 60:02d}",
+                                      "event": "entity_saved", "data": {"n": i}}))
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    compact_archive(str(path), segment_bytes=2 * 1024)
+    producer.join()
+    writer.close()
+
+    saved = [r["data"]["n"] for r in iter_events(str(path)) if r["event"] == "entity_saved"]
+    assert saved == list(range(300))
+    assert sum(1 for r in iter_events(str(path)) if r["event"] == "file_processed") == 10 + 2
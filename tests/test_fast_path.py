@@ -0,0 +1,184 @@
+import os
+import threading
+
+import pytest
+
+from src.modules.fast_path import CompactIndex, FastPath, KeyTable
+from src.modules.librarian import Librarian
+
+
+@pytest.fixture
+def lib(tmp_path):
+    lib = Librarian(str(tmp_path))
+    conn = lib._get_sqlite_conn()
+    with conn:
+        conn.executemany(
+            "INSERT INTO entities (project, type, content) VALUES (?, 'decision', ?)",
+            [("kronos", f"Odluka T{i:03d}: koristimo replikaciju") for i in range(50)]
+            + [("kronos", "kontakt ana@example.com")],
+        )
+        conn.execute("INSERT INTO files (path, project) VALUES ('docs/a.md', 'kronos')")
+    conn.close()
+    return lib
+
+
+@pytest.mark.parametrize("rust", [False, True])
+def test_warmup_and_search(lib, rust):
+    fp = FastPath(lib)
+    if rust and fp.rust_engine is None:
+        pytest.skip("kronos_core nije izgrađen")
+    if not rust:
+        fp._rust_cls = None
+        fp._index = (fp._index[0], None)
+    assert fp.search("odluka t007: koristimo replikaciju") is None
+    fp.warmup()
+    assert fp.is_warmed_up
+    assert fp.search("Odluka T007: koristimo replikaciju")["type"] == "ExactMatch"
+    assert fp.search("kontakt ana@example.com")["confidence"] == 1.0
+    assert fp.search("kronos")["type"] == "ExactMatch"  # ime projekta
+    assert fp.search("odlu")["type"] == "PrefixMatch"
+    assert fp.search("nepostojeći pojam") is None
+    stats = fp.stats()
+    assert stats["keys"] > 51 and 0 < stats["bytes_per_key"] < 1000
+
+
+def test_key_table_exact_and_prefix():
+    table = KeyTable.build([("čvor", [4]), ("baza", [1, 2]), ("bazen", [2, 3]), ("bazalt", [5]), ("bb", [6])])
+    assert len(table) == 5
+    assert list(table.get("baza")) == [1, 2] and not table.get("baz") and not table.get("zzz")
+    assert table.prefix("baz", 10) == [1, 2, 5, 3]  # ključevi po redu, bez duplikata
+    assert table.prefix("baz", 2) == [1, 2]
+    assert table.prefix("č", 10) == [4] and table.prefix("x", 10) == []
+    assert KeyTable().prefix("a", 5) == [] and not KeyTable().get("a")
+
+
+def test_compact_index_stores_docs_once():
+    docs = [("Odluka A", "a.md", "p", "decision"), ("Projekt: p", None, "p", "PROJECT_METADATA")]
+    index = CompactIndex.build(docs, {"odluka a": 0, "p": 1}, {"odluka": [0], "p": [1]})
+    assert index.get("odluka a") == {"content": "Odluka A", "score": 1.0,
+                                     "metadata": {"source": "a.md", "project": "p", "type": "decision"}}
+    assert index.get("p")["metadata"] == {"project": "p", "type": "PROJECT_METADATA"}
+    assert [d["content"] for d in index.search_prefix("odl")] == ["Odluka A"]
+    assert index.stats()["docs"] == 2
+
+
+def test_snapshot_roundtrip_is_mmapped(tmp_path):
+    docs = [("Odluka Ž", "a.md", "p", "decision"), ("Projekt: p", None, "p", "PROJECT_METADATA")]
+    index = CompactIndex.build(docs, {"odluka ž": 0, "p": 1}, {"odluka": [0], "p": [1], "ž": [0]})
+    path = str(tmp_path / "cache" / "fastpath.idx")
+    index.save(path, {"generation": 7})
+    loaded, header = CompactIndex.load(path)
+    assert header["generation"] == 7
+    assert loaded.get("odluka ž") == index.get("odluka ž") and loaded.get("p") == index.get("p")
+    assert loaded.search_prefix("odl") == index.search_prefix("odl") and loaded.search_prefix("ž")
+    assert loaded.stats()["keys"] == index.stats()["keys"]
+    loaded.save(path + ".2", {"generation": 8})  # snapshot iz snapshota
+    assert CompactIndex.load(path + ".2")[0].get("p") == index.get("p")
+
+
+def test_corrupt_snapshot_is_rejected(tmp_path):
+    path = tmp_path / "fastpath.idx"
+    CompactIndex.build([("a", None, "p", "x")], {"aaa": 0}, {}).save(str(path), {"generation": 1})
+    data = path.read_bytes()
+    path.write_bytes(data[:len(data) - 4])
+    with pytest.raises(ValueError):
+        CompactIndex.load(str(path))
+    path.write_bytes(b"NIJE" + data[4:])
+    with pytest.raises(ValueError):
+        CompactIndex.load(str(path))
+
+
+def wait_rebuild(fp):
+    with fp._rebuilding:
+        pass
+
+
+def test_start_uses_snapshot_and_rebuilds_only_when_stale(lib):
+    fp = FastPath(lib)
+    fp.warmup()
+    assert os.path.exists(fp.snapshot_path)
+
+    warm = FastPath(lib)
+    warm.warmup = lambda: pytest.fail("snapshot je aktualan, warmup ne treba")
+    warm.start()
+    assert warm.source == "snapshot" and warm.status()["ready"] and not warm.status()["stale"]
+    assert warm.search("Odluka T007: koristimo replikaciju")["type"] == "ExactMatch"
+    assert not warm.refresh(lib.get_generation())
+
+    conn = lib._get_sqlite_conn()
+    with conn:
+        conn.execute("INSERT INTO entities (project, type, content) VALUES ('kronos', 'decision', 'Nova odluka X')")
+        lib._bump_generation(conn.cursor())
+    conn.close()
+    stale = FastPath(lib)
+    stale.start()  # do kraja warmupa poslužuje stari snapshot
+    wait_rebuild(stale)
+    assert stale.source == "warmup" and stale.generation == lib.get_generation()
+    assert stale.search("nova odluka x")["type"] == "ExactMatch"
+    assert CompactIndex.load(stale.snapshot_path)[1]["generation"] == lib.get_generation()
+
+
+class RecordingEngine:
+    """Zamjena za kronos_core.FastPath koja bilježi insert_many."""
+
+    def __init__(self):
+        self.items = []
+
+    def insert_many(self, items):
+        self.items = items
+        return len(items)
+
+
+def test_warm_start_fills_rust_engine_from_snapshot(lib):
+    fp = FastPath(lib)
+    fp._rust_cls = RecordingEngine
+    fp.warmup()
+    expected = fp.rust_engine.items
+    assert ("kronos", "Projekt: kronos") in expected and ("ana@example.com", "kontakt ana@example.com") in expected
+
+    warm = FastPath(lib)
+    warm._rust_cls = RecordingEngine
+    warm.warmup = lambda: pytest.fail("snapshot je aktualan, warmup ne treba")
+    warm.start()
+    wait_rebuild(warm)
+    assert warm.source == "snapshot" and warm.status()["engine"] == "rust"
+    assert warm.rust_engine.items == expected  # isti ključevi kao nakon warmupa
+
+
+def test_searches_never_see_empty_index_during_rewarm(lib):
+    fp = FastPath(lib)
+    fp.warmup()
+    misses = []
+    stop = threading.Event()
+
+    def searcher():
+        while not stop.is_set():
+            if fp.search("odluka t001: koristimo replikaciju") is None:
+                misses.append(1)
+
+    threads = [threading.Thread(target=searcher) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for _ in range(5):
+        fp.warmup()
+    stop.set()
+    for t in threads:
+        t.join()
+    assert not misses
+
+
+def test_rust_insert_many_matches_insert():
+    kronos_core = pytest.importorskip("src.modules.kronos_core")
+    items = [(f"ključ {i}", f"Sadržaj {i}") for i in range(100)] + [("ana@example.com", "Ana")]
+    one, many = kronos_core.FastPath(), kronos_core.FastPath()
+    with pytest.deprecated_call():
+        for key, content in items:
+            one.insert(key, content)
+    assert many.insert_many(items) == len(items)
+    assert len(one) == len(many) == len(items)
+    for query in ["ključ 7", "klj", "ana@example.com", "nema"]:
+        assert one.search(query) == many.search(query)
+    stats = many.stats()
+    assert stats["contents"] == len(items) and stats["bytes"] > 0
+    many.clear()
+    assert len(many) == 0
@@ -0,0 +1,101 @@
+import os
+import sqlite3
+
+import pytest
+
+from src.modules.ingestor import Ingestor, file_sha256
+from src.utils import metadata_helper
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    monkeypatch.setenv("KRONOS_EMBEDDER", "local")
+    monkeypatch.setattr(metadata_helper, "ALLOWED_ROOTS", metadata_helper.ALLOWED_ROOTS + [str(tmp_path)])
+    root = tmp_path / "repo"
+    root.mkdir()
+    for i in range(3):
+        (root / f"doc_{i}.md").write_text(f"# Dokument {i}\nSadržaj dokumenta {i}.\n", encoding="utf-8")
+    return root
+
+
+@pytest.fixture
+def ingestor(tmp_path, repo):
+    # repo postavlja KRONOS_EMBEDDER=local prije nego Oracle odabere embedder
+    data = tmp_path / "data"
+    data.mkdir()
+    ing = Ingestor(db_path=str(data))
+    ing.oracle.librarian = ing.librarian
+    return ing
+
+
+def _run(ingestor, repo):
+    return ingestor.run(str(repo), project_name="inc", recursive=True, silent=True, incremental=True)
+
+
+def test_first_run_processes_and_stores_hash(ingestor, repo):
+    stats = _run(ingestor, repo)
+    assert stats["processed"] == 3
+    assert stats["skipped"] == 0
+
+    path = str(repo / "doc_0.md")
+    conn = sqlite3.connect(ingestor.librarian.meta_path)
+    stored = conn.execute("SELECT hash FROM files WHERE path = ?", (path,)).fetchone()[0]
+    conn.close()
+    assert stored == file_sha256(path)
+
+
+def test_unchanged_files_are_skipped(ingestor, repo):
+    _run(ingestor, repo)
+    stats = _run(ingestor, repo)
+    assert stats["processed"] == 0
+    assert stats["skipped"] == 3
+    assert stats["files_per_s"] > 0
+
+
+def test_touched_but_identical_file_costs_only_hash(ingestor, repo, monkeypatch):
+    _run(ingestor, repo)
+    path = str(repo / "doc_1.md")
+    st = os.stat(path)
+    os.utime(path, (st.st_atime + 100, st.st_mtime + 100))
+
+    calls = []
+    original = ingestor._process_file
+    monkeypatch.setattr(ingestor, "_process_file", lambda *a, **k: calls.append(a[0]) or original(*a, **k))
+
+    stats = _run(ingestor, repo)
+    assert stats["skipped"] == 3
+    assert calls == []
+    # mtime je osvježen, pa sljedeći prolaz ne mora ni hashirati
+    assert ingestor.librarian.get_file_states([path])[path][0] == os.stat(path).st_mtime
+
+
+def test_changed_file_is_reprocessed(ingestor, repo):
+    _run(ingestor, repo)
+    (repo / "doc_2.md").write_text("# Dokument 2\nNovi sadržaj.\n", encoding="utf-8")
+    st = os.stat(repo / "doc_2.md")
+    os.utime(repo / "doc_2.md", (st.st_atime + 5, st.st_mtime + 5))
+
+    stats = _run(ingestor, repo)
+    assert stats["processed"] == 1
+    assert stats["skipped"] == 2
+
+
+def test_full_mode_reprocesses_everything(ingestor, repo):
+    _run(ingestor, repo)
+    stats = ingestor.run(str(repo), project_name="inc", recursive=True, silent=True)
+    assert stats["processed"] == 3
+    assert stats["skipped"] == 0
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_empty_file_is_marked_processed_and_skipped(ingestor, repo, jobs):
+    (repo / "prazan.md").write_text("  \n", encoding="utf-8")
+    path = str(repo / "prazan.md")
+
+    first = ingestor.run(str(repo), project_name="inc", recursive=True, silent=True, incremental=True, jobs=jobs)
+    assert first["processed"] == 4 and first["failed"] == 0
+    assert ingestor.librarian.get_file_states([path])[path][1] == file_sha256(path)
+
+    second = _run(ingestor, repo)
+    assert second["processed"] == 0
+    assert second["skipped"] == 4
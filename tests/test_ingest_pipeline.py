@@ -0,0 +1,85 @@
+import sqlite3
+import threading
+
+import pytest
+
+from src.modules.ingestor import Ingestor
+from src.modules.ingest_pipeline import chunk_content, prepare_file
+from src.utils import metadata_helper
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    monkeypatch.setenv("KRONOS_EMBEDDER", "local")
+    monkeypatch.setattr(metadata_helper, "ALLOWED_ROOTS", metadata_helper.ALLOWED_ROOTS + [str(tmp_path)])
+    root = tmp_path / "repo"
+    root.mkdir()
+    for i in range(12):
+        body = "".join(f"Linija {n} dokumenta {i} o indeksiranju i pretrazi.\n" for n in range(60))
+        (root / f"doc_{i}.md").write_text(f"# Dokument {i}\n**Odluka:** koristimo SQLite {i}\n{body}", encoding="utf-8")
+    (root / "prazan.md").write_text("   \n", encoding="utf-8")
+    return root
+
+
+def _ingestor(tmp_path, name):
+    data = tmp_path / name
+    data.mkdir()
+    ing = Ingestor(db_path=str(data))
+    ing.oracle.librarian = ing.librarian
+    return ing
+
+
+def _fts_rows(ingestor):
+    conn = sqlite3.connect(ingestor.librarian.meta_path)
+    rows = conn.execute(
+        "SELECT path, content, stemmed_content, start_line, end_line FROM knowledge_fts ORDER BY path, start_line"
+    ).fetchall()
+    conn.close()
+    return rows
+
+
+def test_prepare_file_matches_serial_chunking(repo):
+    path = str(repo / "doc_0.md")
+    prepared = prepare_file(path, "p", chunk_size=500)
+    with open(path, encoding="utf-8") as f:
+        assert prepared["chunks"] == chunk_content(f.read(), 500)
+    assert len(prepared["stemmed"]) == len(prepared["chunks"])
+    assert prepared["extracted"]["decisions"]
+    empty = prepare_file(str(repo / "prazan.md"), "p")
+    assert empty["chunks"] == [] and empty["content_hash"]
+
+
+def test_parallel_ingest_matches_serial(tmp_path, repo):
+    serial = _ingestor(tmp_path, "serial")
+    parallel = _ingestor(tmp_path, "parallel")
+
+    s_stats = serial.run(str(repo), project_name="p", recursive=True, silent=True)
+    p_stats = parallel.run(str(repo), project_name="p", recursive=True, silent=True, jobs=2)
+
+    assert s_stats["processed"] == p_stats["processed"] == 13
+    assert p_stats["failed"] == 0
+    assert _fts_rows(serial) == _fts_rows(parallel)
+    assert serial.oracle.collection.count() == parallel.oracle.collection.count()
+
+
+def test_single_writer_thread_and_batched_writes(tmp_path, repo, monkeypatch):
+    ingestor = _ingestor(tmp_path, "data")
+    writers = []
+    original = ingestor._write_batch
+
+    def tracked(batch, *args, **kwargs):
+        writers.append((threading.current_thread().name, len(batch)))
+        return original(batch, *args, **kwargs)
+
+    monkeypatch.setattr(ingestor, "_write_batch", tracked)
+    monkeypatch.setenv("KRONOS_INGEST_BATCH_CHUNKS", "20")
+    progress = []
+
+    files = ingestor._scan_files(str(repo), recursive=True)
+    ingestor.run_batch(files, project_name="p", silent=True, jobs=3,
+                       on_progress=lambda done, total: progress.append((done, total)))
+
+    assert {name for name, _ in writers} == {"KronosIngestWriter"}
+    assert sum(n for _, n in writers) == 13  # i prazna datoteka, da dobije hash
+    assert len(writers) < 12  # više datoteka po transakciji
+    assert progress[-1][0] == progress[-1][1] == 13
@@ -30,3 +30,26 @@ def test_fts_query_logic():
         assert isinstance(results, list)
     except Exception as e:
         pytest.fail(f"search_fts crashed with exception: {e}")
+
+def test_replace_file_chunks_replaces_rows_in_one_call(tmp_path):
+    """replace_file_chunks briše stare i upisuje nove chunkove datoteke."""
+    lib = Librarian(str(tmp_path))
+    chunks = [
+        {"content": "Prvi dio o indeksiranju", "start_line": 1, "end_line": 3},
+        {"content": "Drugi dio o pretrazi", "start_line": 4, "end_line": 9},
+    ]
+    assert lib.replace_file_chunks("docs/a.md", "kronos", chunks) == 2
+    lib.replace_file_chunks("docs/b.md", "kronos", ["Druga datoteka"])
+    lib.replace_file_chunks("docs/a.md", "kronos", chunks[1:])
+
+    conn = lib._get_sqlite_conn()
+    rows = conn.execute(
+        "SELECT path, content, start_line, end_line FROM knowledge_fts ORDER BY path"
+    ).fetchall()
+    conn.close()
+    assert rows == [
+        ("docs/a.md", "Drugi dio o pretrazi", 4, 9),
+        ("docs/b.md", "Druga datoteka", 1, 1),
+    ]
+    from src.utils.stemmer import stem_text
+    assert lib.search_fts(stem_text("pretrazi"), project="kronos")
@@ -0,0 +1,157 @@
+import time
+import threading
+import concurrent.futures
+
+import pytest
+
+from src.modules.oracle import Oracle
+from src.modules.librarian import Librarian
+from src.utils.rwlock import ReadWriteLock
+
+
+class SlowCollection:
+    """Zamjena za Chroma kolekciju koja simulira mrežnu latenciju embeddinga."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.upserts = 0
+
+    def query(self, query_texts, n_results=5, where=None):
+        time.sleep(self.delay)
+        q = query_texts[0]
+        return {
+            "ids": [[f"{q}_0", f"{q}_1"]],
+            "documents": [["# Kronos\nSemantička memorija", "# Budgeter\nContext budget"]],
+            "metadatas": [[
+                {"source": "docs/a.md", "start_line": 1, "end_line": 2},
+                {"source": "docs/b.md", "start_line": 1, "end_line": 2},
+            ]],
+            "distances": [[0.05, 0.1]],
+        }
+
+    def upsert(self, documents, metadatas, ids):
+        time.sleep(self.delay)
+        self.upserts += 1
+
+
+@pytest.fixture
+def oracle(tmp_path):
+    o = Oracle(db_path=str(tmp_path / "store"))
+    o.librarian = Librarian(str(tmp_path))
+    o.fast_path = None
+    o.hypothesizer = None
+    o.collection = SlowCollection()
+    return o
+
+
+def _throughput(oracle, threads, total=32):
+    # Jedinstveni upiti po rundi, da QueryCache ne preskoči pipeline
+    queries = [f"Što je Kronos {threads}-{i}?" for i in range(total)]
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(lambda q: oracle.ask(q, silent=True, hyde=False), queries))
+    duration = time.perf_counter() - start
+    assert all(r.get("status") != "error" for r in results)
+    return total / duration
+
+
+def test_parallel_ask_scales_with_threads(oracle):
+    """32 paralelna ask poziva: throughput mora rasti s brojem threadova."""
+    rates = {n: _throughput(oracle, n) for n in (1, 4, 8)}
+    for n, rate in rates.items():
+        print(f"threads={n:2d} -> {rate:.1f} q/s")
+
+    assert rates[4] > rates[1] * 2.5
+    assert rates[8] > rates[4] * 1.5
+
+
+def test_upsert_waits_for_readers_and_blocks_new_ones(oracle):
+    """safe_upsert je ekskluzivan: ne preklapa se ni s jednim ask pozivom."""
+    active = {"readers": 0, "overlap": False}
+    guard = threading.Lock()
+    original_query = oracle.collection.query
+    original_upsert = oracle.collection.upsert
+
+    def tracked_query(*args, **kwargs):
+        with guard:
+            active["readers"] += 1
+        try:
+            return original_query(*args, **kwargs)
+        finally:
+            with guard:
+                active["readers"] -= 1
+
+    def tracked_upsert(*args, **kwargs):
+        with guard:
+            if active["readers"]:
+                active["overlap"] = True
+        return original_upsert(*args, **kwargs)
+
+    oracle.collection.query = tracked_query
+    oracle.collection.upsert = tracked_upsert
+
+    meta = {"source": "docs/a.md", "start_line": 1, "end_line": 1}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [executor.submit(oracle.ask, f"upit {i}", silent=True, hyde=False) for i in range(16)]
+        futures += [executor.submit(oracle.safe_upsert, ["doc"], [meta], [f"id{i}"]) for i in range(4)]
+        for f in futures:
+            f.result()
+
+    assert oracle.collection.upserts == 4
+    assert active["overlap"] is False
+
+
+class ExpandingHypothesizer:
+    """Vraća tri varijante upita, bez HyDE generiranja."""
+
+    def expand_query(self, query):
+        return [query, f"{query} arhitektura", f"{query} dizajn"]
+
+    def generate_hypothesis(self, query):
+        return query
+
+
+def test_fan_out_latency_is_slowest_backend_not_sum(oracle, monkeypatch):
+    """Vector, FTS (AND + OR) i sve varijante upita idu paralelno."""
+    oracle.collection = SlowCollection(delay=0.1)
+    oracle.hypothesizer = ExpandingHypothesizer()
+    original_fts = oracle.librarian.search_fts
+
+    def slow_fts(*args, **kwargs):
+        time.sleep(0.1)
+        return original_fts(*args, **kwargs)
+
+    monkeypatch.setattr(oracle.librarian, "search_fts", slow_fts)
+
+    start = time.perf_counter()
+    resp = oracle.ask("Objasni kako radi Kronos", silent=True, hyde=False, expand=True)
+    elapsed = time.perf_counter() - start
+
+    # Serijski: 3 varijante x (vector + FTS) + OR fallback = 0.7s
+    assert elapsed < 0.35
+    timings = resp["timings"]
+    for key in ("vector_ms", "fts_ms", "fts_or_ms", "retrieval_ms"):
+        assert key in timings
+    assert timings["retrieval_ms"] < timings["vector_ms"] + timings["fts_ms"] + timings["fts_or_ms"]
+
+
+def test_rwlock_nested_read_does_not_deadlock_with_waiting_writer():
+    lock = ReadWriteLock()
+    entered = threading.Event()
+    writer_done = threading.Event()
+
+    def writer():
+        with lock.write_lock():
+            writer_done.set()
+
+    with lock.read_lock():
+        t = threading.Thread(target=writer)
+        t.start()
+        time.sleep(0.05)  # pisač sada čeka
+        with lock.read_lock():
+            entered.set()
+        assert not writer_done.is_set()
+
+    t.join(timeout=2)
+    assert entered.is_set()
+    assert writer_done.is_set()
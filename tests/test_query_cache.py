@@ -0,0 +1,99 @@
+
+from src.modules.librarian import Librarian
+from src.utils.query_cache import QueryCache, normalize_query
+
+
+def test_normalize_query():
+    assert normalize_query("  Što je   Kronos? ") == "što je kronos?"
+    assert normalize_query("") == ""
+    assert normalize_query(None) == ""
+
+
+def test_key_includes_all_ask_parameters():
+    base = QueryCache.make_key("Što je Kronos?", project="kronos", limit=5, hyde=True, expand=False)
+    assert base == QueryCache.make_key("što je  kronos?", project="kronos", limit=5, hyde=True, expand=False)
+    assert base != QueryCache.make_key("Što je Kronos?", project=None, limit=5, hyde=True, expand=False)
+    assert base != QueryCache.make_key("Što je Kronos?", project="kronos", limit=10, hyde=True, expand=False)
+    assert base != QueryCache.make_key("Što je Kronos?", project="kronos", limit=5, hyde=False, expand=False)
+    assert base != QueryCache.make_key("Što je Kronos?", project="kronos", limit=5, hyde=True, expand=True)
+
+
+def test_hit_miss_and_copy_isolation():
+    cache = QueryCache()
+    key = QueryCache.make_key("q")
+    assert cache.get(key, 1) is None
+
+    cache.put(key, {"chunks": [{"content": "a"}], "status": "success"}, 1)
+    first = cache.get(key, 1)
+    first["chunks"].append({"content": "mutated"})
+
+    assert len(cache.get(key, 1)["chunks"]) == 1
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+
+
+def test_generation_change_invalidates_everything():
+    cache = QueryCache()
+    cache.put(QueryCache.make_key("a"), {"status": "success"}, 1)
+    cache.put(QueryCache.make_key("b"), {"status": "success"}, 1)
+
+    assert cache.get(QueryCache.make_key("a"), 2) is None
+    assert cache.get(QueryCache.make_key("b"), 2) is None
+    stats = cache.stats()
+    assert stats["entries"] == 0
+    assert stats["invalidations"] == 1
+
+
+def test_stale_generation_does_not_reset_newer_entries():
+    cache = QueryCache()
+    cache.put(QueryCache.make_key("a"), {"status": "nova"}, 2)
+
+    # Spor upit započet prije bumpa (generacija 1) završava nakon njega
+    cache.put(QueryCache.make_key("b"), {"status": "stara"}, 1)
+    assert cache.get(QueryCache.make_key("b"), 1) is None
+
+    assert cache.get(QueryCache.make_key("a"), 2) == {"status": "nova"}
+    assert cache.get(QueryCache.make_key("b"), 2) is None
+    stats = cache.stats()
+    assert stats["entries"] == 1 and stats["invalidations"] == 0 and stats["generation"] == 2
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = QueryCache(max_entries=2)
+    for q in ("a", "b", "c"):
+        cache.put(QueryCache.make_key(q), {"q": q}, 1)
+    assert cache.get(QueryCache.make_key("a"), 1) is None
+    assert cache.stats()["evictions"] == 1
+
+    payload = {"content": "x" * 400}
+    small = QueryCache(max_bytes=1000)
+    small.put(QueryCache.make_key("1"), payload, 1)
+    small.put(QueryCache.make_key("2"), payload, 1)
+    small.get(QueryCache.make_key("1"), 1)  # "1" postaje najsvježiji
+    small.put(QueryCache.make_key("3"), payload, 1)
+
+    assert small.get(QueryCache.make_key("2"), 1) is None
+    assert small.get(QueryCache.make_key("1"), 1) is not None
+    assert small.stats()["bytes"] <= 1000
+
+    # Unos veći od cijelog budžeta se ne sprema
+    small.put(QueryCache.make_key("huge"), {"content": "x" * 5000}, 1)
+    assert small.get(QueryCache.make_key("huge"), 1) is None
+
+
+def test_librarian_mutators_bump_generation(tmp_path):
+    lib = Librarian(str(tmp_path))
+    g0 = lib.get_generation()
+
+    lib.store_extracted_data("notes.md", {"decisions": [{"content": "Koristimo SQLite"}]}, project="p")
+    g1 = lib.get_generation()
+    assert g1 > g0
+
+    decision_id = lib.get_decisions(project="p")[0]["id"]
+    lib.ratify_decision(decision_id, valid_from="2026-01-01")
+    g2 = lib.get_generation()
+    assert g2 > g1
+
+    lib.supersede_decision(decision_id, "Koristimo PostgreSQL")
+    assert lib.get_generation() > g2
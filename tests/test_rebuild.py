@@ -0,0 +1,239 @@
+import json
+import os
+
+import pytest
+
+from src.modules.librarian import Librarian
+from src.rebuild_from_archive import checkpoint_path, load_checkpoint, rebuild
+from src.utils.archive_writer import close_all_writers
+from src.utils import metadata_helper
+from src.utils.event_archive import compact_archive, migrate_archive
+
+
+class Crash(BaseException):
+    """Simulirani pad procesa (ne hvata ga `except Exception`)."""
+
+
+class FakeOracle:
+    def __init__(self, crash_after=None):
+        self.crash_after = crash_after
+        self.calls = 0
+        self.vectors = {}
+        self.sources = {}
+
+    def _call(self):
+        self.calls += 1
+        if self.crash_after is not None and self.calls > self.crash_after:
+            raise Crash()
+
+    def _upsert(self, documents, metadatas, ids):
+        assert len(set(ids)) == len(ids)  # Chroma odbija duplikate u istom upsertu
+        self.vectors.update(zip(ids, documents))
+        for uid, meta in zip(ids, metadatas):
+            self.sources[uid] = (meta.get("project", "default"), meta["source"])
+
+    def safe_upsert(self, documents, metadatas, ids):
+        self._call()
+        self._upsert(documents, metadatas, ids)
+
+    def sync_chunks_many(self, project, files):
+        """Kao Oracle.sync_chunks_many: vektori svake datoteke zamjenjuju prethodne."""
+        self._call()
+        paths = {(project, source) for source, _, _, _ in files}
+        for uid in [uid for uid, key in self.sources.items() if key in paths]:
+            del self.vectors[uid], self.sources[uid]
+        for _, docs, metas, ids in files:
+            self._upsert(docs, metas, ids)
+
+
+class FakeCollection:
+    def __init__(self):
+        self.upserts = 0
+        self.vectors = {}
+
+    def upsert(self, ids, documents, metadatas):
+        self.upserts += 1
+        self.vectors.update(zip(ids, documents))
+
+    def delete(self, ids=None, where=None):
+        for uid in ids or []:
+            self.vectors.pop(uid, None)
+
+
+@pytest.fixture
+def empty_lib(tmp_path, monkeypatch):
+    monkeypatch.setattr(metadata_helper, "ALLOWED_ROOTS", metadata_helper.ALLOWED_ROOTS + [str(tmp_path)])
+    collection = FakeCollection()
+    monkeypatch.setattr(Librarian, "_get_collection", lambda self: self._collection or collection)
+    lib = Librarian(str(tmp_path))
+    lib.fake_collection = collection
+    return lib
+
+
+@pytest.fixture
+def lib(empty_lib, tmp_path):
+    lib = empty_lib
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    for f in range(6):
+        (docs / f"doc{f}.md").write_text("x")
+    for edit in range(4):
+        for f in range(6):
+            lib.log_event("file_processed", {
+                "chunks": [{"content": f"doc{f} verzija {edit} odlomak {c} odluke", "start_line": c + 1,
+                            "end_line": c + 1} for c in range(3)],
+                "metadata": {"source": str(docs / f"doc{f}.md"), "project": "p"},
+                "entities": {"decisions": [f"Odluka {f}"], "problems": [f"Problem {f}.{edit}"]},
+            })
+        if edit == 1:
+            lib.log_event("decision_ratified", {"decision_id": 2, "updates": {"valid_from": "2024-05-01"}})
+    for i in range(5):
+        lib.log_event("entity_saved", {"id": i})
+    close_all_writers(str(tmp_path))
+    with open(lib.archive_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"content": "stari chunk", "metadata": {"source": str(docs / "doc0.md")}}) + "\n")
+    migrate_archive(lib.archive_path, segment_bytes=4 * 1024)
+    return lib
+
+
+def _state(lib):
+    conn = lib._get_sqlite_conn()
+    try:
+        return {
+            "fts": sorted(conn.execute(
+                "SELECT path, content, stemmed_content, start_line FROM knowledge_fts").fetchall()),
+            "entities": sorted(conn.execute(
+                "SELECT id, file_path, type, content, valid_from FROM entities").fetchall()),
+            "files": sorted(r[0] for r in conn.execute("SELECT path FROM files")),
+        }
+    finally:
+        conn.close()
+
+
+def test_rebuild_replays_latest_state(lib):
+    oracle = FakeOracle()
+    stats = rebuild(jobs=1, batch_chunks=10, lib=lib, oracle=oracle)
+    state = _state(lib)
+
+    contents = {row[1] for row in state["fts"]}
+    assert {f"doc{f} verzija 3 odlomak 0 odluke" for f in range(6)} <= contents
+    assert not any("verzija 2" in c for c in contents)
+    assert "stari chunk" in contents
+    assert len(state["files"]) == 6
+    decisions = [e for e in state["entities"] if e[2] == "decision"]
+    assert len(decisions) == 6
+    assert [d[4] for d in decisions if d[3] == "Odluka 0"] == ["2024-05-01"]  # ID 2 nakon "Problem 0.0"
+    assert len([e for e in state["entities"] if e[2] == "problem"]) == 6
+
+    assert stats["batches"] < stats["files"] == 24
+    assert not os.path.exists(checkpoint_path(lib))
+    # Vektori entiteta idu jednim upsertom po batchu, ne po datoteci
+    assert lib.fake_collection.upserts <= stats["batches"]
+    assert len(lib.fake_collection.vectors) == 12
+
+
+def test_resume_after_crash_matches_clean_rebuild(lib):
+    rebuild(jobs=1, batch_chunks=10, lib=lib, oracle=FakeOracle())
+    expected = _state(lib)
+
+    with pytest.raises(Crash):
+        rebuild(jobs=1, batch_chunks=10, lib=lib, oracle=FakeOracle(crash_after=3))
+    checkpoint = load_checkpoint(lib)
+    assert 0 < checkpoint["position"] < 30
+
+    stats = rebuild(resume=True, jobs=1, batch_chunks=10, lib=lib, oracle=FakeOracle())
+    assert stats["events"] < 30
+    assert _state(lib) == expected
+    assert rebuild(resume=True, lib=lib, oracle=FakeOracle()) is None  # checkpoint je potrošen
+
+
+def test_resume_refused_after_compaction(lib):
+    with pytest.raises(Crash):
+        rebuild(jobs=1, batch_chunks=10, lib=lib, oracle=FakeOracle(crash_after=3))
+    compact_archive(lib.archive_path, segment_bytes=4 * 1024)
+    assert rebuild(resume=True, jobs=1, lib=lib, oracle=FakeOracle()) is None
+
+
+def test_parallel_decode_matches_serial(lib):
+    rebuild(jobs=1, lib=lib, oracle=FakeOracle())
+    serial = _state(lib)
+    rebuild(jobs=2, lib=lib, oracle=FakeOracle())
+    assert _state(lib) == serial
+
+
+def _decisions(lib):
+    conn = lib._get_sqlite_conn()
+    try:
+        return sorted(conn.execute(
+            "SELECT e.content, e.valid_from, s.content FROM entities e"
+            " LEFT JOIN entities s ON s.id = e.superseded_by_id WHERE e.type = 'decision'").fetchall())
+    finally:
+        conn.close()
+
+
+def test_compacted_archive_rebuilds_same_decisions(empty_lib, tmp_path):
+    lib = empty_lib
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    for name in ("a.md", "b.md"):
+        (docs / name).write_text("x")
+
+    def ingest(name, decisions):
+        lib.log_event("file_processed", {"chunks": [f"{name} {len(decisions)}"],
+                                         "metadata": {"source": str(docs / name), "project": "p"},
+                                         "entities": {"decisions": decisions}})
+
+    ingest("a.md", ["Odluka X"])
+    ingest("b.md", ["Odluka Y"])
+    ingest("a.md", ["Odluka X", "Odluka Z"])
+    close_all_writers(str(tmp_path))
+    rebuild(jobs=1, lib=lib, oracle=FakeOracle())
+    ids = {content: eid for content, eid in lib._get_sqlite_conn().execute(
+        "SELECT content, id FROM entities WHERE type = 'decision'")}
+    assert ids["Odluka Y"] == 2  # a.md v1 je dobio ID 1, a v2 zadržava X i dodaje Z
+    lib.ratify_decision(ids["Odluka Y"], valid_from="2024-05-01", superseded_by_id=ids["Odluka Z"])
+    ingest("b.md", ["Odluka Y"])  # b.md zamijenjen nakon ratifikacije
+    close_all_writers(str(tmp_path))
+
+    rebuild(jobs=1, lib=lib, oracle=FakeOracle())
+    expected = _decisions(lib)
+    assert ("Odluka Y", "2024-05-01", "Odluka Z") in expected
+
+    stats = compact_archive(lib.archive_path)
+    assert stats["file_processed_after"] < stats["file_processed_before"]
+    rebuild(jobs=1, lib=lib, oracle=FakeOracle())
+    assert _decisions(lib) == expected
+
+
+def test_rebuild_keeps_only_latest_vectors_per_file(empty_lib, tmp_path):
+    lib = empty_lib
+    (tmp_path / "a.md").write_text("x")
+    meta = {"source": str(tmp_path / "a.md"), "project": "p"}
+    for version in ("verzija jedan", "verzija dva", "verzija tri"):
+        lib.log_event("file_processed", {"chunks": [version], "metadata": meta})
+    close_all_writers(str(tmp_path))
+
+    # Batch od jednog chunka: svaka verzija u svom batchu
+    oracle = FakeOracle()
+    rebuild(jobs=1, batch_chunks=1, lib=lib, oracle=oracle)
+    assert sorted(oracle.vectors.values()) == ["verzija tri"]
+    oracle = FakeOracle()
+    rebuild(jobs=1, batch_chunks=100, lib=lib, oracle=oracle)
+    assert sorted(oracle.vectors.values()) == ["verzija tri"]
+
+
+def test_rebuild_into_chroma_drops_old_file_versions(empty_lib, tmp_path, monkeypatch):
+    from src.modules.oracle import Oracle
+
+    monkeypatch.setenv("KRONOS_EMBEDDER", "local")
+    lib = empty_lib
+    (tmp_path / "a.md").write_text("x")
+    meta = {"source": str(tmp_path / "a.md"), "project": "p"}
+    for version in ("verzija jedan", "verzija dva"):
+        lib.log_event("file_processed", {"chunks": [{"content": version, "start_line": 1, "end_line": 1}],
+                                         "metadata": meta})
+    close_all_writers(str(tmp_path))
+
+    oracle = Oracle(db_path=str(tmp_path / "chroma"))
+    rebuild(jobs=1, batch_chunks=1, lib=lib, oracle=oracle)
+    assert oracle.collection.get(where={"source": meta["source"]})["documents"] == ["verzija dva"]
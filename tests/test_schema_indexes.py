@@ -0,0 +1,111 @@
+import re
+import sqlite3
+
+import pytest
+
+from src.modules.librarian import Librarian, SCHEMA_MIGRATIONS
+
+# Vrući upiti iz Librariana (isti oblik WHERE/GROUP BY kao u kodu)
+HOT_QUERIES = {
+    "store_extracted_data delete": ("DELETE FROM entities WHERE file_path = ?", ("docs/a.md",)),
+    "save_entity duplicate": (
+        "SELECT id FROM entities WHERE type = ? AND content = ? AND project = ?",
+        ("decision", "x", "kronos"),
+    ),
+    "get_active_decisions": (
+        "SELECT e.id, e.content, e.valid_from, e.valid_to, e.superseded_by, e.file_path, e.project "
+        "FROM decision_validity v CROSS JOIN entities e ON e.id = v.id "
+        "WHERE v.valid_from_day <= ? AND v.valid_to_day >= ? AND e.project = ?",
+        (20089, 20089, "kronos"),
+    ),
+    "get_active_decisions all projects": (
+        "SELECT e.id FROM decision_validity v CROSS JOIN entities e ON e.id = v.id "
+        "WHERE v.valid_from_day <= ? AND v.valid_to_day >= ?",
+        (20089, 20089),
+    ),
+    "get_decisions": (
+        "SELECT id FROM entities WHERE type = 'decision' "
+        "AND (superseded_by IS NULL OR superseded_by = '') AND project = ? ORDER BY created_at DESC",
+        ("kronos",),
+    ),
+    "is_file_processed": ("SELECT last_modified FROM files WHERE path = ?", ("docs/a.md",)),
+}
+
+# Statistike broje cijelu tablicu pa nema što tražiti; dovoljno je da čitaju samo indeks
+AGGREGATE_QUERIES = {
+    "get_project_stats files": ("SELECT project, count(*) FROM files GROUP BY project", ()),
+    "get_project_stats entities": ("SELECT project, type, count(*) FROM entities GROUP BY project, type", ()),
+    "get_stats entities": ("SELECT type, count(*) FROM entities GROUP BY type", ()),
+}
+
+# SEARCH po indeksu s ograničenjem; "SCAN ... USING COVERING INDEX" je i dalje pun prolaz
+INDEX_SEARCH = re.compile(r"^SEARCH \w+ USING (COVERING )?INDEX \w+ \(.+\)$")
+# R*Tree decision_validity: skeniranje virtualne tablice s ograničenjima (idxStr nije prazan)
+RTREE_SEARCH = re.compile(r"^SCAN v VIRTUAL TABLE INDEX \d+:\w+$")
+ROWID_SEARCH = re.compile(r"^SEARCH \w+ USING INTEGER PRIMARY KEY \(rowid=\?\)$")
+
+
+@pytest.fixture
+def lib(tmp_path):
+    lib = Librarian(str(tmp_path))
+    conn = lib._get_sqlite_conn()
+    with conn:
+        conn.executemany(
+            "INSERT INTO entities (file_path, project, type, content) VALUES (?, ?, ?, ?)",
+            [(f"docs/{i % 50}.md", f"p{i % 4}", ["decision", "problem", "task"][i % 3], f"entitet {i}")
+             for i in range(2000)],
+        )
+        conn.executemany("INSERT INTO files (path, project) VALUES (?, ?)",
+                         [(f"docs/{i}.md", f"p{i % 4}") for i in range(200)])
+    conn.execute("ANALYZE")
+    conn.close()
+    return lib
+
+
+def test_schema_version_is_latest(lib):
+    conn = lib._get_sqlite_conn()
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_MIGRATIONS[-1][0]
+    assert conn.execute("SELECT count(*) FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone()[0] == 1
+    conn.close()
+
+
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_searches_index(lib, name):
+    sql, params = HOT_QUERIES[name]
+    plan = _plan(lib, sql, params)
+    access = [step for step in plan if step.startswith(("SCAN", "SEARCH"))]
+    if "decision_validity" in sql:
+        assert len(access) == 2, f"{name}: {plan}"
+        assert RTREE_SEARCH.match(access[0]) and ROWID_SEARCH.match(access[1]), f"{name}: {plan}"
+    else:
+        assert access and all(INDEX_SEARCH.match(step) for step in access), f"{name}: {plan}"
+
+
+@pytest.mark.parametrize("name", sorted(AGGREGATE_QUERIES))
+def test_aggregate_query_reads_only_index(lib, name):
+    sql, params = AGGREGATE_QUERIES[name]
+    plan = _plan(lib, sql, params)
+    assert plan and all(
+        re.match(r"^SCAN \w+ USING COVERING INDEX \w+$", step) for step in plan
+    ), f"{name}: {plan}"
+
+
+def _plan(lib, sql, params):
+    conn = lib._get_sqlite_conn()
+    try:
+        return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+    finally:
+        conn.close()
+
+
+def test_migration_upgrades_existing_database(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "metadata.db"))
+    conn.execute("CREATE TABLE files (path TEXT PRIMARY KEY, project TEXT, last_modified REAL, hash TEXT, processed_at TEXT)")
+    conn.commit()
+    conn.close()
+
+    lib = Librarian(str(tmp_path))
+    conn = lib._get_sqlite_conn()
+    names = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    conn.close()
+    assert {"idx_entities_file_path", "idx_files_project"} <= names
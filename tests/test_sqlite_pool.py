@@ -0,0 +1,78 @@
+import os
+import threading
+
+import pytest
+
+from src.modules.librarian import Librarian
+from src.utils.sqlite_pool import SQLitePool
+
+
+def test_connection_is_cached_per_thread(tmp_path):
+    pool = SQLitePool(str(tmp_path / "t.db"))
+    first = pool.connection()
+    first.close()
+    assert pool.connection() is first
+
+    other = []
+    t = threading.Thread(target=lambda: other.append(pool.connection()))
+    t.start()
+    t.join()
+    assert other[0] is not first
+    assert pool.stats()["connects"] == 2
+
+
+def test_pragmas_applied_once(tmp_path):
+    conn = SQLitePool(str(tmp_path / "t.db")).connection()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+
+
+def test_close_releases_and_rolls_back_uncommitted(tmp_path):
+    pool = SQLitePool(str(tmp_path / "t.db"))
+    conn = pool.connection()
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.commit()
+    conn.execute("INSERT INTO t VALUES (1)")
+    conn.close()
+
+    conn = pool.connection()
+    assert conn.execute("SELECT count(*) FROM t").fetchone()[0] == 0
+
+
+def test_leaked_transaction_is_rolled_back_on_next_checkout(tmp_path):
+    pool = SQLitePool(str(tmp_path / "t.db"))
+    conn = pool.connection()
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.commit()
+    conn.execute("INSERT INTO t VALUES (1)")  # "iznimka" prije close()
+
+    conn = pool.connection()
+    assert not conn.in_transaction
+
+
+@pytest.mark.skipif(os.name == "nt", reason="Windows ne dopušta brisanje otvorene datoteke")
+def test_replaced_database_file_gets_new_connection(tmp_path):
+    path = tmp_path / "t.db"
+    pool = SQLitePool(str(path))
+    first = pool.connection()
+    first.execute("CREATE TABLE t (x INTEGER)")
+    first.commit()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(str(path) + suffix):
+            os.remove(str(path) + suffix)
+
+    conn = pool.connection()
+    assert conn is not first
+    assert conn.execute("SELECT count(*) FROM sqlite_master WHERE name = 't'").fetchone()[0] == 0
+
+
+def test_librarian_reuses_connection_across_calls(tmp_path):
+    lib = Librarian(str(tmp_path))
+    conn = lib._get_sqlite_conn()
+    conn.close()
+    lib.get_generation()
+    lib.bump_generation()
+    lib.search_fts("kronos")
+    assert lib._get_sqlite_conn() is conn
+    assert lib.get_generation() == 1
@@ -0,0 +1,62 @@
+import gzip
+import json
+import os
+
+import pytest
+
+from src.utils import stemmer as stemmer_module
+from src.utils.stemmer import CroStemmer, stem_many, stem_text, stem_text_batch
+
+# Zlatni korpus generiran linearnom implementacijom (prije tablica po duljini):
+# riječi iz dokumentacije i izvornog koda + sintetički korijen+sufiks(+prefiks)
+# spojevi, oba moda, te nasumični tekstovi za stem_text.
+GOLDEN = os.path.join(os.path.dirname(__file__), "data", "stemmer_golden.json.gz")
+
+
+@pytest.fixture(scope="module")
+def golden():
+    with gzip.open(GOLDEN, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("cache_size", [0, 64])
+def test_matches_golden_corpus(golden, cache_size):
+    stemmer = CroStemmer(cache_size=cache_size)
+    words = [row[0] for row in golden["words"]]
+    for mode, column in (("aggressive", 1), ("conservative", 2)):
+        expected = [row[column] for row in golden["words"]]
+        assert stemmer.stem_many(words, mode) == expected
+        assert [stemmer.stem(w, mode) for w in words[::50]] == expected[::50]
+        for row in golden["texts"]:
+            assert stemmer.stem_text(row[0], mode) == row[column]
+
+
+def test_cache_is_bounded_and_per_mode():
+    stemmer = CroStemmer(cache_size=4)
+    for word in ["kuća", "kući", "kućom", "kućama", "knjiga", "kuća"]:
+        stemmer.stem(word)
+    info = stemmer.cache_info()
+    assert info.currsize == 4 and info.maxsize == 4
+    assert stemmer.stem("knjigama", "conservative") == "knjiga"
+    assert stemmer.cache_info("conservative").currsize == 1
+    assert CroStemmer(cache_size=0).cache_info() is None
+
+
+def test_module_helpers():
+    assert stem_many(["kućama", "ljudi", ""]) == ["kuć", "ljud", ""]
+    assert stem_text("Knjigama  ljudi") == "knjig ljud"
+
+
+@pytest.mark.parametrize("native", [False, True])
+def test_stem_text_batch_matches_python(golden, monkeypatch, native):
+    if native and stemmer_module._native_stem_text_batch is None:
+        pytest.skip("kronos_core nije izgrađen")
+    if not native:
+        monkeypatch.setattr(stemmer_module, "_native_stem_text_batch", None)
+    reference = CroStemmer(cache_size=0)
+    texts = [row[0] for row in golden["texts"]] + [row[0] for row in golden["words"]]
+    texts += ["a\x1fb c\u3000kućama\xa0psa", "ab\u0345ima hebr\u05b0ejski", "İstanbul ǅemal ß ΟΔΟΣ"]
+    for mode in ("aggressive", "conservative", "nepoznat"):
+        assert stem_text_batch(texts, mode) == [reference.stem_text(t, mode) for t in texts]
+        assert stem_text(texts[0], mode) == reference.stem_text(texts[0], mode)
+    assert stem_text_batch([]) == []
@@ -0,0 +1,87 @@
+import sqlite3
+
+import pytest
+
+from src.modules.librarian import Librarian, epoch_day
+
+DECISIONS = [
+    # (content, valid_from, valid_to)
+    ("Otvorena od početka", None, None),
+    ("Samo 2024", "2024-01-01", "2024-12-31"),
+    ("Od sredine 2024", "2024-06-15", None),
+    ("Do ožujka 2025", None, "2025-03-01"),
+    ("S vremenom", "2025-01-10T08:30:00", "2025-02-01"),
+    ("Neispravan datum", "uskoro", None),
+]
+
+
+@pytest.fixture
+def lib(tmp_path):
+    lib = Librarian(str(tmp_path))
+    conn = lib._get_sqlite_conn()
+    with conn:
+        conn.executemany(
+            "INSERT INTO entities (project, type, content, valid_from, valid_to) VALUES ('p', 'decision', ?, ?, ?)",
+            DECISIONS,
+        )
+        conn.execute("INSERT INTO entities (project, type, content, valid_from) VALUES ('p', 'problem', 'x', '2024-01-01')")
+    conn.close()
+    return lib
+
+
+def _string_scan(lib, date):
+    """Stari upit (usporedba ISO stringova) kao referenca."""
+    conn = sqlite3.connect(lib.meta_path)
+    rows = conn.execute(
+        "SELECT content FROM entities WHERE type = 'decision' "
+        "AND (valid_from IS NULL OR valid_from <= ?) AND (valid_to IS NULL OR valid_to >= ?)",
+        (date, date),
+    ).fetchall()
+    conn.close()
+    return {r[0] for r in rows}
+
+
+@pytest.mark.parametrize("date", ["2023-05-01", "2024-01-01", "2024-07-01", "2024-12-31", "2025-01-15", "2025-03-02"])
+def test_active_at_date_matches_string_scan(lib, date):
+    active = {d["content"] for d in lib.get_active_decisions(date=date)}
+    expected = _string_scan(lib, date)
+    # "uskoro" se u indeksu tretira kao otvoreni početak; string usporedba ga nikad ne vraća
+    assert active - {"Neispravan datum"} == expected - {"Neispravan datum"}
+    assert "Neispravan datum" in active
+
+
+def test_index_follows_updates_and_deletes(lib):
+    (decision,) = [d for d in lib.get_active_decisions(date="2024-03-01") if d["content"] == "Samo 2024"]
+    assert lib.ratify_decision(decision["id"], valid_to="2024-02-01")
+    assert "Samo 2024" not in {d["content"] for d in lib.get_active_decisions(date="2024-03-01")}
+
+    conn = lib._get_sqlite_conn()
+    with conn:
+        conn.execute("DELETE FROM entities WHERE id = ?", (decision["id"],))
+    count = conn.execute("SELECT count(*) FROM decision_validity").fetchone()[0]
+    conn.close()
+    assert count == len(DECISIONS) - 1
+
+
+def test_changed_between(lib):
+    changed = [d["content"] for d in lib.get_decisions_changed_between("2024-12-01", "2025-01-31")]
+    assert sorted(changed) == ["S vremenom", "Samo 2024"]
+    assert lib.get_decisions_changed_between("2024-06-15", "2024-06-15", project="drugi") == []
+    with pytest.raises(ValueError):
+        lib.get_decisions_changed_between("sutra", "2025-01-01")
+
+
+def test_queries_use_rtree(lib):
+    conn = lib._get_sqlite_conn()
+    plan = " ".join(r[3] for r in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM decision_validity WHERE valid_from_day <= ? AND valid_to_day >= ?",
+        (epoch_day("2024-01-01"), epoch_day("2024-01-01")),
+    ))
+    conn.close()
+    assert "VIRTUAL TABLE INDEX" in plan
+
+
+def test_epoch_day():
+    assert epoch_day("1970-01-02") == 1
+    assert epoch_day("2025-01-10T08:30:00") == epoch_day("2025-01-10")
+    assert epoch_day("") is None and epoch_day("uskoro") is None